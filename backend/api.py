@@ -1,13 +1,35 @@
 import os
+import sys
+import asyncio
+import threading
+import orjson
 import psycopg2
-from fastapi import FastAPI, HTTPException, Query
+import psycopg2.errors
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse, Response
 from typing import Optional, List
 from datetime import datetime
+from decimal import Decimal
+from itertools import islice
 from dotenv import load_dotenv
 from pydantic import BaseModel
 import json
+import hashlib
+import profiling
+import module_catalog
+import regex_search
+import sync_jobs
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+import patch_index
+import patch_similarity
+import push_events
+import registry
+from patch_symbols import symbol_module
 
 # ============================================================
 # CONFIGURATION
@@ -22,13 +44,41 @@ DB_CONFIG = {
     "port": 5432
 }
 
+# Recherche migration : durée maximale d'une requête SQL (ms) et hunks renvoyés par fichier
+SEARCH_STATEMENT_TIMEOUT_MS = int(os.getenv("SEARCH_STATEMENT_TIMEOUT_MS", 5000))
+SEARCH_MAX_HUNKS_PER_FILE = int(os.getenv("SEARCH_MAX_HUNKS_PER_FILE", 20))
+
+# Intervalle de vérification de la déconnexion du client pendant une recherche (s)
+DISCONNECT_POLL_INTERVAL = 0.2
+
+# Index des patchs sur disque (scripts/patch_index.py), facultatif
+PATCH_INDEX_DIR = os.getenv("PATCH_INDEX_DIR")
+
+# Candidats LSH lus au plus par bande par /files/{id}/similar (BANDS bandes) ;
+# plus haut, les groupes très répandus renvoient plus de candidats proches mais coûtent plus
+SIMILAR_BAND_CANDIDATES = 500
+
+# Compression gzip des réponses : taille minimale (octets) et niveau (1 rapide - 9 compact)
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", 1000))
+GZIP_COMPRESS_LEVEL = int(os.getenv("GZIP_COMPRESS_LEVEL", 1))
+
+# Format du catalogue /bootstrap : à changer quand sa structure change (invalide les caches)
+BOOTSTRAP_FORMAT = 2
+
+# Intervalle de vérification de la version du catalogue des modules (s)
+MODULE_CATALOG_REFRESH_SECONDS = int(os.getenv("MODULE_CATALOG_REFRESH_SECONDS", 60))
+
+# Secret partagé avec le webhook GitHub (/webhooks/github) ; sans lui le webhook est désactivé
+GITHUB_WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET")
+
 # ============================================================
 # FASTAPI APP
 # ============================================================
 app = FastAPI(
     title="Odoo DevLogs API",
     description="API pour consulter et comparer les commits Odoo",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS pour permettre l'accès depuis le frontend
@@ -38,8 +88,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# Réponses JSON compressées (commits, recherche : du texte très répétitif)
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=GZIP_COMPRESS_LEVEL)
+
+# Temps par requête, temps SQL et en-tête Server-Timing (voir /admin/metrics) ;
+# ajouté en dernier, il enveloppe la compression et la compte dans le temps mesuré
+app.add_middleware(profiling.ProfilingMiddleware)
+
 # ============================================================
 # MODÈLES PYDANTIC
 # ============================================================
@@ -68,6 +126,15 @@ class Commit(BaseModel):
     total_changes: int
     is_merge: bool
     html_url: Optional[str]
+    # Conventions du message (scripts/commit_message.py)
+    commit_tag: Optional[str] = None
+    message_modules: Optional[List[str]] = None
+    task_ids: Optional[List[int]] = None
+    opw_ids: Optional[List[int]] = None
+    pr_repo: Optional[str] = None
+    pr_number: Optional[int] = None
+    original_commit: Optional[str] = None
+    author_id: Optional[int] = None
 
 class CommitDetail(Commit):
     files_changed: List[dict]
@@ -77,11 +144,109 @@ class CommitDetail(Commit):
 # ============================================================
 def get_db_connection():
     try:
-        conn = psycopg2.connect(**DB_CONFIG, options='-c client_encoding=UTF8')
+        conn = profiling.connect(**DB_CONFIG, options='-c client_encoding=UTF8')
         return conn
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur de connexion à la base de données: {str(e)}")
 
+MESSAGE_FIELDS = ("commit_tag", "message_modules", "task_ids", "opw_ids", "pr_repo", "pr_number", "original_commit")
+
+# Colonnes des requêtes de commits, dans l'ordre des champs de Commit
+COMMIT_FIELDS = (
+    "id", "sha", "message", "author_name", "author_email", "committed_date",
+    "additions", "deletions", "total_changes", "is_merge", "html_url",
+    *MESSAGE_FIELDS, "author_id"
+)
+
+def commit_dicts(rows):
+    """Lignes de commits (colonnes de COMMIT_FIELDS) en dicts prêts à sérialiser"""
+    return [dict(zip(COMMIT_FIELDS, row)) for row in rows]
+
+def json_default(value):
+    """Types que orjson ne sérialise pas lui-même (SUM() renvoie des Decimal)"""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError
+
+def json_response(content):
+    """Réponse sérialisée directement par orjson.
+
+    Pour les grosses listes : ni modèle Pydantic par ligne, ni validation
+    response_model, ni jsonable_encoder ; le response_model de la route ne
+    sert plus qu'à la documentation OpenAPI.
+    """
+    return Response(orjson.dumps(content, default=json_default), media_type="application/json")
+
+def message_filters(commit_type, declared_module, pr, task, opw, alias="c."):
+    """Conditions SQL (égalités indexées) sur les colonnes tirées du message"""
+    conditions, params = "", []
+    if commit_type:
+        conditions += f" AND {alias}commit_tag = %s"
+        params.append(commit_type.upper())
+    if declared_module:
+        conditions += f" AND {alias}message_modules @> ARRAY[%s]::text[]"
+        params.append(declared_module)
+    if pr:
+        conditions += f" AND {alias}pr_number = %s"
+        params.append(pr)
+    if task:
+        conditions += f" AND {alias}task_ids @> ARRAY[%s]::int[]"
+        params.append(task)
+    if opw:
+        conditions += f" AND {alias}opw_ids @> ARRAY[%s]::int[]"
+        params.append(opw)
+    return conditions, params
+
+def matching_author_ids(cur, author):
+    """Auteurs dont une orthographe contient `author` (table des alias, petite)"""
+    cur.execute("SELECT DISTINCT author_id FROM odoo_devlog.author_aliases WHERE name ILIKE %s;", (f"%{author}%",))
+    return [row[0] for row in cur.fetchall()]
+
+def branch_date_range(cur, branch_names):
+    """Plus ancien / plus récent commit des branches données.
+
+    Ajoutées en clair dans une requête, ces bornes permettent à PostgreSQL
+    d'écarter dès la planification les partitions annuelles hors de la vie
+    des branches (min/max lus sur l'index branch_id, committed_date).
+    """
+    cur.execute("""
+        SELECT MIN(r.first_date), MAX(r.last_date)
+        FROM odoo_devlog.branches b
+        CROSS JOIN LATERAL (
+            SELECT MIN(committed_date) AS first_date, MAX(committed_date) AS last_date
+            FROM odoo_devlog.commits
+            WHERE branch_id = b.id
+        ) r
+        WHERE b.name = ANY(%s);
+    """, (list(branch_names),))
+    return cur.fetchone()
+
+async def run_cancellable(request, func, *args):
+    """Exécute func(conn, *args) dans le pool de threads.
+
+    Si le client HTTP se déconnecte avant la fin, la requête SQL en cours
+    est annulée (pg_cancel_backend via conn.cancel()) au lieu de tourner
+    pour rien jusqu'au bout.
+    """
+    conn = await run_in_threadpool(get_db_connection)
+    task = asyncio.ensure_future(run_in_threadpool(func, conn, *args))
+    try:
+        while not task.done():
+            await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if not task.done() and await request.is_disconnected():
+                conn.cancel()
+                try:
+                    await task
+                except Exception:
+                    pass
+                print(f"⚠️  Client déconnecté : requête annulée ({request.url.path})")
+                return Response(status_code=499)
+        return task.result()
+    finally:
+        if not task.done():
+            conn.cancel()
+        conn.close()
+
 # ============================================================
 # ENDPOINTS
 # ============================================================
@@ -164,63 +329,78 @@ def get_all_commits(
     branch_name: str,
     limit: int = Query(100, ge=1, le=1000),
     offset: int = Query(0, ge=0),
-    author: Optional[str] = None,
+    author: Optional[str] = Query(None, description="Partie du nom, toutes orthographes de l'auteur confondues"),
+    author_id: Optional[int] = None,
     search: Optional[str] = None,
-    module: Optional[str] = None
+    module: Optional[str] = None,
+    commit_type: Optional[str] = Query(None, description="Tag du titre, ex: FIX"),
+    declared_module: Optional[str] = Query(None, description="Module annoncé dans le titre (« [FIX] account: »)"),
+    pr: Optional[int] = Query(None, description="Numéro de la pull request de fusion"),
+    task: Optional[int] = None,
+    opw: Optional[int] = None
 ):
     """Liste les commits de tous les dépôts pour une branche donnée"""
     conn = get_db_connection()
     try:
         with conn.cursor() as cur:
+            first_date, last_date = branch_date_range(cur, [branch_name])
+            if first_date is None:
+                return []
+
             if module:
                 query = """
                     SELECT DISTINCT c.id, c.sha, c.message, c.author_name, c.author_email, c.committed_date,
-                           c.additions, c.deletions, c.total_changes, c.is_merge, c.html_url
+                           c.additions, c.deletions, c.total_changes, c.is_merge, c.html_url,
+                           c.commit_tag, c.message_modules, c.task_ids, c.opw_ids, c.pr_repo, c.pr_number, c.original_commit,
+                           c.author_id
                     FROM odoo_devlog.commits c
                     INNER JOIN odoo_devlog.branches b ON c.branch_id = b.id
-                    INNER JOIN odoo_devlog.file_changes fc ON fc.commit_id = c.id
+                    INNER JOIN odoo_devlog.file_changes fc ON fc.commit_id = c.id AND fc.committed_date = c.committed_date
                     WHERE b.name = %s
                       AND (fc.filename LIKE %s OR fc.filename LIKE %s OR fc.filename LIKE %s)
+                      AND fc.committed_date BETWEEN %s AND %s
                 """
-                params = [branch_name, f'addons/{module}/%', f'odoo/addons/{module}/%', f'{module}/%']
+                params = [branch_name, f'addons/{module}/%', f'odoo/addons/{module}/%', f'{module}/%', first_date, last_date]
             else:
                 query = """
                     SELECT c.id, c.sha, c.message, c.author_name, c.author_email, c.committed_date,
-                           c.additions, c.deletions, c.total_changes, c.is_merge, c.html_url
+                           c.additions, c.deletions, c.total_changes, c.is_merge, c.html_url,
+                           c.commit_tag, c.message_modules, c.task_ids, c.opw_ids, c.pr_repo, c.pr_number, c.original_commit,
+                           c.author_id
                     FROM odoo_devlog.commits c
                     INNER JOIN odoo_devlog.branches b ON c.branch_id = b.id
                     WHERE b.name = %s
                 """
                 params = [branch_name]
 
+            # Bornes en clair : seules les partitions couvrant la vie de la branche sont planifiées
+            query += " AND c.committed_date BETWEEN %s AND %s"
+            params.extend([first_date, last_date])
+
             if author:
-                query += " AND c.author_name ILIKE %s"
-                params.append(f"%{author}%")
+                author_ids = matching_author_ids(cur, author)
+                if not author_ids:
+                    return []
+                query += " AND c.author_id = ANY(%s)"
+                params.append(author_ids)
+
+            if author_id:
+                query += " AND c.author_id = %s"
+                params.append(author_id)
 
             if search:
                 query += " AND c.message ILIKE %s"
                 params.append(f"%{search}%")
 
+            tag_conditions, tag_params = message_filters(commit_type, declared_module, pr, task, opw)
+            query += tag_conditions
+            params.extend(tag_params)
+
             query += " ORDER BY c.committed_date DESC LIMIT %s OFFSET %s;"
             params.extend([limit, offset])
 
             cur.execute(query, params)
-            rows = cur.fetchall()
-            return [
-                Commit(
-                    id=row[0],
-                    sha=row[1],
-                    message=row[2],
-                    author_name=row[3],
-                    author_email=row[4],
-                    committed_date=row[5],
-                    additions=row[6],
-                    deletions=row[7],
-                    total_changes=row[8],
-                    is_merge=row[9],
-                    html_url=row[10]
-                ) for row in rows
-            ]
+            return json_response(commit_dicts(cur.fetchall()))
     finally:
         conn.close()
 
@@ -229,9 +409,15 @@ def get_commits(
     branch_id: int,
     limit: int = Query(100, ge=1, le=1000),
     offset: int = Query(0, ge=0),
-    author: Optional[str] = None,
+    author: Optional[str] = Query(None, description="Partie du nom, toutes orthographes de l'auteur confondues"),
+    author_id: Optional[int] = None,
     search: Optional[str] = None,
-    module: Optional[str] = None
+    module: Optional[str] = None,
+    commit_type: Optional[str] = Query(None, description="Tag du titre, ex: FIX"),
+    declared_module: Optional[str] = Query(None, description="Module annoncé dans le titre (« [FIX] account: »)"),
+    pr: Optional[int] = Query(None, description="Numéro de la pull request de fusion"),
+    task: Optional[int] = None,
+    opw: Optional[int] = None
 ):
     """Liste les commits d'une branche avec pagination et filtres"""
     conn = get_db_connection()
@@ -240,9 +426,11 @@ def get_commits(
             if module:
                 query = """
                     SELECT DISTINCT c.id, c.sha, c.message, c.author_name, c.author_email, c.committed_date,
-                           c.additions, c.deletions, c.total_changes, c.is_merge, c.html_url
+                           c.additions, c.deletions, c.total_changes, c.is_merge, c.html_url,
+                           c.commit_tag, c.message_modules, c.task_ids, c.opw_ids, c.pr_repo, c.pr_number, c.original_commit,
+                           c.author_id
                     FROM odoo_devlog.commits c
-                    INNER JOIN odoo_devlog.file_changes fc ON fc.commit_id = c.id
+                    INNER JOIN odoo_devlog.file_changes fc ON fc.commit_id = c.id AND fc.committed_date = c.committed_date
                     WHERE c.branch_id = %s
                       AND (fc.filename LIKE %s OR fc.filename LIKE %s OR fc.filename LIKE %s)
                 """
@@ -250,40 +438,38 @@ def get_commits(
             else:
                 query = """
                     SELECT id, sha, message, author_name, author_email, committed_date,
-                           additions, deletions, total_changes, is_merge, html_url
+                           additions, deletions, total_changes, is_merge, html_url,
+                           commit_tag, message_modules, task_ids, opw_ids, pr_repo, pr_number, original_commit,
+                           author_id
                     FROM odoo_devlog.commits
                     WHERE branch_id = %s
                 """
                 params = [branch_id]
 
             if author:
-                query += " AND author_name ILIKE %s"
-                params.append(f"%{author}%")
+                author_ids = matching_author_ids(cur, author)
+                if not author_ids:
+                    return []
+                query += " AND author_id = ANY(%s)"
+                params.append(author_ids)
+
+            if author_id:
+                query += " AND author_id = %s"
+                params.append(author_id)
 
             if search:
                 query += " AND message ILIKE %s"
                 params.append(f"%{search}%")
 
+            tag_conditions, tag_params = message_filters(commit_type, declared_module, pr, task, opw, alias="c." if module else "")
+            query += tag_conditions
+            params.extend(tag_params)
+
             query += " ORDER BY committed_date DESC LIMIT %s OFFSET %s;"
             params.extend([limit, offset])
 
             cur.execute(query, params)
-            rows = cur.fetchall()
-            return [
-                Commit(
-                    id=row[0],
-                    sha=row[1],
-                    message=row[2],
-                    author_name=row[3],
-                    author_email=row[4],
-                    committed_date=row[5],
-                    additions=row[6],
-                    deletions=row[7],
-                    total_changes=row[8],
-                    is_merge=row[9],
-                    html_url=row[10]
-                ) for row in rows
-            ]
+            return json_response(commit_dicts(cur.fetchall()))
     finally:
         conn.close()
 
@@ -296,7 +482,9 @@ def get_commit_detail(commit_id: int):
             # Récupérer le commit
             cur.execute("""
                 SELECT id, sha, message, author_name, author_email, committed_date,
-                       additions, deletions, total_changes, is_merge, html_url
+                       additions, deletions, total_changes, is_merge, html_url,
+                       commit_tag, message_modules, task_ids, opw_ids, pr_repo, pr_number, original_commit,
+                       author_id
                 FROM odoo_devlog.commits
                 WHERE id = %s;
             """, (commit_id,))
@@ -305,29 +493,20 @@ def get_commit_detail(commit_id: int):
             if not row:
                 raise HTTPException(status_code=404, detail="Commit non trouvé")
 
-            # Récupérer les fichiers modifiés avec le patch
+            # Récupérer les fichiers modifiés avec le patch (committed_date : une seule partition lue)
             cur.execute("""
-                SELECT filename, status, additions, deletions, changes, previous_filename, patch
+                SELECT filename, status, additions, deletions, changes, previous_filename, patch, id
                 FROM odoo_devlog.file_changes
-                WHERE commit_id = %s
+                WHERE commit_id = %s AND committed_date = %s
                 ORDER BY filename;
-            """, (commit_id,))
+            """, (commit_id, row[5]))
             files = cur.fetchall()
 
-            return CommitDetail(
-                id=row[0],
-                sha=row[1],
-                message=row[2],
-                author_name=row[3],
-                author_email=row[4],
-                committed_date=row[5],
-                additions=row[6],
-                deletions=row[7],
-                total_changes=row[8],
-                is_merge=row[9],
-                html_url=row[10],
-                files_changed=[
+            return json_response({
+                **commit_dicts([row])[0],
+                "files_changed": [
                     {
+                        "id": f[7],
                         "filename": f[0],
                         "status": f[1],
                         "additions": f[2],
@@ -337,7 +516,7 @@ def get_commit_detail(commit_id: int):
                         "patch": f[6]
                     } for f in files
                 ]
-            )
+            })
     finally:
         conn.close()
 
@@ -386,7 +565,7 @@ def compare_all_branches(
                     COUNT(*) as total,
                     SUM(additions) as total_additions,
                     SUM(deletions) as total_deletions,
-                    COUNT(DISTINCT author_name) as unique_authors
+                    COUNT(DISTINCT author_id) as unique_authors
                 FROM odoo_devlog.commits c
                 INNER JOIN odoo_devlog.branches b ON c.branch_id = b.id
                 WHERE b.name = %s;
@@ -398,7 +577,7 @@ def compare_all_branches(
                     COUNT(*) as total,
                     SUM(additions) as total_additions,
                     SUM(deletions) as total_deletions,
-                    COUNT(DISTINCT author_name) as unique_authors
+                    COUNT(DISTINCT author_id) as unique_authors
                 FROM odoo_devlog.commits c
                 INNER JOIN odoo_devlog.branches b ON c.branch_id = b.id
                 WHERE b.name = %s;
@@ -505,7 +684,7 @@ def compare_branches(
                     COUNT(*) as total,
                     SUM(additions) as total_additions,
                     SUM(deletions) as total_deletions,
-                    COUNT(DISTINCT author_name) as unique_authors
+                    COUNT(DISTINCT author_id) as unique_authors
                 FROM odoo_devlog.commits
                 WHERE branch_id = %s;
             """, (b1_id,))
@@ -516,7 +695,7 @@ def compare_branches(
                     COUNT(*) as total,
                     SUM(additions) as total_additions,
                     SUM(deletions) as total_deletions,
-                    COUNT(DISTINCT author_name) as unique_authors
+                    COUNT(DISTINCT author_id) as unique_authors
                 FROM odoo_devlog.commits
                 WHERE branch_id = %s;
             """, (b2_id,))
@@ -565,32 +744,36 @@ def compare_branches(
     finally:
         conn.close()
 
+def summary_stats(cur):
+    """Totaux du tableau de bord (/stats/summary, /bootstrap)"""
+    cur.execute("""
+        SELECT
+            (SELECT COUNT(*) FROM odoo_devlog.repositories) as total_repos,
+            (SELECT COUNT(*) FROM odoo_devlog.branches) as total_branches,
+            (SELECT COUNT(*) FROM odoo_devlog.commits) as total_commits,
+            (SELECT COUNT(*) FROM odoo_devlog.file_changes) as total_file_changes,
+            (SELECT COUNT(*) FROM odoo_devlog.authors) as unique_authors,
+            (SELECT SUM(additions) FROM odoo_devlog.commits) as total_additions,
+            (SELECT SUM(deletions) FROM odoo_devlog.commits) as total_deletions;
+    """)
+    row = cur.fetchone()
+    return {
+        "total_repositories": row[0],
+        "total_branches": row[1],
+        "total_commits": row[2],
+        "total_file_changes": row[3],
+        "unique_authors": row[4],
+        "total_additions": row[5] or 0,
+        "total_deletions": row[6] or 0
+    }
+
 @app.get("/stats/summary")
 def get_summary_stats():
     """Statistiques générales"""
     conn = get_db_connection()
     try:
         with conn.cursor() as cur:
-            cur.execute("""
-                SELECT
-                    (SELECT COUNT(*) FROM odoo_devlog.repositories) as total_repos,
-                    (SELECT COUNT(*) FROM odoo_devlog.branches) as total_branches,
-                    (SELECT COUNT(*) FROM odoo_devlog.commits) as total_commits,
-                    (SELECT COUNT(*) FROM odoo_devlog.file_changes) as total_file_changes,
-                    (SELECT COUNT(DISTINCT author_name) FROM odoo_devlog.commits) as unique_authors,
-                    (SELECT SUM(additions) FROM odoo_devlog.commits) as total_additions,
-                    (SELECT SUM(deletions) FROM odoo_devlog.commits) as total_deletions;
-            """)
-            row = cur.fetchone()
-            return {
-                "total_repositories": row[0],
-                "total_branches": row[1],
-                "total_commits": row[2],
-                "total_file_changes": row[3],
-                "unique_authors": row[4],
-                "total_additions": row[5] or 0,
-                "total_deletions": row[6] or 0
-            }
+            return summary_stats(cur)
     finally:
         conn.close()
 
@@ -600,152 +783,622 @@ def get_top_contributors(limit: int = Query(10, ge=1, le=100)):
     conn = get_db_connection()
     try:
         with conn.cursor() as cur:
+            # Groupement sur author_id : toutes les orthographes d'une personne comptent ensemble
             cur.execute("""
-                SELECT
-                    author_name,
-                    COUNT(*) as commit_count,
-                    SUM(additions) as total_additions,
-                    SUM(deletions) as total_deletions
-                FROM odoo_devlog.commits
-                WHERE author_name IS NOT NULL
-                GROUP BY author_name
-                ORDER BY commit_count DESC
-                LIMIT %s;
+                SELECT a.id, a.name, t.commit_count, t.total_additions, t.total_deletions
+                FROM (
+                    SELECT
+                        author_id,
+                        COUNT(*) as commit_count,
+                        SUM(additions) as total_additions,
+                        SUM(deletions) as total_deletions
+                    FROM odoo_devlog.commits
+                    WHERE author_id IS NOT NULL
+                    GROUP BY author_id
+                    ORDER BY commit_count DESC
+                    LIMIT %s
+                ) t
+                INNER JOIN odoo_devlog.authors a ON a.id = t.author_id
+                ORDER BY t.commit_count DESC;
             """, (limit,))
             rows = cur.fetchall()
             return [
                 {
-                    "author": row[0],
-                    "commits": row[1],
-                    "additions": row[2] or 0,
-                    "deletions": row[3] or 0
+                    "author_id": row[0],
+                    "author": row[1],
+                    "commits": row[2],
+                    "additions": row[3] or 0,
+                    "deletions": row[4] or 0
                 } for row in rows
             ]
     finally:
         conn.close()
 
 @app.get("/search/migration")
-def search_migration_changes(
-    term: str = Query(..., min_length=2),
+async def search_migration_changes(
+    request: Request,
+    term: str = Query(..., min_length=2, max_length=200),
     from_version: str = Query(...),
     to_version: str = Query(...),
     module: Optional[str] = None,
     commit_type: Optional[str] = None,
     use_regex: bool = Query(False, description="Use regex search"),
+    change: Optional[str] = Query(None, pattern="^(added|removed)$", description="Terme ajouté ou supprimé"),
     limit: int = Query(100, ge=1, le=500)
 ):
-    """Recherche les changements entre deux versions avec support module"""
-    conn = get_db_connection()
+    """Recherche les changements entre deux versions avec support module.
+
+    La recherche porte sur les lignes ajoutées / supprimées des hunks
+    (table patch_hunks) : chaque fichier trouvé n'est renvoyé qu'avec ses
+    hunks contenant le terme (au plus SEARCH_MAX_HUNKS_PER_FILE).
+
+    Une regex est d'abord réduite à ses littéraux obligatoires (préfiltre
+    LIKE / trigrammes, voir regex_search.py) ; chaque requête est bornée
+    par SEARCH_STATEMENT_TIMEOUT_MS et annulée si le client se déconnecte.
+
+    Avec PATCH_INDEX_DIR, les fichiers candidats viennent de l'index sur
+    disque : PostgreSQL ne relit qu'eux (par lots, du plus récent au plus
+    ancien) et les fichiers importés après la dernière mise à jour de l'index.
+    """
+    return await run_cancellable(
+        request, search_migration_query,
+        term, from_version, to_version, module, commit_type, use_regex, change, limit
+    )
+
+def search_migration_query(conn, term, from_version, to_version, module, commit_type, use_regex, change, limit):
     try:
         with conn.cursor() as cur:
-            search_operator = "~*" if use_regex else "LIKE"
-            search_term = term if use_regex else f'%{term.lower()}%'
+            cur.execute("SET LOCAL statement_timeout = %s;", (SEARCH_STATEMENT_TIMEOUT_MS,))
+            first_date, last_date = branch_date_range(cur, [from_version, to_version])
+            if first_date is None:
+                return {"results": [], "count": 0, "truncated": False, "from_version": from_version, "to_version": to_version}
+
+            # added_text / removed_text sont stockés en minuscules
+            if use_regex:
+                added_match, added_params = regex_search.regex_condition("h.added_text", term)
+                removed_match, removed_params = regex_search.regex_condition("h.removed_text", term)
+            else:
+                needle = f'%{regex_search.escape_like(term.lower())}%'
+                added_match, added_params = "h.added_text LIKE %s", [needle]
+                removed_match, removed_params = "h.removed_text LIKE %s", [needle]
+            if change == "added":
+                hunk_match, hunk_params = added_match, added_params
+            elif change == "removed":
+                hunk_match, hunk_params = removed_match, removed_params
+            else:
+                hunk_match, hunk_params = f"({added_match} OR {removed_match})", added_params + removed_params
 
             query = f"""
-                SELECT DISTINCT
+                SELECT
                     c.id, c.sha, c.message, c.author_name, c.committed_date,
                     c.additions, c.deletions, b.name as branch_name, c.html_url,
                     fc.id as file_id, fc.filename, fc.status, fc.additions as file_additions,
-                    fc.deletions as file_deletions, fc.patch
+                    fc.deletions as file_deletions
                 FROM odoo_devlog.commits c
                 INNER JOIN odoo_devlog.branches b ON c.branch_id = b.id
-                INNER JOIN odoo_devlog.file_changes fc ON fc.commit_id = c.id
+                INNER JOIN odoo_devlog.file_changes fc ON fc.commit_id = c.id AND fc.committed_date = c.committed_date
+            """
+            conditions = f"""
                 WHERE b.name IN (%s, %s)
-                  AND fc.patch IS NOT NULL
-                  AND {"fc.patch" if use_regex else "LOWER(fc.patch)"} {search_operator} %s
+                  AND c.committed_date BETWEEN %s AND %s
+                  AND fc.committed_date BETWEEN %s AND %s
+                  AND EXISTS (
+                      SELECT 1 FROM odoo_devlog.patch_hunks h
+                      WHERE h.file_change_id = fc.id AND h.committed_date = fc.committed_date
+                        AND h.committed_date BETWEEN %s AND %s
+                        AND {hunk_match}
+                  )
             """
 
-            params = [from_version, to_version, search_term]
+            params = [from_version, to_version, first_date, last_date, first_date, last_date,
+                      first_date, last_date, *hunk_params]
 
             if module:
-                query += " AND (fc.filename LIKE %s OR fc.filename LIKE %s OR fc.filename LIKE %s OR fc.filename LIKE %s)"
+                conditions += " AND (fc.filename LIKE %s OR fc.filename LIKE %s OR fc.filename LIKE %s OR fc.filename LIKE %s)"
                 params.extend([f'addons/{module}/%', f'odoo/addons/{module}/%', f'{module}/%', f'%/{module}/%'])
 
             if commit_type:
-                query += " AND UPPER(c.message) LIKE %s"
-                params.append(f'[{commit_type.upper()}]%')
+                conditions += " AND c.commit_tag = %s"
+                params.append(commit_type.upper())
+
+            candidates = None
+            index = patch_index.cached_index(PATCH_INDEX_DIR) if PATCH_INDEX_DIR else None
+            if index is not None:
+                # Branches vérifiées par la relecture SQL (b.name IN ...), pas par l'index
+                candidates = index.search(
+                    regex_search.required_literals(term) if use_regex else term.lower(),
+                    first_date, last_date, change, module,
+                    needle=None if use_regex else term.lower()
+                )
 
-            query += " ORDER BY c.committed_date DESC LIMIT %s;"
+            if candidates is None:
+                cur.execute(query + conditions + " ORDER BY c.committed_date DESC LIMIT %s;", params + [limit])
+                rows = cur.fetchall()
+            else:
+                # Fichiers importés après la dernière mise à jour de l'index, ou dont l'import
+                # était encore en cours (ids réservés, pas encore visibles) lors de celle-ci
+                pending_ranges = index.pending_ranges
+                pending_filter = " AND (fc.id > %s" + " OR fc.id BETWEEN %s AND %s" * len(pending_ranges) + ")"
+                cur.execute(query + conditions + pending_filter + " ORDER BY c.committed_date DESC LIMIT %s;",
+                            params + [index.last_file_change_id] + [i for ids in pending_ranges for i in ids] + [limit])
+                pending = cur.fetchall()
+                # Puis les candidats de l'index par lots, du plus récent au plus ancien ;
+                # la CTE matérialisée fait partir le plan des fichiers candidats (clé primaire)
+                batch_query = (
+                    "WITH candidates AS MATERIALIZED ("
+                    " SELECT id, committed_date FROM odoo_devlog.file_changes WHERE id = ANY(%s))"
+                    + query
+                    + " INNER JOIN candidates ON candidates.id = fc.id AND candidates.committed_date = fc.committed_date"
+                    + conditions + " ORDER BY c.committed_date DESC LIMIT %s;"
+                )
+                # Lots de taille doublée : un filtre sélectif (type, message) ne multiplie pas les allers-retours
+                rows = []
+                batch_size = max(limit * 2, 200)
+                while len(rows) < limit:
+                    batch = list(islice(candidates, batch_size))
+                    if not batch:
+                        break
+                    cur.execute(batch_query, [batch] + params + [limit - len(rows)])
+                    rows.extend(cur.fetchall())
+                    batch_size *= 2
+                rows += pending
+                rows.sort(key=lambda row: row[4], reverse=True)
+                del rows[limit:]
+
+            # Hunks trouvés des fichiers retenus, bornés aux dates de leurs commits ;
+            # un de plus que le plafond pour signaler les fichiers tronqués
+            hunks = {}
+            if rows:
+                cur.execute(f"""
+                    SELECT * FROM (
+                        SELECT h.file_change_id, h.hunk_index, h.old_start, h.old_lines, h.new_start, h.new_lines,
+                               h.section, h.content, h.additions, h.deletions,
+                               COALESCE({added_match}, FALSE), COALESCE({removed_match}, FALSE),
+                               ROW_NUMBER() OVER (PARTITION BY h.file_change_id ORDER BY h.hunk_index)
+                        FROM odoo_devlog.patch_hunks h
+                        WHERE h.file_change_id = ANY(%s)
+                          AND h.committed_date = ANY(%s)
+                          AND {hunk_match}
+                    ) found
+                    WHERE found.row_number <= %s
+                    ORDER BY 1, 2;
+                """, [*added_params, *removed_params, [row[9] for row in rows], list({row[4] for row in rows}),
+                      *hunk_params, SEARCH_MAX_HUNKS_PER_FILE + 1])
+                for hunk in cur.fetchall():
+                    hunks.setdefault(hunk[0], []).append({
+                        "index": hunk[1],
+                        "old_start": hunk[2],
+                        "old_lines": hunk[3],
+                        "new_start": hunk[4],
+                        "new_lines": hunk[5],
+                        "section": hunk[6],
+                        "content": hunk[7],
+                        "additions": hunk[8],
+                        "deletions": hunk[9],
+                        "term_added": hunk[10],
+                        "term_removed": hunk[11]
+                    })
+    except psycopg2.errors.QueryCanceled:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Recherche interrompue après {SEARCH_STATEMENT_TIMEOUT_MS / 1000:g} s : préciser le terme ou filtrer par module"
+        )
+    except psycopg2.errors.InvalidRegularExpression as e:
+        raise HTTPException(status_code=400, detail=f"Expression régulière invalide : {e.diag.message_primary}")
+
+    results = []
+    for row in rows:
+        file_hunks = hunks.get(row[9], [])
+        results.append({
+            "commit": {
+                "id": row[0],
+                "sha": row[1],
+                "message": row[2],
+                "author": row[3],
+                "date": row[4].isoformat() if row[4] else None,
+                "additions": row[5],
+                "deletions": row[6],
+                "branch": row[7],
+                "html_url": row[8]
+            },
+            "file": {
+                "id": row[9],
+                "filename": row[10],
+                "status": row[11],
+                "additions": row[12],
+                "deletions": row[13],
+                "hunks": file_hunks[:SEARCH_MAX_HUNKS_PER_FILE],
+                "hunks_truncated": len(file_hunks) > SEARCH_MAX_HUNKS_PER_FILE
+            }
+        })
+
+    return json_response({
+        "results": results,
+        "count": len(results),
+        "truncated": len(results) == limit,
+        "from_version": from_version,
+        "to_version": to_version
+    })
+
+@app.get("/symbols")
+def search_symbols(
+    name: Optional[str] = Query(None, description="Nom exact du symbole (champ, méthode, id XML)"),
+    model: Optional[str] = Query(None, description="Modèle de rattachement, ex: sale.order"),
+    q: Optional[str] = Query(None, min_length=2, description="Début du nom complet, ex: sale.order.partner"),
+    kind: Optional[str] = Query(None, pattern="^(model|inherit|field|method|xmlid)$"),
+    from_version: Optional[str] = None,
+    to_version: Optional[str] = None,
+    module: Optional[str] = None,
+    change: Optional[str] = Query(None, pattern="^(added|removed)$"),
+    limit: int = Query(200, ge=1, le=1000)
+):
+    """Changements de symboles Odoo (modèles, champs, méthodes, id XML).
+
+    Ex : /symbols?model=sale.order&name=partner_id&from_version=17.0&to_version=18.0
+    renvoie chaque ajout / suppression du champ sur ces deux branches.
+    """
+    if not (name or model or q):
+        raise HTTPException(status_code=400, detail="Préciser au moins name, model ou q")
+
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            query = """
+                SELECT s.kind, s.model, s.name, s.qualified_name, s.change, s.detail, s.line, s.module,
+                       fc.filename, c.id, c.sha, c.message, c.author_name, c.committed_date, b.name, c.html_url
+                FROM odoo_devlog.patch_symbols s
+                INNER JOIN odoo_devlog.commits c ON c.id = s.commit_id AND c.committed_date = s.committed_date
+                INNER JOIN odoo_devlog.file_changes fc ON fc.id = s.file_change_id AND fc.committed_date = s.committed_date
+                LEFT JOIN odoo_devlog.branches b ON b.id = c.branch_id
+                WHERE TRUE
+            """
+            params = []
+
+            versions = [v for v in (from_version, to_version) if v]
+            if versions:
+                first_date, last_date = branch_date_range(cur, versions)
+                if first_date is None:
+                    return {"symbols": [], "count": 0}
+                query += """
+                    AND b.name = ANY(%s)
+                    AND s.committed_date BETWEEN %s AND %s
+                    AND c.committed_date BETWEEN %s AND %s
+                    AND fc.committed_date BETWEEN %s AND %s
+                """
+                params.extend([versions, first_date, last_date, first_date, last_date, first_date, last_date])
+
+            if model:
+                query += " AND s.model = %s"
+                params.append(model)
+            if name:
+                query += " AND s.name = %s"
+                params.append(name)
+            if q:
+                query += " AND s.qualified_name LIKE %s"
+                params.append(q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+            if kind:
+                query += " AND s.kind = %s"
+                params.append(kind)
+            if module:
+                query += " AND s.module = %s"
+                params.append(module)
+            if change:
+                query += " AND s.change = %s"
+                params.append(change)
+
+            query += " ORDER BY s.committed_date DESC, s.id LIMIT %s;"
             params.append(limit)
 
             cur.execute(query, params)
             rows = cur.fetchall()
 
-            results = []
-            for row in rows:
-                results.append({
-                    "commit": {
+            symbols = [{
+                "kind": row[0],
+                "model": row[1],
+                "name": row[2],
+                "qualified_name": row[3],
+                "change": row[4],
+                "detail": row[5],
+                "line": row[6],
+                "module": row[7],
+                "filename": row[8],
+                "commit": {
+                    "id": row[9],
+                    "sha": row[10],
+                    "message": row[11],
+                    "author": row[12],
+                    "date": row[13].isoformat() if row[13] else None,
+                    "branch": row[14],
+                    "html_url": row[15]
+                }
+            } for row in rows]
+
+            return {"symbols": symbols, "count": len(symbols)}
+    finally:
+        conn.close()
+
+@app.get("/files/{file_id}/similar")
+def get_similar_changes(
+    file_id: int,
+    min_similarity: float = Query(0.5, ge=0.1, le=1.0, description="Similarité de Jaccard estimée minimale"),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """Changements proches du patch d'un fichier, tous modules et versions confondus.
+
+    Les candidats partagent au moins une bande LSH de l'empreinte MinHash
+    (index GIN, voir scripts/patch_similarity.py), au plus
+    SIMILAR_BAND_CANDIDATES par bande : une bande très répandue (version du
+    manifeste, traductions .po) ne fait pas lire tout son groupe. Leur
+    similarité est ensuite estimée sur l'empreinte complète.
+    """
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT committed_date, signature, bands FROM odoo_devlog.patch_signatures
+                WHERE file_change_id = %s;
+            """, (file_id,))
+            target = cur.fetchone()
+            if target is None:
+                cur.execute("SELECT 1 FROM odoo_devlog.file_changes WHERE id = %s;", (file_id,))
+                if cur.fetchone() is None:
+                    raise HTTPException(status_code=404, detail="Fichier non trouvé")
+                # Fichier sans ligne modifiée (binaire, renommage) : pas d'empreinte
+                return {"file_id": file_id, "similar": [], "count": 0}
+            committed_date, signature, bands = target
+
+            # Candidats bande par bande, plafonnés : le coût ne suit pas la taille des groupes
+            cur.execute("""
+                SELECT s.file_change_id, s.committed_date, s.signature
+                FROM unnest(%s::bigint[]) AS k(band)
+                CROSS JOIN LATERAL (
+                    SELECT file_change_id, committed_date, signature
+                    FROM odoo_devlog.patch_signatures
+                    WHERE bands @> ARRAY[k.band]
+                      AND NOT (file_change_id = %s AND committed_date = %s)
+                    LIMIT %s
+                ) s;
+            """, (bands, file_id, committed_date, SIMILAR_BAND_CANDIDATES))
+            # Un candidat présent dans plusieurs bandes n'est comparé qu'une fois
+            candidates = {(other_id, other_date): other_signature for other_id, other_date, other_signature in cur.fetchall()}
+
+            scored = []
+            for (other_id, other_date), other_signature in candidates.items():
+                score = patch_similarity.similarity(bytes(signature), bytes(other_signature))
+                if score >= min_similarity:
+                    scored.append((score, other_date, other_id))
+            scored.sort(reverse=True)
+            scored = scored[:limit]
+            if not scored:
+                return {"file_id": file_id, "similar": [], "count": 0}
+
+            cur.execute("""
+                SELECT fc.id, fc.filename, fc.status, fc.additions, fc.deletions,
+                       c.id, c.sha, c.message, c.author_name, c.committed_date, b.name, c.html_url
+                FROM unnest(%s::int[], %s::timestamp[]) AS t(id, committed_date)
+                INNER JOIN odoo_devlog.file_changes fc ON fc.id = t.id AND fc.committed_date = t.committed_date
+                INNER JOIN odoo_devlog.commits c ON c.id = fc.commit_id AND c.committed_date = fc.committed_date
+                LEFT JOIN odoo_devlog.branches b ON b.id = c.branch_id;
+            """, ([other_id for _, _, other_id in scored], [other_date for _, other_date, _ in scored]))
+            details = {row[0]: row for row in cur.fetchall()}
+
+            similar = []
+            for score, _, other_id in scored:
+                row = details.get(other_id)
+                if row is None:
+                    continue
+                similar.append({
+                    "similarity": round(score, 3),
+                    "file": {
                         "id": row[0],
-                        "sha": row[1],
-                        "message": row[2],
-                        "author": row[3],
-                        "date": row[4].isoformat() if row[4] else None,
-                        "additions": row[5],
-                        "deletions": row[6],
-                        "branch": row[7],
-                        "html_url": row[8]
+                        "filename": row[1],
+                        "module": symbol_module(row[1]),
+                        "status": row[2],
+                        "additions": row[3],
+                        "deletions": row[4]
                     },
-                    "file": {
-                        "id": row[9],
-                        "filename": row[10],
-                        "status": row[11],
-                        "additions": row[12],
-                        "deletions": row[13],
-                        "patch": row[14]
+                    "commit": {
+                        "id": row[5],
+                        "sha": row[6],
+                        "message": row[7],
+                        "author": row[8],
+                        "date": row[9].isoformat() if row[9] else None,
+                        "branch": row[10],
+                        "html_url": row[11]
                     }
                 })
 
-            return {
-                "results": results,
-                "count": len(results),
-                "from_version": from_version,
-                "to_version": to_version
-            }
+            return {"file_id": file_id, "similar": similar, "count": len(similar)}
     finally:
         conn.close()
 
+# ============================================================
+# CATALOGUE DES MODULES (autocomplétion en mémoire)
+# ============================================================
+# Catalogue de ce worker, remplacé en bloc à chaque reconstruction
+_module_catalog = None
+_module_catalog_task = None
+_module_catalog_lock = threading.Lock()
+
+def refresh_module_catalog():
+    """Reconstruit le catalogue si sa version a changé (module_catalog.catalog_version) ; retourne le catalogue"""
+    global _module_catalog
+    # Une seule reconstruction à la fois (tâche périodique, première requête)
+    with _module_catalog_lock:
+        conn = psycopg2.connect(**DB_CONFIG, options='-c client_encoding=UTF8')
+        try:
+            with conn.cursor() as cur:
+                version = module_catalog.catalog_version(cur)
+            conn.commit()
+            if _module_catalog is None or _module_catalog.version != version:
+                _module_catalog = module_catalog.load_catalog(conn, version)
+                print(f"📦 Catalogue des modules : {len(_module_catalog)} modules (version {version})")
+            return _module_catalog
+        finally:
+            conn.close()
+
+def current_module_catalog():
+    """Catalogue en mémoire, chargé à la première demande si le démarrage ne l'a pas fait"""
+    if _module_catalog is not None:
+        return _module_catalog
+    try:
+        return refresh_module_catalog()
+    except psycopg2.Error as e:
+        raise HTTPException(status_code=500, detail=f"Erreur de connexion à la base de données: {str(e)}")
+
+async def keep_module_catalog_fresh():
+    while True:
+        try:
+            await run_in_threadpool(refresh_module_catalog)
+        except Exception as e:
+            print(f"⚠️  Catalogue des modules non rafraîchi : {e}")
+        await asyncio.sleep(MODULE_CATALOG_REFRESH_SECONDS)
+
+@app.on_event("startup")
+async def start_module_catalog():
+    global _module_catalog_task
+    _module_catalog_task = asyncio.ensure_future(keep_module_catalog_fresh())
+
+@app.on_event("shutdown")
+async def stop_module_catalog():
+    if _module_catalog_task is not None:
+        _module_catalog_task.cancel()
+
 @app.get("/modules")
-def get_modules(search: Optional[str] = None, limit: int = Query(100, ge=1, le=500)):
-    """Liste tous les modules détectés avec recherche optionnelle"""
+def get_modules(
+    search: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    fuzzy: bool = Query(True, description="Compléter par des noms approchants (fautes de frappe)")
+):
+    """Modules détectés ; avec search, classés par pertinence puis par nombre de commits.
+
+    Servi depuis le catalogue en mémoire (module_catalog.py) : préfixe du nom
+    ou d'un de ses mots, sous-chaîne, puis noms approchants.
+    """
+    catalog = current_module_catalog()
+    matches = catalog.search(search, limit, fuzzy) if search else catalog.by_name(limit)
+    return [
+        {"name": m.name, "path": m.path, "repo": m.repo, "commits": m.commits, "match": match}
+        for m, match in matches
+    ]
+
+COMMIT_TYPES = [
+    {"code": "FIX", "label": "Bug Fix", "color": "#ef4444"},
+    {"code": "IMP", "label": "Improvement", "color": "#3b82f6"},
+    {"code": "ADD", "label": "Addition", "color": "#22c55e"},
+    {"code": "REF", "label": "Refactoring", "color": "#f59e0b"},
+    {"code": "REM", "label": "Removal", "color": "#9ca3af"},
+    {"code": "MOV", "label": "Move", "color": "#8b5cf6"},
+    {"code": "REV", "label": "Revert", "color": "#ec4899"},
+    {"code": "I18N", "label": "Translation", "color": "#06b6d4"}
+]
+
+@app.get("/commit-types")
+def get_commit_types():
+    """Extrait les types de commits du message"""
+    return COMMIT_TYPES
+
+# ============================================================
+# BOOTSTRAP (catalogue du premier affichage)
+# ============================================================
+# Dernier catalogue construit par ce worker : (version, corps JSON)
+_bootstrap_cache = (None, None)
+
+def data_version(cur):
+    """Version des données, tirée de marqueurs bon marché qui changent à chaque import.
+
+    Séquences des commits et des auteurs, dernier import terminé, empreinte
+    des dépôts, des branches (têtes mises à jour par le webhook) et des
+    modules : quelques lectures d'index, sans parcourir commits ni
+    file_changes comme le fait le calcul des totaux.
+    """
+    cur.execute("""
+        SELECT concat_ws('|',
+            (SELECT last_value FROM odoo_devlog.commits_id_seq),
+            (SELECT last_value FROM odoo_devlog.authors_id_seq),
+            (SELECT COUNT(*) FROM odoo_devlog.authors),
+            (SELECT MAX(id) || ':' || COALESCE(MAX(ended_at)::TEXT, '') FROM odoo_devlog.import_log),
+            (SELECT md5(string_agg(concat_ws(':', id, full_name, description, default_branch), ',' ORDER BY id))
+             FROM odoo_devlog.repositories),
+            (SELECT md5(string_agg(concat_ws(':', id, name, is_default, last_commit_sha), ',' ORDER BY id))
+             FROM odoo_devlog.branches),
+            (SELECT COUNT(*) || ':' || MAX(id) FROM odoo_devlog.modules)
+        );
+    """)
+    markers = cur.fetchone()[0]
+    return hashlib.md5(f"{BOOTSTRAP_FORMAT}|{markers}".encode("utf-8")).hexdigest()[:16]
+
+def build_bootstrap(cur, version):
+    """Catalogue complet : dépôts avec leurs branches, types de commits et totaux"""
+    cur.execute("""
+        SELECT id, full_name, description, default_branch, html_url
+        FROM odoo_devlog.repositories
+        ORDER BY full_name;
+    """)
+    repositories = [{
+        "id": row[0],
+        "full_name": row[1],
+        "description": row[2],
+        "default_branch": row[3],
+        "html_url": row[4],
+        "branches": []
+    } for row in cur.fetchall()]
+    by_id = {repo["id"]: repo for repo in repositories}
+
+    cur.execute("""
+        SELECT repo_id, id, name, is_default, last_commit_sha
+        FROM odoo_devlog.branches
+        ORDER BY repo_id, is_default DESC, name;
+    """)
+    for repo_id, branch_id, name, is_default, last_commit_sha in cur.fetchall():
+        if repo_id in by_id:
+            by_id[repo_id]["branches"].append({
+                "id": branch_id,
+                "name": name,
+                "is_default": is_default,
+                "last_commit_sha": last_commit_sha
+            })
+
+    return {
+        "version": version,
+        "repositories": repositories,
+        "commit_types": COMMIT_TYPES,
+        "stats": summary_stats(cur)
+    }
+
+def etag_matches(if_none_match, etag):
+    """True si l'en-tête If-None-Match du navigateur désigne cette version (forme faible acceptée)"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+@app.get("/bootstrap")
+def get_bootstrap(request: Request):
+    """Tout ce qu'il faut au premier affichage, en une réponse versionnée.
+
+    L'ETag est la version du catalogue : le navigateur garde la réponse et la
+    revalide à chaque chargement (Cache-Control: no-cache) ; tant qu'aucun
+    import n'a eu lieu, l'API répond 304 sans rien recalculer.
+    """
+    global _bootstrap_cache
     conn = get_db_connection()
     try:
         with conn.cursor() as cur:
-            if search:
-                cur.execute("""
-                    SELECT DISTINCT m.name, m.path_prefix, r.full_name
-                    FROM odoo_devlog.modules m
-                    JOIN odoo_devlog.repositories r ON m.repo_id = r.id
-                    WHERE m.name ILIKE %s
-                    ORDER BY m.name
-                    LIMIT %s;
-                """, (f'%{search}%', limit))
-            else:
-                cur.execute("""
-                    SELECT DISTINCT m.name, m.path_prefix, r.full_name
-                    FROM odoo_devlog.modules m
-                    JOIN odoo_devlog.repositories r ON m.repo_id = r.id
-                    ORDER BY m.name
-                    LIMIT %s;
-                """, (limit,))
-            rows = cur.fetchall()
-            return [{"name": r[0], "path": r[1], "repo": r[2]} for r in rows]
+            version = data_version(cur)
+            etag = f'"{version}"'
+            headers = {"ETag": etag, "Cache-Control": "no-cache"}
+            if etag_matches(request.headers.get("if-none-match"), etag):
+                return Response(status_code=304, headers=headers)
+
+            cached_version, body = _bootstrap_cache
+            if cached_version != version:
+                body = json.dumps(build_bootstrap(cur, version), ensure_ascii=False).encode("utf-8")
+                _bootstrap_cache = (version, body)
+            return Response(content=body, media_type="application/json", headers=headers)
     finally:
         conn.close()
 
-@app.get("/commit-types")
-def get_commit_types():
-    """Extrait les types de commits du message"""
-    return [
-        {"code": "FIX", "label": "Bug Fix", "color": "#ef4444"},
-        {"code": "IMP", "label": "Improvement", "color": "#3b82f6"},
-        {"code": "ADD", "label": "Addition", "color": "#22c55e"},
-        {"code": "REF", "label": "Refactoring", "color": "#f59e0b"},
-        {"code": "REM", "label": "Removal", "color": "#9ca3af"},
-        {"code": "MOV", "label": "Move", "color": "#8b5cf6"},
-        {"code": "REV", "label": "Revert", "color": "#ec4899"},
-        {"code": "I18N", "label": "Translation", "color": "#06b6d4"}
-    ]
-
 # ============================================================
 # ANALYTICS ENDPOINTS
 # ============================================================
@@ -765,7 +1418,7 @@ def get_timeline(
                 COUNT(*) as commit_count,
                 SUM(c.additions) as total_additions,
                 SUM(c.deletions) as total_deletions,
-                COUNT(DISTINCT c.author_name) as author_count
+                COUNT(DISTINCT c.author_id) as author_count
             FROM odoo_devlog.commits c
             WHERE c.branch_id = %s
                 AND c.committed_date >= NOW() - INTERVAL '%s days'
@@ -816,7 +1469,7 @@ def get_module_analytics(
                 COUNT(DISTINCT fc.commit_id) as commit_count,
                 COALESCE(SUM(fc.additions), 0) as total_additions,
                 COALESCE(SUM(fc.deletions), 0) as total_deletions,
-                COUNT(DISTINCT c.author_name) as contributor_count,
+                COUNT(DISTINCT c.author_id) as contributor_count,
                 MAX(c.committed_date) as last_modified
             FROM odoo_devlog.modules m
             INNER JOIN odoo_devlog.file_changes fc ON (
@@ -824,7 +1477,7 @@ def get_module_analytics(
                 OR fc.filename LIKE CONCAT('odoo/addons/', m.name, '/%%')
                 OR fc.filename LIKE CONCAT(m.name, '/%%')
             )
-            INNER JOIN odoo_devlog.commits c ON c.id = fc.commit_id
+            INNER JOIN odoo_devlog.commits c ON c.id = fc.commit_id AND c.committed_date = fc.committed_date
             INNER JOIN odoo_devlog.branches b ON b.id = c.branch_id
             WHERE b.name = %s AND m.name IS NOT NULL
             GROUP BY m.name
@@ -886,7 +1539,7 @@ def get_detected_changes(
                 fc.status,
                 fc.patch
             FROM odoo_devlog.commits c
-            JOIN odoo_devlog.file_changes fc ON fc.commit_id = c.id
+            JOIN odoo_devlog.file_changes fc ON fc.commit_id = c.id AND fc.committed_date = c.committed_date
             JOIN odoo_devlog.branches b ON b.id = c.branch_id
             WHERE b.name = %s
                 AND fc.patch IS NOT NULL
@@ -958,168 +1611,201 @@ def get_detected_changes(
 # ============================================================
 # ADMIN / FETCH MANAGEMENT
 # ============================================================
-import asyncio
 from fastapi.responses import StreamingResponse
-import tempfile
-from pathlib import Path
 
-current_fetch_process = None
-fetch_lock = asyncio.Lock()
-current_log_file = None
+# Un worker avec SYNC_RUNNER=0 sert l'API sans exécuter de synchronisations
+SYNC_RUNNER_ENABLED = os.getenv("SYNC_RUNNER", "1") != "0"
 
 class FetchRequest(BaseModel):
     mode: str
     repositories: Optional[List[str]] = None
     branches: Optional[List[str]] = None
+    fetcher: Optional[str] = None
 
-@app.post("/admin/fetch")
-async def trigger_fetch(request: FetchRequest):
-    """Déclenche un fetch des commits"""
-    import subprocess
-    import sys
-
-    global current_fetch_process, current_log_file
-
-    async with fetch_lock:
-        if current_fetch_process and current_fetch_process.poll() is None:
-            return {
-                "status": "already_running",
-                "mode": request.mode,
-                "pid": current_fetch_process.pid,
-                "message": "Une synchronisation est déjà en cours"
-            }
-
-        try:
-            script_path = os.path.join(os.path.dirname(__file__), "..", "scripts", "fetch_commits.py")
+def connect_sync_db():
+    """Connexion du runner de jobs (hors requêtes HTTP, non profilée)"""
+    return psycopg2.connect(**DB_CONFIG, options='-c client_encoding=UTF8')
 
-            cmd = [sys.executable, "-u", script_path]
+sync_runner = sync_jobs.SyncJobRunner(connect_sync_db)
 
-            if request.mode == "full":
-                cmd.append("full")
+@app.on_event("startup")
+async def start_sync_runner():
+    if SYNC_RUNNER_ENABLED:
+        sync_runner.start()
 
-            if request.repositories:
-                cmd.append("--repos")
-                cmd.extend(request.repositories)
+@app.on_event("shutdown")
+async def stop_sync_runner():
+    await sync_runner.stop()
 
-            if request.branches:
-                cmd.append("--branches")
-                cmd.extend(request.branches)
+def run_jobs_query(func, *args):
+    """Exécute func(conn, *args) sur la file des jobs, avec une erreur claire si la migration manque"""
+    conn = get_db_connection()
+    try:
+        return func(conn, *args)
+    except psycopg2.errors.UndefinedTable:
+        raise HTTPException(status_code=503, detail="File des synchronisations absente : lancez python database/migrate.py")
+    finally:
+        conn.close()
 
-            log_dir = Path(__file__).parent.parent / "logs"
-            log_dir.mkdir(exist_ok=True)
-            current_log_file = log_dir / f"sync_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+def resolve_job_id(conn, job_id):
+    return job_id if job_id is not None else sync_jobs.latest_job_id(conn)
 
-            log_handle = open(current_log_file, 'w', encoding='utf-8')
+def job_logs(conn, job_id, after):
+    """Lignes de journal d'un job enregistrées après l'événement `after`"""
+    job = sync_jobs.get_job(conn, job_id) if job_id is not None else None
+    if job is None:
+        return {"job_id": None, "running": False, "logs": [], "position": 0, "completed": True}
 
-            env = os.environ.copy()
-            env['PYTHONUNBUFFERED'] = '1'
+    limit = 2000
+    events = sync_jobs.events_after(conn, job_id, after, None, limit)
+    running = job["status"] in sync_jobs.ACTIVE
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "running": running,
+        "logs": [{'type': data['type'], 'message': data['message']} for _, event, data in events if event == 'log'],
+        "position": events[-1][0] if events else after,
+        "completed": not running and len(events) < limit
+    }
 
-            current_fetch_process = subprocess.Popen(
-                cmd,
-                stdout=log_handle,
-                stderr=subprocess.STDOUT,
-                env=env
-            )
+def last_event_id_of(request, last_event_id):
+    header = request.headers.get("last-event-id")
+    return int(header) if header and header.isdigit() else last_event_id
+
+def job_event_stream(request, job_id, last_event_id):
+    """Flux SSE d'un job : en direct s'il tourne dans ce worker, relu en base sinon"""
+    broadcaster = sync_runner.broadcaster(job_id)
+    if broadcaster is not None:
+        stream = broadcaster.stream(request, last_event_id)
+    else:
+        stream = sync_jobs.stream_from_db(get_db_connection, job_id, request, last_event_id)
+    return StreamingResponse(
+        stream,
+        media_type="text/event-stream",
+        # Content-Encoding posé : GZipMiddleware laisse passer le flux au lieu
+        # de retenir les événements dans son tampon de compression
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "Content-Encoding": "identity"}
+    )
 
-            return {
-                "status": "started",
-                "mode": request.mode,
-                "pid": current_fetch_process.pid,
-                "log_file": str(current_log_file),
-                "repositories": request.repositories or ["all"],
-                "branches": request.branches or ["all"],
-                "message": f"Fetch {request.mode} démarré"
-            }
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Erreur: {str(e)}")
+# ------------------------------------------------------------
+# File des synchronisations
+# ------------------------------------------------------------
+@app.post("/admin/jobs")
+def create_sync_job(request: FetchRequest):
+    """Ajoute une synchronisation à la file (exécutée par le premier worker disponible)"""
+    return run_jobs_query(sync_jobs.enqueue, request.mode, request.repositories, request.branches, request.fetcher)
+
+@app.get("/admin/jobs")
+def list_sync_jobs(status: Optional[List[str]] = Query(None), limit: int = Query(20, le=200)):
+    """Derniers jobs de synchronisation, filtrables par statut"""
+    return {"jobs": run_jobs_query(sync_jobs.list_jobs, status, limit)}
+
+@app.get("/admin/jobs/{job_id}")
+def get_sync_job(job_id: int):
+    """Statut d'un job et sa dernière progression"""
+    job = run_jobs_query(sync_jobs.get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job introuvable")
+    broadcaster = sync_runner.broadcaster(job_id)
+    if broadcaster is not None:
+        job["progress"] = broadcaster.last_progress
+    else:
+        job["progress"] = run_jobs_query(sync_jobs.last_progress, job_id)
+    return job
+
+@app.get("/admin/jobs/{job_id}/logs")
+def get_sync_job_logs(job_id: int, after: int = 0):
+    """Journal d'un job à partir d'un numéro d'événement (polling)"""
+    return run_jobs_query(job_logs, job_id, after)
+
+@app.get("/admin/jobs/{job_id}/events")
+async def stream_sync_job_events(job_id: int, request: Request, last_event_id: int = 0):
+    """Journal et progression d'un job en Server-Sent Events (log, progress, status, completed)"""
+    return job_event_stream(request, job_id, last_event_id_of(request, last_event_id))
+
+@app.post("/admin/jobs/{job_id}/cancel")
+def cancel_sync_job(job_id: int):
+    """Annule un job : retiré de la file s'il attend, arrêté par son worker s'il tourne"""
+    jobs = run_jobs_query(sync_jobs.request_cancel, job_id)
+    if not jobs:
+        return {"status": "no_process", "job_id": job_id, "message": "Ce job n'est pas en cours"}
+    if jobs[job_id] == "cancelled":
+        return {"status": "cancelled", "job_id": job_id, "message": "Job retiré de la file"}
+    return {"status": "cancel_requested", "job_id": job_id, "message": "Annulation demandée"}
+
+# ------------------------------------------------------------
+# Synchronisation courante (panneau Admin)
+# ------------------------------------------------------------
+@app.post("/admin/fetch")
+def trigger_fetch(request: FetchRequest):
+    """Déclenche un fetch des commits (ajouté à la file des synchronisations)"""
+    job = run_jobs_query(sync_jobs.enqueue, request.mode, request.repositories, request.branches, request.fetcher)
+    return {
+        "status": "queued",
+        "job_id": job["id"],
+        "mode": request.mode,
+        "repositories": request.repositories or ["all"],
+        "branches": request.branches or ["all"],
+        "message": f"Fetch {request.mode} ajouté à la file (job {job['id']})"
+    }
 
 @app.get("/admin/fetch-logs")
-def get_fetch_logs(last_position: int = 0):
-    """Récupère les nouveaux logs depuis la dernière position"""
-    global current_log_file, current_fetch_process
-
-    if not current_log_file or not Path(current_log_file).exists():
-        return {
-            "running": False,
-            "logs": [],
-            "position": 0,
-            "completed": True
-        }
-
+def get_fetch_logs(last_position: int = 0, job_id: Optional[int] = None):
+    """Récupère les nouveaux logs du job courant depuis la dernière position"""
     try:
-        with open(current_log_file, 'r', encoding='utf-8') as f:
-            f.seek(last_position)
-            new_lines = f.readlines()
-            new_position = f.tell()
-
-        logs = []
-        for line in new_lines:
-            line = line.strip()
-            if line:
-                log_type = 'info'
-                if '✅' in line or 'success' in line.lower() or 'réussie' in line.lower():
-                    log_type = 'success'
-                elif '❌' in line or 'error' in line.lower() or 'erreur' in line.lower():
-                    log_type = 'error'
-                elif '⚠️' in line or 'warning' in line.lower():
-                    log_type = 'warning'
-
-                logs.append({'type': log_type, 'message': line})
-
-        is_running = current_fetch_process and current_fetch_process.poll() is None
-
-        return {
-            "running": is_running,
-            "logs": logs,
-            "position": new_position,
-            "completed": not is_running
-        }
+        return run_jobs_query(lambda conn: job_logs(conn, resolve_job_id(conn, job_id), last_position))
     except Exception as e:
         return {
             "running": False,
-            "logs": [{'type': 'error', 'message': f'Erreur: {str(e)}'}],
+            "logs": [{'type': 'error', 'message': f'Erreur: {e.detail if isinstance(e, HTTPException) else e}'}],
             "position": last_position,
             "completed": True
         }
 
+@app.get("/admin/fetch-events")
+async def stream_fetch_events(request: Request, last_event_id: int = 0, job_id: Optional[int] = None):
+    """Progression du job courant en Server-Sent Events (log, progress, status, completed)"""
+    if job_id is None:
+        job_id = await run_in_threadpool(run_jobs_query, sync_jobs.latest_job_id)
+    return job_event_stream(request, job_id, last_event_id_of(request, last_event_id))
+
+@app.get("/admin/fetch-progress")
+def get_fetch_progress(job_id: Optional[int] = None):
+    """Dernier événement de progression du job courant (commits, débit, quota, ETA)"""
+    job_id = job_id if job_id is not None else run_jobs_query(sync_jobs.latest_job_id)
+    if job_id is None:
+        return {"running": False, "job_id": None, "progress": None}
+    job = get_sync_job(job_id)
+    return {"running": job["status"] in sync_jobs.ACTIVE, "job_id": job_id, "progress": job["progress"]}
+
 @app.get("/admin/fetch-running")
 def is_fetch_running():
-    """Vérifie si un fetch est en cours"""
-    global current_fetch_process
+    """Vérifie si une synchronisation est en cours ou en attente"""
+    jobs = run_jobs_query(sync_jobs.list_jobs, sync_jobs.ACTIVE)
+    if not jobs:
+        return {"running": False, "jobs": []}
+    running = [job for job in jobs if job["status"] == "running"]
+    return {
+        "running": True,
+        "pid": running[0]["pid"] if running else None,
+        "job_id": (running or jobs)[-1]["id"],
+        "jobs": jobs
+    }
 
-    if current_fetch_process and current_fetch_process.poll() is None:
+@app.post("/admin/cancel-fetch")
+def cancel_fetch():
+    """Annule toutes les synchronisations en cours ou en attente"""
+    jobs = run_jobs_query(sync_jobs.request_cancel)
+    if not jobs:
         return {
-            "running": True,
-            "pid": current_fetch_process.pid
+            "status": "no_process",
+            "message": "Aucune synchronisation en cours"
         }
-    return {"running": False}
-
-@app.post("/admin/cancel-fetch")
-async def cancel_fetch():
-    """Annule la synchronisation en cours"""
-    global current_fetch_process
-
-    async with fetch_lock:
-        if not current_fetch_process or current_fetch_process.poll() is not None:
-            return {
-                "status": "no_process",
-                "message": "Aucune synchronisation en cours"
-            }
-
-        try:
-            current_fetch_process.terminate()
-
-            try:
-                current_fetch_process.wait(timeout=5)
-            except:
-                current_fetch_process.kill()
-
-            return {
-                "status": "cancelled",
-                "message": "Synchronisation annulée"
-            }
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Erreur lors de l'annulation: {str(e)}")
+    return {
+        "status": "cancelled",
+        "jobs": sorted(jobs),
+        "message": "Synchronisation annulée"
+    }
 
 @app.get("/admin/fetch-status")
 def get_fetch_status():
@@ -1165,6 +1851,66 @@ def get_fetch_status():
     except Exception as e:
         return {"logs": [], "last_fetch": None, "error": str(e)}
 
+@app.get("/admin/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Métriques au format texte Prometheus (requêtes HTTP, SQL, connexions)"""
+    return PlainTextResponse(profiling.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.get("/admin/slow-queries")
+def get_slow_queries():
+    """Requêtes SQL les plus lentes de la fenêtre glissante, avec plan EXPLAIN si capturé"""
+    return {
+        "window_seconds": profiling.SLOW_QUERY_WINDOW,
+        "explain_threshold_ms": profiling.EXPLAIN_THRESHOLD_MS or None,
+        "queries": profiling.slow_queries_snapshot()
+    }
+
+# ============================================================
+# WEBHOOK GITHUB (pushs)
+# ============================================================
+def queue_push(conn, delivery_id, push):
+    """Met à jour la tête de la branche et met ses commits en file d'import"""
+    tracked = (push.repo_name, push.branch_name) in registry.select(registry.load_registry())
+    if not tracked or not push_events.branch_exists(conn, push.repo_name, push.branch_name):
+        return {"status": "ignored", "reason": f"branche {push.repo_name}/{push.branch_name} non suivie"}
+
+    push_id = push_events.record_push(conn, delivery_id, push)
+    if push_id is None:
+        return {"status": "duplicate", "delivery_id": delivery_id}
+    # Livraison nouvelle seulement : une redélivrance d'un ancien push ne fait pas reculer la tête
+    push_events.update_branch_head(conn, push.repo_name, push.branch_name, push.after)
+    if not push.shas and push.complete:
+        # Rien à importer (retour en arrière, branche recréée) : le push est clos tout de suite
+        push_events.finish_pushes(conn, [push_id], "done")
+        return {"status": "ignored", "reason": "aucun nouveau commit"}
+    # Un seul job en attente par branche : il importera tous les pushs reçus d'ici là
+    job = sync_jobs.enqueue_once(conn, "push", [push.repo_name], [push.branch_name])
+    return {"status": "queued", "push_id": push_id, "job_id": job["id"], "commits": len(push.shas)}
+
+@app.post("/webhooks/github", status_code=202)
+async def github_webhook(request: Request):
+    """Reçoit les événements push de GitHub : les commits poussés sont importés dans les secondes qui suivent"""
+    if not GITHUB_WEBHOOK_SECRET:
+        raise HTTPException(status_code=503, detail="Webhook désactivé : définir GITHUB_WEBHOOK_SECRET")
+    body = await request.body()
+    if not push_events.verify_signature(GITHUB_WEBHOOK_SECRET, body, request.headers.get("x-hub-signature-256")):
+        raise HTTPException(status_code=401, detail="Signature invalide")
+
+    event = request.headers.get("x-github-event")
+    if event == "ping":
+        return {"status": "pong"}
+    if event != "push":
+        return {"status": "ignored", "reason": f"événement {event} non géré"}
+
+    try:
+        push = push_events.parse_push(json.loads(body))
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Payload push invalide")
+    if push is None:
+        return {"status": "ignored", "reason": "suppression ou référence hors branches"}
+
+    return await run_in_threadpool(run_jobs_query, queue_push, request.headers.get("x-github-delivery"), push)
+
 # ============================================================
 # MAIN
 # ============================================================
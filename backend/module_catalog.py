@@ -0,0 +1,142 @@
+"""Catalogue des modules en mémoire pour l'autocomplétion (/modules).
+
+Chargé par l'API au démarrage, puis reconstruit quand sa version change
+(nouveau module, comptes recalculés après un import) : chaque frappe est
+servie sans requête SQL. La version ignore les têtes de branches et les
+commits arrivés entre deux recomptages, si bien qu'un push reçu par le
+webhook ne déclenche pas de reconstruction.
+
+- préfixe : clés triées (le nom complet et chacun de ses mots, « stock »
+  trouve sale_stock), recherche par dichotomie ;
+- sous-chaîne : candidats par intersection de l'index de trigrammes,
+  vérifiés sur le nom ;
+- approximatif : similarité des trigrammes comme pg_trgm (trigrammes
+  communs / trigrammes distincts des deux noms), au-dessus de
+  FUZZY_THRESHOLD ; « acount » trouve account.
+
+Les résultats sont classés par qualité de correspondance, puis par nombre
+de commits annonçant le module dans leur titre (« [FIX] account: »), lu
+dans module_commit_counts (recalculée une fois par import).
+"""
+import hashlib
+from bisect import bisect_left
+from collections import namedtuple, defaultdict, Counter
+
+# Similarité minimale d'une correspondance approximative (seuil par défaut de pg_trgm)
+FUZZY_THRESHOLD = 0.3
+
+# Qualité de correspondance, de la meilleure à la moins bonne
+MATCHES = ("exact", "prefix", "word", "substring", "fuzzy")
+
+Module = namedtuple("Module", "name path repo commits")
+
+def trigrams(word, padded=True):
+    """Trigrammes d'un mot ; avec padded, bornés comme pg_trgm (« ␣␣a », « ␣ac »… « nt␣ »)"""
+    text = f"  {word} " if padded else word
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class ModuleCatalog:
+    """Modules (un par dépôt) et index de recherche, immuables une fois construits"""
+
+    def __init__(self, modules, version=None):
+        self.version = version
+        self.modules = sorted(modules, key=lambda m: (m.name, m.repo))
+
+        keys = []
+        self.name_trigrams = []
+        self.postings = defaultdict(set)
+        for index, module in enumerate(self.modules):
+            name = module.name.lower()
+            keys.append((name, index))
+            keys.extend((word, index) for word in set(name.split("_")[1:]) if word)
+            grams = trigrams(name)
+            self.name_trigrams.append(grams)
+            for gram in grams:
+                self.postings[gram].add(index)
+        keys.sort()
+        self.keys = [key for key, _ in keys]
+        self.key_modules = [index for _, index in keys]
+
+    def __len__(self):
+        return len(self.modules)
+
+    def by_name(self, limit):
+        return [(module, None) for module in self.modules[:limit]]
+
+    def search(self, query, limit=20, fuzzy=True):
+        """[(module, correspondance)] classés : correspondance, puis commits décroissants, puis nom"""
+        query = query.strip().lower()
+        if not query:
+            return self.by_name(limit)
+
+        # index -> (rang de la correspondance, -similarité)
+        found = {}
+
+        def keep(index, rank, similarity=1.0):
+            if index not in found or (rank, -similarity) < found[index]:
+                found[index] = (rank, -similarity)
+
+        position = bisect_left(self.keys, query)
+        while position < len(self.keys) and self.keys[position].startswith(query):
+            index = self.key_modules[position]
+            name = self.modules[index].name.lower()
+            if name == query:
+                keep(index, 0)
+            elif name.startswith(query):
+                keep(index, 1)
+            else:
+                keep(index, 2)
+            position += 1
+
+        # Les correspondances suivantes sont moins bonnes : inutiles si la page est pleine
+        if len(found) < limit:
+            if len(query) >= 3:
+                grams = trigrams(query, padded=False)
+                candidates = set.intersection(*(self.postings.get(gram, set()) for gram in grams))
+            else:
+                candidates = range(len(self.modules))
+            for index in candidates:
+                if index not in found and query in self.modules[index].name.lower():
+                    keep(index, 3)
+
+        if fuzzy and len(found) < limit:
+            grams = trigrams(query)
+            shared = Counter()
+            for gram in grams:
+                shared.update(self.postings.get(gram, ()))
+            for index, count in shared.items():
+                if index in found:
+                    continue
+                similarity = count / (len(grams) + len(self.name_trigrams[index]) - count)
+                if similarity >= FUZZY_THRESHOLD:
+                    keep(index, 4, similarity)
+
+        ranked = sorted(found, key=lambda index: (*found[index], -self.modules[index].commits, self.modules[index].name))
+        return [(self.modules[index], MATCHES[found[index][0]]) for index in ranked[:limit]]
+
+# ============================================================
+# CHARGEMENT
+# ============================================================
+def catalog_version(cur):
+    """Version du catalogue : modules, noms des dépôts et date du dernier recomptage"""
+    cur.execute("""
+        SELECT concat_ws('|',
+            (SELECT COUNT(*) || ':' || MAX(id) FROM odoo_devlog.modules),
+            (SELECT md5(string_agg(id || ':' || full_name, ',' ORDER BY id)) FROM odoo_devlog.repositories),
+            (SELECT COUNT(*) || ':' || COALESCE(MAX(refreshed_at)::TEXT, '') FROM odoo_devlog.module_commit_counts)
+        );
+    """)
+    return hashlib.md5(cur.fetchone()[0].encode("utf-8")).hexdigest()[:16]
+
+def load_catalog(conn, version=None):
+    """Catalogue construit depuis la base (modules détectés et commits qui les annoncent)"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT m.name, m.path_prefix, r.full_name, COALESCE(n.commits, 0)
+            FROM odoo_devlog.modules m
+            JOIN odoo_devlog.repositories r ON r.id = m.repo_id
+            LEFT JOIN odoo_devlog.module_commit_counts n ON n.repo_id = m.repo_id AND n.module = m.name;
+        """)
+        modules = [Module(*row) for row in cur.fetchall()]
+    conn.commit()
+    return ModuleCatalog(modules, version)
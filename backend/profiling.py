@@ -0,0 +1,299 @@
+import os
+import re
+import time
+import hashlib
+import threading
+import contextvars
+import psycopg2
+import psycopg2.extensions
+from collections import defaultdict
+from starlette.datastructures import MutableHeaders
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+# Nombre de requêtes SQL lentes conservées dans le classement
+SLOW_QUERY_TOP_N = int(os.getenv("PROFILE_SLOW_QUERY_TOP_N", 20))
+
+# Fenêtre glissante du classement (secondes)
+SLOW_QUERY_WINDOW = int(os.getenv("PROFILE_SLOW_QUERY_WINDOW", 3600))
+
+# Au-delà de ce seuil (ms), le plan EXPLAIN (ANALYZE, BUFFERS) est capturé (0 = désactivé)
+EXPLAIN_THRESHOLD_MS = float(os.getenv("PROFILE_EXPLAIN_THRESHOLD_MS", 0))
+
+HISTOGRAM_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+_current = contextvars.ContextVar("request_profile", default=None)
+_lock = threading.Lock()
+
+# ============================================================
+# STATISTIQUES
+# ============================================================
+class RequestProfile:
+    """Mesures d'une requête HTTP : connexions, requêtes SQL, temps total"""
+
+    def __init__(self, route=None):
+        self.route = route
+        self.queries = []
+        self.db_time = 0.0
+        self.acquire_time = 0.0
+        self.connections = 0
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(HISTOGRAM_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        for i, bound in enumerate(HISTOGRAM_BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+
+class QueryStats:
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.max_seconds = 0.0
+
+request_histograms = defaultdict(Histogram)
+request_db_seconds = defaultdict(float)
+request_status = defaultdict(int)
+acquire_histogram = Histogram()
+query_stats = defaultdict(QueryStats)
+slow_queries = []
+
+def normalize_sql(sql):
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", errors="replace")
+    sql = re.sub(r"\s+", " ", str(sql)).strip()
+    # Les VALUES de execute_values varient avec la taille du lot
+    return re.sub(r"VALUES \(.*", "VALUES (...)", sql)
+
+def query_id(fingerprint):
+    """Identifiant court d'une requête normalisée, label Prometheus (le texte irait au-delà des limites)"""
+    return hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()[:12]
+
+def _record_slow_query(entry):
+    now = time.time()
+    with _lock:
+        slow_queries[:] = [q for q in slow_queries if now - q["at"] < SLOW_QUERY_WINDOW]
+        if len(slow_queries) < SLOW_QUERY_TOP_N:
+            slow_queries.append(entry)
+        else:
+            fastest = min(range(len(slow_queries)), key=lambda i: slow_queries[i]["duration_ms"])
+            if slow_queries[fastest]["duration_ms"] >= entry["duration_ms"]:
+                return
+            slow_queries[fastest] = entry
+        slow_queries.sort(key=lambda q: q["duration_ms"], reverse=True)
+
+def _is_slow_candidate(duration_ms):
+    with _lock:
+        if len(slow_queries) < SLOW_QUERY_TOP_N:
+            return True
+        return duration_ms > slow_queries[-1]["duration_ms"]
+
+# ============================================================
+# CURSEUR INSTRUMENTÉ
+# ============================================================
+class ProfilingCursor(psycopg2.extensions.cursor):
+    """Curseur qui chronomètre chaque execute() et compte les lignes"""
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            self._record(query, vars, time.perf_counter() - started)
+
+    def _record(self, query, vars, duration):
+        fingerprint = normalize_sql(query)
+        rows = self.rowcount if self.rowcount and self.rowcount > 0 else 0
+        profile = _current.get()
+        route = profile.route if profile is not None else None
+
+        with _lock:
+            stats = query_stats[fingerprint]
+            stats.calls += 1
+            stats.seconds += duration
+            stats.rows += rows
+            stats.max_seconds = max(stats.max_seconds, duration)
+
+        if profile is not None:
+            profile.db_time += duration
+            profile.queries.append((fingerprint, duration, rows))
+
+        duration_ms = duration * 1000
+        if not _is_slow_candidate(duration_ms):
+            return
+
+        entry = {
+            "query_id": query_id(fingerprint),
+            "query": fingerprint,
+            "duration_ms": round(duration_ms, 2),
+            "rows": rows,
+            "route": route,
+            "at": time.time(),
+            "plan": None
+        }
+        if EXPLAIN_THRESHOLD_MS and duration_ms >= EXPLAIN_THRESHOLD_MS and fingerprint.upper().startswith(("SELECT", "WITH")):
+            entry["plan"] = self._explain(query, vars)
+        _record_slow_query(entry)
+
+    def _explain(self, query, vars):
+        """Rejoue la requête sous EXPLAIN (ANALYZE, BUFFERS) sur la même connexion"""
+        try:
+            with self.connection.cursor(cursor_factory=psycopg2.extensions.cursor) as cur:
+                cur.execute(b"EXPLAIN (ANALYZE, BUFFERS) " + self.mogrify(query, vars))
+                return "\n".join(row[0] for row in cur.fetchall())
+        except Exception as e:
+            return f"EXPLAIN impossible: {e}"
+
+def connect(**db_config):
+    """psycopg2.connect instrumenté : mesure le temps d'acquisition de la connexion"""
+    started = time.perf_counter()
+    conn = psycopg2.connect(**db_config, cursor_factory=ProfilingCursor)
+    duration = time.perf_counter() - started
+
+    with _lock:
+        acquire_histogram.observe(duration)
+    profile = _current.get()
+    if profile is not None:
+        profile.acquire_time += duration
+        profile.connections += 1
+    return conn
+
+# ============================================================
+# MIDDLEWARE
+# ============================================================
+def server_timing_header(profile, total):
+    parts = [
+        f'db;dur={profile.db_time * 1000:.1f};desc="{len(profile.queries)} sql"',
+        f'conn;dur={profile.acquire_time * 1000:.1f};desc="{profile.connections} conn"',
+        f"app;dur={max(0.0, total - profile.db_time - profile.acquire_time) * 1000:.1f}",
+        f"total;dur={total * 1000:.1f}"
+    ]
+    slowest = sorted(profile.queries, key=lambda q: q[1], reverse=True)[:3]
+    for i, (_, duration, rows) in enumerate(slowest, start=1):
+        parts.append(f'q{i};dur={duration * 1000:.1f};desc="{rows} rows"')
+    return ", ".join(parts)
+
+class ProfilingMiddleware:
+    """Middleware ASGI : temps par requête, temps SQL et en-tête Server-Timing.
+
+    Écrit en ASGI pur : BaseHTTPMiddleware (app.middleware("http")) masque
+    aux endpoints la déconnexion du client (Request.is_disconnected()).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(route=scope["path"])
+        token = _current.set(profile)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                total = time.perf_counter() - started
+                route = scope.get("route")
+                profile.route = getattr(route, "path", scope["path"])
+                key = (scope["method"], profile.route)
+
+                with _lock:
+                    request_histograms[key].observe(total)
+                    request_db_seconds[key] += profile.db_time
+                    request_status[(scope["method"], profile.route, message["status"])] += 1
+
+                MutableHeaders(scope=message)["Server-Timing"] = server_timing_header(profile, total)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+
+# ============================================================
+# EXPORT PROMETHEUS
+# ============================================================
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+def _histogram_lines(name, labels, histogram):
+    lines = []
+    for bound, count in zip(HISTOGRAM_BUCKETS, histogram.counts):
+        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+    lines.append(f"{name}_sum{{{labels}}} {histogram.total:.6f}")
+    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return lines
+
+def render_prometheus():
+    lines = []
+    with _lock:
+        lines.append("# HELP odoo_devlog_http_request_duration_seconds Durée des requêtes HTTP")
+        lines.append("# TYPE odoo_devlog_http_request_duration_seconds histogram")
+        for (method, route), histogram in sorted(request_histograms.items()):
+            labels = f'method="{method}",route="{_label(route)}"'
+            lines.extend(_histogram_lines("odoo_devlog_http_request_duration_seconds", labels, histogram))
+
+        lines.append("# HELP odoo_devlog_http_requests_total Requêtes HTTP par statut")
+        lines.append("# TYPE odoo_devlog_http_requests_total counter")
+        for (method, route, status), count in sorted(request_status.items()):
+            lines.append(f'odoo_devlog_http_requests_total{{method="{method}",route="{_label(route)}",status="{status}"}} {count}')
+
+        lines.append("# HELP odoo_devlog_http_request_db_seconds_total Temps passé en SQL par route")
+        lines.append("# TYPE odoo_devlog_http_request_db_seconds_total counter")
+        for (method, route), seconds in sorted(request_db_seconds.items()):
+            lines.append(f'odoo_devlog_http_request_db_seconds_total{{method="{method}",route="{_label(route)}"}} {seconds:.6f}')
+
+        lines.append("# HELP odoo_devlog_db_connection_acquire_seconds Temps d'ouverture des connexions PostgreSQL")
+        lines.append("# TYPE odoo_devlog_db_connection_acquire_seconds histogram")
+        lines.extend(_histogram_lines("odoo_devlog_db_connection_acquire_seconds", 'pool="direct"', acquire_histogram))
+
+        # Requêtes SQL : label query_id (sha1 du texte normalisé), texte dans odoo_devlog_sql_query_info
+        queries = [(query_id(fingerprint), fingerprint, stats)
+                   for fingerprint, stats in sorted(query_stats.items(), key=lambda item: -item[1].seconds)]
+
+        lines.append("# HELP odoo_devlog_sql_query_info Texte de chaque requête SQL normalisée")
+        lines.append("# TYPE odoo_devlog_sql_query_info gauge")
+        for qid, fingerprint, _ in queries:
+            lines.append(f'odoo_devlog_sql_query_info{{query_id="{qid}",query="{_label(fingerprint)}"}} 1')
+
+        lines.append("# HELP odoo_devlog_sql_query_seconds_total Temps cumulé par requête SQL normalisée")
+        lines.append("# TYPE odoo_devlog_sql_query_seconds_total counter")
+        for qid, _, stats in queries:
+            lines.append(f'odoo_devlog_sql_query_seconds_total{{query_id="{qid}"}} {stats.seconds:.6f}')
+
+        lines.append("# HELP odoo_devlog_sql_query_calls_total Exécutions par requête SQL normalisée")
+        lines.append("# TYPE odoo_devlog_sql_query_calls_total counter")
+        for qid, _, stats in queries:
+            lines.append(f'odoo_devlog_sql_query_calls_total{{query_id="{qid}"}} {stats.calls}')
+
+        lines.append("# HELP odoo_devlog_sql_query_rows_total Lignes renvoyées ou modifiées par requête SQL normalisée")
+        lines.append("# TYPE odoo_devlog_sql_query_rows_total counter")
+        for qid, _, stats in queries:
+            lines.append(f'odoo_devlog_sql_query_rows_total{{query_id="{qid}"}} {stats.rows}')
+
+        lines.append("# HELP odoo_devlog_sql_query_max_seconds Exécution la plus longue par requête SQL normalisée")
+        lines.append("# TYPE odoo_devlog_sql_query_max_seconds gauge")
+        for qid, _, stats in queries:
+            lines.append(f'odoo_devlog_sql_query_max_seconds{{query_id="{qid}"}} {stats.max_seconds:.6f}')
+
+        lines.append("# HELP odoo_devlog_slow_query_duration_ms Requêtes SQL les plus lentes (fenêtre glissante)")
+        lines.append("# TYPE odoo_devlog_slow_query_duration_ms gauge")
+        for rank, entry in enumerate(slow_queries, start=1):
+            labels = f'rank="{rank}",route="{_label(entry["route"])}",query_id="{entry["query_id"]}"'
+            lines.append(f"odoo_devlog_slow_query_duration_ms{{{labels}}} {entry['duration_ms']}")
+    return "\n".join(lines) + "\n"
+
+def slow_queries_snapshot():
+    with _lock:
+        return [dict(entry) for entry in slow_queries]
@@ -0,0 +1,163 @@
+"""Préfiltre trigrammes des recherches par expression régulière.
+
+Une regex ne peut correspondre qu'à un texte contenant ses littéraux
+obligatoires : `def _compute_\\w+_amount` exige « def _compute_ » et
+« _amount ». Ces littéraux (3 caractères et plus, en minuscules) sont
+traduits en conditions LIKE placées avant la regex : avec pg_trgm, elles
+passent par les index trigrammes de patch_hunks ; sans, elles écartent la
+plupart des hunks à moindre coût que le moteur de regex, qui ne vérifie
+que les survivants.
+
+L'analyse utilise le parseur de `re` (les bornes de mot PostgreSQL `\\m`,
+`\\M`, `\\y`, `\\Y` lui sont présentées comme `\\b`). Un motif qu'il refuse
+n'a simplement pas de préfiltre, pas plus qu'un motif contenant une classe
+POSIX entre crochets (`[[:alpha:]]`, `[[:<:]]`, `[[.x.]]`, `[[=e=]]`) : `re`
+la lirait comme un ensemble suivi d'un `]` littéral que PostgreSQL n'exige pas.
+"""
+import re
+import warnings
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+# Un littéral plus court ne donne aucun trigramme
+MIN_LITERAL_LENGTH = 3
+
+# \m \M \y \Y (PostgreSQL) non précédés d'un backslash échappé
+PG_WORD_BOUNDARY = re.compile(r"(?<!\\)((?:\\\\)*)\\[mMyY]")
+
+REPEATS = tuple(op for op in (
+    sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT, getattr(sre_parse, "POSSESSIVE_REPEAT", None)
+) if op is not None)
+
+# ============================================================
+# ANALYSE
+# ============================================================
+def _all_of(parts):
+    required = []
+    for part in parts:
+        if part is None or (isinstance(part, str) and len(part) < MIN_LITERAL_LENGTH):
+            continue
+        if isinstance(part, tuple) and part[0] == "and":
+            required.extend(part[1])
+        elif part not in required:
+            required.append(part)
+    if not required:
+        return None
+    return required[0] if len(required) == 1 else ("and", required)
+
+def _any_of(alternatives):
+    choices = []
+    for alternative in alternatives:
+        # Une seule alternative sans littéral suffit à tout laisser passer
+        if alternative is None or (isinstance(alternative, str) and len(alternative) < MIN_LITERAL_LENGTH):
+            return None
+        if isinstance(alternative, tuple) and alternative[0] == "or":
+            choices.extend(alternative[1])
+        else:
+            choices.append(alternative)
+    return choices[0] if len(choices) == 1 else ("or", choices)
+
+def _sequence(items):
+    """Condition requise par une suite d'éléments analysés par sre_parse"""
+    parts, run = [], []
+
+    def flush():
+        if run:
+            parts.append("".join(run))
+            run.clear()
+
+    for op, arg in items:
+        if op is sre_parse.LITERAL:
+            run.append(chr(arg).lower())
+            continue
+        flush()
+        if op is sre_parse.SUBPATTERN:
+            parts.append(_sequence(arg[-1]))
+        elif op in REPEATS:
+            low, _, sub = arg
+            if low >= 1:
+                parts.append(_sequence(sub))
+        elif op is sre_parse.BRANCH:
+            parts.append(_any_of([_sequence(alternative) for alternative in arg[1]]))
+        elif op is getattr(sre_parse, "ATOMIC_GROUP", None):
+            parts.append(_sequence(arg))
+        # IN, ANY, AT, NOT_LITERAL, GROUPREF... : aucun littéral garanti
+    flush()
+    return _all_of(parts)
+
+def _has_posix_bracket(pattern):
+    """True si une expression entre crochets contient [:classe:], [.élément.] ou [=équivalence=]"""
+    i, inside = 0, False
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            i += 2
+            continue
+        if not inside:
+            if char == "[":
+                inside = True
+                i += 1
+                # « ^ » puis « ] » en tête de l'ensemble sont littéraux
+                if pattern[i:i + 1] == "^":
+                    i += 1
+                if pattern[i:i + 1] == "]":
+                    i += 1
+                continue
+        elif char == "[" and i + 1 < len(pattern) and pattern[i + 1] in ":.=":
+            return True
+        elif char == "]":
+            inside = False
+        i += 1
+    return False
+
+def required_literals(pattern):
+    """Littéraux obligatoires d'une regex.
+
+    Retourne une chaîne, un arbre ("and" | "or", [enfants]) ou None si
+    aucun littéral d'au moins 3 caractères n'est garanti :
+
+        def _compute_\\w+_amount  -> ("and", ["def _compute_", "_amount"])
+        (sale|purchase)_order     -> ("and", [("or", ["sale", "purchase"]), "_order"])
+        \\mpartner_id\\M           -> "partner_id"
+        [.]write                  -> ".write" (point entre crochets, pas de classe POSIX)
+        [[:alpha:]]foo            -> None (classe POSIX)
+        [[:<:]]partner_id         -> None (borne de mot POSIX)
+    """
+    if _has_posix_bracket(pattern):
+        return None
+    try:
+        # Les crochets imbriqués ([[a]) déclenchent un FutureWarning de `re`
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", FutureWarning)
+            return _sequence(sre_parse.parse(PG_WORD_BOUNDARY.sub(r"\1\\b", pattern)))
+    except (re.error, RecursionError, OverflowError, ValueError):
+        return None
+
+# ============================================================
+# SQL
+# ============================================================
+def escape_like(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def like_condition(required, column):
+    """(SQL, paramètres) équivalents à l'arbre de littéraux, pour une colonne en minuscules"""
+    if isinstance(required, str):
+        return f"{column} LIKE %s", [f"%{escape_like(required)}%"]
+    operator, children = required
+    sqls, params = [], []
+    for child in children:
+        sql, child_params = like_condition(child, column)
+        sqls.append(sql)
+        params.extend(child_params)
+    return "(" + f" {operator.upper()} ".join(sqls) + ")", params
+
+def regex_condition(column, pattern):
+    """(SQL, paramètres) : préfiltre LIKE puis vérification `~*` de la regex"""
+    required = required_literals(pattern)
+    if required is None:
+        return f"{column} ~* %s", [pattern]
+    prefilter, params = like_condition(required, column)
+    return f"({prefilter} AND {column} ~* %s)", params + [pattern]
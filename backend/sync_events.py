@@ -0,0 +1,208 @@
+"""Diffusion de la progression d'une synchronisation (Server-Sent Events).
+
+Le journal de fetch_commits.py est lu une seule fois, par une tâche
+asyncio qui suit le fichier pendant toute la synchronisation : chaque ligne
+est classée (succès, erreur, avertissement, info) puis numérotée et
+transmise à tous les navigateurs abonnés. N onglets Admin ouverts coûtent
+une lecture du fichier au lieu de N boucles de polling.
+
+Les événements JSON lines de scripts/sync_progress.py (--progress-file)
+sont suivis de la même façon et diffusés tels quels en événements
+« progress » ; le dernier reste disponible pour /admin/fetch-progress.
+
+Les derniers événements sont conservés : un client qui se connecte en
+cours de route (ou se reconnecte avec l'en-tête Last-Event-ID) reçoit ce
+qu'il a manqué avant le direct.
+"""
+import os
+import json
+import asyncio
+from collections import deque
+
+# Intervalle de lecture du journal quand il n'y a rien de nouveau (s)
+TAIL_INTERVAL = 0.25
+
+# Événements rejoués à un client qui arrive en cours de synchronisation
+HISTORY_SIZE = 5000
+
+# Événements en attente par client : au-delà, le client est déconnecté et se reconnecte
+SUBSCRIBER_QUEUE_SIZE = 2000
+
+# Commentaire envoyé quand rien ne se passe, pour garder la connexion ouverte (s)
+KEEPALIVE_INTERVAL = 15
+
+# ============================================================
+# CLASSEMENT DES LIGNES
+# ============================================================
+def classify_line(line):
+    """Type d'une ligne du journal : success, error, warning ou info"""
+    lowered = line.lower()
+    if '✅' in line or 'success' in lowered or 'réussie' in lowered:
+        return 'success'
+    if '❌' in line or 'error' in lowered or 'erreur' in lowered:
+        return 'error'
+    if '⚠️' in line or 'warning' in lowered:
+        return 'warning'
+    return 'info'
+
+def format_event(event_id, event, data):
+    """Bloc SSE d'un événement"""
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+# ============================================================
+# SUIVI D'UN FICHIER
+# ============================================================
+class TailedFile:
+    """Fichier lu au fil de l'eau ; les lignes complètes sont passées à `handler`"""
+
+    def __init__(self, path, handler):
+        self.path = path
+        self.handler = handler
+        self.handle = None
+        self.pending = ""
+
+    def read(self):
+        """Lit la suite du fichier (ouvert dès qu'il existe) ; True si du contenu est arrivé"""
+        if self.handle is None:
+            if not os.path.exists(self.path):
+                return False
+            self.handle = open(self.path, 'r', encoding='utf-8', errors='replace')
+        chunk = self.handle.read()
+        if not chunk:
+            return False
+        *lines, self.pending = (self.pending + chunk).split("\n")
+        self.handler(lines)
+        return True
+
+    def flush(self):
+        """Transmet la dernière ligne, non terminée par un retour à la ligne"""
+        if self.pending.strip():
+            self.handler([self.pending])
+        self.pending = ""
+
+    def close(self):
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+
+# ============================================================
+# DIFFUSION
+# ============================================================
+class SyncBroadcaster:
+    """Suit le journal de la synchronisation en cours et diffuse ses lignes"""
+
+    def __init__(self):
+        self.history = deque(maxlen=HISTORY_SIZE)
+        self.subscribers = set()
+        self.next_id = 1
+        self.running = False
+        self.task = None
+        self.last_progress = None
+        self.unsaved = []
+
+    def start(self, log_file, process, progress_file=None):
+        """Commence le suivi d'une nouvelle synchronisation (appelé par /admin/fetch)"""
+        if self.task and not self.task.done():
+            self.task.cancel()
+        self.history.clear()
+        self.last_progress = None
+        self.running = True
+        self._publish("status", {"running": True, "pid": process.pid})
+        self.task = asyncio.ensure_future(self._tail(log_file, process, progress_file))
+
+    def subscribe(self, last_event_id=0):
+        """File des événements d'un client, amorcée avec ceux qu'il n'a pas vus"""
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        for event in self.history:
+            if event[0] > last_event_id:
+                queue.put_nowait(event)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+    def _publish(self, event, data):
+        item = (self.next_id, event, data)
+        self.next_id += 1
+        self.history.append(item)
+        self.unsaved.append(item)
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(item)
+            except asyncio.QueueFull:
+                # Client trop lent : il se reconnectera avec Last-Event-ID
+                self.subscribers.discard(queue)
+                queue.get_nowait()
+                queue.put_nowait(None)
+
+    def drain(self):
+        """Événements publiés depuis le dernier appel (à enregistrer en base)"""
+        items, self.unsaved = self.unsaved, []
+        return items
+
+    def _log_lines(self, lines):
+        for line in lines:
+            line = line.strip()
+            if line:
+                self._publish("log", {"type": classify_line(line), "message": line})
+
+    def _progress_lines(self, lines):
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            self.last_progress = record
+            self._publish("progress", record)
+
+    async def _tail(self, log_file, process, progress_file=None):
+        sources = [TailedFile(log_file, self._log_lines)]
+        if progress_file:
+            sources.append(TailedFile(progress_file, self._progress_lines))
+        try:
+            while True:
+                # Lire jusqu'au bout avant de vérifier si le processus est terminé
+                read = [source.read() for source in sources]
+                if any(read):
+                    continue
+                if process.poll() is not None:
+                    break
+                await asyncio.sleep(TAIL_INTERVAL)
+            for source in sources:
+                source.flush()
+            self._publish("completed", {"running": False, "returncode": process.returncode})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._publish("log", {"type": "error", "message": f"Erreur de lecture du journal : {e}"})
+            self._publish("completed", {"running": process.poll() is None, "returncode": process.poll()})
+        finally:
+            self.running = False
+            for source in sources:
+                source.close()
+
+    async def stream(self, request, last_event_id=0):
+        """Flux text/event-stream d'un client, jusqu'à la fin de la synchronisation"""
+        queue = self.subscribe(last_event_id)
+        try:
+            if not self.running and queue.empty():
+                yield format_event(self.next_id - 1, "completed", {"running": False, "returncode": None})
+                return
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                if item is None:
+                    return
+                event_id, event, data = item
+                yield format_event(event_id, event, data)
+                if event == "completed":
+                    return
+        finally:
+            self.unsubscribe(queue)
@@ -0,0 +1,451 @@
+"""File persistante des synchronisations, partagée par les workers de l'API.
+
+Une demande de synchronisation devient une ligne de odoo_devlog.sync_jobs
+(queued). Chaque worker uvicorn fait tourner un SyncJobRunner qui réclame
+les jobs en attente avec `SELECT ... FOR UPDATE SKIP LOCKED`, lance
+fetch_commits.py et signe sa présence (heartbeat) tant que le processus
+tourne. Deux jobs qui portent sur un même dépôt et une même branche ne
+tournent jamais en même temps ; un job dont le worker a disparu (plus de
+heartbeat depuis STALE_AFTER secondes) est marqué en échec.
+
+Journal et progression de chaque job passent par un SyncBroadcaster local
+(sync_events.py) et sont recopiés dans sync_job_events : le worker qui
+exécute le job diffuse en direct, les autres relisent la table. Statut,
+journal et annulation sont donc les mêmes quel que soit le worker qui
+reçoit la requête.
+"""
+import os
+import sys
+import json
+import socket
+import asyncio
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from fastapi.concurrency import run_in_threadpool
+from psycopg2.extras import execute_values, Json
+import sync_events
+
+# Identité du worker dans sync_jobs.owner
+OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+# Jobs exécutés en même temps par un worker
+MAX_JOBS_PER_WORKER = int(os.getenv("SYNC_MAX_JOBS_PER_WORKER", 1))
+
+# Boucle du runner : réclamation, enregistrement des événements (s)
+POLL_INTERVAL = 1.0
+
+# Heartbeat des jobs en cours et lecture des demandes d'annulation (s)
+HEARTBEAT_INTERVAL = 5
+
+# Sans heartbeat depuis ce délai, le worker d'un job est considéré perdu (s)
+STALE_AFTER = 60
+
+# Attente de l'arrêt propre de fetch_commits.py avant kill (s)
+CANCEL_TIMEOUT = 15
+
+SCRIPT_PATH = Path(__file__).resolve().parent.parent / "scripts" / "fetch_commits.py"
+LOG_DIR = Path(__file__).resolve().parent.parent / "logs"
+
+JOB_COLUMNS = ("id", "mode", "repositories", "branches", "fetcher", "status", "cancel_requested", "owner",
+               "pid", "heartbeat_at", "created_at", "started_at", "ended_at", "returncode", "error_message")
+SELECT_JOB = f"SELECT {', '.join(JOB_COLUMNS)} FROM odoo_devlog.sync_jobs"
+
+ACTIVE = ("queued", "running")
+
+def dump_json(data):
+    return json.dumps(data, ensure_ascii=False)
+
+def job_dict(row):
+    job = dict(zip(JOB_COLUMNS, row))
+    for key in ("heartbeat_at", "created_at", "started_at", "ended_at"):
+        if job[key]:
+            job[key] = job[key].isoformat()
+    return job
+
+# ============================================================
+# REQUÊTES
+# ============================================================
+def enqueue(conn, mode, repositories=None, branches=None, fetcher=None):
+    """Ajoute un job à la file et le retourne"""
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            INSERT INTO odoo_devlog.sync_jobs (mode, repositories, branches, fetcher)
+            VALUES (%s, %s, %s, %s)
+            RETURNING {', '.join(JOB_COLUMNS)};
+        """, (mode, repositories or None, branches or None, fetcher))
+        job = job_dict(cur.fetchone())
+    conn.commit()
+    return job
+
+def enqueue_once(conn, mode, repositories=None, branches=None):
+    """Comme enqueue, sauf si un job identique attend déjà (pushs rapprochés : un seul job)"""
+    with conn.cursor() as cur:
+        cur.execute(SELECT_JOB + """
+            WHERE status = 'queued' AND mode = %s
+              AND repositories IS NOT DISTINCT FROM %s AND branches IS NOT DISTINCT FROM %s
+            ORDER BY id
+            LIMIT 1;
+        """, (mode, repositories or None, branches or None))
+        row = cur.fetchone()
+    conn.commit()
+    if row:
+        return job_dict(row)
+    return enqueue(conn, mode, repositories, branches)
+
+def get_job(conn, job_id):
+    with conn.cursor() as cur:
+        cur.execute(SELECT_JOB + " WHERE id = %s;", (job_id,))
+        row = cur.fetchone()
+    conn.commit()
+    return job_dict(row) if row else None
+
+def list_jobs(conn, status=None, limit=20):
+    with conn.cursor() as cur:
+        if status:
+            cur.execute(SELECT_JOB + " WHERE status = ANY(%s) ORDER BY id DESC LIMIT %s;", (list(status), limit))
+        else:
+            cur.execute(SELECT_JOB + " ORDER BY id DESC LIMIT %s;", (limit,))
+        jobs = [job_dict(row) for row in cur.fetchall()]
+    conn.commit()
+    return jobs
+
+def latest_job_id(conn):
+    """Job en cours le plus ancien, sinon le dernier créé"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT id FROM odoo_devlog.sync_jobs
+            ORDER BY (status = 'running') DESC, (status = 'queued') DESC,
+                     CASE WHEN status IN ('running', 'queued') THEN id END, id DESC
+            LIMIT 1;
+        """)
+        row = cur.fetchone()
+    conn.commit()
+    return row[0] if row else None
+
+def request_cancel(conn, job_id=None):
+    """Annule un job (ou tous les jobs actifs) : direct en attente, signalé à son worker en cours.
+
+    Retourne {id: statut après la demande} ('cancelled' ou 'running').
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE odoo_devlog.sync_jobs SET
+                status = CASE WHEN status = 'queued' THEN 'cancelled' ELSE status END,
+                ended_at = CASE WHEN status = 'queued' THEN NOW() ELSE ended_at END,
+                cancel_requested = (status = 'running')
+            WHERE status IN ('queued', 'running') AND (%s::int IS NULL OR id = %s)
+            RETURNING id, status;
+        """, (job_id, job_id))
+        jobs = dict(cur.fetchall())
+    conn.commit()
+    return jobs
+
+def claim_next(conn, owner):
+    """Réclame le plus ancien job en attente sans conflit avec un job en cours.
+
+    SKIP LOCKED : deux workers ne réclament jamais le même job ; le verrou
+    consultatif sérialise les réclamations pour que le test de conflit
+    voie les jobs tout juste démarrés par un autre worker.
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_advisory_xact_lock(hashtext('odoo_devlog.sync_jobs'));")
+        cur.execute(f"""
+            UPDATE odoo_devlog.sync_jobs SET
+                status = 'running', owner = %s, started_at = NOW(), heartbeat_at = NOW()
+            WHERE id = (
+                SELECT j.id FROM odoo_devlog.sync_jobs j
+                WHERE j.status = 'queued'
+                  AND NOT EXISTS (
+                      SELECT 1 FROM odoo_devlog.sync_jobs r
+                      WHERE r.status = 'running'
+                        AND (r.repositories IS NULL OR j.repositories IS NULL OR r.repositories && j.repositories)
+                        AND (r.branches IS NULL OR j.branches IS NULL OR r.branches && j.branches)
+                  )
+                ORDER BY j.id
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING {', '.join(JOB_COLUMNS)};
+        """, (owner,))
+        row = cur.fetchone()
+    conn.commit()
+    return job_dict(row) if row else None
+
+def set_pid(conn, job_id, pid):
+    with conn.cursor() as cur:
+        cur.execute("UPDATE odoo_devlog.sync_jobs SET pid = %s WHERE id = %s;", (pid, job_id))
+    conn.commit()
+
+def heartbeat(conn, owner, job_ids):
+    """Signe la présence du worker ; retourne les ids dont l'annulation est demandée"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE odoo_devlog.sync_jobs SET heartbeat_at = NOW()
+            WHERE id = ANY(%s) AND owner = %s AND status = 'running'
+            RETURNING id, cancel_requested;
+        """, (list(job_ids), owner))
+        cancelled = [job_id for job_id, requested in cur.fetchall() if requested]
+    conn.commit()
+    return cancelled
+
+def reap_stale(conn):
+    """Passe en échec les jobs dont le worker ne donne plus signe de vie"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE odoo_devlog.sync_jobs SET
+                status = 'failed', ended_at = NOW(),
+                error_message = 'Worker perdu (plus de heartbeat)'
+            WHERE status = 'running' AND heartbeat_at < NOW() - make_interval(secs => %s)
+            RETURNING id;
+        """, (STALE_AFTER,))
+        ids = [row[0] for row in cur.fetchall()]
+    conn.commit()
+    return ids
+
+def finish(conn, job_id, status, returncode=None, error_message=None):
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE odoo_devlog.sync_jobs SET
+                status = %s, returncode = %s, error_message = %s, ended_at = NOW(), pid = NULL
+            WHERE id = %s;
+        """, (status, returncode, error_message, job_id))
+    conn.commit()
+
+def save_events(conn, job_id, events):
+    if not events:
+        return
+    with conn.cursor() as cur:
+        execute_values(cur, """
+            INSERT INTO odoo_devlog.sync_job_events (job_id, event_id, event, data) VALUES %s
+            ON CONFLICT DO NOTHING
+        """, [(job_id, event_id, event, Json(data, dumps=dump_json)) for event_id, event, data in events], page_size=500)
+    conn.commit()
+
+def events_after(conn, job_id, after=0, event=None, limit=1000):
+    """Événements enregistrés d'un job (event_id, event, data), dans l'ordre"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT event_id, event, data FROM odoo_devlog.sync_job_events
+            WHERE job_id = %s AND event_id > %s AND (%s::text IS NULL OR event = %s)
+            ORDER BY event_id
+            LIMIT %s;
+        """, (job_id, after, event, event, limit))
+        rows = cur.fetchall()
+    conn.commit()
+    return rows
+
+def last_progress(conn, job_id):
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT data FROM odoo_devlog.sync_job_events
+            WHERE job_id = %s AND event = 'progress'
+            ORDER BY event_id DESC LIMIT 1;
+        """, (job_id,))
+        row = cur.fetchone()
+    conn.commit()
+    return row[0] if row else None
+
+# ============================================================
+# EXÉCUTION DANS UN WORKER
+# ============================================================
+class LocalJob:
+    """Job exécuté par ce worker : processus et diffusion de son journal"""
+
+    def __init__(self, job, process, broadcaster):
+        self.job = job
+        self.process = process
+        self.broadcaster = broadcaster
+        self.cancelling = False
+
+def build_command(job, progress_file):
+    cmd = [sys.executable, "-u", str(SCRIPT_PATH)]
+    if job["mode"] in ("full", "push"):
+        cmd.append(job["mode"])
+    if job["repositories"]:
+        cmd.append("--repos")
+        cmd.extend(job["repositories"])
+    if job["branches"]:
+        cmd.append("--branches")
+        cmd.extend(job["branches"])
+    if job["fetcher"]:
+        cmd.extend(["--fetcher", job["fetcher"]])
+    cmd.extend(["--progress-file", str(progress_file)])
+    return cmd
+
+class SyncJobRunner:
+    """Boucle de fond d'un worker : réclame, lance, surveille et termine les jobs"""
+
+    def __init__(self, connect, owner=OWNER, max_jobs=MAX_JOBS_PER_WORKER):
+        self.connect = connect
+        self.owner = owner
+        self.max_jobs = max_jobs
+        self.jobs = {}
+        self.conn = None
+        self.task = None
+        self.last_heartbeat = 0.0
+        self.warned = False
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.ensure_future(self._loop())
+
+    async def stop(self):
+        """Arrêt du worker : les jobs en cours sont interrompus et marqués annulés"""
+        if self.task:
+            self.task.cancel()
+            self.task = None
+        for job_id, local in list(self.jobs.items()):
+            local.cancelling = True
+            await run_in_threadpool(self._terminate, local.process)
+            await self._finish(job_id, local)
+
+    def broadcaster(self, job_id):
+        local = self.jobs.get(job_id)
+        return local.broadcaster if local else None
+
+    # ------------------------------------------------------------
+    # Boucle
+    # ------------------------------------------------------------
+    async def _loop(self):
+        while True:
+            try:
+                await self._tick()
+                self.warned = False
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not self.warned:
+                    print(f"⚠️  File des synchronisations indisponible : {e}")
+                    self.warned = True
+                self._reset_connection()
+            await asyncio.sleep(POLL_INTERVAL)
+
+    def _db(self, func, *args):
+        if self.conn is None or self.conn.closed:
+            self.conn = self.connect()
+        return run_in_threadpool(func, self.conn, *args)
+
+    def _reset_connection(self):
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
+        self.conn = None
+
+    async def _tick(self):
+        for job_id, local in list(self.jobs.items()):
+            await self._db(save_events, job_id, local.broadcaster.drain())
+            if local.process.poll() is not None and local.broadcaster.task.done():
+                await self._finish(job_id, local)
+
+        loop_time = asyncio.get_running_loop().time()
+        if loop_time - self.last_heartbeat >= HEARTBEAT_INTERVAL:
+            self.last_heartbeat = loop_time
+            if self.jobs:
+                for job_id in await self._db(heartbeat, self.owner, list(self.jobs)):
+                    local = self.jobs.get(job_id)
+                    if local and not local.cancelling:
+                        local.cancelling = True
+                        asyncio.ensure_future(run_in_threadpool(self._terminate, local.process))
+            for job_id in await self._db(reap_stale):
+                print(f"⚠️  Job de synchronisation {job_id} sans worker : marqué en échec")
+
+        while len(self.jobs) < self.max_jobs:
+            job = await self._db(claim_next, self.owner)
+            if job is None:
+                break
+            await self._launch(job)
+
+    async def _launch(self, job):
+        LOG_DIR.mkdir(exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        log_file = LOG_DIR / f"sync_{job['id']}_{stamp}.log"
+        progress_file = log_file.with_suffix(".progress.jsonl")
+
+        env = os.environ.copy()
+        env['PYTHONUNBUFFERED'] = '1'
+        try:
+            with open(log_file, 'w', encoding='utf-8') as log_handle:
+                process = subprocess.Popen(
+                    build_command(job, progress_file),
+                    stdout=log_handle,
+                    stderr=subprocess.STDOUT,
+                    env=env
+                )
+        except Exception as e:
+            await self._db(finish, job["id"], "failed", None, f"Lancement impossible : {e}")
+            return
+
+        broadcaster = sync_events.SyncBroadcaster()
+        broadcaster.start(log_file, process, progress_file)
+        self.jobs[job["id"]] = LocalJob(job, process, broadcaster)
+        await self._db(set_pid, job["id"], process.pid)
+
+    async def _finish(self, job_id, local):
+        if local.broadcaster.task and not local.broadcaster.task.done():
+            await asyncio.wait({local.broadcaster.task}, timeout=CANCEL_TIMEOUT)
+        returncode = local.process.poll()
+        if local.cancelling:
+            status, error = "cancelled", "Synchronisation annulée"
+        elif returncode == 0:
+            status, error = "done", None
+        else:
+            status, error = "failed", f"fetch_commits.py terminé avec le code {returncode}"
+        await self._db(save_events, job_id, local.broadcaster.drain())
+        await self._db(finish, job_id, status, returncode, error)
+        self.jobs.pop(job_id, None)
+
+    @staticmethod
+    def _terminate(process):
+        if process.poll() is not None:
+            return
+        process.terminate()
+        try:
+            process.wait(timeout=CANCEL_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+# ============================================================
+# FLUX D'UN JOB DEPUIS LA BASE (AUTRES WORKERS)
+# ============================================================
+async def stream_from_db(connect, job_id, request, last_event_id=0, interval=1.0):
+    """Flux text/event-stream d'un job exécuté par un autre worker (relecture de sync_job_events)"""
+    conn = await run_in_threadpool(connect)
+    try:
+        yield "retry: 3000\n\n"
+        idle = 0.0
+        while True:
+            rows = await run_in_threadpool(events_after, conn, job_id, last_event_id)
+            for event_id, event, data in rows:
+                last_event_id = event_id
+                yield sync_events.format_event(event_id, event, data)
+                if event == "completed":
+                    return
+            if rows:
+                idle = 0.0
+                continue
+
+            job = await run_in_threadpool(get_job, conn, job_id)
+            if job is None or job["status"] not in ACTIVE:
+                # Événements éventuellement enregistrés entre les deux lectures
+                if not await run_in_threadpool(events_after, conn, job_id, last_event_id):
+                    yield sync_events.format_event(last_event_id, "completed", {
+                        "running": False,
+                        "returncode": job["returncode"] if job else None,
+                        "status": job["status"] if job else None
+                    })
+                    return
+                continue
+
+            if await request.is_disconnected():
+                return
+            await asyncio.sleep(interval)
+            idle += interval
+            if idle >= sync_events.KEEPALIVE_INTERVAL:
+                idle = 0.0
+                yield ": keep-alive\n\n"
+    finally:
+        await run_in_threadpool(conn.close)
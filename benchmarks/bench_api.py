@@ -0,0 +1,259 @@
+"""Benchmark des endpoints de backend/api.py sur une base synthétique.
+
+Chaque endpoint est appelé via le TestClient FastAPI (sans réseau) ; on
+mesure p50/p95/p99, le temps CPU du processus par requête (API et client
+confondus), les octets transmis (compressés si l'API compresse, la taille
+du JSON décodé à part) et le nombre de lignes lues côté PostgreSQL
+(pg_stat_user_tables : seq_tup_read + idx_tup_fetch). Le rapport est écrit
+dans benchmarks/results/api_<commit git>.json pour comparer les versions.
+
+Usage :
+    python -m benchmarks.generate_data --dbname odoo_devlog_bench --create --commits 200000
+    python -m benchmarks.bench_api --dbname odoo_devlog_bench --iterations 20
+    python -m benchmarks.bench_api --dbname odoo_devlog_bench --compare benchmarks/results/api_abc1234.json
+    python -m benchmarks.bench_api --only commits_all_1000 migration_search --no-compression
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from datetime import datetime
+
+from benchmarks.database import ROOT_DIR, SERVER_CONFIG, connect
+
+RESULTS_DIR = ROOT_DIR / "benchmarks" / "results"
+
+# Délai laissé aux backends PostgreSQL pour publier leurs statistiques
+STATS_SETTLE_DELAY = 1.0
+
+# ============================================================
+# SCÉNARIOS
+# ============================================================
+def build_scenarios(conn):
+    """Construit la liste des appels à partir du contenu de la base"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT b.id, b.name, b.repo_id
+            FROM odoo_devlog.branches b
+            JOIN odoo_devlog.commits c ON c.branch_id = b.id
+            GROUP BY b.id, b.name, b.repo_id
+            ORDER BY COUNT(*) DESC
+            LIMIT 1;
+        """)
+        branch_id, branch_name, repo_id = cur.fetchone()
+        cur.execute("SELECT DISTINCT name FROM odoo_devlog.branches WHERE name <> %s ORDER BY name LIMIT 1;", (branch_name,))
+        other_branch = cur.fetchone()[0]
+        cur.execute("SELECT id FROM odoo_devlog.commits WHERE branch_id = %s ORDER BY committed_date DESC LIMIT 1 OFFSET 50;", (branch_id,))
+        commit_id = cur.fetchone()[0]
+        cur.execute("""
+            SELECT author_name FROM odoo_devlog.commits
+            WHERE author_name IS NOT NULL
+            GROUP BY author_name ORDER BY COUNT(*) DESC LIMIT 1;
+        """)
+        author = cur.fetchone()[0].split(" ")[0]
+        cur.execute("SELECT name FROM odoo_devlog.modules ORDER BY id LIMIT 1;")
+        module = cur.fetchone()[0]
+        cur.execute("""
+            SELECT model, name FROM odoo_devlog.patch_symbols
+            WHERE kind = 'field' AND model IS NOT NULL
+            GROUP BY model, name ORDER BY COUNT(*) DESC LIMIT 1;
+        """)
+        symbol_model, symbol_name = cur.fetchone() or ("res.partner", "name")
+        cur.execute("SELECT file_change_id FROM odoo_devlog.patch_signatures ORDER BY file_change_id DESC LIMIT 1 OFFSET 100;")
+        similar_file = cur.fetchone()
+
+    return [
+        ("repositories", "/repositories", {}),
+        ("branches", f"/repositories/{repo_id}/branches", {}),
+        ("commits_all", "/commits/all", {"branch_name": branch_name, "limit": 100}),
+        ("commits_all_1000", "/commits/all", {"branch_name": branch_name, "limit": 1000}),
+        ("commits_all_author", "/commits/all", {"branch_name": branch_name, "author": author}),
+        ("commits_all_search", "/commits/all", {"branch_name": branch_name, "search": "[FIX]"}),
+        ("commits_all_type", "/commits/all", {"branch_name": branch_name, "commit_type": "REV"}),
+        ("commits_all_module", "/commits/all", {"branch_name": branch_name, "module": module}),
+        ("branch_commits", f"/branches/{branch_id}/commits", {"limit": 100}),
+        ("branch_commits_offset", f"/branches/{branch_id}/commits", {"limit": 100, "offset": 2000}),
+        ("branch_commits_module", f"/branches/{branch_id}/commits", {"module": module}),
+        ("commit_detail", f"/commits/{commit_id}", {}),
+        ("compare_all", "/compare/all", {"branch1": other_branch, "branch2": branch_name}),
+        ("compare_repo", "/compare", {"repo_id": repo_id, "branch1": other_branch, "branch2": branch_name}),
+        ("stats_summary", "/stats/summary", {}),
+        ("top_contributors", "/stats/top-contributors", {"limit": 20}),
+        ("migration_search", "/search/migration", {"term": "fields.many2one", "from_version": other_branch, "to_version": branch_name}),
+        ("migration_search_module", "/search/migration", {"term": "_compute_", "from_version": other_branch, "to_version": branch_name, "module": module}),
+        ("migration_search_type", "/search/migration", {"term": "ondelete", "from_version": other_branch, "to_version": branch_name, "commit_type": "FIX"}),
+        ("migration_search_removed", "/search/migration", {"term": "fields.many2one", "from_version": other_branch, "to_version": branch_name, "change": "removed"}),
+        ("migration_search_regex", "/search/migration", {"term": "def _compute_\\w+_amount", "from_version": other_branch, "to_version": branch_name, "use_regex": "true"}),
+        ("migration_search_regex_posix", "/search/migration", {"term": "[[:<:]]partner", "from_version": other_branch, "to_version": branch_name, "use_regex": "true"}),
+        ("symbols", "/symbols", {"model": symbol_model, "name": symbol_name, "from_version": other_branch, "to_version": branch_name}),
+        ("symbols_prefix", "/symbols", {"q": f"{symbol_model}.", "from_version": other_branch, "to_version": branch_name}),
+        ("similar_changes", f"/files/{similar_file[0] if similar_file else 0}/similar", {}),
+        ("modules", "/modules", {}),
+        ("modules_search", "/modules", {"search": module[:3]}),
+        ("timeline", "/analytics/timeline", {"branch_id": branch_id, "days": 365}),
+        ("module_analytics", "/analytics/modules", {"branch_name": branch_name}),
+        ("fetch_status", "/admin/fetch-status", {})
+    ]
+
+# ============================================================
+# MESURES
+# ============================================================
+def rows_scanned(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_stat_clear_snapshot();")
+        cur.execute("""
+            SELECT COALESCE(SUM(seq_tup_read + COALESCE(idx_tup_fetch, 0)), 0)
+            FROM pg_stat_user_tables
+            WHERE schemaname = 'odoo_devlog';
+        """)
+        value = cur.fetchone()[0]
+    conn.commit()
+    return int(value)
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+def measure(client, stats_conn, path, params, iterations, warmup, headers=None):
+    for _ in range(warmup):
+        client.get(path, params=params, headers=headers)
+
+    before = rows_scanned(stats_conn)
+    latencies = []
+    cpu_times = []
+    status = None
+    size = json_size = 0
+    for _ in range(iterations):
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        response = client.get(path, params=params, headers=headers)
+        cpu_times.append((time.process_time() - cpu_started) * 1000)
+        latencies.append((time.perf_counter() - started) * 1000)
+        status = response.status_code
+        # content-length : taille sur le réseau (compressée) ; content : JSON décodé
+        json_size = len(response.content)
+        size = int(response.headers.get("content-length", json_size))
+    time.sleep(STATS_SETTLE_DELAY)
+    after = rows_scanned(stats_conn)
+
+    return {
+        "status": status,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "cpu_ms": round(percentile(cpu_times, 50), 2),
+        "rows_scanned": (after - before) // iterations,
+        "response_bytes": size,
+        "json_bytes": json_size
+    }
+
+def git_revision():
+    try:
+        sha = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, text=True).strip()
+        dirty = bool(subprocess.check_output(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT_DIR, text=True).strip())
+        return sha, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+def dataset_scale(conn):
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM odoo_devlog.commits),
+                (SELECT COUNT(*) FROM odoo_devlog.file_changes),
+                (SELECT pg_size_pretty(pg_database_size(current_database())));
+        """)
+        commits, files, size = cur.fetchone()
+    conn.commit()
+    return {"commits": commits, "file_changes": files, "database_size": size}
+
+# ============================================================
+# RAPPORT
+# ============================================================
+def print_report(report, baseline=None):
+    print("=" * 112)
+    print(f"📊 API @ {report['revision']}{' (modifié)' if report['dirty'] else ''} — "
+          f"{report['scale']['commits']} commits, {report['scale']['file_changes']} fichiers")
+    print("=" * 112)
+    header = (f"{'endpoint':<26}{'status':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'CPU ms':>10}"
+              f"{'lignes lues':>14}{'octets':>12}")
+    if baseline:
+        header += f"{'Δ p50':>10}{'Δ CPU':>10}{'Δ octets':>10}"
+    print(header)
+    for name, result in report["endpoints"].items():
+        line = (f"{name:<26}{result['status']:>7}{result['p50_ms']:>10}{result['p95_ms']:>10}"
+                f"{result['p99_ms']:>10}{result.get('cpu_ms', '-'):>10}{result['rows_scanned']:>14}{result['response_bytes']:>12}")
+        previous = (baseline or {}).get("endpoints", {}).get(name)
+        if previous:
+            for key in ("p50_ms", "cpu_ms", "response_bytes"):
+                if previous.get(key) and key in result:
+                    line += f"{(result[key] - previous[key]) / previous[key] * 100:>+9.0f}%"
+                else:
+                    line += f"{'-':>10}"
+        print(line)
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark des endpoints de l'API")
+    parser.add_argument("--dbname", default="odoo_devlog_bench", help="Base peuplée par generate_data")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--only", nargs="+", help="Ne mesurer que ces scénarios")
+    parser.add_argument("--compare", help="Rapport JSON précédent à comparer")
+    parser.add_argument("--no-compression", action="store_true",
+                        help="Demander des réponses non compressées (Accept-Encoding: identity)")
+    parser.add_argument("--output", help="Chemin du rapport (défaut: benchmarks/results/api_<commit>.json)")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    # api.py lit sa configuration à l'import
+    os.environ["DB_NAME"] = args.dbname
+    sys.path.insert(0, str(ROOT_DIR / "backend"))
+    import api
+    from fastapi.testclient import TestClient
+    api.DB_CONFIG.update({"dbname": args.dbname, "port": SERVER_CONFIG["port"]})
+
+    stats_conn = connect(args.dbname)
+    scenarios = build_scenarios(stats_conn)
+    if args.only:
+        scenarios = [s for s in scenarios if s[0] in args.only]
+
+    revision, dirty = git_revision()
+    report = {
+        "revision": revision,
+        "dirty": dirty,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "scale": dataset_scale(stats_conn),
+        "iterations": args.iterations,
+        "compression": not args.no_compression,
+        "endpoints": {}
+    }
+
+    # Sans précision, httpx annonce gzip comme un navigateur
+    headers = {"Accept-Encoding": "identity"} if args.no_compression else None
+    with TestClient(api.app) as client:
+        for name, path, params in scenarios:
+            print(f"   → {name}...", flush=True)
+            report["endpoints"][name] = measure(client, stats_conn, path, params, args.iterations, args.warmup, headers)
+    stats_conn.close()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    output = args.output or RESULTS_DIR / f"api_{revision}{'_dirty' if dirty else ''}.json"
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Rapport: {output}")
+
+if __name__ == "__main__":
+    main()
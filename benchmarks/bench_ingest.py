@@ -0,0 +1,216 @@
+"""Benchmark d'ingestion : fetch_commits.py contre un faux GitHub local.
+
+Lance benchmarks/fake_github.py dans un sous-processus, crée une base
+PostgreSQL jetable, importe une branche via le pipeline de fetch_commits.py
+puis mesure commits/s, appels API par commit, allers-retours base par commit
+et pic de mémoire.
+
+Usage :
+    python -m benchmarks.bench_ingest --commits 500 --files 5 --fetcher graphql
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import logging
+import subprocess
+import urllib.request
+import psycopg2.extensions
+from datetime import datetime
+
+from benchmarks.database import (
+    ROOT_DIR, SERVER_CONFIG, connect, create_throwaway_database, drop_database,
+    register_repository, peak_rss_mb
+)
+
+# ============================================================
+# COMPTAGE DES ALLERS-RETOURS BASE
+# ============================================================
+class RoundTrips:
+    executes = 0
+    commits = 0
+    rollbacks = 0
+
+    @classmethod
+    def total(cls):
+        return cls.executes + cls.commits + cls.rollbacks
+
+class CountingCursor(psycopg2.extensions.cursor):
+    def execute(self, query, vars=None):
+        RoundTrips.executes += 1
+        return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        vars_list = list(vars_list)
+        RoundTrips.executes += len(vars_list)
+        return super().executemany(query, vars_list)
+
+class CountingConnection(psycopg2.extensions.connection):
+    def commit(self):
+        RoundTrips.commits += 1
+        return super().commit()
+
+    def rollback(self):
+        RoundTrips.rollbacks += 1
+        return super().rollback()
+
+# ============================================================
+# FAUX SERVEUR GITHUB
+# ============================================================
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_fake_github(args, port):
+    cmd = [
+        sys.executable, "-m", "benchmarks.fake_github",
+        "--port", str(port),
+        "--repo", args.repo,
+        "--branches", args.branch,
+        "--commits", str(args.commits),
+        "--files", str(args.files),
+        "--patch-size", str(args.patch_size),
+        "--latency", str(args.latency),
+        "--rate-limit", str(args.rate_limit),
+        "--rate-window", str(args.rate_window)
+    ]
+    process = subprocess.Popen(cmd, cwd=ROOT_DIR, stdout=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            fake_github_call(url, "/_bench/stats")
+            return process, url
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Le faux serveur GitHub n'a pas démarré")
+
+def fake_github_call(url, path, method="GET"):
+    request = urllib.request.Request(url + path, data=b"{}" if method == "POST" else None, method=method)
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return json.loads(response.read())
+
+# ============================================================
+# SCÉNARIO
+# ============================================================
+def run(args):
+    port = args.port or free_port()
+    server, url = start_fake_github(args, port)
+    dbname = create_throwaway_database()
+
+    try:
+        conn = connect(dbname)
+        register_repository(conn, args.repo, [args.branch])
+        conn.close()
+
+        # fetch_commits lit sa configuration à l'import
+        os.environ.update({
+            "GITHUB_TOKEN": "bench",
+            "GITHUB_API_URL": url,
+            "GITHUB_GRAPHQL_URL": f"{url}/graphql",
+            "DB_NAME": dbname,
+            "MAX_COMMITS_PER_BRANCH": "0"
+        })
+        sys.path.insert(0, str(ROOT_DIR / "scripts"))
+        import fetch_commits
+
+        if not args.verbose:
+            for handler in logging.getLogger().handlers:
+                handler.setLevel(logging.WARNING)
+
+        fetch_commits.DB_CONFIG.update({
+            "dbname": dbname,
+            "port": SERVER_CONFIG["port"],
+            "connection_factory": CountingConnection,
+            "cursor_factory": CountingCursor
+        })
+
+        fake_github_call(url, "/_bench/reset", method="POST")
+        started = time.perf_counter()
+        if args.mode == "full":
+            fetch_commits.fetch_commits_for_branch(args.repo, args.branch, args.fetcher)
+        else:
+            fetch_commits.fetch_new_commits_only(args.repo, args.branch, args.fetcher)
+        elapsed = time.perf_counter() - started
+        api = fake_github_call(url, "/_bench/stats")
+
+        conn = connect(dbname)
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM odoo_devlog.commits;")
+            commits = cur.fetchone()[0]
+            cur.execute("SELECT COUNT(*) FROM odoo_devlog.file_changes;")
+            files = cur.fetchone()[0]
+        conn.close()
+    finally:
+        server.terminate()
+        server.wait()
+        if not args.keep_db:
+            drop_database(dbname)
+
+    per_commit = lambda value: round(value / commits, 3) if commits else None
+    return {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "scenario": {
+            "mode": args.mode,
+            "fetcher": args.fetcher,
+            "commits": args.commits,
+            "files_per_commit": args.files,
+            "patch_size": args.patch_size,
+            "latency": args.latency,
+            "rate_limit": args.rate_limit
+        },
+        "results": {
+            "elapsed_s": round(elapsed, 3),
+            "commits_imported": commits,
+            "file_changes": files,
+            "commits_per_s": round(commits / elapsed, 2) if elapsed else None,
+            "api_calls": api["requests"],
+            "api_calls_by_route": api["by_route"],
+            "api_calls_per_commit": per_commit(api["requests"]),
+            "db_round_trips": RoundTrips.total(),
+            "db_round_trips_per_commit": per_commit(RoundTrips.total()),
+            "peak_rss_mb": peak_rss_mb()
+        }
+    }
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark d'ingestion contre un faux GitHub")
+    parser.add_argument("--mode", default="full", choices=["full", "incremental"])
+    parser.add_argument("--fetcher", default="rest", choices=["rest", "graphql"])
+    parser.add_argument("--repo", default="odoo/odoo")
+    parser.add_argument("--branch", default="master")
+    parser.add_argument("--commits", type=int, default=500)
+    parser.add_argument("--files", type=int, default=5)
+    parser.add_argument("--patch-size", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Latence simulée par requête GitHub (secondes)")
+    parser.add_argument("--rate-limit", type=int, default=0)
+    parser.add_argument("--rate-window", type=int, default=3600)
+    parser.add_argument("--port", type=int, default=0, help="Port du faux GitHub (0 = port libre)")
+    parser.add_argument("--keep-db", action="store_true", help="Ne pas supprimer la base jetable")
+    parser.add_argument("--output", help="Fichier JSON où ajouter le résultat")
+    parser.add_argument("--verbose", action="store_true", help="Afficher les logs de fetch_commits")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    report = run(args)
+    results = report["results"]
+
+    print("=" * 60)
+    print(f"📊 INGESTION {args.mode.upper()} / {args.fetcher.upper()} — {args.commits} commits x {args.files} fichiers")
+    print("=" * 60)
+    print(f"   • Durée               : {results['elapsed_s']} s")
+    print(f"   • Débit               : {results['commits_per_s']} commits/s")
+    print(f"   • Appels API / commit : {results['api_calls_per_commit']} ({results['api_calls']} au total)")
+    print(f"   • Requêtes BDD / commit : {results['db_round_trips_per_commit']} ({results['db_round_trips']} au total)")
+    print(f"   • Pic mémoire (RSS)   : {results['peak_rss_mb']} Mo")
+
+    if args.output:
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(report) + "\n")
+
+if __name__ == "__main__":
+    main()
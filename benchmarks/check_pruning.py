@@ -0,0 +1,127 @@
+"""Vérifie l'élagage des partitions (partition pruning) sur les requêtes de l'API.
+
+Les endpoints sont appelés via le TestClient FastAPI avec la capture
+EXPLAIN (ANALYZE, BUFFERS) de backend/profiling.py activée pour chaque
+requête : on compte, par table partitionnée, les partitions réellement
+lues (les nœuds « never executed » ou retirés par « Subplans Removed »
+ne comptent pas).
+
+Chaque scénario est jugé sur sa requête la plus lente, la requête
+principale : les sondages d'index auxiliaires (min/max de branch_date_range)
+touchent toutes les partitions mais ne lisent qu'une page d'index vide par
+partition. Les recherches par id seul (détail d'un commit) sont affichées
+sans être vérifiées : sans committed_date, chaque partition est sondée sur
+sa clé primaire.
+
+Usage :
+    python -m benchmarks.generate_data --dbname odoo_devlog_bench --create --commits 200000
+    python -m benchmarks.check_pruning --dbname odoo_devlog_bench
+    python -m benchmarks.check_pruning --dbname odoo_devlog_bench --plans   # affiche les plans
+"""
+import os
+import re
+import sys
+import argparse
+
+from benchmarks.database import ROOT_DIR, SERVER_CONFIG, connect
+from benchmarks.bench_api import build_scenarios
+
+PARTITIONED_TABLES = ["commits", "file_changes", "patch_hunks", "patch_symbols"]
+
+# Requêtes dont les partitions lues doivent être un sous-ensemble strict
+PRUNED_SCENARIOS = [
+    "commits_all", "branch_commits", "branch_commits_offset",
+    "timeline", "migration_search", "migration_search_module", "migration_search_type",
+    "migration_search_removed", "symbols", "symbols_prefix"
+]
+
+# Affichées pour information seulement
+REPORTED_SCENARIOS = ["commit_detail"]
+
+PARTITION_SCAN = re.compile(r"\bon (commits|file_changes|patch_hunks|patch_symbols)_(y\d{4}|old)\b")
+
+def partition_counts(conn):
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT parent.relname, COUNT(*)
+            FROM pg_inherits i
+            JOIN pg_class parent ON parent.oid = i.inhparent
+            JOIN pg_namespace n ON n.oid = parent.relnamespace
+            WHERE n.nspname = 'odoo_devlog' AND parent.relname = ANY(%s)
+            GROUP BY parent.relname;
+        """, (PARTITIONED_TABLES,))
+        counts = dict(cur.fetchall())
+    conn.commit()
+    return counts
+
+def scanned_partitions(plan):
+    """Partitions effectivement lues d'après un plan EXPLAIN ANALYZE texte"""
+    scanned = {table: set() for table in PARTITIONED_TABLES}
+    for line in plan.splitlines():
+        if "never executed" in line:
+            continue
+        for table, suffix in PARTITION_SCAN.findall(line):
+            scanned[table].add(suffix)
+    return scanned
+
+def run(args):
+    # api.py lit sa configuration à l'import
+    os.environ["DB_NAME"] = args.dbname
+    sys.path.insert(0, str(ROOT_DIR / "backend"))
+    import api
+    import profiling
+    from fastapi.testclient import TestClient
+    api.DB_CONFIG.update({"dbname": args.dbname, "port": SERVER_CONFIG["port"]})
+
+    # Plan capturé pour chaque SELECT, classement assez large pour tout garder
+    profiling.EXPLAIN_THRESHOLD_MS = 0.0001
+    profiling.SLOW_QUERY_TOP_N = 10000
+
+    conn = connect(args.dbname)
+    totals = partition_counts(conn)
+    scenarios = [s for s in build_scenarios(conn) if s[0] in PRUNED_SCENARIOS + REPORTED_SCENARIOS]
+    conn.close()
+
+    failures = 0
+    print(f"{'scénario':<26}" + "".join(f"{table + ' lues':>22}" for table in PARTITIONED_TABLES))
+    with TestClient(api.app) as client:
+        for name, path, params in scenarios:
+            profiling.slow_queries.clear()
+            client.get(path, params=params)
+
+            # Instantané trié du plus lent au plus rapide
+            queries = [q for q in profiling.slow_queries_snapshot() if q["plan"]]
+            if not queries:
+                print(f"{name:<26}  (aucun plan capturé)")
+                continue
+            scanned = scanned_partitions(queries[0]["plan"])
+
+            pruned = all(len(scanned[table]) < totals.get(table, 0) for table in PARTITIONED_TABLES if scanned[table])
+            line = f"{name:<26}"
+            for table in PARTITIONED_TABLES:
+                line += f"{len(scanned[table]):>12} / {totals.get(table, 0):<7}"
+            if name in REPORTED_SCENARIOS:
+                line += "  (information)"
+            elif not pruned:
+                failures += 1
+                line += "  ❌ toutes les partitions"
+            print(line)
+
+            if args.plans:
+                print(queries[0]["plan"], end="\n\n")
+
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vérifie l'élagage des partitions sur les endpoints")
+    parser.add_argument("--dbname", default="odoo_devlog_bench", help="Base peuplée par generate_data")
+    parser.add_argument("--plans", action="store_true", help="Afficher les plans EXPLAIN capturés")
+    args = parser.parse_args(argv)
+    failures = run(args)
+    if failures:
+        print(f"\n❌ {failures} scénario(s) sans élagage")
+        sys.exit(1)
+    print("\n✅ Élagage vérifié")
+
+if __name__ == "__main__":
+    main()
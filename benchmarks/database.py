@@ -0,0 +1,87 @@
+import os
+import sys
+import psycopg2
+from pathlib import Path
+from dotenv import load_dotenv
+from database.migrate import apply_migrations
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+load_dotenv()
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+SCHEMA_FILE = ROOT_DIR / "database" / "schema.sql"
+
+SERVER_CONFIG = {
+    "user": os.getenv("DB_USER"),
+    "password": os.getenv("DB_PASSWORD"),
+    "host": os.getenv("DB_HOST", "localhost"),
+    "port": int(os.getenv("DB_PORT", 5432))
+}
+
+# Base utilisée pour lancer CREATE/DROP DATABASE
+ADMIN_DBNAME = os.getenv("BENCH_ADMIN_DB", "postgres")
+
+# ============================================================
+# BASE JETABLE
+# ============================================================
+def connect(dbname, **kwargs):
+    return psycopg2.connect(dbname=dbname, **SERVER_CONFIG, options='-c client_encoding=UTF8', **kwargs)
+
+def create_throwaway_database(prefix="odoo_devlog_bench", name=None):
+    """Crée une base vide avec le schéma odoo_devlog et retourne son nom"""
+    dbname = name or f"{prefix}_{os.getpid()}"
+    admin = connect(ADMIN_DBNAME)
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute(f'DROP DATABASE IF EXISTS "{dbname}";')
+        cur.execute(f'CREATE DATABASE "{dbname}";')
+    admin.close()
+
+    conn = connect(dbname)
+    with conn.cursor() as cur:
+        cur.execute(SCHEMA_FILE.read_text(encoding="utf-8"))
+    conn.commit()
+    apply_migrations(conn, verbose=False)
+    conn.close()
+    return dbname
+
+def drop_database(dbname):
+    admin = connect(ADMIN_DBNAME)
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute(f'DROP DATABASE IF EXISTS "{dbname}";')
+    admin.close()
+
+def register_repository(conn, full_name, branches):
+    """Enregistre un dépôt et ses branches comme le ferait init_db.py"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO odoo_devlog.repositories (full_name, default_branch, html_url)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (full_name) DO UPDATE SET default_branch = EXCLUDED.default_branch
+            RETURNING id;
+        """, (full_name, branches[0], f"https://github.com/{full_name}"))
+        repo_id = cur.fetchone()[0]
+        for branch in branches:
+            cur.execute("""
+                INSERT INTO odoo_devlog.branches (repo_id, name, is_default)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (repo_id, name) DO NOTHING;
+            """, (repo_id, branch, branch == branches[0]))
+    conn.commit()
+    return repo_id
+
+# ============================================================
+# MÉMOIRE
+# ============================================================
+def peak_rss_mb():
+    """Pic de mémoire résidente du processus courant (None si indisponible)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en octets sur macOS, en kilo-octets ailleurs
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
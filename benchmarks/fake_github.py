@@ -0,0 +1,402 @@
+"""Faux serveur GitHub (REST + GraphQL) pour mesurer l'ingestion hors ligne.
+
+Les commits sont générés de façon déterministe à partir de leur index : le
+serveur ne stocke qu'un index sha -> position. Il imite les réponses que
+PyGithub et scripts/github_graphql.py consomment (pagination par en-tête
+Link, en-têtes X-RateLimit-*, pages GraphQL de 100 commits).
+
+Usage :
+    python -m benchmarks.fake_github --port 8765 --commits 2000 --files 5
+"""
+import json
+import time
+import zlib
+import hashlib
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, urlencode
+
+BASE_DATE = datetime(2025, 1, 1, tzinfo=timezone.utc)
+MODULES = ["account", "sale", "purchase", "stock", "mrp", "website", "hr", "crm", "project", "point_of_sale"]
+
+# GitHub ne renvoie pas plus de 3000 fichiers par commit (pages de 300)
+MAX_COMMIT_FILES = 3000
+
+# ============================================================
+# DONNÉES SYNTHÉTIQUES
+# ============================================================
+class SyntheticRepository:
+    def __init__(self, full_name, branches, commits, files_per_commit, patch_size):
+        self.full_name = full_name
+        self.branches = branches
+        self.commits = commits
+        self.files_per_commit = files_per_commit
+        self.patch_size = patch_size
+        self.index = {}
+        for branch in branches:
+            for i in range(commits):
+                self.index[self.sha(branch, i)] = (branch, i)
+
+    def sha(self, branch, i):
+        return hashlib.sha1(f"{self.full_name}:{branch}:{i}".encode()).hexdigest()
+
+    def date(self, i):
+        return (BASE_DATE - timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    def message(self, i):
+        module = MODULES[i % len(MODULES)]
+        tag = ["FIX", "IMP", "ADD", "REF"][i % 4]
+        return f"[{tag}] {module}: synthetic change #{i}\n\nBenchmark commit generated by fake_github."
+
+    def author(self, i):
+        n = i % 40
+        return {"name": f"Dev {n}", "email": f"dev{n}@example.com", "date": self.date(i)}
+
+    def patch(self, branch, i, j):
+        header = f"@@ -{10 + j},6 +{10 + j},8 @@ class Model{j}(models.Model):\n"
+        lines = []
+        size = len(header)
+        k = 0
+        while size < self.patch_size:
+            line = f"+    field_{i}_{j}_{k} = fields.Char(string='Field {k}')\n"
+            lines.append(line)
+            size += len(line)
+            k += 1
+        return header + "".join(lines)
+
+    def files(self, branch, i):
+        files = []
+        for j in range(self.files_per_commit):
+            module = MODULES[(i + j) % len(MODULES)]
+            patch = self.patch(branch, i, j)
+            additions = patch.count("\n+")
+            files.append({
+                "sha": hashlib.sha1(f"{branch}:{i}:{j}".encode()).hexdigest(),
+                "filename": f"addons/{module}/models/file_{j}.py",
+                "status": "modified",
+                "additions": additions,
+                "deletions": 0,
+                "changes": additions,
+                "patch": patch,
+                "blob_url": None,
+                "raw_url": None,
+                "contents_url": None
+            })
+        return files
+
+    def parents(self, branch, i):
+        return [self.sha(branch, i + 1)] if i + 1 < self.commits else []
+
+# ============================================================
+# SERVEUR
+# ============================================================
+class FakeGitHubState:
+    def __init__(self, repositories, latency=0.0, rate_limit=0, rate_window=3600):
+        self.repositories = {r.full_name: r for r in repositories}
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.requests = 0
+        self.by_route = {}
+        self.window_start = time.time()
+        self.window_used = 0
+
+    def record(self, route):
+        with self.lock:
+            now = time.time()
+            if now - self.window_start >= self.rate_window:
+                self.window_start = now
+                self.window_used = 0
+            self.requests += 1
+            self.window_used += 1
+            self.by_route[route] = self.by_route.get(route, 0) + 1
+
+    def rate_headers(self):
+        limit = self.rate_limit or 5000
+        remaining = max(0, limit - self.window_used) if self.rate_limit else limit
+        return {
+            "X-RateLimit-Limit": str(limit),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Used": str(self.window_used),
+            "X-RateLimit-Reset": str(int(self.window_start + self.rate_window)),
+            "X-RateLimit-Resource": "core"
+        }
+
+    def exhausted(self):
+        return self.rate_limit and self.window_used > self.rate_limit
+
+class FakeGitHubHandler(BaseHTTPRequestHandler):
+    state = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def base_url(self):
+        return f"http://{self.headers.get('Host')}"
+
+    def send_json(self, payload, status=200, extra_headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in self.state.rate_headers().items():
+            self.send_header(key, value)
+        for key, value in (extra_headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _begin(self, route):
+        self.state.record(route)
+        if self.state.latency:
+            time.sleep(self.state.latency)
+        if self.state.exhausted():
+            self.send_json({"message": "API rate limit exceeded"}, status=403)
+            return False
+        return True
+
+    # --------------------------------------------------------
+    # GET
+    # --------------------------------------------------------
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        parts = [p for p in parsed.path.split("/") if p]
+
+        if parsed.path == "/_bench/stats":
+            return self.send_json({"requests": self.state.requests, "by_route": self.state.by_route})
+
+        if parsed.path == "/rate_limit":
+            if not self._begin("rate_limit"):
+                return
+            headers = self.state.rate_headers()
+            core = {
+                "limit": int(headers["X-RateLimit-Limit"]),
+                "remaining": int(headers["X-RateLimit-Remaining"]),
+                "reset": int(headers["X-RateLimit-Reset"]),
+                "used": int(headers["X-RateLimit-Used"])
+            }
+            return self.send_json({"resources": {"core": core, "search": core, "graphql": core}, "rate": core})
+
+        if len(parts) >= 3 and parts[0] == "repos":
+            full_name = f"{parts[1]}/{parts[2]}"
+            repo = self.state.repositories.get(full_name)
+            if not repo:
+                return self.send_json({"message": "Not Found"}, status=404)
+
+            if len(parts) == 3:
+                if not self._begin("repo"):
+                    return
+                return self.send_json(self.repo_json(repo))
+            if len(parts) == 4 and parts[3] == "commits":
+                if not self._begin("list_commits"):
+                    return
+                return self.list_commits(repo, params)
+            if len(parts) == 5 and parts[3] == "commits":
+                if not self._begin("get_commit"):
+                    return
+                return self.get_commit(repo, parts[4], params)
+            if len(parts) == 5 and parts[3] == "compare":
+                if not self._begin("compare"):
+                    return
+                return self.compare(repo, parts[4])
+
+        self.send_json({"message": "Not Found"}, status=404)
+
+    def repo_json(self, repo):
+        owner, name = repo.full_name.split("/")
+        return {
+            "id": zlib.crc32(repo.full_name.encode()) % 100000,
+            "name": name,
+            "full_name": repo.full_name,
+            "owner": {"login": owner},
+            "url": f"{self.base_url}/repos/{repo.full_name}",
+            "html_url": f"https://github.com/{repo.full_name}",
+            "default_branch": repo.branches[0]
+        }
+
+    def commit_json(self, repo, branch, i, with_files=False, page=1, per_page=300):
+        sha = repo.sha(branch, i)
+        author = repo.author(i)
+        data = {
+            "sha": sha,
+            "url": f"{self.base_url}/repos/{repo.full_name}/commits/{sha}",
+            "html_url": f"https://github.com/{repo.full_name}/commit/{sha}",
+            "commit": {
+                "message": repo.message(i),
+                "author": author,
+                "committer": author,
+                "comment_count": 0
+            },
+            "parents": [
+                {"sha": p, "url": f"{self.base_url}/repos/{repo.full_name}/commits/{p}"}
+                for p in repo.parents(branch, i)
+            ],
+            "author": None,
+            "committer": None
+        }
+        if with_files:
+            files = repo.files(branch, i)
+            additions = sum(f["additions"] for f in files)
+            data["stats"] = {"additions": additions, "deletions": 0, "total": additions}
+            # Comme GitHub : au plus MAX_COMMIT_FILES fichiers, les stats restent complètes
+            served = files[:MAX_COMMIT_FILES]
+            data["files"] = served[(page - 1) * per_page:page * per_page]
+        return data
+
+    def link_header(self, path, params, page, has_next):
+        if not has_next:
+            return {}
+        next_params = dict(params, page=str(page + 1))
+        return {"Link": f'<{self.base_url}{path}?{urlencode(next_params)}>; rel="next"'}
+
+    def list_commits(self, repo, params):
+        branch = params.get("sha", repo.branches[0])
+        if branch not in repo.branches:
+            return self.send_json({"message": "No commit found for SHA"}, status=404)
+        page = int(params.get("page", 1))
+        per_page = min(int(params.get("per_page", 30)), 100)
+        start = (page - 1) * per_page
+        end = min(start + per_page, repo.commits)
+        items = [self.commit_json(repo, branch, i) for i in range(start, end)]
+        path = urlparse(self.path).path
+        self.send_json(items, extra_headers=self.link_header(path, params, page, end < repo.commits))
+
+    def get_commit(self, repo, sha, params):
+        location = repo.index.get(sha)
+        if not location:
+            return self.send_json({"message": "No commit found for SHA"}, status=422)
+        branch, i = location
+        page = int(params.get("page", 1))
+        per_page = min(int(params.get("per_page", 300)), 300)
+        path = urlparse(self.path).path
+        has_next = page * per_page < min(repo.files_per_commit, MAX_COMMIT_FILES)
+        self.send_json(
+            self.commit_json(repo, branch, i, with_files=True, page=page, per_page=per_page),
+            extra_headers=self.link_header(path, params, page, has_next)
+        )
+
+    def compare(self, repo, spec):
+        # base...head sur une même branche : commits de head non contenus dans base, du plus ancien au plus récent
+        base, _, head = spec.partition("...")
+        base_location, head_location = repo.index.get(base), repo.index.get(head)
+        if not base_location or not head_location or base_location[0] != head_location[0]:
+            return self.send_json({"message": "Not Found"}, status=404)
+        branch = head_location[0]
+        indexes = range(base_location[1] - 1, head_location[1] - 1, -1)
+        self.send_json({
+            "url": f"{self.base_url}/repos/{repo.full_name}/compare/{spec}",
+            "status": "ahead" if indexes else "identical",
+            "ahead_by": len(indexes),
+            "behind_by": 0,
+            "total_commits": len(indexes),
+            "commits": [self.commit_json(repo, branch, i) for i in indexes],
+            "files": []
+        })
+
+    # --------------------------------------------------------
+    # POST
+    # --------------------------------------------------------
+    def do_POST(self):
+        parsed = urlparse(self.path)
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        if parsed.path == "/_bench/reset":
+            self.state.reset_stats()
+            return self.send_json({"status": "reset"})
+
+        if parsed.path in ("/graphql", "/api/graphql"):
+            if not self._begin("graphql"):
+                return
+            return self.graphql(body.get("variables") or {})
+
+        self.send_json({"message": "Not Found"}, status=404)
+
+    def graphql(self, variables):
+        full_name = f"{variables.get('owner')}/{variables.get('name')}"
+        repo = self.state.repositories.get(full_name)
+        branch = (variables.get("ref") or "").replace("refs/heads/", "")
+        headers = self.state.rate_headers()
+        rate_limit = {
+            "cost": 1,
+            "remaining": int(headers["X-RateLimit-Remaining"]),
+            "resetAt": datetime.fromtimestamp(int(headers["X-RateLimit-Reset"]), timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        }
+        if not repo or branch not in repo.branches:
+            return self.send_json({"data": {"rateLimit": rate_limit, "repository": {"ref": None} if repo else None}})
+
+        start = int(variables.get("cursor") or 0)
+        page_size = min(int(variables.get("pageSize") or 100), 100)
+        end = min(start + page_size, repo.commits)
+        nodes = []
+        for i in range(start, end):
+            author = repo.author(i)
+            additions = sum(f["additions"] for f in repo.files(branch, i))
+            parents = repo.parents(branch, i)
+            nodes.append({
+                "oid": repo.sha(branch, i),
+                "url": f"https://github.com/{repo.full_name}/commit/{repo.sha(branch, i)}",
+                "message": repo.message(i),
+                "additions": additions,
+                "deletions": 0,
+                "changedFilesIfAvailable": repo.files_per_commit,
+                "comments": {"totalCount": 0},
+                "author": author,
+                "committer": author,
+                "parents": {"totalCount": len(parents), "nodes": [{"oid": p} for p in parents]}
+            })
+
+        history = {
+            "pageInfo": {"hasNextPage": end < repo.commits, "endCursor": str(end)},
+            "nodes": nodes
+        }
+        self.send_json({"data": {
+            "rateLimit": rate_limit,
+            "repository": {"ref": {"target": {"history": history}}}
+        }})
+
+# ============================================================
+# LANCEMENT
+# ============================================================
+def make_server(host, port, state):
+    handler = type("BoundFakeGitHubHandler", (FakeGitHubHandler,), {"state": state})
+    return ThreadingHTTPServer((host, port), handler)
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Faux serveur GitHub pour les benchmarks d'ingestion")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--repo", default="odoo/odoo", help="Nom complet du dépôt simulé")
+    parser.add_argument("--branches", nargs="+", default=["master"])
+    parser.add_argument("--commits", type=int, default=1000, help="Commits par branche")
+    parser.add_argument("--files", type=int, default=5, help="Fichiers par commit")
+    parser.add_argument("--patch-size", type=int, default=2000, help="Taille d'un patch en octets")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latence ajoutée par requête (secondes)")
+    parser.add_argument("--rate-limit", type=int, default=0, help="Requêtes autorisées par fenêtre (0 = illimité)")
+    parser.add_argument("--rate-window", type=int, default=3600, help="Durée de la fenêtre de rate limit (secondes)")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    repo = SyntheticRepository(args.repo, args.branches, args.commits, args.files, args.patch_size)
+    state = FakeGitHubState([repo], latency=args.latency, rate_limit=args.rate_limit, rate_window=args.rate_window)
+    server = make_server(args.host, args.port, state)
+    print(f"Fake GitHub prêt sur http://{args.host}:{args.port} ({args.commits} commits x {len(args.branches)} branches)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+"""Générateur de données synthétiques pour le schéma odoo_devlog.
+
+Remplit repositories, branches, modules, authors, commits, file_changes,
+patch_hunks, patch_symbols, patch_signatures et import_log avec des
+distributions proches de l'historique Odoo : modules et auteurs suivant une
+loi de Zipf, tailles de patch log-normales, commits forward-portés d'une
+version à la suivante (même message, nouveau sha, trailer
+X-original-commit). Insertion par COPY, en lots.
+
+Usage :
+    python -m benchmarks.generate_data --dbname odoo_devlog_bench --create --commits 200000
+"""
+import io
+import sys
+import random
+import hashlib
+import argparse
+from datetime import datetime, timedelta
+
+from benchmarks.database import ROOT_DIR, connect, create_throwaway_database, drop_database
+
+sys.path.insert(0, str(ROOT_DIR / "scripts"))
+from patch_hunks import backfill_hunks
+from patch_symbols import backfill_symbols
+from patch_similarity import backfill_signatures
+from commit_message import backfill_commit_tags
+from authors import backfill_authors
+
+REPOSITORIES = ["odoo/odoo", "odoo/enterprise"]
+BRANCHES = ["16.0", "17.0", "18.0", "19.0", "master"]
+
+# Date de création approximative de chaque branche
+BRANCH_START = {
+    "16.0": datetime(2022, 10, 1),
+    "17.0": datetime(2023, 10, 1),
+    "18.0": datetime(2024, 10, 1),
+    "19.0": datetime(2025, 9, 1),
+    "master": datetime(2022, 10, 1)
+}
+END_DATE = datetime(2026, 10, 1)
+
+MODULES = {
+    "odoo/odoo": [
+        "account", "sale", "stock", "purchase", "mrp", "website", "web", "base", "mail", "hr",
+        "point_of_sale", "crm", "project", "website_sale", "l10n_fr", "l10n_be", "l10n_in", "product",
+        "account_payment", "hr_holidays", "calendar", "survey", "event", "fleet", "im_livechat",
+        "sale_stock", "purchase_stock", "stock_account", "delivery", "payment", "portal", "auth_signup",
+        "lunch", "note", "spreadsheet", "html_editor", "barcodes", "uom", "analytic", "repair"
+    ],
+    "odoo/enterprise": [
+        "account_accountant", "account_reports", "web_studio", "helpdesk", "planning", "sign",
+        "documents", "quality_control", "mrp_plm", "sale_subscription", "timesheet_grid",
+        "industry_fsm", "appointment", "knowledge", "voip", "social", "marketing_automation",
+        "hr_payroll", "l10n_be_reports", "l10n_fr_reports", "approvals", "stock_barcode"
+    ]
+}
+
+TAGS = ["FIX", "IMP", "ADD", "REF", "REM", "MOV", "REV", "I18N", "PERF"]
+TAG_WEIGHTS = [45, 25, 8, 8, 4, 2, 3, 4, 1]
+
+FILE_KINDS = [
+    ("models/{name}.py", 40),
+    ("views/{name}_views.xml", 20),
+    ("static/src/js/{name}.js", 12),
+    ("tests/test_{name}.py", 12),
+    ("i18n/fr.po", 6),
+    ("data/{name}_data.xml", 5),
+    ("__manifest__.py", 3),
+    ("security/ir.model.access.csv", 2)
+]
+
+PY_LINES = [
+    "    {f} = fields.Many2one('{m}', string='{F}', ondelete='cascade')",
+    "    {f} = fields.Char(string='{F}', required=True)",
+    "    {f} = fields.Float(compute='_compute_{f}', store=True)",
+    "    {f}_ids = fields.One2many('{m}.line', '{f}_id')",
+    "    _name = '{m}'",
+    "    _inherit = ['{m}', 'mail.thread']",
+    "    def _compute_{f}(self):",
+    "        for record in self:",
+    "            record.{f} = sum(record.line_ids.mapped('{f}'))",
+    "    @api.depends('{f}', 'state')",
+    "    def action_{f}(self):",
+    "        self.ensure_one()",
+    "        return self.env['{m}'].search([('{f}', '=', self.id)])",
+    "        raise UserError(_('The {F} is not valid.'))",
+    "    @api.model_create_multi",
+]
+XML_LINES = [
+    '        <record id="view_{f}_form" model="ir.ui.view">',
+    '            <field name="name">{m}.form</field>',
+    '            <field name="model">{m}</field>',
+    '            <field name="arch" type="xml">',
+    '                <field name="{f}" invisible="state != \'draft\'"/>',
+    '                <button name="action_{f}" type="object" string="{F}"/>',
+    '        </record>',
+    '        <menuitem id="menu_{f}" action="action_{f}" sequence="10"/>',
+]
+JS_LINES = [
+    "    async {f}() {{",
+    "        await this.orm.call('{m}', 'action_{f}', [this.props.record.resId]);",
+    "    }}",
+    "    setup() {{ super.setup(); this.{f} = useState({{}}); }}",
+    "import {{ registry }} from \"@web/core/registry\";",
+]
+WORDS = ["amount", "partner", "invoice", "move", "line", "tax", "picking", "quant", "order", "journal",
+         "company", "currency", "product", "template", "payment", "lot", "route", "warehouse", "employee"]
+
+# ============================================================
+# OUTILS
+# ============================================================
+def zipf_weights(n, s=1.1):
+    return [1 / (rank ** s) for rank in range(1, n + 1)]
+
+def copy_value(value):
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    value = str(value)
+    return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+def copy_rows(cur, table, columns, rows):
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(copy_value(v) for v in row))
+        buffer.write("\n")
+    buffer.seek(0)
+    cur.copy_expert(f"COPY odoo_devlog.{table} ({', '.join(columns)}) FROM STDIN", buffer)
+
+# ============================================================
+# GÉNÉRATEUR
+# ============================================================
+class DataGenerator:
+    def __init__(self, rng, authors=2000, files_per_commit=6.0, patch_mean=1500, forward_port_rate=0.35):
+        self.rng = rng
+        self.files_per_commit = files_per_commit
+        self.patch_mean = patch_mean
+        self.forward_port_rate = forward_port_rate
+        self.authors = self.build_authors(authors)
+        self.author_weights = zipf_weights(len(self.authors))
+        self.module_weights = {repo: zipf_weights(len(mods)) for repo, mods in MODULES.items()}
+        self.kind_paths = [k for k, _ in FILE_KINDS]
+        self.kind_weights = [w for _, w in FILE_KINDS]
+
+    def build_authors(self, count):
+        authors = []
+        for i in range(count):
+            first = self.rng.choice(["Jean", "Marie", "Pierre", "Anh", "Raj", "Laura", "Tom", "Sofia", "Yusuf", "Nina"])
+            last = f"{self.rng.choice(['Dupont', 'Martin', 'Nguyen', 'Patel', 'Garcia', 'Leroy', 'Smet', 'Khan'])}{i}"
+            login = f"{first[:1].lower()}{last.lower()}"
+            authors.append((f"{first} {last}", f"{login}@odoo.com"))
+        # Quelques contributeurs apparaissent sous plusieurs orthographes/adresses
+        for i in range(0, count, 25):
+            name, email = authors[i]
+            authors.append((name.upper(), email))
+            authors.append((name, email.replace("@odoo.com", "@users.noreply.github.com")))
+        return authors
+
+    def sha(self, *parts):
+        return hashlib.sha1(":".join(str(p) for p in parts).encode()).hexdigest()
+
+    def patch(self, filename, model, field):
+        target = min(50000, int(self.rng.lognormvariate(0, 1.0) * self.patch_mean))
+        if filename.endswith(".py"):
+            templates = PY_LINES
+        elif filename.endswith(".xml"):
+            templates = XML_LINES
+        elif filename.endswith(".js"):
+            templates = JS_LINES
+        else:
+            templates = ['msgid "{F}"', 'msgstr "{F} traduit"', "#: model:ir.model.fields,field_description:{m}"]
+
+        start = self.rng.randint(1, 800)
+        lines = [f"@@ -{start},7 +{start},9 @@ class {model.title().replace('.', '')}(models.Model):"]
+        size = len(lines[0])
+        additions = deletions = 0
+        hunk_end = len(lines) + self.rng.randint(8, 40)
+        while size < target:
+            # Nouveau hunk plus loin dans le fichier
+            if len(lines) >= hunk_end:
+                start += self.rng.randint(20, 200)
+                lines.append(f"@@ -{start},7 +{start},9 @@")
+                size += len(lines[-1]) + 1
+                hunk_end = len(lines) + self.rng.randint(8, 40)
+            word = self.rng.choice(WORDS)
+            line = self.rng.choice(templates).format(f=f"{field}_{word}", F=word.title(), m=model)
+            marker = self.rng.choices([" ", "+", "-"], weights=[5, 3, 2])[0]
+            additions += marker == "+"
+            deletions += marker == "-"
+            lines.append(marker + line)
+            size += len(line) + 2
+        return "\n".join(lines), additions, deletions
+
+    def files(self, repo, module):
+        count = max(1, int(self.rng.expovariate(1 / self.files_per_commit)))
+        files = []
+        seen = set()
+        prefix = "addons/" if repo == "odoo/odoo" else ""
+        for _ in range(count):
+            if self.rng.random() < 0.8:
+                file_module = module
+            else:
+                file_module = self.rng.choices(MODULES[repo], weights=self.module_weights[repo])[0]
+            name = self.rng.choice(WORDS)
+            filename = f"{prefix}{file_module}/" + self.rng.choices(self.kind_paths, weights=self.kind_weights)[0].format(name=name)
+            if filename in seen:
+                continue
+            seen.add(filename)
+            model = f"{file_module.split('_')[0]}.{name}"
+            patch, additions, deletions = self.patch(filename, model, name)
+            status = self.rng.choices(["modified", "added", "removed", "renamed"], weights=[85, 9, 4, 2])[0]
+            files.append((filename, status, additions, deletions, patch))
+        return files
+
+    def message(self, tag, module, author_name, original_sha=None):
+        title = f"[{tag}] {module}: {self.rng.choice(['fix', 'improve', 'handle', 'compute', 'remove', 'add'])} {self.rng.choice(WORDS)} {self.rng.choice(WORDS)}"
+        body = [title, "", f"Steps to reproduce the {self.rng.choice(WORDS)} issue.", ""]
+        if self.rng.random() < 0.5:
+            body.append(f"task-{self.rng.randint(3000000, 4500000)}")
+        if self.rng.random() < 0.2:
+            body.append(f"opw-{self.rng.randint(3000000, 4500000)}")
+        body.append("")
+        body.append(f"closes odoo/odoo#{self.rng.randint(100000, 220000)}")
+        if original_sha:
+            body.append("")
+            body.append(f"X-original-commit: {original_sha}")
+        body.append(f"Signed-off-by: {author_name}")
+        return "\n".join(body)
+
+    def commits(self, repo, branches, count):
+        """Génère les commits d'un dépôt, forward-portés d'une branche à l'autre"""
+        stable = [b for b in BRANCHES if b != "master"]
+        produced = 0
+        while produced < count:
+            branch = self.rng.choices(BRANCHES, weights=[15, 20, 25, 20, 20])[0]
+            start = BRANCH_START[branch]
+            date = start + timedelta(seconds=self.rng.randint(0, int((END_DATE - start).total_seconds())))
+            tag = self.rng.choices(TAGS, weights=TAG_WEIGHTS)[0]
+            module = self.rng.choices(MODULES[repo], weights=self.module_weights[repo])[0]
+            author_name, author_email = self.rng.choices(self.authors, weights=self.author_weights)[0]
+            files = self.files(repo, module)
+            sha = self.sha(repo, branch, produced)
+            message = self.message(tag, module, author_name)
+            yield (branches[branch], sha, message, author_name, author_email, date, files)
+            produced += 1
+
+            # Forward-port vers les versions suivantes
+            if branch in stable and tag in ("FIX", "I18N", "PERF"):
+                original = sha
+                for target in BRANCHES[BRANCHES.index(branch) + 1:]:
+                    if produced >= count or self.rng.random() > self.forward_port_rate * 2:
+                        break
+                    date = date + timedelta(hours=self.rng.randint(2, 96))
+                    sha = self.sha(repo, target, produced)
+                    yield (branches[target], sha, self.message(tag, module, author_name, original), author_name, author_email, date, files)
+                    produced += 1
+
+# ============================================================
+# INSERTION
+# ============================================================
+COMMIT_COLUMNS = [
+    "id", "repo_id", "branch_id", "sha", "html_url", "message",
+    "author_name", "author_email", "committer_name", "committer_email",
+    "authored_date", "committed_date", "comment_count", "additions", "deletions",
+    "total_changes", "parent_count", "is_merge"
+]
+FILE_COLUMNS = ["commit_id", "committed_date", "filename", "status", "additions", "deletions", "changes", "patch"]
+
+def populate(conn, args):
+    rng = random.Random(args.seed)
+    generator = DataGenerator(rng, authors=args.authors, files_per_commit=args.files,
+                              patch_mean=args.patch_size, forward_port_rate=args.forward_port_rate)
+
+    with conn.cursor() as cur:
+        cur.execute("SELECT COALESCE(MAX(id), 0) FROM odoo_devlog.commits;")
+        next_id = cur.fetchone()[0] + 1
+
+        per_repo = {REPOSITORIES[0]: int(args.commits * 0.7), REPOSITORIES[1]: args.commits - int(args.commits * 0.7)}
+        for repo, count in per_repo.items():
+            cur.execute("""
+                INSERT INTO odoo_devlog.repositories (full_name, default_branch, html_url)
+                VALUES (%s, 'master', %s)
+                ON CONFLICT (full_name) DO UPDATE SET default_branch = EXCLUDED.default_branch
+                RETURNING id;
+            """, (repo, f"https://github.com/{repo}"))
+            repo_id = cur.fetchone()[0]
+
+            branches = {}
+            for branch in BRANCHES:
+                cur.execute("""
+                    INSERT INTO odoo_devlog.branches (repo_id, name, is_default)
+                    VALUES (%s, %s, %s)
+                    ON CONFLICT (repo_id, name) DO UPDATE SET is_default = EXCLUDED.is_default
+                    RETURNING id;
+                """, (repo_id, branch, branch == "master"))
+                branches[branch] = cur.fetchone()[0]
+
+            for module in MODULES[repo]:
+                prefix = f"addons/{module}/" if repo == "odoo/odoo" else f"{module}/"
+                cur.execute("""
+                    INSERT INTO odoo_devlog.modules (repo_id, name, path_prefix)
+                    VALUES (%s, %s, %s)
+                    ON CONFLICT (repo_id, name) DO NOTHING;
+                """, (repo_id, module, prefix))
+            conn.commit()
+
+            commit_rows, file_rows = [], []
+            commits_total = files_total = 0
+            for branch_id, sha, message, author_name, author_email, date, files in generator.commits(repo, branches, count):
+                additions = sum(f[2] for f in files)
+                deletions = sum(f[3] for f in files)
+                commit_rows.append((
+                    next_id, repo_id, branch_id, sha, f"https://github.com/{repo}/commit/{sha}", message,
+                    author_name, author_email, author_name, author_email,
+                    date, date, 0, additions, deletions, additions + deletions, 1, False
+                ))
+                for filename, status, f_add, f_del, patch in files:
+                    file_rows.append((next_id, date, filename, status, f_add, f_del, f_add + f_del, patch))
+                next_id += 1
+
+                if len(commit_rows) >= args.batch_size:
+                    copy_rows(cur, "commits", COMMIT_COLUMNS, commit_rows)
+                    copy_rows(cur, "file_changes", FILE_COLUMNS, file_rows)
+                    conn.commit()
+                    commits_total += len(commit_rows)
+                    files_total += len(file_rows)
+                    print(f"   ✓ {repo}: {commits_total} commits, {files_total} fichiers", flush=True)
+                    commit_rows, file_rows = [], []
+
+            if commit_rows:
+                copy_rows(cur, "commits", COMMIT_COLUMNS, commit_rows)
+                copy_rows(cur, "file_changes", FILE_COLUMNS, file_rows)
+                conn.commit()
+
+            cur.execute("""
+                INSERT INTO odoo_devlog.import_log (repo_id, branch_name, started_at, ended_at, total_commits_imported, status)
+                SELECT %s, name, NOW() - INTERVAL '1 hour', NOW(), %s, 'success'
+                FROM odoo_devlog.branches WHERE repo_id = %s;
+            """, (repo_id, count // len(BRANCHES), repo_id))
+
+        cur.execute("SELECT setval('odoo_devlog.commits_id_seq', (SELECT MAX(id) FROM odoo_devlog.commits));")
+        conn.commit()
+
+    # Tag, modules et références des messages, comme à l'import
+    commits_done = backfill_commit_tags(conn, batch_size=args.batch_size * 5)
+    print(f"   ✓ {commits_done} messages de commit analysés", flush=True)
+    pairs_done, commits_done = backfill_authors(conn)
+    print(f"   ✓ {pairs_done} alias d'auteurs, {commits_done} commits rattachés", flush=True)
+
+    # Hunks de la recherche migration, découpés comme à l'import
+    files_done, hunks_done = backfill_hunks(conn, batch_size=args.batch_size * 5)
+    print(f"   ✓ {files_done} patchs découpés en {hunks_done} hunks", flush=True)
+    files_done, symbols_done = backfill_symbols(conn, batch_size=args.batch_size * 5)
+    print(f"   ✓ {symbols_done} symboles extraits de {files_done} fichiers", flush=True)
+    files_done, signatures_done = backfill_signatures(conn, batch_size=args.batch_size * 5)
+    print(f"   ✓ {signatures_done} empreintes MinHash sur {files_done} fichiers", flush=True)
+
+    with conn.cursor() as cur:
+        cur.execute("ANALYZE odoo_devlog.commits;")
+        cur.execute("ANALYZE odoo_devlog.file_changes;")
+        cur.execute("ANALYZE odoo_devlog.patch_hunks;")
+        cur.execute("ANALYZE odoo_devlog.patch_symbols;")
+        cur.execute("ANALYZE odoo_devlog.patch_signatures;")
+    conn.commit()
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Génère des données odoo_devlog synthétiques")
+    parser.add_argument("--dbname", default="odoo_devlog_bench", help="Base cible")
+    parser.add_argument("--create", action="store_true", help="(Re)créer la base avec le schéma avant insertion")
+    parser.add_argument("--commits", type=int, default=100000, help="Nombre total de commits")
+    parser.add_argument("--files", type=float, default=6.0, help="Nombre moyen de fichiers par commit")
+    parser.add_argument("--patch-size", type=int, default=1500, help="Taille médiane d'un patch (octets)")
+    parser.add_argument("--authors", type=int, default=2000, help="Nombre de contributeurs distincts")
+    parser.add_argument("--forward-port-rate", type=float, default=0.35, help="Probabilité de forward-port d'un correctif")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Commits par lot COPY")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.create:
+        drop_database(args.dbname)
+        create_throwaway_database(name=args.dbname)
+
+    print(f"🔧 Génération de {args.commits} commits dans {args.dbname}...", flush=True)
+    conn = connect(args.dbname)
+    try:
+        populate(conn, args)
+    finally:
+        conn.close()
+    print("✅ Données générées", flush=True)
+
+if __name__ == "__main__":
+    main()
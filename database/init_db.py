@@ -1,9 +1,15 @@
 import psycopg2
 from github import Github
 import os
+import sys
 from datetime import datetime
 from dotenv import load_dotenv
 from pathlib import Path
+from migrate import apply_migrations
+
+# Registre des dépôts suivis, partagé avec fetch_commits.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+from registry import load_registry, repositories
 
 # ============================================================
 # CONFIGURATION
@@ -40,6 +46,8 @@ try:
     cur.execute(schema_sql)
     conn.commit()
     cur.close()
+    # Base neuve : les migrations (idempotentes) sont seulement enregistrées
+    apply_migrations(conn, verbose=False)
     conn.close()
     print("✅ Base de données initialisée avec succès !")
 except Exception as e:
@@ -49,10 +57,8 @@ except Exception as e:
 # ============================================================
 # DÉPÔTS À INITIALISER
 # ============================================================
-REPOSITORIES = [
-    "odoo/odoo",
-    "odoo/enterprise"
-]
+# repositories.json à la racine du projet (ou SYNC_REGISTRY_FILE)
+REPOSITORIES = repositories(load_registry())
 
 # ============================================================
 # FONCTION : Connexion PostgreSQL
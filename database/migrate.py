@@ -0,0 +1,87 @@
+"""Applique les migrations de database/migrations/ à une base existante.
+
+Chaque fichier NNN_description.sql est exécuté une seule fois, dans sa
+propre transaction, puis enregistré dans odoo_devlog.schema_migrations.
+Les migrations sont écrites de façon idempotente (IF NOT EXISTS) : sur une
+base neuve créée depuis schema.sql, elles ne font que s'enregistrer.
+
+Usage :
+    python migrate.py            # applique les migrations en attente
+    python migrate.py --status   # liste les migrations en attente
+"""
+import os
+import argparse
+import psycopg2
+from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DB_CONFIG = {
+    "dbname": os.getenv("DB_NAME", "odoo_devlog"),
+    "user": os.getenv("DB_USER"),
+    "password": os.getenv("DB_PASSWORD"),
+    "host": os.getenv("DB_HOST", "localhost"),
+    "port": 5432
+}
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
+def migration_files():
+    return sorted(MIGRATIONS_DIR.glob("*.sql"))
+
+def applied_migrations(conn):
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS odoo_devlog.schema_migrations (
+                name TEXT PRIMARY KEY,
+                applied_at TIMESTAMP DEFAULT NOW()
+            );
+        """)
+        cur.execute("SELECT name FROM odoo_devlog.schema_migrations;")
+        names = {row[0] for row in cur.fetchall()}
+    conn.commit()
+    return names
+
+def pending_migrations(conn):
+    applied = applied_migrations(conn)
+    return [path for path in migration_files() if path.name not in applied]
+
+def apply_migrations(conn, verbose=True):
+    """Applique les migrations en attente et retourne leurs noms"""
+    done = []
+    for path in pending_migrations(conn):
+        with conn.cursor() as cur:
+            cur.execute(path.read_text(encoding="utf-8"))
+            cur.execute("INSERT INTO odoo_devlog.schema_migrations (name) VALUES (%s);", (path.name,))
+        conn.commit()
+        done.append(path.name)
+        if verbose:
+            print(f"✅ Migration appliquée : {path.name}")
+    return done
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrations du schéma odoo_devlog")
+    parser.add_argument("--status", action="store_true", help="Lister les migrations en attente sans les appliquer")
+    args = parser.parse_args()
+
+    try:
+        conn = psycopg2.connect(**DB_CONFIG, options='-c client_encoding=UTF8')
+    except Exception as e:
+        print(f"❌ Erreur de connexion à PostgreSQL : {e}")
+        exit(1)
+
+    if args.status:
+        pending = pending_migrations(conn)
+        for path in pending:
+            print(f"⏳ {path.name}")
+        print(f"📊 {len(pending)} migration(s) en attente")
+    else:
+        try:
+            done = apply_migrations(conn)
+        except Exception as e:
+            conn.rollback()
+            print(f"❌ Échec de la migration : {e}")
+            exit(1)
+        print(f"🎉 Schéma à jour ({len(done)} migration(s) appliquée(s))")
+    conn.close()
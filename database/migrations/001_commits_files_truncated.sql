@@ -0,0 +1,5 @@
+-- ============================================================
+-- commits.files_truncated : liste de fichiers incomplète côté GitHub
+-- (plus de 3000 fichiers, page en erreur, stats supérieures aux fichiers reçus)
+-- ============================================================
+ALTER TABLE odoo_devlog.commits ADD COLUMN IF NOT EXISTS files_truncated BOOLEAN DEFAULT FALSE;
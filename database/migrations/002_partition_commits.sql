@@ -0,0 +1,147 @@
+-- ============================================================
+-- Partitionnement de commits et file_changes par année de committed_date
+--
+-- Migration HORS LIGNE : les tables sont réécrites dans une seule
+-- transaction. Arrêter l'API et les synchronisations avant de la lancer.
+-- Les id sont conservés (mêmes séquences) ; les doublons (commit_id,
+-- filename) éventuels sont éliminés pendant la copie.
+-- Sans effet si commits est déjà partitionnée (base créée depuis schema.sql).
+-- ============================================================
+CREATE OR REPLACE FUNCTION odoo_devlog.create_yearly_partitions(from_year INT, to_year INT)
+RETURNS INT AS $$
+DECLARE
+    y INT;
+    tbl TEXT;
+    created INT := 0;
+BEGIN
+    FOR y IN from_year..to_year LOOP
+        FOREACH tbl IN ARRAY ARRAY['commits', 'file_changes'] LOOP
+            IF to_regclass(format('odoo_devlog.%I', tbl || '_y' || y)) IS NULL THEN
+                EXECUTE format(
+                    'CREATE TABLE odoo_devlog.%I PARTITION OF odoo_devlog.%I FOR VALUES FROM (%L) TO (%L)',
+                    tbl || '_y' || y, tbl, make_date(y, 1, 1), make_date(y + 1, 1, 1)
+                );
+                created := created + 1;
+            END IF;
+        END LOOP;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    last_year INT;
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'odoo_devlog.commits'::regclass) THEN
+        RETURN;
+    END IF;
+
+    SET LOCAL search_path TO odoo_devlog;
+
+    -- Clés étrangères impossibles vers des tables partitionnées sur ces colonnes seules
+    ALTER TABLE commit_parents DROP CONSTRAINT IF EXISTS commit_parents_commit_id_fkey;
+    ALTER TABLE module_changes DROP CONSTRAINT IF EXISTS module_changes_commit_id_fkey;
+    ALTER TABLE detected_changes DROP CONSTRAINT IF EXISTS detected_changes_file_change_id_fkey;
+
+    -- Les anciennes tables libèrent les noms d'index
+    ALTER TABLE commits RENAME TO commits_legacy;
+    ALTER TABLE commits_legacy RENAME CONSTRAINT commits_pkey TO commits_legacy_pkey;
+    ALTER TABLE commits_legacy RENAME CONSTRAINT commits_sha_key TO commits_legacy_sha_key;
+    ALTER TABLE file_changes RENAME TO file_changes_legacy;
+    ALTER TABLE file_changes_legacy RENAME CONSTRAINT file_changes_pkey TO file_changes_legacy_pkey;
+    IF EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'file_changes_commit_filename_key') THEN
+        ALTER TABLE file_changes_legacy RENAME CONSTRAINT file_changes_commit_filename_key TO file_changes_legacy_key;
+    END IF;
+    DROP INDEX IF EXISTS idx_file_changes_commit_id;
+
+    CREATE TABLE commits (
+        id INTEGER NOT NULL DEFAULT nextval('odoo_devlog.commits_id_seq'),
+        repo_id INTEGER NOT NULL REFERENCES repositories(id) ON DELETE CASCADE,
+        branch_id INTEGER REFERENCES branches(id) ON DELETE SET NULL,
+        sha VARCHAR(50) NOT NULL,
+        html_url TEXT,
+        message TEXT,
+        author_name VARCHAR(150),
+        author_email VARCHAR(200),
+        committer_name VARCHAR(150),
+        committer_email VARCHAR(200),
+        authored_date TIMESTAMP,
+        committed_date TIMESTAMP NOT NULL,
+        comment_count INT,
+        additions INT DEFAULT 0,
+        deletions INT DEFAULT 0,
+        total_changes INT DEFAULT 0,
+        parent_count INT DEFAULT 0,
+        is_merge BOOLEAN DEFAULT FALSE,
+        files_truncated BOOLEAN DEFAULT FALSE,
+        PRIMARY KEY (id, committed_date),
+        CONSTRAINT commits_sha_key UNIQUE (sha, committed_date)
+    ) PARTITION BY RANGE (committed_date);
+
+    CREATE INDEX idx_commits_branch_date ON commits(branch_id, committed_date DESC);
+    CREATE INDEX idx_commits_repo_id ON commits(repo_id, id);
+
+    CREATE TABLE file_changes (
+        id INTEGER NOT NULL DEFAULT nextval('odoo_devlog.file_changes_id_seq'),
+        commit_id INTEGER NOT NULL,
+        committed_date TIMESTAMP NOT NULL,
+        filename TEXT NOT NULL,
+        status VARCHAR(20) CHECK (status IN ('added', 'modified', 'removed', 'renamed')),
+        additions INT DEFAULT 0,
+        deletions INT DEFAULT 0,
+        changes INT DEFAULT 0,
+        previous_filename TEXT,
+        patch TEXT,
+        blob_url TEXT,
+        raw_url TEXT,
+        contents_url TEXT,
+        PRIMARY KEY (id, committed_date),
+        FOREIGN KEY (commit_id, committed_date) REFERENCES commits(id, committed_date) ON DELETE CASCADE,
+        CONSTRAINT file_changes_commit_filename_key UNIQUE (commit_id, filename, committed_date)
+    ) PARTITION BY RANGE (committed_date);
+
+    CREATE TABLE commits_old PARTITION OF commits FOR VALUES FROM (MINVALUE) TO ('2005-01-01');
+    CREATE TABLE file_changes_old PARTITION OF file_changes FOR VALUES FROM (MINVALUE) TO ('2005-01-01');
+
+    -- Jusqu'à la date la plus récente de l'historique (horloges en avance comprises)
+    SELECT GREATEST(EXTRACT(YEAR FROM NOW())::INT + 2,
+                    COALESCE(EXTRACT(YEAR FROM MAX(COALESCE(committed_date, authored_date)))::INT, 0))
+    INTO last_year FROM commits_legacy;
+    PERFORM create_yearly_partitions(2005, last_year);
+
+    INSERT INTO commits (
+        id, repo_id, branch_id, sha, html_url, message,
+        author_name, author_email, committer_name, committer_email,
+        authored_date, committed_date, comment_count, additions, deletions,
+        total_changes, parent_count, is_merge, files_truncated
+    )
+    SELECT
+        id, repo_id, branch_id, sha, html_url, message,
+        author_name, author_email, committer_name, committer_email,
+        authored_date, COALESCE(committed_date, authored_date, NOW()), comment_count, additions, deletions,
+        total_changes, parent_count, is_merge, files_truncated
+    FROM commits_legacy;
+
+    INSERT INTO file_changes (
+        id, commit_id, committed_date, filename, status, additions, deletions, changes,
+        previous_filename, patch, blob_url, raw_url, contents_url
+    )
+    SELECT DISTINCT ON (fc.commit_id, fc.filename)
+        fc.id, fc.commit_id, COALESCE(c.committed_date, c.authored_date, NOW()), fc.filename, fc.status,
+        fc.additions, fc.deletions, fc.changes,
+        fc.previous_filename, fc.patch, fc.blob_url, fc.raw_url, fc.contents_url
+    FROM file_changes_legacy fc
+    JOIN commits_legacy c ON c.id = fc.commit_id
+    ORDER BY fc.commit_id, fc.filename, fc.id;
+
+    -- Les séquences suivent les nouvelles tables avant la suppression des anciennes
+    ALTER SEQUENCE commits_id_seq OWNED BY commits.id;
+    ALTER SEQUENCE file_changes_id_seq OWNED BY file_changes.id;
+    DROP TABLE file_changes_legacy;
+    DROP TABLE commits_legacy;
+END;
+$$;
+
+ANALYZE odoo_devlog.commits;
+ANALYZE odoo_devlog.file_changes;
@@ -0,0 +1,65 @@
+-- ============================================================
+-- patch_hunks : hunks des patchs pour la recherche migration
+-- Partitionnée comme file_changes. La table est vide après la migration :
+-- lancer `python scripts/patch_hunks.py` pour découper l'historique.
+-- ============================================================
+CREATE TABLE IF NOT EXISTS odoo_devlog.patch_hunks (
+    file_change_id INTEGER NOT NULL,
+    committed_date TIMESTAMP NOT NULL,
+    hunk_index SMALLINT NOT NULL,
+    old_start INT,
+    old_lines INT,
+    new_start INT,
+    new_lines INT,
+    section TEXT,
+    content TEXT NOT NULL,
+    additions INT DEFAULT 0,
+    deletions INT DEFAULT 0,
+    added_text TEXT,
+    removed_text TEXT,
+    PRIMARY KEY (file_change_id, hunk_index, committed_date),
+    FOREIGN KEY (file_change_id, committed_date) REFERENCES odoo_devlog.file_changes(id, committed_date) ON DELETE CASCADE
+) PARTITION BY RANGE (committed_date);
+
+CREATE TABLE IF NOT EXISTS odoo_devlog.patch_hunks_old
+    PARTITION OF odoo_devlog.patch_hunks FOR VALUES FROM (MINVALUE) TO ('2005-01-01');
+
+CREATE OR REPLACE FUNCTION odoo_devlog.create_yearly_partitions(from_year INT, to_year INT)
+RETURNS INT AS $$
+DECLARE
+    y INT;
+    tbl TEXT;
+    created INT := 0;
+BEGIN
+    FOR y IN from_year..to_year LOOP
+        FOREACH tbl IN ARRAY ARRAY['commits', 'file_changes', 'patch_hunks'] LOOP
+            IF to_regclass(format('odoo_devlog.%I', tbl || '_y' || y)) IS NULL THEN
+                EXECUTE format(
+                    'CREATE TABLE odoo_devlog.%I PARTITION OF odoo_devlog.%I FOR VALUES FROM (%L) TO (%L)',
+                    tbl || '_y' || y, tbl, make_date(y, 1, 1), make_date(y + 1, 1, 1)
+                );
+                created := created + 1;
+            END IF;
+        END LOOP;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Mêmes années que les partitions de commits déjà en place
+SELECT odoo_devlog.create_yearly_partitions(2005, COALESCE(MAX(SUBSTRING(child.relname FROM 'commits_y([0-9]{4})$')::INT), 2005))
+FROM pg_inherits i
+JOIN pg_class child ON child.oid = i.inhrelid
+WHERE i.inhparent = 'odoo_devlog.commits'::regclass;
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA public;
+        CREATE INDEX IF NOT EXISTS idx_patch_hunks_added_trgm
+            ON odoo_devlog.patch_hunks USING GIN (added_text public.gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS idx_patch_hunks_removed_trgm
+            ON odoo_devlog.patch_hunks USING GIN (removed_text public.gin_trgm_ops);
+    END IF;
+END;
+$$;
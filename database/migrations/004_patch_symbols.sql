@@ -0,0 +1,74 @@
+-- ============================================================
+-- patch_symbols : symboles Odoo (modèles, champs, méthodes, id XML)
+-- ajoutés / supprimés par les patchs. Vide après la migration : lancer
+-- `python scripts/patch_symbols.py` pour indexer l'historique.
+-- create_yearly_partitions couvre désormais toutes les tables partitionnées
+-- du schéma.
+-- ============================================================
+CREATE TABLE IF NOT EXISTS odoo_devlog.patch_symbols (
+    id BIGSERIAL,
+    file_change_id INTEGER NOT NULL,
+    committed_date TIMESTAMP NOT NULL,
+    commit_id INTEGER NOT NULL,
+    module VARCHAR(150),
+    kind VARCHAR(20) NOT NULL CHECK (kind IN ('model', 'inherit', 'field', 'method', 'xmlid')),
+    model VARCHAR(150),
+    name TEXT NOT NULL,
+    qualified_name TEXT NOT NULL,
+    change VARCHAR(10) NOT NULL CHECK (change IN ('added', 'removed')),
+    line INT,
+    detail VARCHAR(50),
+    PRIMARY KEY (id, committed_date),
+    FOREIGN KEY (file_change_id, committed_date) REFERENCES odoo_devlog.file_changes(id, committed_date) ON DELETE CASCADE
+) PARTITION BY RANGE (committed_date);
+
+CREATE INDEX IF NOT EXISTS idx_patch_symbols_model_name ON odoo_devlog.patch_symbols(model, name, committed_date);
+CREATE INDEX IF NOT EXISTS idx_patch_symbols_qualified ON odoo_devlog.patch_symbols(qualified_name text_pattern_ops);
+CREATE INDEX IF NOT EXISTS idx_patch_symbols_file ON odoo_devlog.patch_symbols(file_change_id);
+
+CREATE TABLE IF NOT EXISTS odoo_devlog.patch_symbols_old
+    PARTITION OF odoo_devlog.patch_symbols FOR VALUES FROM (MINVALUE) TO ('2005-01-01');
+
+CREATE OR REPLACE FUNCTION odoo_devlog.create_yearly_partitions(from_year INT, to_year INT)
+RETURNS INT AS $$
+DECLARE
+    y INT;
+    tbl TEXT;
+    created INT := 0;
+BEGIN
+    FOR y IN from_year..to_year LOOP
+        FOR tbl IN
+            SELECT c.relname FROM pg_partitioned_table p
+            JOIN pg_class c ON c.oid = p.partrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = 'odoo_devlog'
+            ORDER BY c.relname
+        LOOP
+            IF to_regclass(format('odoo_devlog.%I', tbl || '_y' || y)) IS NULL THEN
+                EXECUTE format(
+                    'CREATE TABLE odoo_devlog.%I PARTITION OF odoo_devlog.%I FOR VALUES FROM (%L) TO (%L)',
+                    tbl || '_y' || y, tbl, make_date(y, 1, 1), make_date(y + 1, 1, 1)
+                );
+                created := created + 1;
+            END IF;
+        END LOOP;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Mêmes années que les partitions de commits déjà en place
+SELECT odoo_devlog.create_yearly_partitions(2005, COALESCE(MAX(SUBSTRING(child.relname FROM 'commits_y([0-9]{4})$')::INT), 2005))
+FROM pg_inherits i
+JOIN pg_class child ON child.oid = i.inhrelid
+WHERE i.inhparent = 'odoo_devlog.commits'::regclass;
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA public;
+        CREATE INDEX IF NOT EXISTS idx_patch_symbols_qualified_trgm
+            ON odoo_devlog.patch_symbols USING GIN (qualified_name public.gin_trgm_ops);
+    END IF;
+END;
+$$;
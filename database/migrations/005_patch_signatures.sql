@@ -0,0 +1,27 @@
+-- ============================================================
+-- patch_signatures : empreintes MinHash des patchs et clés LSH de leurs
+-- bandes (recherche des changements similaires). Vide après la
+-- migration : lancer `python scripts/patch_similarity.py` pour
+-- l'historique.
+-- ============================================================
+CREATE TABLE IF NOT EXISTS odoo_devlog.patch_signatures (
+    file_change_id INTEGER NOT NULL,
+    committed_date TIMESTAMP NOT NULL,
+    commit_id INTEGER NOT NULL,
+    shingles INT NOT NULL,
+    signature BYTEA NOT NULL,
+    bands BIGINT[] NOT NULL,
+    PRIMARY KEY (file_change_id, committed_date),
+    FOREIGN KEY (file_change_id, committed_date) REFERENCES odoo_devlog.file_changes(id, committed_date) ON DELETE CASCADE
+) PARTITION BY RANGE (committed_date);
+
+CREATE INDEX IF NOT EXISTS idx_patch_signatures_bands ON odoo_devlog.patch_signatures USING GIN (bands);
+
+CREATE TABLE IF NOT EXISTS odoo_devlog.patch_signatures_old
+    PARTITION OF odoo_devlog.patch_signatures FOR VALUES FROM (MINVALUE) TO ('2005-01-01');
+
+-- Mêmes années que les partitions de commits déjà en place
+SELECT odoo_devlog.create_yearly_partitions(2005, COALESCE(MAX(SUBSTRING(child.relname FROM 'commits_y([0-9]{4})$')::INT), 2005))
+FROM pg_inherits i
+JOIN pg_class child ON child.oid = i.inhrelid
+WHERE i.inhparent = 'odoo_devlog.commits'::regclass;
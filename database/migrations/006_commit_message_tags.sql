@@ -0,0 +1,21 @@
+-- ============================================================
+-- Conventions des messages de commit en colonnes indexées : tag
+-- ([FIX]...), modules annoncés, task / opw, pull request de fusion,
+-- commit d'origine d'un forward-port. Vides pour l'historique après la
+-- migration : lancer `python scripts/commit_message.py`.
+-- ============================================================
+ALTER TABLE odoo_devlog.commits
+    ADD COLUMN IF NOT EXISTS commit_tag VARCHAR(10),
+    ADD COLUMN IF NOT EXISTS message_modules TEXT[],
+    ADD COLUMN IF NOT EXISTS task_ids INT[],
+    ADD COLUMN IF NOT EXISTS opw_ids INT[],
+    ADD COLUMN IF NOT EXISTS pr_repo VARCHAR(200),
+    ADD COLUMN IF NOT EXISTS pr_number INT,
+    ADD COLUMN IF NOT EXISTS original_commit VARCHAR(50);
+
+CREATE INDEX IF NOT EXISTS idx_commits_branch_tag_date ON odoo_devlog.commits(branch_id, commit_tag, committed_date DESC);
+CREATE INDEX IF NOT EXISTS idx_commits_message_modules ON odoo_devlog.commits USING GIN (message_modules);
+CREATE INDEX IF NOT EXISTS idx_commits_task_ids ON odoo_devlog.commits USING GIN (task_ids);
+CREATE INDEX IF NOT EXISTS idx_commits_opw_ids ON odoo_devlog.commits USING GIN (opw_ids);
+CREATE INDEX IF NOT EXISTS idx_commits_pr ON odoo_devlog.commits(pr_number, pr_repo);
+CREATE INDEX IF NOT EXISTS idx_commits_original_commit ON odoo_devlog.commits(original_commit);
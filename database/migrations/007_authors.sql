@@ -0,0 +1,27 @@
+-- ============================================================
+-- authors / author_aliases : dimension des auteurs, alias fusionnés
+-- par email normalisé ; commits.author_id. Vide pour l'historique après
+-- la migration : lancer `python scripts/authors.py`.
+-- ============================================================
+CREATE TABLE IF NOT EXISTS odoo_devlog.authors (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(150) NOT NULL,
+    email VARCHAR(200),
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS odoo_devlog.author_aliases (
+    email_key VARCHAR(200) NOT NULL,
+    name VARCHAR(150) NOT NULL,
+    author_id INTEGER NOT NULL REFERENCES odoo_devlog.authors(id) ON DELETE CASCADE,
+    email VARCHAR(200),
+    PRIMARY KEY (email_key, name)
+);
+
+CREATE INDEX IF NOT EXISTS idx_author_aliases_author ON odoo_devlog.author_aliases(author_id);
+CREATE INDEX IF NOT EXISTS idx_author_aliases_name ON odoo_devlog.author_aliases(lower(name));
+
+ALTER TABLE odoo_devlog.commits
+    ADD COLUMN IF NOT EXISTS author_id INTEGER REFERENCES odoo_devlog.authors(id) ON DELETE SET NULL;
+
+CREATE INDEX IF NOT EXISTS idx_commits_author_date ON odoo_devlog.commits(author_id, committed_date DESC);
@@ -0,0 +1,34 @@
+-- ============================================================
+-- sync_jobs / sync_job_events : file persistante des synchronisations,
+-- partagée par tous les workers de l'API (backend/sync_jobs.py).
+-- ============================================================
+CREATE TABLE IF NOT EXISTS odoo_devlog.sync_jobs (
+    id SERIAL PRIMARY KEY,
+    mode VARCHAR(20) NOT NULL DEFAULT 'incremental',
+    repositories TEXT[],
+    branches TEXT[],
+    fetcher VARCHAR(20),
+    status VARCHAR(20) NOT NULL DEFAULT 'queued'
+        CHECK (status IN ('queued', 'running', 'done', 'failed', 'cancelled')),
+    cancel_requested BOOLEAN NOT NULL DEFAULT FALSE,
+    owner VARCHAR(150),
+    pid INTEGER,
+    heartbeat_at TIMESTAMP,
+    created_at TIMESTAMP DEFAULT NOW(),
+    started_at TIMESTAMP,
+    ended_at TIMESTAMP,
+    returncode INTEGER,
+    error_message TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_sync_jobs_queued ON odoo_devlog.sync_jobs(id) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS idx_sync_jobs_running ON odoo_devlog.sync_jobs(heartbeat_at) WHERE status = 'running';
+
+CREATE TABLE IF NOT EXISTS odoo_devlog.sync_job_events (
+    job_id INTEGER NOT NULL REFERENCES odoo_devlog.sync_jobs(id) ON DELETE CASCADE,
+    event_id INTEGER NOT NULL,
+    event VARCHAR(20) NOT NULL,
+    data JSONB NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (job_id, event_id)
+);
@@ -0,0 +1,32 @@
+-- ============================================================
+-- ingest_units : unités de travail de l'import (branche ou tranche de
+-- pages), réclamées par les workers `fetch_commits.py worker`
+-- (scripts/ingest_units.py).
+-- ============================================================
+CREATE TABLE IF NOT EXISTS odoo_devlog.ingest_units (
+    id SERIAL PRIMARY KEY,
+    repo_name VARCHAR(200) NOT NULL,
+    branch_name VARCHAR(100) NOT NULL,
+    mode VARCHAR(20) NOT NULL CHECK (mode IN ('incremental', 'full')),
+    first_page INTEGER,
+    last_page INTEGER,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued'
+        CHECK (status IN ('queued', 'running', 'done', 'failed')),
+    owner VARCHAR(150),
+    token_index INTEGER,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    commits_imported INTEGER NOT NULL DEFAULT 0,
+    error_message TEXT,
+    created_at TIMESTAMP DEFAULT NOW(),
+    claimed_at TIMESTAMP,
+    heartbeat_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+-- Une même unité n'attend ou ne tourne qu'une fois (replanification sans doublon)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_ingest_units_pending
+    ON odoo_devlog.ingest_units(repo_name, branch_name, mode, COALESCE(first_page, -1))
+    WHERE status IN ('queued', 'running');
+
+CREATE INDEX IF NOT EXISTS idx_ingest_units_queued ON odoo_devlog.ingest_units(id) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS idx_ingest_units_running ON odoo_devlog.ingest_units(heartbeat_at) WHERE status = 'running';
@@ -0,0 +1,25 @@
+-- ============================================================
+-- push_events : pushs reçus par le webhook GitHub (/webhooks/github),
+-- importés commit par commit par `fetch_commits.py push`
+-- (scripts/push_events.py).
+-- ============================================================
+CREATE TABLE IF NOT EXISTS odoo_devlog.push_events (
+    id SERIAL PRIMARY KEY,
+    delivery_id VARCHAR(100) UNIQUE,         -- X-GitHub-Delivery (redélivrance sans doublon)
+    repo_name VARCHAR(200) NOT NULL,
+    branch_name VARCHAR(100) NOT NULL,
+    before_sha VARCHAR(50),
+    after_sha VARCHAR(50) NOT NULL,
+    shas TEXT[] NOT NULL,                    -- commits poussés, du plus ancien au plus récent
+    forced BOOLEAN NOT NULL DEFAULT FALSE,
+    complete BOOLEAN NOT NULL DEFAULT TRUE,  -- FALSE : liste du payload tronquée par GitHub
+    status VARCHAR(20) NOT NULL DEFAULT 'queued'
+        CHECK (status IN ('queued', 'done', 'failed')),
+    commits_imported INTEGER NOT NULL DEFAULT 0,
+    error_message TEXT,
+    received_at TIMESTAMP DEFAULT NOW(),
+    processed_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_push_events_queued
+    ON odoo_devlog.push_events(repo_name, branch_name, id) WHERE status = 'queued';
@@ -0,0 +1,7 @@
+-- ============================================================
+-- ingest_units.head_sha : tête de branche figée à la planification d'un
+-- import complet ; toutes les tranches de pages paginent l'historique de
+-- ce commit, même si la branche avance pendant l'import
+-- (scripts/ingest_units.py).
+-- ============================================================
+ALTER TABLE odoo_devlog.ingest_units ADD COLUMN IF NOT EXISTS head_sha VARCHAR(50);
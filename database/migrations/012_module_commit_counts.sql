@@ -0,0 +1,20 @@
+-- ============================================================
+-- module_commit_counts : commits annonçant chaque module dans leur titre,
+-- recalculés une fois par import (commit_message.refresh_module_counts)
+-- au lieu d'être comptés sur commits par chaque worker de l'API à chaque
+-- reconstruction du catalogue des modules (backend/module_catalog.py).
+-- ============================================================
+CREATE TABLE IF NOT EXISTS odoo_devlog.module_commit_counts (
+    repo_id INTEGER NOT NULL REFERENCES odoo_devlog.repositories(id) ON DELETE CASCADE,
+    module TEXT NOT NULL,
+    commits INTEGER NOT NULL,
+    refreshed_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (repo_id, module)
+);
+
+-- Premier remplissage depuis les commits déjà importés
+INSERT INTO odoo_devlog.module_commit_counts (repo_id, module, commits)
+SELECT c.repo_id, module, COUNT(*)
+FROM odoo_devlog.commits c, unnest(c.message_modules) AS module
+GROUP BY c.repo_id, module
+ON CONFLICT DO NOTHING;
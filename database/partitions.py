@@ -0,0 +1,98 @@
+"""Crée à l'avance les partitions annuelles des tables partitionnées (commits,
+file_changes, patch_hunks, patch_symbols, patch_signatures).
+
+À lancer régulièrement (cron, tâche planifiée). Il n'y a pas de partition
+DEFAULT : un commit d'une année sans partition fait créer celle-ci par
+l'import (verrou bref sur la table parente) ; la création anticipée évite
+ce verrou pendant les synchronisations.
+
+Usage :
+    python partitions.py                   # année courante + 2 ans
+    python partitions.py --years-ahead 5
+    python partitions.py --status          # partitions, lignes, taille
+"""
+import os
+import argparse
+from datetime import datetime
+import psycopg2
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DB_CONFIG = {
+    "dbname": os.getenv("DB_NAME", "odoo_devlog"),
+    "user": os.getenv("DB_USER"),
+    "password": os.getenv("DB_PASSWORD"),
+    "host": os.getenv("DB_HOST", "localhost"),
+    "port": 5432
+}
+
+PARTITIONED_TABLES = ["commits", "file_changes", "patch_hunks", "patch_symbols", "patch_signatures"]
+
+def ensure_partitions(conn, years_ahead=2):
+    """Crée les partitions manquantes jusqu'à l'année courante + years_ahead"""
+    year = datetime.now().year
+    with conn.cursor() as cur:
+        cur.execute("SELECT odoo_devlog.create_yearly_partitions(%s, %s);", (year, year + years_ahead))
+        created = cur.fetchone()[0]
+    conn.commit()
+    return created
+
+def partition_status(conn):
+    """Retourne (table, partition, bornes, lignes estimées, taille) pour chaque partition"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT parent.relname, child.relname,
+                   pg_get_expr(child.relpartbound, child.oid),
+                   GREATEST(child.reltuples, 0)::BIGINT,
+                   pg_size_pretty(pg_total_relation_size(child.oid))
+            FROM pg_inherits i
+            JOIN pg_class parent ON parent.oid = i.inhparent
+            JOIN pg_class child ON child.oid = i.inhrelid
+            JOIN pg_namespace n ON n.oid = parent.relnamespace
+            WHERE n.nspname = 'odoo_devlog' AND parent.relname = ANY(%s)
+            ORDER BY parent.relname, child.relname;
+        """, (PARTITIONED_TABLES,))
+        rows = cur.fetchall()
+    conn.commit()
+    return rows
+
+def last_partition_year(conn):
+    """Dernière année couverte par les partitions de commits"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT MAX(SUBSTRING(child.relname FROM 'commits_y([0-9]{4})$')::INT)
+            FROM pg_inherits i
+            JOIN pg_class child ON child.oid = i.inhrelid
+            WHERE i.inhparent = 'odoo_devlog.commits'::regclass;
+        """)
+        year = cur.fetchone()[0]
+    conn.commit()
+    return year
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Partitions annuelles des tables partitionnées")
+    parser.add_argument("--years-ahead", type=int, default=2, help="Années futures à préparer")
+    parser.add_argument("--status", action="store_true", help="Afficher les partitions existantes")
+    args = parser.parse_args()
+
+    try:
+        conn = psycopg2.connect(**DB_CONFIG, options='-c client_encoding=UTF8')
+    except Exception as e:
+        print(f"❌ Erreur de connexion à PostgreSQL : {e}")
+        exit(1)
+
+    if args.status:
+        for table, partition, bounds, rows, size in partition_status(conn):
+            print(f"{table:<14}{partition:<24}{rows:>12} lignes{size:>12}   {bounds}")
+    else:
+        try:
+            created = ensure_partitions(conn, args.years_ahead)
+        except psycopg2.Error as e:
+            conn.rollback()
+            print(f"❌ Création des partitions impossible : {e}")
+            exit(1)
+        print(f"✅ {created} partition(s) créée(s)")
+
+    print(f"📅 Partitions jusqu'à {last_partition_year(conn)} inclus")
+    conn.close()
@@ -34,14 +34,41 @@ CREATE TABLE branches (
     UNIQUE(repo_id, name)
 );
 
+-- ============================================================
+-- TABLE : authors / author_aliases
+-- Une personne (authors) et les couples (nom, email) sous lesquels elle
+-- apparaît (author_aliases), fusionnés par email normalisé
+-- (scripts/authors.py)
+-- ============================================================
+CREATE TABLE authors (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(150) NOT NULL,              -- nom affiché (orthographe la plus fréquente)
+    email VARCHAR(200),                      -- première adresse rencontrée
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE TABLE author_aliases (
+    email_key VARCHAR(200) NOT NULL,         -- email normalisé, ou « name:<nom> » sans email
+    name VARCHAR(150) NOT NULL,
+    author_id INTEGER NOT NULL REFERENCES authors(id) ON DELETE CASCADE,
+    email VARCHAR(200),
+    PRIMARY KEY (email_key, name)
+);
+
+CREATE INDEX idx_author_aliases_author ON author_aliases(author_id);
+CREATE INDEX idx_author_aliases_name ON author_aliases(lower(name));
+
 -- ============================================================
 -- TABLE : commits
+-- Partitionnée par année de committed_date (voir create_yearly_partitions) :
+-- les listes triées par date, la timeline et le vacuum ne touchent que les
+-- partitions concernées. La clé de partition fait partie des clés uniques.
 -- ============================================================
 CREATE TABLE commits (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     repo_id INTEGER NOT NULL REFERENCES repositories(id) ON DELETE CASCADE,
     branch_id INTEGER REFERENCES branches(id) ON DELETE SET NULL,
-    sha VARCHAR(50) UNIQUE NOT NULL,
+    sha VARCHAR(50) NOT NULL,
     html_url TEXT,
     message TEXT,
     author_name VARCHAR(150),
@@ -49,30 +76,55 @@ CREATE TABLE commits (
     committer_name VARCHAR(150),
     committer_email VARCHAR(200),
     authored_date TIMESTAMP,
-    committed_date TIMESTAMP,
+    committed_date TIMESTAMP NOT NULL,
     comment_count INT,
     additions INT DEFAULT 0,
     deletions INT DEFAULT 0,
     total_changes INT DEFAULT 0,
     parent_count INT DEFAULT 0,
-    is_merge BOOLEAN DEFAULT FALSE
-);
+    is_merge BOOLEAN DEFAULT FALSE,
+    files_truncated BOOLEAN DEFAULT FALSE,   -- liste de fichiers incomplète côté GitHub
+    -- Conventions du message (scripts/commit_message.py)
+    commit_tag VARCHAR(10),                  -- ex: FIX, IMP, REV
+    message_modules TEXT[],                  -- modules annoncés dans le titre (« [FIX] account, sale: »)
+    task_ids INT[],                          -- task-NNN
+    opw_ids INT[],                           -- opw-NNN
+    pr_repo VARCHAR(200),                    -- « closes odoo/odoo#NNN »
+    pr_number INT,
+    original_commit VARCHAR(50),             -- X-original-commit (forward-port)
+    author_id INTEGER REFERENCES authors(id) ON DELETE SET NULL,
+    PRIMARY KEY (id, committed_date),
+    CONSTRAINT commits_sha_key UNIQUE (sha, committed_date)
+) PARTITION BY RANGE (committed_date);
+
+CREATE INDEX idx_commits_branch_date ON commits(branch_id, committed_date DESC);
+CREATE INDEX idx_commits_repo_id ON commits(repo_id, id);
+CREATE INDEX idx_commits_branch_tag_date ON commits(branch_id, commit_tag, committed_date DESC);
+CREATE INDEX idx_commits_message_modules ON commits USING GIN (message_modules);
+CREATE INDEX idx_commits_task_ids ON commits USING GIN (task_ids);
+CREATE INDEX idx_commits_opw_ids ON commits USING GIN (opw_ids);
+CREATE INDEX idx_commits_pr ON commits(pr_number, pr_repo);
+CREATE INDEX idx_commits_original_commit ON commits(original_commit);
+CREATE INDEX idx_commits_author_date ON commits(author_id, committed_date DESC);
 
 -- ============================================================
 -- TABLE : commit_parents
+-- (pas de clé étrangère : commits est partitionnée et sa clé inclut committed_date)
 -- ============================================================
 CREATE TABLE commit_parents (
-    commit_id INTEGER REFERENCES commits(id) ON DELETE CASCADE,
+    commit_id INTEGER NOT NULL,
     parent_sha VARCHAR(50) NOT NULL,
     PRIMARY KEY (commit_id, parent_sha)
 );
 
 -- ============================================================
 -- TABLE : file_changes
+-- Partitionnée comme commits : committed_date est recopiée depuis le commit
 -- ============================================================
 CREATE TABLE file_changes (
-    id SERIAL PRIMARY KEY,
-    commit_id INTEGER NOT NULL REFERENCES commits(id) ON DELETE CASCADE,
+    id SERIAL,
+    commit_id INTEGER NOT NULL,
+    committed_date TIMESTAMP NOT NULL,
     filename TEXT NOT NULL,
     status VARCHAR(20) CHECK (status IN ('added', 'modified', 'removed', 'renamed')),
     additions INT DEFAULT 0,
@@ -82,10 +134,136 @@ CREATE TABLE file_changes (
     patch TEXT,                              -- diff complet
     blob_url TEXT,
     raw_url TEXT,
-    contents_url TEXT
-);
+    contents_url TEXT,
+    PRIMARY KEY (id, committed_date),
+    FOREIGN KEY (commit_id, committed_date) REFERENCES commits(id, committed_date) ON DELETE CASCADE,
+    CONSTRAINT file_changes_commit_filename_key UNIQUE (commit_id, filename, committed_date)  -- sert aussi d'index sur commit_id
+) PARTITION BY RANGE (committed_date);
+
+-- ============================================================
+-- TABLE : patch_hunks
+-- Hunks des patchs (scripts/patch_hunks.py) : la recherche migration porte
+-- sur les lignes ajoutées / supprimées et ne renvoie que les hunks trouvés
+-- ============================================================
+CREATE TABLE patch_hunks (
+    file_change_id INTEGER NOT NULL,
+    committed_date TIMESTAMP NOT NULL,
+    hunk_index SMALLINT NOT NULL,            -- ordre dans le patch
+    old_start INT,
+    old_lines INT,
+    new_start INT,
+    new_lines INT,
+    section TEXT,                            -- texte après « @@ » (classe, fonction)
+    content TEXT NOT NULL,                   -- hunk complet, en-tête et contexte compris
+    additions INT DEFAULT 0,
+    deletions INT DEFAULT 0,
+    added_text TEXT,                         -- lignes ajoutées sans le « + », en minuscules
+    removed_text TEXT,                       -- lignes supprimées sans le « - », en minuscules
+    PRIMARY KEY (file_change_id, hunk_index, committed_date),
+    FOREIGN KEY (file_change_id, committed_date) REFERENCES file_changes(id, committed_date) ON DELETE CASCADE
+) PARTITION BY RANGE (committed_date);
 
-CREATE INDEX idx_file_changes_commit_id ON file_changes(commit_id);
+-- ============================================================
+-- TABLE : patch_symbols
+-- Symboles Odoo ajoutés / supprimés par les patchs (scripts/patch_symbols.py) :
+-- modèles, champs, méthodes, identifiants XML
+-- ============================================================
+CREATE TABLE patch_symbols (
+    id BIGSERIAL,
+    file_change_id INTEGER NOT NULL,
+    committed_date TIMESTAMP NOT NULL,
+    commit_id INTEGER NOT NULL,
+    module VARCHAR(150),
+    kind VARCHAR(20) NOT NULL CHECK (kind IN ('model', 'inherit', 'field', 'method', 'xmlid')),
+    model VARCHAR(150),                      -- modèle de rattachement (ex: sale.order), si connu
+    name TEXT NOT NULL,                      -- ex: partner_id, _compute_amount, view_order_form
+    qualified_name TEXT NOT NULL,            -- ex: sale.order.partner_id, sale.view_order_form
+    change VARCHAR(10) NOT NULL CHECK (change IN ('added', 'removed')),
+    line INT,                                -- ligne dans le nouveau (ajout) ou l'ancien fichier (suppression)
+    detail VARCHAR(50),                      -- type du champ (Many2one...), balise XML
+    PRIMARY KEY (id, committed_date),
+    FOREIGN KEY (file_change_id, committed_date) REFERENCES file_changes(id, committed_date) ON DELETE CASCADE
+) PARTITION BY RANGE (committed_date);
+
+CREATE INDEX idx_patch_symbols_model_name ON patch_symbols(model, name, committed_date);
+CREATE INDEX idx_patch_symbols_qualified ON patch_symbols(qualified_name text_pattern_ops);
+CREATE INDEX idx_patch_symbols_file ON patch_symbols(file_change_id);
+
+-- ============================================================
+-- TABLE : patch_signatures
+-- Empreintes MinHash des patchs (scripts/patch_similarity.py) et clés
+-- LSH de leurs bandes, pour /files/{id}/similar
+-- ============================================================
+CREATE TABLE patch_signatures (
+    file_change_id INTEGER NOT NULL,
+    committed_date TIMESTAMP NOT NULL,
+    commit_id INTEGER NOT NULL,
+    shingles INT NOT NULL,                   -- nombre de shingles distincts du patch
+    signature BYTEA NOT NULL,                -- 64 entiers de 32 bits (little-endian)
+    bands BIGINT[] NOT NULL,                 -- une clé par bande de l'empreinte
+    PRIMARY KEY (file_change_id, committed_date),
+    FOREIGN KEY (file_change_id, committed_date) REFERENCES file_changes(id, committed_date) ON DELETE CASCADE
+) PARTITION BY RANGE (committed_date);
+
+CREATE INDEX idx_patch_signatures_bands ON patch_signatures USING GIN (bands);
+
+-- ============================================================
+-- PARTITIONS ANNUELLES (toutes les tables partitionnées du schéma)
+-- Appelée ici pour l'historique, puis par database/partitions.py (cron)
+-- pour créer les années à venir ; l'import crée aussi une année manquante
+-- à la volée. Pas de partition DEFAULT : elle empêcherait les parcours
+-- ordonnés par date (ORDER BY committed_date ... LIMIT) de s'arrêter aux
+-- partitions récentes. Les dates antérieures à 2005 vont dans *_old.
+-- ============================================================
+CREATE OR REPLACE FUNCTION create_yearly_partitions(from_year INT, to_year INT)
+RETURNS INT AS $$
+DECLARE
+    y INT;
+    tbl TEXT;
+    created INT := 0;
+BEGIN
+    FOR y IN from_year..to_year LOOP
+        FOR tbl IN
+            SELECT c.relname FROM pg_partitioned_table p
+            JOIN pg_class c ON c.oid = p.partrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = 'odoo_devlog'
+            ORDER BY c.relname
+        LOOP
+            IF to_regclass(format('odoo_devlog.%I', tbl || '_y' || y)) IS NULL THEN
+                EXECUTE format(
+                    'CREATE TABLE odoo_devlog.%I PARTITION OF odoo_devlog.%I FOR VALUES FROM (%L) TO (%L)',
+                    tbl || '_y' || y, tbl, make_date(y, 1, 1), make_date(y + 1, 1, 1)
+                );
+                created := created + 1;
+            END IF;
+        END LOOP;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TABLE commits_old PARTITION OF commits FOR VALUES FROM (MINVALUE) TO ('2005-01-01');
+CREATE TABLE file_changes_old PARTITION OF file_changes FOR VALUES FROM (MINVALUE) TO ('2005-01-01');
+CREATE TABLE patch_hunks_old PARTITION OF patch_hunks FOR VALUES FROM (MINVALUE) TO ('2005-01-01');
+CREATE TABLE patch_symbols_old PARTITION OF patch_symbols FOR VALUES FROM (MINVALUE) TO ('2005-01-01');
+CREATE TABLE patch_signatures_old PARTITION OF patch_signatures FOR VALUES FROM (MINVALUE) TO ('2005-01-01');
+
+SELECT create_yearly_partitions(2005, EXTRACT(YEAR FROM NOW())::INT + 2);
+
+-- Index trigrammes des lignes modifiées et des noms de symboles (LIKE
+-- '%terme%', ~*) si pg_trgm est disponible ; sans l'extension, la recherche
+-- parcourt les seules partitions des versions comparées
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA public;
+        CREATE INDEX IF NOT EXISTS idx_patch_hunks_added_trgm ON patch_hunks USING GIN (added_text public.gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS idx_patch_hunks_removed_trgm ON patch_hunks USING GIN (removed_text public.gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS idx_patch_symbols_qualified_trgm ON patch_symbols USING GIN (qualified_name public.gin_trgm_ops);
+    END IF;
+END;
+$$;
 
 -- ============================================================
 -- TABLE : modules (détection automatique ou ajout manuel)
@@ -98,12 +276,25 @@ CREATE TABLE modules (
     UNIQUE(repo_id, name)
 );
 
+-- ============================================================
+-- TABLE : module_commit_counts (commits annonçant chaque module)
+-- Recalculée une fois par import (commit_message.refresh_module_counts),
+-- lue par le catalogue d'autocomplétion de l'API (backend/module_catalog.py)
+-- ============================================================
+CREATE TABLE module_commit_counts (
+    repo_id INTEGER NOT NULL REFERENCES repositories(id) ON DELETE CASCADE,
+    module TEXT NOT NULL,                    -- nom annoncé dans le titre (« [FIX] account: »)
+    commits INTEGER NOT NULL,
+    refreshed_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (repo_id, module)
+);
+
 -- ============================================================
 -- TABLE : module_changes (relie commits <-> modules)
 -- ============================================================
 CREATE TABLE module_changes (
     id SERIAL PRIMARY KEY,
-    commit_id INTEGER NOT NULL REFERENCES commits(id) ON DELETE CASCADE,
+    commit_id INTEGER NOT NULL,              -- commits partitionnée : pas de clé étrangère
     module_id INTEGER NOT NULL REFERENCES modules(id) ON DELETE CASCADE,
     summary TEXT
 );
@@ -113,7 +304,7 @@ CREATE TABLE module_changes (
 -- ============================================================
 CREATE TABLE detected_changes (
     id SERIAL PRIMARY KEY,
-    file_change_id INTEGER REFERENCES file_changes(id) ON DELETE CASCADE,
+    file_change_id INTEGER,                  -- file_changes partitionnée : pas de clé étrangère
     type VARCHAR(50),                        -- ex: field_rename, model_add, method_remove
     element_type VARCHAR(50),                -- ex: field, model, view, method
     element_old TEXT,
@@ -154,3 +345,96 @@ CREATE TABLE import_log (
     status VARCHAR(20) CHECK (status IN ('pending', 'running', 'success', 'failed')) DEFAULT 'pending',
     error_message TEXT
 );
+
+-- ============================================================
+-- TABLE : sync_jobs / sync_job_events (file des synchronisations)
+-- Réclamées par les workers de l'API avec FOR UPDATE SKIP LOCKED ;
+-- journal et progression de chaque job (backend/sync_jobs.py)
+-- ============================================================
+CREATE TABLE sync_jobs (
+    id SERIAL PRIMARY KEY,
+    mode VARCHAR(20) NOT NULL DEFAULT 'incremental',
+    repositories TEXT[],
+    branches TEXT[],
+    fetcher VARCHAR(20),
+    status VARCHAR(20) NOT NULL DEFAULT 'queued'
+        CHECK (status IN ('queued', 'running', 'done', 'failed', 'cancelled')),
+    cancel_requested BOOLEAN NOT NULL DEFAULT FALSE,
+    owner VARCHAR(150),
+    pid INTEGER,
+    heartbeat_at TIMESTAMP,
+    created_at TIMESTAMP DEFAULT NOW(),
+    started_at TIMESTAMP,
+    ended_at TIMESTAMP,
+    returncode INTEGER,
+    error_message TEXT
+);
+
+CREATE INDEX idx_sync_jobs_queued ON sync_jobs(id) WHERE status = 'queued';
+CREATE INDEX idx_sync_jobs_running ON sync_jobs(heartbeat_at) WHERE status = 'running';
+
+CREATE TABLE sync_job_events (
+    job_id INTEGER NOT NULL REFERENCES sync_jobs(id) ON DELETE CASCADE,
+    event_id INTEGER NOT NULL,
+    event VARCHAR(20) NOT NULL,
+    data JSONB NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (job_id, event_id)
+);
+
+-- ============================================================
+-- TABLE : ingest_units (unités de travail des workers d'import)
+-- Une branche (incrémental) ou une tranche de pages (complet), réclamée
+-- par `fetch_commits.py worker` (scripts/ingest_units.py)
+-- ============================================================
+CREATE TABLE ingest_units (
+    id SERIAL PRIMARY KEY,
+    repo_name VARCHAR(200) NOT NULL,
+    branch_name VARCHAR(100) NOT NULL,
+    mode VARCHAR(20) NOT NULL CHECK (mode IN ('incremental', 'full')),
+    first_page INTEGER,
+    last_page INTEGER,
+    head_sha VARCHAR(50),                    -- complet : tête de branche figée à la planification
+    status VARCHAR(20) NOT NULL DEFAULT 'queued'
+        CHECK (status IN ('queued', 'running', 'done', 'failed')),
+    owner VARCHAR(150),
+    token_index INTEGER,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    commits_imported INTEGER NOT NULL DEFAULT 0,
+    error_message TEXT,
+    created_at TIMESTAMP DEFAULT NOW(),
+    claimed_at TIMESTAMP,
+    heartbeat_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+CREATE UNIQUE INDEX idx_ingest_units_pending
+    ON ingest_units(repo_name, branch_name, mode, COALESCE(first_page, -1))
+    WHERE status IN ('queued', 'running');
+CREATE INDEX idx_ingest_units_queued ON ingest_units(id) WHERE status = 'queued';
+CREATE INDEX idx_ingest_units_running ON ingest_units(heartbeat_at) WHERE status = 'running';
+
+-- ============================================================
+-- TABLE : push_events (pushs reçus par le webhook GitHub)
+-- Commits exacts de chaque push, importés par `fetch_commits.py push`
+-- (scripts/push_events.py)
+-- ============================================================
+CREATE TABLE push_events (
+    id SERIAL PRIMARY KEY,
+    delivery_id VARCHAR(100) UNIQUE,         -- X-GitHub-Delivery
+    repo_name VARCHAR(200) NOT NULL,
+    branch_name VARCHAR(100) NOT NULL,
+    before_sha VARCHAR(50),
+    after_sha VARCHAR(50) NOT NULL,
+    shas TEXT[] NOT NULL,                    -- du plus ancien au plus récent
+    forced BOOLEAN NOT NULL DEFAULT FALSE,
+    complete BOOLEAN NOT NULL DEFAULT TRUE,  -- FALSE : liste du payload tronquée par GitHub
+    status VARCHAR(20) NOT NULL DEFAULT 'queued'
+        CHECK (status IN ('queued', 'done', 'failed')),
+    commits_imported INTEGER NOT NULL DEFAULT 0,
+    error_message TEXT,
+    received_at TIMESTAMP DEFAULT NOW(),
+    processed_at TIMESTAMP
+);
+
+CREATE INDEX idx_push_events_queued ON push_events(repo_name, branch_name, id) WHERE status = 'queued';
@@ -27,7 +27,8 @@ document.addEventListener('DOMContentLoaded', async () => {
     loadRepositories();
     loadCommitTypes();
     loadMigrationVersions();
-    loadModules();
+    setupModuleAutocomplete('migrationModule', 'moduleSuggestions');
+    setupModuleAutocomplete('commitModule', 'commitModuleSuggestions');
     loadAdminReposAndBranches();
     setupEventListeners();
     initKeyboardShortcuts();
@@ -104,13 +105,48 @@ function setupEventListeners() {
     });
 }
 
+// ============================================================
+// CATALOGUE (/bootstrap)
+// ============================================================
+// Dépôts avec leurs branches, types de commits et totaux en une
+// seule requête, partagée par tous les onglets ; le navigateur garde la
+// réponse et la revalide par son ETag (304 tant qu'aucun import n'a eu lieu)
+let catalogPromise = null;
+
+function loadCatalog(refresh = false) {
+    if (!catalogPromise || refresh) {
+        catalogPromise = fetch(`${API_BASE_URL}/bootstrap`)
+            .then(response => {
+                if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                return response.json();
+            })
+            .catch(error => {
+                catalogPromise = null;
+                throw error;
+            });
+    }
+    return catalogPromise;
+}
+
+async function repoBranches(repoId) {
+    const catalog = await loadCatalog();
+    const repo = catalog.repositories.find(r => String(r.id) === String(repoId));
+    return repo ? repo.branches : [];
+}
+
+async function allBranchNames() {
+    const catalog = await loadCatalog();
+    const names = new Set();
+    catalog.repositories.forEach(repo => repo.branches.forEach(b => names.add(b.name)));
+    return Array.from(names);
+}
+
 // ============================================================
 // DASHBOARD
 // ============================================================
 async function loadDashboard() {
     try {
-        const response = await fetch(`${API_BASE_URL}/stats/summary`);
-        const data = await response.json();
+        const data = (await loadCatalog()).stats;
 
         document.getElementById('totalRepos').textContent = data.total_repositories;
         document.getElementById('totalBranches').textContent = data.total_branches;
@@ -154,8 +190,7 @@ async function loadTopContributors() {
 // ============================================================
 async function loadRepositories() {
     try {
-        const response = await fetch(`${API_BASE_URL}/repositories`);
-        state.repositories = await response.json();
+        state.repositories = (await loadCatalog()).repositories;
 
         const repoSelect = document.getElementById('repoSelect');
         const compareRepoSelect = document.getElementById('compareRepoSelect');
@@ -167,15 +202,8 @@ async function loadRepositories() {
         repoSelect.innerHTML = '<option value="all" selected>Tous les dépôts</option>' + options;
         compareRepoSelect.innerHTML = '<option value="">Sélectionner un dépôt...</option><option value="all">Tous les dépôts</option>' + options;
 
-        const allBranches = new Set();
-        for (const repo of state.repositories) {
-            const branchesResponse = await fetch(`${API_BASE_URL}/repositories/${repo.id}/branches`);
-            const branches = await branchesResponse.json();
-            branches.forEach(b => allBranches.add(b.name));
-        }
-
         const branchSelect = document.getElementById('branchSelect');
-        state.branches = Array.from(allBranches).map(name => ({ id: `all:${name}`, name }));
+        state.branches = (await allBranchNames()).map(name => ({ id: `all:${name}`, name }));
         branchSelect.innerHTML = '<option value="">Sélectionner une branche...</option>' +
             state.branches.map(branch => `<option value="${branch.id}">${branch.name}</option>`).join('');
         branchSelect.disabled = false;
@@ -197,17 +225,7 @@ async function onRepoChange(e) {
 
     if (repoId === 'all') {
         try {
-            const reposResponse = await fetch(`${API_BASE_URL}/repositories`);
-            const repos = await reposResponse.json();
-
-            const allBranches = new Set();
-            for (const repo of repos) {
-                const branchesResponse = await fetch(`${API_BASE_URL}/repositories/${repo.id}/branches`);
-                const branches = await branchesResponse.json();
-                branches.forEach(b => allBranches.add(b.name));
-            }
-
-            state.branches = Array.from(allBranches).map(name => ({ id: `all:${name}`, name }));
+            state.branches = (await allBranchNames()).map(name => ({ id: `all:${name}`, name }));
 
             branchSelect.innerHTML = '<option value="">Sélectionner une branche...</option>' +
                 state.branches.map(branch =>
@@ -221,8 +239,7 @@ async function onRepoChange(e) {
     }
 
     try {
-        const response = await fetch(`${API_BASE_URL}/repositories/${repoId}/branches`);
-        state.branches = await response.json();
+        state.branches = await repoBranches(repoId);
 
         branchSelect.innerHTML = '<option value="">Sélectionner une branche...</option>' +
             state.branches.map(branch =>
@@ -272,7 +289,7 @@ async function loadCommits() {
 
         if (search) url += `&search=${encodeURIComponent(search)}`;
         if (author) url += `&author=${encodeURIComponent(author)}`;
-        if (commitType) url += `&search=${encodeURIComponent('[' + commitType + ']')}`;
+        if (commitType) url += `&commit_type=${encodeURIComponent(commitType)}`;
         if (module) url += `&module=${encodeURIComponent(module)}`;
 
         const response = await fetch(url);
@@ -313,7 +330,7 @@ async function loadCommits() {
         commits = commits.slice(0, 100);
 
         container.innerHTML = commits.map(commit => {
-            const commitType = extractCommitType(commit.message);
+            const commitType = extractCommitType(commit.message, commit.commit_tag);
             return `
             <div class="commit-item" onclick="showCommitDetails(${commit.id})">
                 <div class="commit-header">
@@ -488,17 +505,9 @@ async function onCompareRepoChange(e) {
 
     if (repoId === 'all') {
         try {
-            const reposResponse = await fetch(`${API_BASE_URL}/repositories`);
-            const repos = await reposResponse.json();
-
-            const allBranches = new Set();
-            for (const repo of repos) {
-                const branchesResponse = await fetch(`${API_BASE_URL}/repositories/${repo.id}/branches`);
-                const branches = await branchesResponse.json();
-                branches.forEach(b => allBranches.add(b.name));
-            }
+            const allBranches = await allBranchNames();
 
-            const options = Array.from(allBranches).map(name =>
+            const options = allBranches.map(name =>
                 `<option value="${name}">${name}</option>`
             ).join('');
 
@@ -516,8 +525,7 @@ async function onCompareRepoChange(e) {
     }
 
     try {
-        const response = await fetch(`${API_BASE_URL}/repositories/${repoId}/branches`);
-        const branches = await response.json();
+        const branches = await repoBranches(repoId);
 
         const options = branches.map(branch =>
             `<option value="${branch.name}">${branch.name}${branch.is_default ? ' (défaut)' : ''}</option>`
@@ -757,8 +765,7 @@ function collapseAllDiffs() {
 // ============================================================
 async function loadCommitTypes() {
     try {
-        const response = await fetch(`${API_BASE_URL}/commit-types`);
-        const types = await response.json();
+        const types = (await loadCatalog()).commit_types;
         window.commitTypes = types;
 
         // Remplir le select dans Commits tab
@@ -777,13 +784,11 @@ async function loadCommitTypes() {
 
 async function loadMigrationVersions() {
     try {
-        const response = await fetch(`${API_BASE_URL}/repositories`);
-        const repos = await response.json();
+        const repos = (await loadCatalog()).repositories;
 
         if (repos.length === 0) return;
 
-        const branchesResponse = await fetch(`${API_BASE_URL}/repositories/${repos[0].id}/branches`);
-        const branches = await branchesResponse.json();
+        const branches = repos[0].branches;
 
         const fromVersionSelect = document.getElementById('migrationFromVersion');
         const toVersionSelect = document.getElementById('migrationToVersion');
@@ -799,95 +804,48 @@ async function loadMigrationVersions() {
     }
 }
 
-let modulesData = [];
-
-async function loadModules() {
-    try {
-        const response = await fetch(`${API_BASE_URL}/modules`);
-        const modules = await response.json();
-        modulesData = modules.map(m => m.name);
-        console.log(`✅ ${modulesData.length} modules chargés`);
-        setupModuleAutocomplete();
-        setupCommitModuleAutocomplete();
-    } catch (error) {
-        console.error('Erreur lors du chargement des modules:', error);
-        modulesData = [];
-    }
-}
-
-function setupModuleAutocomplete() {
-    const input = document.getElementById('migrationModule');
-    const suggestionsDiv = document.getElementById('moduleSuggestions');
+// Autocomplétion servie par l'API (catalogue des modules en mémoire, classé
+// par pertinence puis par nombre de commits) ; une frappe annule la précédente
+function setupModuleAutocomplete(inputId, suggestionsId) {
+    const input = document.getElementById(inputId);
+    const suggestionsDiv = document.getElementById(suggestionsId);
 
     if (!input || !suggestionsDiv) return;
 
-    input.addEventListener('input', (e) => {
-        const value = e.target.value.toLowerCase();
+    let controller = null;
 
-        if (value.length < 1) {
-            suggestionsDiv.style.display = 'none';
-            return;
-        }
+    input.addEventListener('input', async (e) => {
+        const value = e.target.value.trim();
 
-        const filtered = modulesData
-            .filter(m => m.toLowerCase().includes(value))
-            .slice(0, 20);
+        if (controller) controller.abort();
 
-        if (filtered.length === 0) {
+        if (value.length < 1) {
             suggestionsDiv.style.display = 'none';
             return;
         }
 
-        suggestionsDiv.innerHTML = filtered
-            .map(m => `<div class="suggestion-item" onclick="selectModule('${m}')">${m}</div>`)
-            .join('');
-        suggestionsDiv.style.display = 'block';
-    });
-
-    input.addEventListener('blur', () => {
-        setTimeout(() => {
-            suggestionsDiv.style.display = 'none';
-        }, 200);
-    });
-
-    input.addEventListener('focus', (e) => {
-        if (e.target.value.length > 0) {
-            e.target.dispatchEvent(new Event('input'));
-        }
-    });
-}
-
-function selectModule(moduleName) {
-    const input = document.getElementById('migrationModule');
-    input.value = moduleName;
-    document.getElementById('moduleSuggestions').style.display = 'none';
-}
-
-function setupCommitModuleAutocomplete() {
-    const input = document.getElementById('commitModule');
-    const suggestionsDiv = document.getElementById('commitModuleSuggestions');
-
-    if (!input || !suggestionsDiv) return;
-
-    input.addEventListener('input', (e) => {
-        const value = e.target.value.toLowerCase();
-
-        if (value.length < 1) {
-            suggestionsDiv.style.display = 'none';
+        controller = new AbortController();
+        let modules;
+        try {
+            const params = new URLSearchParams({ search: value, limit: 20 });
+            const response = await fetch(`${API_BASE_URL}/modules?${params}`, { signal: controller.signal });
+            modules = await response.json();
+        } catch (error) {
+            if (error.name !== 'AbortError') {
+                console.error('Erreur lors du chargement des modules:', error);
+            }
             return;
         }
 
-        const filtered = modulesData
-            .filter(m => m.toLowerCase().includes(value))
-            .slice(0, 20);
-
-        if (filtered.length === 0) {
+        if (modules.length === 0) {
             suggestionsDiv.style.display = 'none';
             return;
         }
 
-        suggestionsDiv.innerHTML = filtered
-            .map(m => `<div class="suggestion-item" onclick="selectCommitModule('${m}')">${m}</div>`)
+        suggestionsDiv.innerHTML = modules
+            .map(m => `<div class="suggestion-item" onclick="selectModule('${inputId}', '${suggestionsId}', '${m.name}')">
+                ${m.name}<span style="float: right; opacity: 0.6;">${formatNumber(m.commits)} commits</span>
+            </div>`)
             .join('');
         suggestionsDiv.style.display = 'block';
     });
@@ -905,15 +863,18 @@ function setupCommitModuleAutocomplete() {
     });
 }
 
-function selectCommitModule(moduleName) {
-    const input = document.getElementById('commitModule');
+function selectModule(inputId, suggestionsId, moduleName) {
+    const input = document.getElementById(inputId);
     input.value = moduleName;
-    document.getElementById('commitModuleSuggestions').style.display = 'none';
+    document.getElementById(suggestionsId).style.display = 'none';
 }
 
 // ============================================================
 // MIGRATION HELPER
 // ============================================================
+// Recherche en cours : annulée par la suivante (l'API annule alors la requête SQL)
+let migrationSearchController = null;
+
 async function searchMigrationChanges() {
     const searchTerm = document.getElementById('migrationSearch').value.trim();
     const fromVersion = document.getElementById('migrationFromVersion').value;
@@ -922,6 +883,7 @@ async function searchMigrationChanges() {
     const commitType = document.getElementById('migrationCommitType').value;
     const fileExtension = document.getElementById('migrationFileExtension').value;
     const useRegex = document.getElementById('migrationRegex').checked;
+    const change = document.getElementById('migrationChange').value;
     const resultsDiv = document.getElementById('migrationResults');
 
     if (!searchTerm || searchTerm.length < 2) {
@@ -941,13 +903,29 @@ async function searchMigrationChanges() {
         if (module) url += `&module=${encodeURIComponent(module)}`;
         if (commitType) url += `&commit_type=${commitType}`;
         if (useRegex) url += `&use_regex=true`;
+        if (change) url += `&change=${change}`;
 
         console.log('Migration search URL:', url);
         console.log('Module filter:', module);
 
-        const response = await fetch(url);
+        if (migrationSearchController) migrationSearchController.abort();
+        migrationSearchController = new AbortController();
+
+        const response = await fetch(url, { signal: migrationSearchController.signal });
         let data = await response.json();
 
+        if (!response.ok) {
+            // detail : message de l'API (regex invalide, délai dépassé) ou liste d'erreurs de validation
+            const message = typeof data.detail === 'string' ? data.detail : 'Paramètres de recherche invalides';
+            resultsDiv.innerHTML = `<p class="info-text">${escapeHtml(message)}</p>`;
+            return;
+        }
+
+        // L'API ne renvoie que les hunks contenant le terme : le diff affiché se limite à eux
+        data.results.forEach(r => {
+            r.file.patch = r.file.hunks.map(h => h.content).join('\n');
+        });
+
         if (fileExtension) {
             data.results = data.results.filter(r => r.file.filename.endsWith(fileExtension));
             data.count = data.results.length;
@@ -957,6 +935,7 @@ async function searchMigrationChanges() {
 
         displayMigrationResults(data, searchTerm);
     } catch (error) {
+        if (error.name === 'AbortError') return;
         console.error('Erreur lors de la recherche:', error);
         resultsDiv.innerHTML = '<p class="info-text">Erreur lors de la recherche. Vérifiez que des commits sont importés.</p>';
     }
@@ -989,7 +968,7 @@ function displayMigrationResults(data, searchTerm) {
         <div class="migration-summary" style="margin-bottom: 30px;">
             <div style="display: flex; justify-content: space-between; align-items: start; margin-bottom: 20px; padding: 20px; background: var(--gray-50); border-left: 4px solid var(--black);">
                 <div>
-                    <h3 style="font-size: 1.5rem; margin-bottom: 10px;">${data.count} changement(s) trouvé(s)</h3>
+                    <h3 style="font-size: 1.5rem; margin-bottom: 10px;">${data.count}${data.truncated ? '+' : ''} changement(s) trouvé(s)</h3>
                     <div style="display: inline-block; padding: 6px 15px; background: var(--black); color: var(--white); font-size: 0.9rem; font-weight: 700; text-transform: uppercase; letter-spacing: 1px;">
                         ${data.from_version} → ${data.to_version}
                     </div>
@@ -1246,8 +1225,10 @@ function escapeRegex(str) {
     return str.replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
 }
 
-function extractCommitType(message) {
-    if (!message || !window.commitTypes) return null;
+function extractCommitType(message, tag) {
+    if (!window.commitTypes) return null;
+    if (tag) return window.commitTypes.find(t => t.code === tag);
+    if (!message) return null;
 
     const match = message.match(/^\[([A-Z0-9]+)\]/);
     if (!match) return null;
@@ -1520,18 +1501,10 @@ async function onModuleAnalyticsRepoChange() {
 
     if (repoId === 'all') {
         try {
-            const reposResponse = await fetch(`${API_BASE_URL}/repositories`);
-            const repos = await reposResponse.json();
-
-            const allBranches = new Set();
-            for (const repo of repos) {
-                const branchesResponse = await fetch(`${API_BASE_URL}/repositories/${repo.id}/branches`);
-                const branches = await branchesResponse.json();
-                branches.forEach(b => allBranches.add(b.name));
-            }
+            const allBranches = await allBranchNames();
 
             branchSelect.innerHTML = '<option value="">Sélectionner...</option>' +
-                Array.from(allBranches).map(name => `<option value="all:${name}">${name}</option>`).join('');
+                allBranches.map(name => `<option value="all:${name}">${name}</option>`).join('');
             branchSelect.disabled = false;
         } catch (error) {
             console.error('Erreur lors du chargement des branches:', error);
@@ -1540,8 +1513,7 @@ async function onModuleAnalyticsRepoChange() {
     }
 
     try {
-        const response = await fetch(`${API_BASE_URL}/repositories/${repoId}/branches`);
-        const branches = await response.json();
+        const branches = await repoBranches(repoId);
 
         branchSelect.innerHTML = '<option value="">Sélectionner...</option>' +
             branches.map(branch => `<option value="${branch.name}">${branch.name}</option>`).join('');
@@ -1562,8 +1534,7 @@ async function onTimelineRepoChange() {
     }
 
     try {
-        const response = await fetch(`${API_BASE_URL}/repositories/${repoId}/branches`);
-        const branches = await response.json();
+        const branches = await repoBranches(repoId);
 
         branchSelect.innerHTML = '<option value="">Sélectionner une branche...</option>' +
             branches.map(b => `<option value="${b.id}">${b.name}</option>`).join('');
@@ -2219,6 +2190,7 @@ document.addEventListener('DOMContentLoaded', () => {
 // ============================================================
 let pollingInterval = null;
 let logPosition = 0;
+let syncEventSource = null;
 
 async function triggerFetch(mode) {
     try {
@@ -2261,22 +2233,13 @@ async function triggerFetch(mode) {
 
         const data = await response.json();
 
-        if (data.status === 'already_running') {
-            showNotification(data.message, 'warning');
-            addTerminalLine(data.message, 'warning');
-            incrementalBtn.disabled = false;
-            fullBtn.disabled = false;
-            cancelBtn.style.display = 'inline-block';
-            return;
-        }
-
-        if (response.ok && data.status === 'started') {
+        if (response.ok && data.status === 'queued') {
             showSyncIndicator();
-            showNotification('Synchronisation démarrée', 'success');
-            addTerminalLine(`✅ Synchronisation démarrée (PID: ${data.pid})`, 'success');
+            showNotification('Synchronisation ajoutée à la file', 'success');
+            addTerminalLine(`✅ ${data.message}`, 'success');
 
             cancelBtn.style.display = 'inline-block';
-            startStreamingLogs();
+            startStreamingLogs(data.job_id);
 
         } else {
             showNotification('Erreur lors du démarrage', 'error');
@@ -2304,6 +2267,21 @@ function showSyncIndicator() {
     }
 }
 
+// Résumé d'un événement de progression (scripts/sync_progress.py) dans l'indicateur
+function updateSyncIndicator(progress) {
+    const label = document.querySelector('#syncIndicatorGlobal span');
+    if (!label || !progress.branch) return;
+
+    let text = `Synchronisation ${progress.repo} ${progress.branch}`;
+    if (progress.commits !== undefined) {
+        text += ` — ${progress.commits} commits (${progress.new} nouveaux)`;
+    }
+    if (progress.eta_seconds !== null && progress.eta_seconds !== undefined) {
+        text += ` · reste ~${Math.ceil(progress.eta_seconds / 60)} min`;
+    }
+    label.textContent = text;
+}
+
 function hideSyncIndicator() {
     const indicator = document.getElementById('syncIndicatorGlobal');
     if (indicator) {
@@ -2313,7 +2291,67 @@ function hideSyncIndicator() {
 
 let pollingErrorCount = 0;
 
-function startStreamingLogs() {
+function finishSync() {
+    hideSyncIndicator();
+    const incrementalBtn = document.getElementById('incrementalBtn');
+    const fullBtn = document.getElementById('fullBtn');
+    const cancelBtn = document.getElementById('cancelBtn');
+    if (incrementalBtn) incrementalBtn.disabled = false;
+    if (fullBtn) fullBtn.disabled = false;
+    if (cancelBtn) cancelBtn.style.display = 'none';
+    showNotification('Synchronisation terminée', 'success');
+    addTerminalLine('', 'info');
+    addTerminalLine('✅ Synchronisation terminée', 'success');
+    loadFetchStatus();
+    // Nouveaux commits et branches : nouvelle version du catalogue
+    loadCatalog(true).then(loadDashboard).catch(() => {});
+}
+
+// Progression poussée par le serveur (un seul suivi du journal pour tous les onglets)
+function startStreamingLogs(jobId = null) {
+    stopStreaming();
+
+    if (typeof EventSource === 'undefined') {
+        startPollingLogs(jobId);
+        return;
+    }
+
+    let received = false;
+    const jobParam = jobId ? `?job_id=${jobId}` : '';
+    syncEventSource = new EventSource(`${API_BASE_URL}/admin/fetch-events${jobParam}`);
+
+    syncEventSource.addEventListener('log', (event) => {
+        received = true;
+        const log = JSON.parse(event.data);
+        addTerminalLine(log.message, log.type);
+    });
+
+    syncEventSource.addEventListener('progress', (event) => {
+        updateSyncIndicator(JSON.parse(event.data));
+    });
+
+    syncEventSource.addEventListener('completed', () => {
+        stopStreaming();
+        finishSync();
+    });
+
+    syncEventSource.onerror = () => {
+        // Flux indisponible (proxy, ancienne API) : retour au polling
+        if (!received || syncEventSource.readyState === EventSource.CLOSED) {
+            stopStreaming();
+            startPollingLogs(jobId);
+        }
+    };
+}
+
+function stopStreaming() {
+    if (syncEventSource) {
+        syncEventSource.close();
+        syncEventSource = null;
+    }
+}
+
+function startPollingLogs(jobId = null) {
     if (pollingInterval) {
         clearInterval(pollingInterval);
     }
@@ -2323,7 +2361,8 @@ function startStreamingLogs() {
 
     pollingInterval = setInterval(async () => {
         try {
-            const response = await fetch(`${API_BASE_URL}/admin/fetch-logs?last_position=${logPosition}`);
+            const jobParam = jobId ? `&job_id=${jobId}` : '';
+            const response = await fetch(`${API_BASE_URL}/admin/fetch-logs?last_position=${logPosition}${jobParam}`);
 
             if (!response.ok) {
                 throw new Error(`HTTP ${response.status}`);
@@ -2342,17 +2381,7 @@ function startStreamingLogs() {
             if (data.completed) {
                 clearInterval(pollingInterval);
                 pollingInterval = null;
-                hideSyncIndicator();
-                const incrementalBtn = document.getElementById('incrementalBtn');
-                const fullBtn = document.getElementById('fullBtn');
-                const cancelBtn = document.getElementById('cancelBtn');
-                if (incrementalBtn) incrementalBtn.disabled = false;
-                if (fullBtn) fullBtn.disabled = false;
-                if (cancelBtn) cancelBtn.style.display = 'none';
-                showNotification('Synchronisation terminée', 'success');
-                addTerminalLine('', 'info');
-                addTerminalLine('✅ Synchronisation terminée', 'success');
-                loadFetchStatus();
+                finishSync();
             }
         } catch (error) {
             console.error('Erreur polling logs:', error);
@@ -2376,6 +2405,7 @@ function startStreamingLogs() {
 }
 
 function stopPolling() {
+    stopStreaming();
     if (pollingInterval) {
         clearInterval(pollingInterval);
         pollingInterval = null;
@@ -2433,8 +2463,7 @@ function clearTerminal() {
 
 async function loadAdminReposAndBranches() {
     try {
-        const reposResponse = await fetch(`${API_BASE_URL}/repositories`);
-        const repos = await reposResponse.json();
+        const repos = (await loadCatalog()).repositories;
 
         const repoSelect = document.getElementById('adminRepoSelect');
         if (repoSelect && repos.length > 0) {
@@ -2443,16 +2472,11 @@ async function loadAdminReposAndBranches() {
             ).join('');
         }
 
-        const allBranches = new Set();
-        for (const repo of repos) {
-            const branchesResponse = await fetch(`${API_BASE_URL}/repositories/${repo.id}/branches`);
-            const branches = await branchesResponse.json();
-            branches.forEach(branch => allBranches.add(branch.name));
-        }
+        const allBranches = await allBranchNames();
 
         const branchSelect = document.getElementById('adminBranchSelect');
-        if (branchSelect && allBranches.size > 0) {
-            const sortedBranches = Array.from(allBranches).sort((a, b) => {
+        if (branchSelect && allBranches.length > 0) {
+            const sortedBranches = allBranches.slice().sort((a, b) => {
                 const aNum = parseFloat(a);
                 const bNum = parseFloat(b);
                 if (!isNaN(aNum) && !isNaN(bNum)) return aNum - bNum;
@@ -2466,7 +2490,7 @@ async function loadAdminReposAndBranches() {
             ).join('');
         }
 
-        console.log(`✅ Chargé ${repos.length} repos et ${allBranches.size} branches pour Admin`);
+        console.log(`✅ Chargé ${repos.length} repos et ${allBranches.length} branches pour Admin`);
     } catch (error) {
         console.error('Erreur chargement repos/branches Admin:', error);
     }
@@ -2482,7 +2506,7 @@ async function checkSyncStatus() {
             const terminalBody = document.getElementById('terminalBody');
             if (terminalBody) {
                 addTerminalLine('⚠️  Une synchronisation est en cours (détectée au chargement)', 'warning');
-                startStreamingLogs();
+                startStreamingLogs(data.job_id);
             }
         }
     } catch (error) {
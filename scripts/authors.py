@@ -0,0 +1,248 @@
+"""Dimension des auteurs : une personne, plusieurs orthographes et adresses.
+
+Chaque couple (nom, email) vu dans un commit est un alias rangé dans
+odoo_devlog.author_aliases et rattaché à une ligne de odoo_devlog.authors.
+Les alias sont fusionnés par email normalisé (minuscules, adresse
+« ID+login@users.noreply.github.com » ramenée à « login@… ») ; une adresse
+noreply GitHub ou un commit sans email rejoint l'auteur qui porte déjà ce
+nom, s'il est le seul. commits.author_id porte l'auteur : les statistiques
+comptent et groupent des entiers au lieu de noms libres.
+
+L'import résout l'auteur de chaque commit ; ce script le fait pour les
+commits déjà importés, recalcule le nom affiché (le plus fréquent) et
+permet de fusionner à la main deux auteurs restés distincts.
+
+Usage :
+    python authors.py                      # rattache les commits sans author_id
+    python authors.py --suggest            # auteurs distincts portant le même nom
+    python authors.py --merge 12 340 341   # fusionne 340 et 341 dans 12
+"""
+import os
+import re
+import time
+import argparse
+import logging
+import psycopg2
+from psycopg2.extras import execute_values
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DB_CONFIG = {
+    "dbname": os.getenv("DB_NAME", "odoo_devlog"),
+    "user": os.getenv("DB_USER"),
+    "password": os.getenv("DB_PASSWORD"),
+    "host": os.getenv("DB_HOST", "localhost"),
+    "port": 5432
+}
+
+NOREPLY = re.compile(r"^(?:\d+\+)?([^@]+)@users\.noreply\.github\.com$")
+
+# Couples résolus par transaction lors du rattrapage (un verrou consultatif chacun)
+RESOLVE_BATCH = 500
+
+# ============================================================
+# ALIAS
+# ============================================================
+def alias_key(name, email):
+    """Clé de fusion d'un couple (nom, email), None sans nom ni email"""
+    email = (email or "").strip().lower()
+    if email:
+        noreply = NOREPLY.match(email)
+        return f"{noreply.group(1)}@users.noreply.github.com" if noreply else email
+    name = (name or "").strip().lower()
+    return f"name:{name}" if name else None
+
+def _weak_key(key):
+    """Clé qui ne désigne personne à elle seule (noreply GitHub, nom sans email)"""
+    return key.startswith("name:") or key.endswith("@users.noreply.github.com")
+
+def _attach_alias(cur, key, name, email):
+    """Rattache un nouvel alias à un auteur existant ou créé (sous verrou de la clé)"""
+    cur.execute("SELECT author_id FROM odoo_devlog.author_aliases WHERE email_key = %s LIMIT 1;", (key,))
+    row = cur.fetchone()
+    author_id = row[0] if row else None
+
+    if author_id is None and _weak_key(key):
+        cur.execute("""
+            SELECT DISTINCT author_id FROM odoo_devlog.author_aliases
+            WHERE lower(name) = lower(%s) LIMIT 2;
+        """, (name,))
+        found = cur.fetchall()
+        if len(found) == 1:
+            author_id = found[0][0]
+
+    if author_id is None:
+        cur.execute("INSERT INTO odoo_devlog.authors (name, email) VALUES (%s, %s) RETURNING id;", (name, email))
+        author_id = cur.fetchone()[0]
+
+    cur.execute("""
+        INSERT INTO odoo_devlog.author_aliases (email_key, name, author_id, email)
+        VALUES (%s, %s, %s, %s)
+        ON CONFLICT (email_key, name) DO NOTHING;
+    """, (key, name, author_id, email))
+    return author_id
+
+def resolve_author(cur, name, email, cache=None):
+    """Id de l'auteur d'un couple (nom, email), créé au besoin.
+
+    Un alias connu se lit en une requête ; un nouvel alias est rattaché
+    sous un verrou consultatif de sa clé (imports concurrents). `cache`
+    (dict) évite de relire les alias déjà résolus : à réserver aux
+    traitements qui valident au fur et à mesure.
+    """
+    key = alias_key(name, email)
+    if key is None:
+        return None
+    name = (name or "").strip()[:150] or key[:150]
+    email = (email or "").strip()[:200] or None
+    if cache is not None and (key, name) in cache:
+        return cache[(key, name)]
+
+    cur.execute("SELECT author_id, name FROM odoo_devlog.author_aliases WHERE email_key = %s;", (key,))
+    author_id = next((known for known, alias in cur.fetchall() if alias == name), None)
+    if author_id is None:
+        cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s));", (key,))
+        author_id = _attach_alias(cur, key, name, email)
+
+    if cache is not None:
+        cache[(key, name)] = author_id
+    return author_id
+
+# ============================================================
+# RATTRAPAGE
+# ============================================================
+def refresh_display_names(cur):
+    """Nom affiché = orthographe la plus fréquente dans les commits de l'auteur"""
+    cur.execute("""
+        UPDATE odoo_devlog.authors a SET name = top.author_name
+        FROM (
+            SELECT DISTINCT ON (author_id) author_id, author_name
+            FROM odoo_devlog.commits
+            WHERE author_id IS NOT NULL AND author_name IS NOT NULL
+            GROUP BY author_id, author_name
+            ORDER BY author_id, COUNT(*) DESC, author_name
+        ) top
+        WHERE a.id = top.author_id AND a.name IS DISTINCT FROM top.author_name;
+    """)
+
+def backfill_authors(conn, batch_size=20000, pause=0.0):
+    """Rattache à un auteur les commits qui n'en ont pas.
+
+    Les couples (nom, email) distincts sont résolus une fois, adresses
+    nominatives d'abord (une adresse noreply rejoint ensuite l'auteur du
+    même nom), puis les commits sont mis à jour par tranches d'id.
+    Retourne (couples résolus, commits rattachés).
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT DISTINCT COALESCE(author_name, ''), COALESCE(author_email, '')
+            FROM odoo_devlog.commits WHERE author_id IS NULL;
+        """)
+        pairs = cur.fetchall()
+    conn.commit()
+    pairs.sort(key=lambda pair: (_weak_key(alias_key(*pair) or "name:"), pair))
+
+    cache = {}
+    mapping = []
+    for start in range(0, len(pairs), RESOLVE_BATCH):
+        with conn.cursor() as cur:
+            for name, email in pairs[start:start + RESOLVE_BATCH]:
+                author_id = resolve_author(cur, name, email, cache)
+                if author_id is not None:
+                    mapping.append((name, email, author_id))
+        conn.commit()
+
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TEMP TABLE author_map (name TEXT, email TEXT, author_id INT, PRIMARY KEY (name, email))
+            ON COMMIT PRESERVE ROWS;
+        """)
+        if mapping:
+            execute_values(cur, "INSERT INTO author_map VALUES %s", mapping, page_size=1000)
+        cur.execute("ANALYZE author_map;")
+        cur.execute("SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM odoo_devlog.commits WHERE author_id IS NULL;")
+        low, high = cur.fetchone()
+    conn.commit()
+
+    updated = 0
+    start = low
+    while start <= high:
+        end = start + batch_size - 1
+        with conn.cursor() as cur:
+            cur.execute("""
+                UPDATE odoo_devlog.commits c SET author_id = m.author_id
+                FROM author_map m
+                WHERE c.id BETWEEN %s AND %s AND c.author_id IS NULL
+                  AND COALESCE(c.author_name, '') = m.name AND COALESCE(c.author_email, '') = m.email;
+            """, (start, end))
+            updated += cur.rowcount
+        conn.commit()
+        start = end + 1
+        if pause:
+            time.sleep(pause)
+
+    with conn.cursor() as cur:
+        refresh_display_names(cur)
+        cur.execute("DROP TABLE author_map;")
+    conn.commit()
+    return len(mapping), updated
+
+# ============================================================
+# FUSION MANUELLE
+# ============================================================
+def suggest_merges(conn, limit=50):
+    """Auteurs distincts portant le même nom (sans tenir compte de la casse)"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT lower(name), array_agg(DISTINCT author_id ORDER BY author_id)
+            FROM odoo_devlog.author_aliases
+            GROUP BY lower(name)
+            HAVING COUNT(DISTINCT author_id) > 1
+            ORDER BY lower(name)
+            LIMIT %s;
+        """, (limit,))
+        return cur.fetchall()
+
+def merge_authors(conn, keep_id, other_ids):
+    """Rattache commits et alias de `other_ids` à `keep_id`, puis supprime les doublons"""
+    with conn.cursor() as cur:
+        cur.execute("UPDATE odoo_devlog.commits SET author_id = %s WHERE author_id = ANY(%s);", (keep_id, list(other_ids)))
+        moved = cur.rowcount
+        cur.execute("UPDATE odoo_devlog.author_aliases SET author_id = %s WHERE author_id = ANY(%s);", (keep_id, list(other_ids)))
+        cur.execute("DELETE FROM odoo_devlog.authors WHERE id = ANY(%s);", (list(other_ids),))
+        refresh_display_names(cur)
+    conn.commit()
+    return moved
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    parser = argparse.ArgumentParser(description="Auteurs des commits : rattrapage et fusion des alias")
+    parser.add_argument("--batch-size", type=int, default=20000, help="Nombre d'id de commits par transaction")
+    parser.add_argument("--pause", type=float, default=0.0, help="Pause entre deux tranches (secondes)")
+    parser.add_argument("--suggest", action="store_true", help="Lister les auteurs distincts de même nom")
+    parser.add_argument("--merge", type=int, nargs="+", metavar="ID", help="Fusionner les auteurs suivants dans le premier")
+    args = parser.parse_args()
+
+    try:
+        conn = psycopg2.connect(**DB_CONFIG, options='-c client_encoding=UTF8')
+    except Exception as e:
+        logger.error(f"❌ Erreur de connexion à PostgreSQL : {e}")
+        exit(1)
+
+    if args.suggest:
+        for name, ids in suggest_merges(conn):
+            logger.info(f"   • {name} : auteurs {', '.join(map(str, ids))}")
+    elif args.merge:
+        if len(args.merge) < 2:
+            logger.error("❌ --merge attend l'auteur conservé puis au moins un doublon")
+            exit(1)
+        moved = merge_authors(conn, args.merge[0], args.merge[1:])
+        logger.info(f"✅ {moved} commits rattachés à l'auteur {args.merge[0]}")
+    else:
+        started = time.time()
+        pairs, updated = backfill_authors(conn, args.batch_size, args.pause)
+        logger.info(f"✅ {pairs} alias résolus, {updated} commits rattachés ({time.time() - started:.1f}s)")
+    conn.close()
@@ -0,0 +1,86 @@
+import os
+import logging
+from github import GithubException
+
+logger = logging.getLogger(__name__)
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+# Nombre de fichiers par morceau transmis à l'écriture (taille des INSERT)
+FILE_CHUNK_SIZE = int(os.getenv("FILE_CHUNK_SIZE", 100))
+
+# GitHub ne renvoie jamais plus de 3000 fichiers pour un commit
+GITHUB_MAX_COMMIT_FILES = 3000
+
+# ============================================================
+# LECTURE PAGINÉE DES FICHIERS
+# ============================================================
+def iter_commit_files(commit):
+    """Itère les fichiers d'un commit page par page, sans garder les pages lues.
+
+    La première page (jusqu'à 300 fichiers) est déjà dans la réponse du
+    commit ; les suivantes sont demandées une à une tant que l'en-tête Link
+    annonce une page suivante. Contrairement à l'itération d'une
+    PaginatedList, les pages déjà consommées ne restent pas en mémoire.
+    """
+    # Les commits GraphQL délèguent les fichiers à un commit REST
+    source = getattr(commit, "rest_commit", commit)
+    if source is None:
+        return
+
+    files = source.files
+    page_size = len(source.raw_data.get("files") or [])
+    for index in range(page_size):
+        yield files[index]
+
+    if 'rel="next"' not in (source.raw_headers.get("link") or ""):
+        return
+
+    page = 1
+    while True:
+        batch = files.get_page(page)
+        yield from batch
+        if len(batch) < page_size or not batch:
+            return
+        page += 1
+
+def files_truncated(commit, streamed, changes):
+    """Indique si la liste de fichiers reçue est incomplète.
+
+    `streamed` est le nombre de fichiers reçus, `changes` la somme de leurs
+    lignes modifiées, comparée aux statistiques globales du commit.
+    """
+    if streamed >= GITHUB_MAX_COMMIT_FILES:
+        return True
+    changed_files = getattr(commit, "changed_files", None)
+    if changed_files and streamed < changed_files:
+        return True
+    stats = commit.stats
+    return bool(stats and stats.total and changes < stats.total)
+
+def iter_file_chunks(commit):
+    """Découpe les fichiers d'un commit en morceaux de FILE_CHUNK_SIZE.
+
+    Produit des triplets (fichiers, dernier, tronqué) ; le dernier morceau,
+    éventuellement vide, porte l'indicateur de troncature. Une page en
+    erreur arrête la lecture et marque le commit comme tronqué plutôt que
+    de l'abandonner.
+    """
+    chunk = []
+    streamed = 0
+    changes = 0
+    failed = False
+    try:
+        for file in iter_commit_files(commit):
+            chunk.append(file)
+            streamed += 1
+            changes += file.changes or 0
+            if len(chunk) >= FILE_CHUNK_SIZE:
+                yield chunk, False, False
+                chunk = []
+    except GithubException as e:
+        logger.warning(f"⚠️  Fichiers incomplets pour {commit.sha[:7]} ({streamed} lus): {e.status}")
+        failed = True
+
+    yield chunk, True, failed or files_truncated(commit, streamed, changes)
@@ -0,0 +1,208 @@
+"""Conventions des messages de commit Odoo, extraites à l'import.
+
+    [FIX] account, sale: titre du commit
+
+    task-3456789
+    opw-4012345
+
+    closes odoo/odoo#185000
+
+    X-original-commit: 0123abcd...
+
+donne le tag (FIX), les modules annoncés (account, sale), les tâches et
+tickets (opw) cités, la pull request de fusion (odoo/odoo #185000) et le
+commit d'origine d'un forward-port. Ces valeurs sont rangées dans des
+colonnes indexées de commits : les filtres par type, module annoncé ou
+référence sont des égalités au lieu de LIKE sur le message.
+
+L'import remplit les colonnes au fil de l'eau ; ce script les recalcule
+pour les commits déjà importés (idempotent, reprise avec --from-id), puis
+recompte les commits de chaque module annoncé (module_commit_counts, lu
+par l'autocomplétion de l'API).
+
+Usage :
+    python commit_message.py
+    python commit_message.py --from-id 120000 --batch-size 5000
+"""
+import os
+import re
+import time
+import argparse
+import logging
+from collections import namedtuple
+import psycopg2
+from psycopg2.extras import execute_values
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DB_CONFIG = {
+    "dbname": os.getenv("DB_NAME", "odoo_devlog"),
+    "user": os.getenv("DB_USER"),
+    "password": os.getenv("DB_PASSWORD"),
+    "host": os.getenv("DB_HOST", "localhost"),
+    "port": 5432
+}
+
+MessageTags = namedtuple("MessageTags", "tag modules task_ids opw_ids pr_repo pr_number original_commit")
+
+TAG_COLUMNS = "commit_tag, message_modules, task_ids, opw_ids, pr_repo, pr_number, original_commit"
+
+# ============================================================
+# MOTIFS
+# ============================================================
+TITLE_TAGS = re.compile(r"^((?:\s*\[[A-Za-z0-9_-]+\])+)\s*")
+TAG = re.compile(r"\[([A-Za-z0-9_-]+)\]")
+REVERT = re.compile(r'^Revert\s+"(.*)"\s*$')
+TITLE_MODULES = re.compile(r"^([a-z0-9_]+(?:\s*,\s*[a-z0-9_]+)*)\s*:")
+
+TASK = re.compile(r"\btask[-_ ]?(?:id)?\s*[:#-]?\s*(\d{3,10})\b", re.IGNORECASE)
+OPW = re.compile(r"\bopw[-_ ]?\s*[:#-]?\s*(\d{3,10})\b", re.IGNORECASE)
+CLOSES = re.compile(r"^\s*closes\s+([\w.-]+/[\w.-]+)#(\d+)\s*$", re.IGNORECASE | re.MULTILINE)
+ORIGINAL_COMMIT = re.compile(r"^\s*X-original-commit:\s*([0-9a-f]{7,40})\s*$", re.IGNORECASE | re.MULTILINE)
+
+# Préfixes du robot de forward-port, sans valeur de type
+IGNORED_TAGS = {"FW", "FP"}
+
+# Au-delà de INTEGER : référence mal saisie, ignorée
+MAX_REFERENCE = 2 ** 31 - 1
+
+# ============================================================
+# ANALYSE
+# ============================================================
+def _references(pattern, message):
+    found = []
+    for value in pattern.findall(message):
+        number = int(value)
+        if number <= MAX_REFERENCE and number not in found:
+            found.append(number)
+    return found
+
+def parse_message(message):
+    """Tag, modules annoncés et références d'un message de commit"""
+    if not message:
+        return MessageTags(None, [], [], [], None, None, None)
+
+    title = message.split("\n", 1)[0].strip()
+    tag = None
+    reverted = REVERT.match(title)
+    if reverted:
+        tag, title = "REV", reverted.group(1)
+
+    tags = TITLE_TAGS.match(title)
+    if tags:
+        for value in TAG.findall(tags.group(1)):
+            value = value.upper()
+            if value not in IGNORED_TAGS:
+                tag = tag or value[:10]
+                break
+        title = title[tags.end():]
+
+    # « module: » n'est une annonce qu'après un [TAG] : « fix: minuscule » n'annonce rien
+    modules = []
+    declared = TITLE_MODULES.match(title) if tags else None
+    if declared:
+        modules = [name.strip() for name in declared.group(1).split(",")]
+
+    closes = CLOSES.findall(message)
+    pr_repo, pr_number = closes[-1] if closes else (None, None)
+    if pr_number is not None and int(pr_number) > MAX_REFERENCE:
+        pr_repo = pr_number = None
+    original = ORIGINAL_COMMIT.search(message)
+
+    return MessageTags(
+        tag,
+        modules,
+        _references(TASK, message),
+        _references(OPW, message),
+        pr_repo,
+        int(pr_number) if pr_number is not None else None,
+        original.group(1).lower() if original else None
+    )
+
+# ============================================================
+# RECONSTRUCTION
+# ============================================================
+def backfill_commit_tags(conn, batch_size=5000, pause=0.0, from_id=None):
+    """Recalcule les colonnes tirées des messages par tranches d'id de commits.
+
+    Chaque tranche est une transaction ; la relancer réécrit les mêmes
+    valeurs. Retourne le nombre de commits traités.
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM odoo_devlog.commits;")
+        low, high = cur.fetchone()
+    conn.commit()
+
+    done = batches = 0
+    start = max(low, from_id or 0)
+    while start <= high:
+        end = start + batch_size - 1
+        with conn.cursor() as cur:
+            cur.execute("SELECT id, committed_date, message FROM odoo_devlog.commits WHERE id BETWEEN %s AND %s;", (start, end))
+            rows = [(commit_id, committed_date, *parse_message(message)) for commit_id, committed_date, message in cur.fetchall()]
+            if rows:
+                execute_values(cur, """
+                    UPDATE odoo_devlog.commits c SET
+                        commit_tag = v.commit_tag, message_modules = v.message_modules,
+                        task_ids = v.task_ids, opw_ids = v.opw_ids,
+                        pr_repo = v.pr_repo, pr_number = v.pr_number, original_commit = v.original_commit
+                    FROM (VALUES %s) AS v (id, committed_date, commit_tag, message_modules, task_ids, opw_ids,
+                                          pr_repo, pr_number, original_commit)
+                    WHERE c.id = v.id AND c.committed_date = v.committed_date
+                """, rows, template="(%s, %s::timestamp, %s, %s::text[], %s::int[], %s::int[], %s, %s::int, %s)", page_size=1000)
+            done += len(rows)
+        conn.commit()
+
+        batches += 1
+        if batches % 20 == 0:
+            logger.info(f"   → commits jusqu'à {end} : {done} traités")
+        start = end + 1
+        if pause:
+            time.sleep(pause)
+
+    return done
+
+# ============================================================
+# COMPTES PAR MODULE
+# ============================================================
+def refresh_module_counts(conn):
+    """Recompte les commits annonçant chaque module (module_commit_counts) ; retourne le nombre de modules.
+
+    Un seul parcours des commits, une fois par import : l'API ne lit plus
+    que cette petite table. La table est remplacée dans une transaction,
+    les lecteurs voient l'ancienne version jusqu'au commit.
+    """
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM odoo_devlog.module_commit_counts;")
+        cur.execute("""
+            INSERT INTO odoo_devlog.module_commit_counts (repo_id, module, commits)
+            SELECT c.repo_id, module, COUNT(*)
+            FROM odoo_devlog.commits c, unnest(c.message_modules) AS module
+            GROUP BY c.repo_id, module;
+        """)
+        counted = cur.rowcount
+    conn.commit()
+    return counted
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    parser = argparse.ArgumentParser(description="Recalcule le tag, les modules et les références des messages de commit")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Nombre d'id de commits par transaction")
+    parser.add_argument("--pause", type=float, default=0.0, help="Pause entre deux tranches (secondes)")
+    parser.add_argument("--from-id", type=int, default=None, help="Reprendre à partir de cet id de commit")
+    args = parser.parse_args()
+
+    try:
+        conn = psycopg2.connect(**DB_CONFIG, options='-c client_encoding=UTF8')
+    except Exception as e:
+        logger.error(f"❌ Erreur de connexion à PostgreSQL : {e}")
+        exit(1)
+
+    started = time.time()
+    done = backfill_commit_tags(conn, args.batch_size, args.pause, args.from_id)
+    logger.info(f"✅ {done} commits analysés ({time.time() - started:.1f}s)")
+    logger.info(f"📦 {refresh_module_counts(conn)} modules recomptés")
+    conn.close()
@@ -0,0 +1,172 @@
+"""Supprime les doublons de file_changes et pose la clé (commit_id, filename).
+
+Avant cette clé, chaque réimport d'un commit dupliquait ses fichiers. Le
+nettoyage se fait par tranches de commit_id, chacune dans sa propre
+transaction courte, en gardant la ligne la plus ancienne (les id référencés
+restent valides). L'index unique est ensuite construit en CONCURRENTLY puis
+rattaché comme contrainte : aucune étape ne bloque les écritures longtemps.
+
+Le script est idempotent et peut être relancé après une interruption.
+
+Usage :
+    python scripts/dedup_file_changes.py --dry-run
+    python scripts/dedup_file_changes.py --batch-size 2000 --pause 0.1
+"""
+import os
+import time
+import argparse
+import logging
+import psycopg2
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+logger = logging.getLogger(__name__)
+
+DB_CONFIG = {
+    "dbname": os.getenv("DB_NAME", "odoo_devlog"),
+    "user": os.getenv("DB_USER"),
+    "password": os.getenv("DB_PASSWORD"),
+    "host": os.getenv("DB_HOST", "localhost"),
+    "port": 5432
+}
+
+KEY_NAME = "file_changes_commit_filename_key"
+
+# Index remplacé par la clé unique, dont commit_id est la première colonne
+LEGACY_INDEX = "idx_file_changes_commit_id"
+
+# Tentatives de construction de l'index si une synchro réinsère des doublons entre-temps
+MAX_INDEX_ATTEMPTS = 3
+
+def count_duplicates(conn):
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT COUNT(*) - COUNT(DISTINCT (commit_id, filename))
+            FROM odoo_devlog.file_changes;
+        """)
+        value = cur.fetchone()[0]
+    conn.commit()
+    return value
+
+def delete_duplicates(conn, batch_size, pause):
+    """Parcourt file_changes par tranches de commit_id et supprime les doublons"""
+    with conn.cursor() as cur:
+        cur.execute("SELECT COALESCE(MIN(commit_id), 0), COALESCE(MAX(commit_id), 0) FROM odoo_devlog.file_changes;")
+        low, high = cur.fetchone()
+    conn.commit()
+
+    deleted = 0
+    batches = 0
+    start = low
+    while start <= high:
+        end = start + batch_size - 1
+        with conn.cursor() as cur:
+            cur.execute("""
+                DELETE FROM odoo_devlog.file_changes fc
+                USING (
+                    SELECT id, ROW_NUMBER() OVER (PARTITION BY commit_id, filename ORDER BY id) AS rank
+                    FROM odoo_devlog.file_changes
+                    WHERE commit_id BETWEEN %s AND %s
+                ) d
+                WHERE fc.id = d.id AND d.rank > 1;
+            """, (start, end))
+            deleted += cur.rowcount
+        conn.commit()
+
+        batches += 1
+        if batches % 50 == 0:
+            logger.info(f"   → commits jusqu'à {end} : {deleted} doublons supprimés")
+        start = end + 1
+        if pause:
+            time.sleep(pause)
+
+    return deleted
+
+def index_state(conn):
+    """Retourne None (absent), 'invalid' (build CONCURRENTLY interrompu) ou 'valid'"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT i.indisvalid
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = 'odoo_devlog' AND c.relname = %s;
+        """, (KEY_NAME,))
+        row = cur.fetchone()
+    if row is None:
+        return None
+    return "valid" if row[0] else "invalid"
+
+def has_constraint(conn):
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT 1 FROM pg_constraint
+            WHERE conname = %s AND conrelid = 'odoo_devlog.file_changes'::regclass;
+        """, (KEY_NAME,))
+        return cur.fetchone() is not None
+
+def build_unique_index(conn, batch_size, pause):
+    for attempt in range(1, MAX_INDEX_ATTEMPTS + 1):
+        state = index_state(conn)
+        if state == "valid":
+            return True
+        with conn.cursor() as cur:
+            if state == "invalid":
+                cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS odoo_devlog.{KEY_NAME};")
+            logger.info(f"🔨 Construction de l'index unique (tentative {attempt})...")
+            try:
+                cur.execute(f"CREATE UNIQUE INDEX CONCURRENTLY {KEY_NAME} ON odoo_devlog.file_changes (commit_id, filename);")
+                return True
+            except psycopg2.errors.UniqueViolation:
+                logger.warning("⚠️  Nouveaux doublons insérés pendant la construction, nouveau passage...")
+        delete_duplicates(conn, batch_size, pause)
+    return False
+
+def main():
+    parser = argparse.ArgumentParser(description="Déduplication de file_changes et clé (commit_id, filename)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Nombre de commit_id par transaction")
+    parser.add_argument("--pause", type=float, default=0.0, help="Pause entre deux tranches (secondes)")
+    parser.add_argument("--lock-timeout", default="5s", help="lock_timeout pour l'ajout de la contrainte")
+    parser.add_argument("--dry-run", action="store_true", help="Compter les doublons sans rien modifier")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(**DB_CONFIG, options='-c client_encoding=UTF8')
+    logger.info("✅ Connexion PostgreSQL réussie")
+
+    if has_constraint(conn):
+        logger.info(f"✓ Contrainte {KEY_NAME} déjà en place, rien à faire")
+        conn.close()
+        return
+
+    duplicates = count_duplicates(conn)
+    logger.info(f"📊 {duplicates} lignes en double dans file_changes")
+    if args.dry_run:
+        conn.close()
+        return
+
+    started = time.time()
+    deleted = delete_duplicates(conn, args.batch_size, args.pause)
+    logger.info(f"🗑️  {deleted} doublons supprimés en {time.time() - started:.1f}s")
+
+    # CREATE/DROP INDEX CONCURRENTLY ne peuvent pas s'exécuter dans une transaction
+    conn.autocommit = True
+    if not build_unique_index(conn, args.batch_size, args.pause):
+        logger.error("❌ Impossible de construire l'index unique : arrêtez les synchronisations et relancez le script.")
+        conn.close()
+        exit(1)
+
+    with conn.cursor() as cur:
+        # Verrou exclusif bref : l'index existe déjà, seule la contrainte est déclarée
+        cur.execute("SET lock_timeout = %s;", (args.lock_timeout,))
+        cur.execute(f"ALTER TABLE odoo_devlog.file_changes ADD CONSTRAINT {KEY_NAME} UNIQUE USING INDEX {KEY_NAME};")
+        cur.execute("RESET lock_timeout;")
+        cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS odoo_devlog.{LEGACY_INDEX};")
+        cur.execute("ANALYZE odoo_devlog.file_changes;")
+
+    logger.info(f"✅ Contrainte {KEY_NAME} ajoutée")
+    conn.close()
+
+if __name__ == "__main__":
+    main()
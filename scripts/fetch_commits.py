@@ -1,10 +1,30 @@
 import os
 import psycopg2
+import psycopg2.errors
 from github import Github, GithubException
+from github_graphql import GraphQLCommitFetcher, UrllibTransport
+from pipeline import FetchPipeline
+from known_commits import known_commits_for
+from commit_files import iter_file_chunks
+from patch_hunks import insert_hunks
+from patch_symbols import insert_symbols
+from patch_similarity import insert_signatures
+from commit_message import parse_message, refresh_module_counts
+from authors import resolve_author
+from sync_progress import ProgressReporter
+import ingest_units
+import push_events
+import registry
+import scheduler
+import patch_index
 from dotenv import load_dotenv
 from datetime import datetime
 import logging
 import time
+import signal
+import threading
+from collections import namedtuple
+from pathlib import Path
 
 # ============================================================
 # CONFIGURATION
@@ -35,6 +55,9 @@ if sys.platform == 'win32':
     sys.stderr.reconfigure(encoding='utf-8')
 
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+# Jetons supplémentaires répartis entre les workers (séparés par des virgules)
+GITHUB_TOKENS = [token.strip() for token in os.getenv("GITHUB_TOKENS", "").split(",") if token.strip()] or [GITHUB_TOKEN]
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
 DB_CONFIG = {
     "dbname": os.getenv("DB_NAME", "odoo_devlog"),
     "user": os.getenv("DB_USER"),
@@ -43,16 +66,45 @@ DB_CONFIG = {
     "port": 5432
 }
 
-REPOSITORIES = [
-    "odoo/odoo",
-    "odoo/enterprise"
-]
-BRANCHES = ["16.0","17.0", "18.0", "19.0", "master"]
+# Dépôts et branches suivis, avec cadence et priorité (repositories.json, scripts/registry.py)
+REGISTRY = registry.load_registry()
+REPOSITORIES = registry.repositories(REGISTRY)
+BRANCHES = registry.branch_names(REGISTRY)
 
 # Limite de commits à récupérer par branche (0 = illimité)
 # Pour récupérer TOUS les commits, mettre à 0 ou très grand nombre
 MAX_COMMITS_PER_BRANCH = int(os.getenv("MAX_COMMITS_PER_BRANCH", 0))
 
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "database" / "migrations"
+
+# Source des commits : "rest" (PyGithub) ou "graphql" (pages de 100 commits)
+COMMIT_FETCHER = os.getenv("COMMIT_FETCHER", "rest")
+
+# Index des patchs sur disque mis à jour en fin de synchronisation (facultatif)
+PATCH_INDEX_DIR = os.getenv("PATCH_INDEX_DIR")
+
+# Événements de progression JSON lines (scripts/sync_progress.py), facultatif
+SYNC_PROGRESS_FILE = os.getenv("SYNC_PROGRESS_FILE")
+
+# Pause quand le quota REST est presque épuisé (s)
+RATE_LIMIT_PAUSE = 60
+
+# Mode worker : attente entre deux lectures d'une file vide (s)
+WORKER_IDLE_WAIT = 30
+
+# Mode schedule : attente maximale entre deux tours du planificateur (s)
+SCHEDULER_MAX_WAIT = 900
+
+# Positionné par SIGTERM (ex: /admin/cancel-fetch) pour un arrêt propre
+STOP_EVENT = threading.Event()
+
+# Remplacé dans le main quand un fichier de progression est demandé
+PROGRESS = ProgressReporter()
+
+def handle_stop_signal(signum, frame):
+    logger.warning("⚠️  Arrêt demandé : fin de l'écriture en cours puis arrêt...")
+    STOP_EVENT.set()
+
 # ============================================================
 # CONNEXION À LA BDD
 # ============================================================
@@ -68,7 +120,21 @@ def connect_db():
 # ============================================================
 # INSÉRER UN COMMIT
 # ============================================================
-def insert_commit(conn, repo_id, commit, branch_id):
+def commit_date(commit):
+    """Date de partition du commit (committed_date, à défaut authored_date)"""
+    git = commit.commit
+    for actor in (git.committer, git.author):
+        if actor and actor.date:
+            return actor.date.replace(tzinfo=None)
+    return datetime.now()
+
+def ensure_year_partition(conn, year):
+    """Crée les partitions d'une année absente (le cron database/partitions.py les crée d'avance)"""
+    with conn.cursor() as cur:
+        cur.execute("SELECT odoo_devlog.create_yearly_partitions(%s, %s);", (year, year))
+    conn.commit()
+
+def insert_commit(conn, repo_id, commit, branch_id, retry=True):
     try:
         sha = commit.sha
         message = commit.commit.message
@@ -77,26 +143,31 @@ def insert_commit(conn, repo_id, commit, branch_id):
         committer = commit.commit.committer.name if commit.commit.committer else None
         committer_email = commit.commit.committer.email if commit.commit.committer else None
         authored_date = commit.commit.author.date.replace(tzinfo=None) if commit.commit.author and commit.commit.author.date else None
-        committed_date = commit.commit.committer.date.replace(tzinfo=None) if commit.commit.committer and commit.commit.committer.date else None
+        committed_date = commit_date(commit)
         stats = commit.stats if hasattr(commit, "stats") else None
         additions = stats.additions if stats else 0
         deletions = stats.deletions if stats else 0
         total = stats.total if stats else 0
-        parent_count = len(commit.parents)
+        parent_count = commit.parent_count if hasattr(commit, "parent_count") else len(commit.parents)
         is_merge = parent_count > 1
         comment_count = commit.commit.comment_count if hasattr(commit.commit, "comment_count") else 0
+        tags = parse_message(message)
 
         with conn.cursor() as cur:
+            author_id = resolve_author(cur, author, author_email)
             cur.execute("""
                 INSERT INTO odoo_devlog.commits (
                     repo_id, branch_id, sha, html_url, message,
                     author_name, author_email, committer_name, committer_email,
                     authored_date, committed_date,
                     comment_count, additions, deletions, total_changes,
-                    parent_count, is_merge
+                    parent_count, is_merge,
+                    commit_tag, message_modules, task_ids, opw_ids, pr_repo, pr_number, original_commit,
+                    author_id
                 )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (sha) DO UPDATE SET branch_id = EXCLUDED.branch_id
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
+                        %s, %s::text[], %s::int[], %s::int[], %s, %s, %s, %s)
+                ON CONFLICT (sha, committed_date) DO UPDATE SET branch_id = EXCLUDED.branch_id
                 RETURNING id;
             """, (
                 repo_id,
@@ -115,11 +186,22 @@ def insert_commit(conn, repo_id, commit, branch_id):
                 deletions,
                 total,
                 parent_count,
-                is_merge
+                is_merge,
+                *tags,
+                author_id
             ))
             result = cur.fetchone()
             commit_id = result[0] if result else None
             return commit_id
+    except psycopg2.errors.CheckViolation as e:
+        # Aucune partition pour cette année (date dans le futur, cron pas encore passé)
+        conn.rollback()
+        if not retry:
+            logger.error(f"❌ Erreur lors de l'insertion du commit {sha}: {e}")
+            return None
+        logger.info(f"🗂️  Création des partitions {committed_date.year}")
+        ensure_year_partition(conn, committed_date.year)
+        return insert_commit(conn, repo_id, commit, branch_id, retry=False)
     except Exception as e:
         logger.error(f"❌ Erreur lors de l'insertion du commit {sha}: {e}")
         return None
@@ -163,18 +245,21 @@ def auto_detect_modules(conn, repo_id, files):
     except:
         pass
 
-def insert_files_changed(conn, commit_id, repo_id, files):
+def insert_files_changed(conn, commit_id, committed_date, repo_id, files, commit=True):
+    """Insère un lot de fichiers ; avec commit=False la transaction reste ouverte (morceaux d'un même commit)"""
     try:
         if not files:
-            return
+            return True
 
         auto_detect_modules(conn, repo_id, files)
 
         with conn.cursor() as cur:
-            values = []
+            # Une seule ligne par fichier : un même nom dans le lot ferait échouer l'upsert
+            values = {}
             for file in files:
-                values.append((
+                values[file.filename] = (
                     commit_id,
+                    committed_date,
                     file.filename,
                     file.status,
                     file.additions,
@@ -185,20 +270,50 @@ def insert_files_changed(conn, commit_id, repo_id, files):
                     getattr(file, "blob_url", None),
                     getattr(file, "raw_url", None),
                     getattr(file, "contents_url", None)
-                ))
+                )
 
             if values:
                 from psycopg2.extras import execute_values
-                execute_values(cur, """
+                written = execute_values(cur, """
                     INSERT INTO odoo_devlog.file_changes (
-                        commit_id, filename, status, additions, deletions, changes, patch,
+                        commit_id, committed_date, filename, status, additions, deletions, changes, patch,
                         previous_filename, blob_url, raw_url, contents_url
                     )
                     VALUES %s
-                    ON CONFLICT DO NOTHING
-                """, values)
+                    ON CONFLICT (commit_id, filename, committed_date) DO UPDATE SET
+                        status = EXCLUDED.status,
+                        additions = EXCLUDED.additions,
+                        deletions = EXCLUDED.deletions,
+                        changes = EXCLUDED.changes,
+                        patch = EXCLUDED.patch,
+                        previous_filename = EXCLUDED.previous_filename,
+                        blob_url = EXCLUDED.blob_url,
+                        raw_url = EXCLUDED.raw_url,
+                        contents_url = EXCLUDED.contents_url
+                    RETURNING id, filename
+                """, list(values.values()), fetch=True)
 
-        conn.commit()
+                # Hunks, symboles et empreintes des recherches ; ceux d'un fichier réimporté sont remplacés
+                written_ids = {file_id for file_id, _ in written}
+                insert_hunks(
+                    cur,
+                    [(file_id, committed_date, values[filename][7]) for file_id, filename in written],
+                    replace_ids=written_ids
+                )
+                insert_symbols(
+                    cur,
+                    [(file_id, committed_date, commit_id, filename, values[filename][7]) for file_id, filename in written],
+                    replace_ids=written_ids
+                )
+                insert_signatures(
+                    cur,
+                    [(file_id, committed_date, commit_id, values[filename][7]) for file_id, filename in written],
+                    replace_ids=written_ids
+                )
+
+        if commit:
+            conn.commit()
+        return True
     except Exception as e:
         error_msg = str(e)
         if "No space left on device" in error_msg or "DiskFull" in error_msg:
@@ -209,6 +324,214 @@ def insert_files_changed(conn, commit_id, repo_id, files):
         else:
             logger.error(f"❌ Erreur lors de l'insertion des fichiers pour le commit {commit_id}: {e}")
             conn.rollback()
+            return False
+
+def mark_files_truncated(conn, commit_id, committed_date):
+    with conn.cursor() as cur:
+        cur.execute(
+            "UPDATE odoo_devlog.commits SET files_truncated = TRUE WHERE id = %s AND committed_date = %s;",
+            (commit_id, committed_date)
+        )
+
+def missing_schema_steps(conn):
+    """Liste les étapes de mise à niveau du schéma à lancer avant une synchronisation"""
+    steps = []
+    with conn.cursor() as cur:
+        # Clé (commit_id, filename) utilisée par l'upsert des fichiers
+        cur.execute("""
+            SELECT 1 FROM pg_constraint
+            WHERE conname = 'file_changes_commit_filename_key'
+              AND conrelid = 'odoo_devlog.file_changes'::regclass;
+        """)
+        if cur.fetchone() is None:
+            steps.append("python scripts/dedup_file_changes.py")
+
+        cur.execute("SELECT to_regclass('odoo_devlog.schema_migrations') IS NOT NULL;")
+        applied = set()
+        if cur.fetchone()[0]:
+            cur.execute("SELECT name FROM odoo_devlog.schema_migrations;")
+            applied = {row[0] for row in cur.fetchall()}
+    conn.commit()
+
+    if any(path.name not in applied for path in MIGRATIONS_DIR.glob("*.sql")):
+        steps.append("python database/migrate.py")
+    return steps
+
+# ============================================================
+# SOURCE DES COMMITS (REST OU GRAPHQL)
+# ============================================================
+def iter_branch_commits(repo, repo_name, branch_name, fetcher, token=None, pages=None, head_sha=None):
+    """Itère les commits d'une branche, du plus récent au plus ancien.
+
+    En mode graphql, les métadonnées arrivent par pages de 100 et seul
+    l'accès à `commit.files` déclenche un appel REST. `pages` (première,
+    dernière) limite la liste REST à une tranche de pages (unité d'un worker),
+    paginée depuis `head_sha`, la tête figée à la planification.
+    """
+    if pages is not None:
+        return iter_commit_pages(repo.get_commits(sha=head_sha or branch_name), *pages)
+    if fetcher == "graphql":
+        graphql = GraphQLCommitFetcher(UrllibTransport(token or GITHUB_TOKEN), rest_repo=repo)
+        return graphql.iter_commits(repo_name, branch_name)
+    return repo.get_commits(sha=branch_name)
+
+def iter_commit_pages(commits, first_page, last_page):
+    """Commits des pages first_page..last_page (numérotées depuis 0) d'une liste REST"""
+    for page in range(first_page, last_page + 1):
+        items = commits.get_page(page)
+        if not items:
+            return
+        yield from items
+
+# Élément transmis du fetch à l'écriture : un morceau des fichiers d'un commit.
+# files=None : commit déjà en base, transmis sans appel API.
+CommitPart = namedtuple("CommitPart", "commit files first last truncated")
+
+# Issue de la synchronisation d'une branche : success, failed ou cancelled, commits importés
+SyncResult = namedtuple("SyncResult", "status count error", defaults=(None,))
+
+def produce_commits(g, commits, stop_sha=None, known=None):
+    """Étape réseau du pipeline : prépare chaque commit avec ses fichiers.
+
+    Tous les appels GitHub d'un commit sont faits ici, dans le thread de
+    fetch, pour que l'étape d'écriture ne touche plus qu'à la base. Les
+    fichiers sont transmis par morceaux (CommitPart) au fil des pages, si
+    bien qu'un commit de plusieurs milliers de fichiers n'est jamais
+    entièrement en mémoire. Les commits présents dans `known` sont
+    transmis sans fichiers et ne coûtent aucun appel au-delà de la page
+    de liste.
+    """
+    produced = 0
+    for commit in commits:
+        if stop_sha and commit.sha == stop_sha:
+            logger.info(f"✓ Dernier commit connu atteint ({commit.sha[:7]})")
+            break
+
+        if known is not None and commit.sha in known:
+            yield CommitPart(commit, None, True, True, False)
+            continue
+
+        wait_for_rate_limit(g)
+
+        # Force le chargement complet du commit (stats + première page de fichiers) côté fetch
+        _ = commit.stats
+        first = True
+        for chunk, last, truncated in iter_file_chunks(commit):
+            yield CommitPart(commit, chunk, first, last, truncated)
+            first = False
+
+        produced += 1
+        if MAX_COMMITS_PER_BRANCH > 0 and produced >= MAX_COMMITS_PER_BRANCH:
+            logger.warning(f"⚠️  Limite atteinte: {MAX_COMMITS_PER_BRANCH} commits")
+            break
+
+def wait_for_rate_limit(g):
+    """Pause si le quota REST est presque épuisé (lu dans les en-têtes, sans appel API)"""
+    remaining, _ = g.rate_limiting
+    PROGRESS.observe_rate(g)
+    if remaining < 100:
+        logger.warning(f"⚠️  Rate limit: {remaining} requêtes restantes. Pause {RATE_LIMIT_PAUSE}s...")
+        PROGRESS.rate_limited(RATE_LIMIT_PAUSE)
+        time.sleep(RATE_LIMIT_PAUSE)
+
+def reassign_known_commits(conn, branch_id, shas):
+    """Rattache à la branche des commits déjà importés (équivalent du ON CONFLICT d'insert_commit)"""
+    if not shas:
+        return
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE odoo_devlog.commits SET branch_id = %s
+            WHERE sha = ANY(%s) AND branch_id IS DISTINCT FROM %s;
+        """, (branch_id, list(shas), branch_id))
+    conn.commit()
+
+class CommitWriter:
+    """Étape d'écriture : insère chaque commit puis ses fichiers morceau par morceau.
+
+    Un commit et ses morceaux partagent une transaction, validée au dernier
+    morceau : une synchronisation interrompue ne laisse pas de commit à
+    moitié importé (qui serait ensuite ignoré comme déjà connu).
+    """
+
+    def __init__(self, conn, repo_id, branch_id):
+        self.conn = conn
+        self.repo_id = repo_id
+        self.branch_id = branch_id
+        self.commit_id = None
+        self.committed_date = None
+        self.count = 0
+        self.skipped = 0
+        self.files_count = 0
+        self.truncated = 0
+
+    def write(self, part):
+        """Retourne True quand un commit est importé, False s'il est ignoré, None en cours de commit"""
+        if part.first:
+            self.committed_date = commit_date(part.commit)
+            self.commit_id = insert_commit(self.conn, self.repo_id, part.commit, self.branch_id)
+            if self.commit_id is None:
+                self.conn.rollback()
+
+        if self.commit_id is not None and part.files:
+            if insert_files_changed(self.conn, self.commit_id, self.committed_date, self.repo_id, part.files, commit=False):
+                self.files_count += len(part.files)
+            else:
+                self.commit_id = None
+
+        if not part.last:
+            return None
+
+        if self.commit_id is None:
+            self.skipped += 1
+            return False
+
+        if part.truncated:
+            mark_files_truncated(self.conn, self.commit_id, self.committed_date)
+            self.truncated += 1
+            logger.warning(f"⚠️  Liste de fichiers tronquée pour {part.commit.sha[:7]}")
+        self.conn.commit()
+        self.commit_id = None
+        self.count += 1
+        return True
+
+    def abort(self):
+        """Annule le commit en cours si la synchronisation s'arrête au milieu de ses fichiers"""
+        if self.commit_id is not None:
+            self.conn.rollback()
+            self.commit_id = None
+
+# ============================================================
+# DONNÉES DÉRIVÉES (après un import)
+# ============================================================
+def refresh_derived_data():
+    """Comptes par module et index des patchs ; un échec n'annule pas l'import"""
+    try:
+        conn = psycopg2.connect(**DB_CONFIG, options='-c client_encoding=UTF8')
+        try:
+            counted = refresh_module_counts(conn)
+        finally:
+            conn.close()
+        logger.info(f"📦 Comptes par module : {counted} modules")
+    except Exception as e:
+        logger.warning(f"⚠️  Comptes par module non mis à jour : {e}")
+    refresh_patch_index()
+
+# ============================================================
+# INDEX DES PATCHS
+# ============================================================
+def refresh_patch_index():
+    """Ajoute les fichiers importés à l'index des patchs ; un échec n'annule pas l'import"""
+    if not PATCH_INDEX_DIR:
+        return
+    try:
+        conn = psycopg2.connect(**DB_CONFIG, options='-c client_encoding=UTF8')
+        try:
+            indexed = patch_index.update_index(conn, PATCH_INDEX_DIR)
+        finally:
+            conn.close()
+        logger.info(f"🔎 Index des patchs : {indexed} documents ajoutés")
+    except Exception as e:
+        logger.warning(f"⚠️  Index des patchs non mis à jour : {e}")
 
 # ============================================================
 # CRÉER UNE ENTRÉE DANS LE LOG D'IMPORT
@@ -236,12 +559,16 @@ def update_import_log(conn, log_id, status, total_commits=0, error_message=None)
 # ============================================================
 # RÉCUPÉRER ET INSÉRER LES COMMITS D'UNE BRANCHE
 # ============================================================
-def fetch_commits_for_branch(repo_name, branch_name):
+def fetch_commits_for_branch(repo_name, branch_name, fetcher=COMMIT_FETCHER, token=None, pages=None, head_sha=None):
+    """Import complet d'une branche, ou d'une tranche de pages (first, last) depuis head_sha pour un worker"""
     conn = None
     log_id = None
 
     try:
-        g = Github(GITHUB_TOKEN)
+        if pages is not None:
+            g = Github(token or GITHUB_TOKEN, base_url=GITHUB_API_URL, per_page=ingest_units.COMMITS_PER_PAGE)
+        else:
+            g = Github(token or GITHUB_TOKEN, base_url=GITHUB_API_URL)
         repo = g.get_repo(repo_name)
         conn = connect_db()
 
@@ -250,55 +577,72 @@ def fetch_commits_for_branch(repo_name, branch_name):
             result = cur.fetchone()
             if not result:
                 logger.error(f"❌ Dépôt {repo_name} non trouvé dans la base.")
-                return
+                return SyncResult('failed', 0, "Dépôt non trouvé dans la base")
             repo_id = result[0]
 
             cur.execute("SELECT id FROM odoo_devlog.branches WHERE repo_id = %s AND name = %s;", (repo_id, branch_name))
             branch_data = cur.fetchone()
             if not branch_data:
                 logger.error(f"❌ Branche {branch_name} non trouvée dans la base pour {repo_name}.")
-                return
+                return SyncResult('failed', 0, "Branche non trouvée dans la base")
             branch_id = branch_data[0]
 
         log_id = create_import_log(conn, repo_id, branch_name)
         logger.info(f"")
         logger.info(f"📦 Dépôt: {repo_name}")
         logger.info(f"🌿 Branche: {branch_name}")
-        logger.info(f"🔄 Récupération des commits...")
-
-        commits = repo.get_commits(sha=branch_name)
-        count = 0
-        skipped = 0
-        files_count = 0
-
-        for commit in commits:
-            rate_limit = g.get_rate_limit()
-            if rate_limit.core.remaining < 100:
-                logger.warning(f"⚠️  Rate limit: {rate_limit.core.remaining} requêtes restantes. Pause 60s...")
-                time.sleep(60)
-
-            commit_id = insert_commit(conn, repo_id, commit, branch_id)
-            if commit_id:
-                if commit.files:
-                    files_list = list(commit.files)
-                    insert_files_changed(conn, commit_id, repo_id, files_list)
-                    files_count += len(files_list)
-                count += 1
-
-                if count % 50 == 0:
-                    conn.commit()
-                    logger.info(f"   ✓ {count} commits ajoutés...")
+        if pages is not None:
+            logger.info(f"🔄 Récupération des commits (pages {pages[0]} à {pages[1]})...")
+        else:
+            logger.info(f"🔄 Récupération des commits...")
+
+        known = known_commits_for(conn, repo_id)
+        commits = iter_branch_commits(repo, repo_name, branch_name, fetcher, token, pages, head_sha)
+        writer = CommitWriter(conn, repo_id, branch_id)
+        known_skipped = 0
+        known_batch = []
+
+        def write(part):
+            nonlocal known_skipped
+            if part.files is None:
+                # Déjà en base : aucun appel API, simple rattachement à la branche par lots
+                known_skipped += 1
+                known_batch.append(part.commit.sha)
+                if len(known_batch) >= 500:
+                    reassign_known_commits(conn, branch_id, known_batch)
+                    known_batch.clear()
             else:
-                skipped += 1
+                inserted = writer.write(part)
+                if inserted is None:
+                    return
+                if inserted:
+                    known.add(part.commit.sha)
+                    if writer.count % 50 == 0:
+                        logger.info(f"   ✓ {writer.count} commits ajoutés...")
 
-            if (count + skipped) % 100 == 0 and (count + skipped) > 0:
-                logger.info(f"   → Traité: {count + skipped} commits ({count} nouveaux, {skipped} existants)")
+            processed = writer.count + writer.skipped + known_skipped
+            if processed % 100 == 0:
+                logger.info(f"   → Traité: {processed} commits ({writer.count} nouveaux, {writer.skipped + known_skipped} existants)")
+            PROGRESS.progress(writer, known_skipped)
 
-            if MAX_COMMITS_PER_BRANCH > 0 and count >= MAX_COMMITS_PER_BRANCH:
-                logger.warning(f"⚠️  Limite atteinte: {MAX_COMMITS_PER_BRANCH} commits")
-                break
+        pipeline = FetchPipeline(STOP_EVENT)
+        try:
+            pipeline.run(produce_commits(g, commits, known=known), write)
+        finally:
+            writer.abort()
+        pipeline.log_throughput()
 
+        reassign_known_commits(conn, branch_id, known_batch)
         conn.commit()
+        PROGRESS.progress(writer, known_skipped, force=True)
+        count = writer.count
+        skipped = writer.skipped + known_skipped
+        files_count = writer.files_count
+
+        if STOP_EVENT.is_set():
+            update_import_log(conn, log_id, 'failed', count, error_message="Synchronisation annulée")
+            logger.warning(f"⚠️  Synchronisation annulée pour {repo_name}/{branch_name} ({count} commits importés)")
+            return SyncResult('cancelled', count)
 
         update_import_log(conn, log_id, 'success', count)
         logger.info(f"")
@@ -306,18 +650,23 @@ def fetch_commits_for_branch(repo_name, branch_name):
         logger.info(f"   • {count} commits importés")
         logger.info(f"   • {skipped} commits ignorés (déjà présents)")
         logger.info(f"   • {files_count} fichiers analysés")
+        if writer.truncated:
+            logger.info(f"   • {writer.truncated} commits avec liste de fichiers tronquée")
         logger.info(f"")
+        return SyncResult('success', count)
 
     except GithubException as e:
         error_msg = f"Erreur GitHub API: {e.status} - {e.data}"
         logger.error(f"❌ {error_msg}")
         if log_id and conn:
             update_import_log(conn, log_id, 'failed', error_message=error_msg)
+        return SyncResult('failed', 0, error_msg)
     except Exception as e:
         error_msg = f"Erreur inattendue: {str(e)}"
         logger.error(f"❌ {error_msg}")
         if log_id and conn:
             update_import_log(conn, log_id, 'failed', error_message=error_msg)
+        return SyncResult('failed', 0, error_msg)
     finally:
         if conn:
             conn.close()
@@ -325,13 +674,13 @@ def fetch_commits_for_branch(repo_name, branch_name):
 # ============================================================
 # FONCTION : Fetch incrémental (seulement les nouveaux commits)
 # ============================================================
-def fetch_new_commits_only(repo_name, branch_name):
+def fetch_new_commits_only(repo_name, branch_name, fetcher=COMMIT_FETCHER, token=None):
     """Récupère uniquement les commits plus récents que le dernier stocké en BDD"""
     conn = None
     log_id = None
 
     try:
-        g = Github(GITHUB_TOKEN)
+        g = Github(token or GITHUB_TOKEN, base_url=GITHUB_API_URL)
         repo = g.get_repo(repo_name)
         conn = connect_db()
 
@@ -340,14 +689,14 @@ def fetch_new_commits_only(repo_name, branch_name):
             result = cur.fetchone()
             if not result:
                 logger.error(f"❌ Dépôt {repo_name} non trouvé dans la base.")
-                return
+                return SyncResult('failed', 0, "Dépôt non trouvé dans la base")
             repo_id = result[0]
 
             cur.execute("SELECT id FROM odoo_devlog.branches WHERE repo_id = %s AND name = %s;", (repo_id, branch_name))
             branch_data = cur.fetchone()
             if not branch_data:
                 logger.error(f"❌ Branche {branch_name} non trouvée dans la base pour {repo_name}.")
-                return
+                return SyncResult('failed', 0, "Branche non trouvée dans la base")
             branch_id = branch_data[0]
 
             # Récupérer le dernier commit stocké pour cette branche
@@ -373,37 +722,32 @@ def fetch_new_commits_only(repo_name, branch_name):
 
         logger.info(f"🔍 Récupération des commits...")
 
-        commits = repo.get_commits(sha=branch_name)
-        count = 0
-        skipped = 0
-        files_count = 0
+        commits = iter_branch_commits(repo, repo_name, branch_name, fetcher, token)
+        writer = CommitWriter(conn, repo_id, branch_id)
 
-        for commit in commits:
-            if last_commit and commit.sha == last_commit[0]:
-                logger.info(f"✓ Dernier commit connu atteint ({commit.sha[:7]})")
-                break
+        def write(part):
+            if writer.write(part) and writer.count % 10 == 0:
+                logger.info(f"   ✓ {writer.count} nouveaux commits")
+            PROGRESS.progress(writer)
 
-            rate_limit = g.get_rate_limit()
-            if rate_limit.core.remaining < 100:
-                logger.warning(f"⚠️  Rate limit: {rate_limit.core.remaining} requêtes. Pause 60s...")
-                time.sleep(60)
-
-            commit_id = insert_commit(conn, repo_id, commit, branch_id)
-            if commit_id:
-                if commit.files:
-                    files_list = list(commit.files)
-                    insert_files_changed(conn, commit_id, repo_id, files_list)
-                    files_count += len(files_list)
-                count += 1
-
-                if count % 10 == 0:
-                    logger.info(f"   ✓ {count} nouveaux commits")
-            else:
-                skipped += 1
+        stop_sha = last_commit[0] if last_commit else None
+        pipeline = FetchPipeline(STOP_EVENT)
+        try:
+            pipeline.run(produce_commits(g, commits, stop_sha), write)
+        finally:
+            writer.abort()
+        pipeline.log_throughput()
 
-            if MAX_COMMITS_PER_BRANCH > 0 and count >= MAX_COMMITS_PER_BRANCH:
-                logger.warning(f"⚠️  Limite: {MAX_COMMITS_PER_BRANCH} commits")
-                break
+        conn.commit()
+        PROGRESS.progress(writer, force=True)
+        count = writer.count
+        skipped = writer.skipped
+        files_count = writer.files_count
+
+        if STOP_EVENT.is_set():
+            update_import_log(conn, log_id, 'failed', count, error_message="Synchronisation annulée")
+            logger.warning(f"⚠️  Synchronisation annulée pour {repo_name}/{branch_name} ({count} nouveaux commits)")
+            return SyncResult('cancelled', count)
 
         update_import_log(conn, log_id, 'success', count)
         logger.info(f"")
@@ -411,22 +755,307 @@ def fetch_new_commits_only(repo_name, branch_name):
         logger.info(f"   • {count} nouveaux commits")
         logger.info(f"   • {skipped} ignorés")
         logger.info(f"   • {files_count} fichiers analysés")
+        if writer.truncated:
+            logger.info(f"   • {writer.truncated} commits avec liste de fichiers tronquée")
         logger.info(f"")
+        return SyncResult('success', count)
 
     except GithubException as e:
         error_msg = f"Erreur GitHub API: {e.status} - {e.data}"
         logger.error(f"❌ {error_msg}")
         if log_id and conn:
             update_import_log(conn, log_id, 'failed', error_message=error_msg)
+        return SyncResult('failed', 0, error_msg)
     except Exception as e:
         error_msg = f"Erreur inattendue: {str(e)}"
         logger.error(f"❌ {error_msg}")
         if log_id and conn:
             update_import_log(conn, log_id, 'failed', error_message=error_msg)
+        return SyncResult('failed', 0, error_msg)
     finally:
         if conn:
             conn.close()
 
+# ============================================================
+# FONCTION : Commits poussés (webhook, scripts/push_events.py)
+# ============================================================
+def iter_pushed_commits(repo, pushes, known, base_sha, reassign):
+    """Commits des pushs absents de la base, sans relister la branche.
+
+    Les commits déjà connus (poussés sur une autre branche) sont passés à
+    `reassign` sans appel API. Si le parent d'un push manque, la
+    comparaison base_sha...after reprend aussi les commits perdus.
+    """
+    seen = set()
+    for push in pushes:
+        gap = not push.complete or (push.before and push.before not in known and push.before not in seen)
+        if gap and base_sha:
+            logger.warning(f"⚠️  Push {push.id} : commits manquants avant {push.after[:7]}, comparaison depuis {base_sha[:7]}")
+            for commit in repo.compare(base_sha, push.after).commits:
+                if commit.sha not in seen:
+                    seen.add(commit.sha)
+                    yield commit
+        for sha in push.shas:
+            if sha in seen:
+                continue
+            seen.add(sha)
+            if sha in known:
+                reassign(sha)
+            else:
+                yield repo.get_commit(sha)
+        base_sha = push.after
+
+def fetch_pushed_commits(repo_name, branch_name, token=None):
+    """Importe les commits des pushs en attente de la branche (un appel par commit nouveau)"""
+    conn = None
+    log_id = None
+    pushes = []
+
+    try:
+        conn = connect_db()
+
+        with conn.cursor() as cur:
+            cur.execute("SELECT id FROM odoo_devlog.repositories WHERE full_name = %s;", (repo_name,))
+            result = cur.fetchone()
+            if not result:
+                logger.error(f"❌ Dépôt {repo_name} non trouvé dans la base.")
+                return SyncResult('failed', 0, "Dépôt non trouvé dans la base")
+            repo_id = result[0]
+
+            cur.execute("SELECT id FROM odoo_devlog.branches WHERE repo_id = %s AND name = %s;", (repo_id, branch_name))
+            branch_data = cur.fetchone()
+            if not branch_data:
+                logger.error(f"❌ Branche {branch_name} non trouvée dans la base pour {repo_name}.")
+                return SyncResult('failed', 0, "Branche non trouvée dans la base")
+            branch_id = branch_data[0]
+
+            # Point de départ d'une comparaison si des commits manquent
+            cur.execute("""
+                SELECT sha FROM odoo_devlog.commits
+                WHERE branch_id = %s
+                ORDER BY committed_date DESC
+                LIMIT 1;
+            """, (branch_id,))
+            last_commit = cur.fetchone()
+
+        pushes = push_events.queued_pushes(conn, repo_name, branch_name)
+        if not pushes:
+            logger.info(f"✓ Aucun push en attente pour {repo_name}/{branch_name}")
+            return SyncResult('success', 0)
+
+        log_id = create_import_log(conn, repo_id, branch_name)
+        logger.info(f"")
+        logger.info(f"📦 Dépôt: {repo_name}")
+        logger.info(f"🌿 Branche: {branch_name}")
+        logger.info(f"📬 {len(pushes)} pushs, {sum(len(push.shas) for push in pushes)} commits poussés")
+
+        g = Github(token or GITHUB_TOKEN, base_url=GITHUB_API_URL)
+        # lazy : pas d'appel pour le dépôt, seulement pour les commits
+        repo = g.get_repo(repo_name, lazy=True)
+        known = known_commits_for(conn, repo_id)
+        writer = CommitWriter(conn, repo_id, branch_id)
+        known_batch = []
+
+        def write(part):
+            if part.files is None:
+                known_batch.append(part.commit.sha)
+            elif writer.write(part):
+                known.add(part.commit.sha)
+                logger.info(f"   ✓ {part.commit.sha[:7]} importé")
+            PROGRESS.progress(writer, len(known_batch))
+
+        commits = iter_pushed_commits(repo, pushes, known, last_commit[0] if last_commit else None, known_batch.append)
+        pipeline = FetchPipeline(STOP_EVENT)
+        try:
+            pipeline.run(produce_commits(g, commits, known=known), write)
+        finally:
+            writer.abort()
+        pipeline.log_throughput()
+
+        reassign_known_commits(conn, branch_id, known_batch)
+        conn.commit()
+        PROGRESS.progress(writer, len(known_batch), force=True)
+        count = writer.count
+
+        if STOP_EVENT.is_set():
+            # Les pushs restent en file : le prochain job les reprend (import idempotent)
+            update_import_log(conn, log_id, 'failed', count, error_message="Synchronisation annulée")
+            logger.warning(f"⚠️  Synchronisation annulée pour {repo_name}/{branch_name} ({count} commits importés)")
+            return SyncResult('cancelled', count)
+
+        update_import_log(conn, log_id, 'success', count)
+        push_events.finish_pushes(conn, [push.id for push in pushes], 'done', count)
+        logger.info(f"✅ Terminé pour {repo_name}/{branch_name} : {count} nouveaux commits, {len(known_batch)} déjà connus")
+        return SyncResult('success', count)
+
+    except GithubException as e:
+        error_msg = f"Erreur GitHub API: {e.status} - {e.data}"
+        logger.error(f"❌ {error_msg}")
+        if conn:
+            conn.rollback()
+            if log_id:
+                update_import_log(conn, log_id, 'failed', error_message=error_msg)
+            # Le push suivant comblera le trou par comparaison
+            push_events.finish_pushes(conn, [push.id for push in pushes], 'failed', error_message=error_msg)
+        return SyncResult('failed', 0, error_msg)
+    except Exception as e:
+        error_msg = f"Erreur inattendue: {str(e)}"
+        logger.error(f"❌ {error_msg}")
+        if conn:
+            conn.rollback()
+            if log_id:
+                update_import_log(conn, log_id, 'failed', error_message=error_msg)
+            push_events.finish_pushes(conn, [push.id for push in pushes], 'failed', error_message=error_msg)
+        return SyncResult('failed', 0, error_msg)
+    finally:
+        if conn:
+            conn.close()
+
+# ============================================================
+# WORKER : UNITÉS DE TRAVAIL PARTAGÉES (scripts/ingest_units.py)
+# ============================================================
+def run_unit(unit, fetcher, token):
+    if unit.mode == "full":
+        pages = (unit.first_page, unit.last_page) if unit.first_page is not None else None
+        return fetch_commits_for_branch(unit.repo_name, unit.branch_name, fetcher, token, pages, unit.head_sha)
+    return fetch_new_commits_only(unit.repo_name, unit.branch_name, fetcher, token)
+
+def run_worker(fetcher, once=False):
+    """Traite les unités de ingest_units jusqu'à l'arrêt (avec once : jusqu'à ce que la file soit vide).
+
+    Plusieurs workers, sur une ou plusieurs machines, peuvent tourner sur la
+    même base. Retourne le nombre d'unités traitées.
+    """
+    def connect():
+        return psycopg2.connect(**DB_CONFIG, options='-c client_encoding=UTF8')
+
+    conn = connect()
+    tokens = ingest_units.TokenPool(GITHUB_TOKENS, GITHUB_API_URL)
+    heartbeat = ingest_units.Heartbeat(connect)
+    heartbeat.start()
+    processed = 0
+    index_pending = False
+
+    try:
+        while not STOP_EVENT.is_set():
+            for unit_id in ingest_units.reclaim_stale(conn):
+                logger.warning(f"⚠️  Unité {unit_id} sans worker : remise en file")
+
+            unit = ingest_units.claim_unit(conn)
+            if unit is None:
+                # File vide : le moment de compter et d'indexer ce qui vient d'être importé
+                if index_pending:
+                    refresh_derived_data()
+                    index_pending = False
+                if once:
+                    break
+                STOP_EVENT.wait(WORKER_IDLE_WAIT)
+                continue
+
+            token_index, token = tokens.best()
+            ingest_units.set_token(conn, unit.id, token_index)
+            logger.info(f"📥 Unité {unit.id} : {unit.repo_name}/{unit.branch_name} ({unit.mode}, jeton {token_index})")
+
+            heartbeat.unit_id = unit.id
+            PROGRESS.branch_start(unit.repo_name, unit.branch_name)
+            try:
+                result = run_unit(unit, fetcher, token)
+            finally:
+                heartbeat.unit_id = None
+            PROGRESS.branch_end(result.status)
+
+            if result.status == 'cancelled':
+                # Arrêt du worker : l'unité repart dans la file pour un autre
+                ingest_units.finish_unit(conn, unit.id, 'queued', result.count)
+            else:
+                status = 'done' if result.status == 'success' else 'failed'
+                ingest_units.finish_unit(conn, unit.id, status, result.count, result.error)
+            processed += 1
+            index_pending = index_pending or result.count > 0
+    finally:
+        heartbeat.stop()
+        conn.close()
+
+    return processed
+
+# ============================================================
+# PLANIFICATEUR : BRANCHES DUES PAR PRIORITÉ (scripts/scheduler.py)
+# ============================================================
+def log_decisions(decisions, budget):
+    logger.info(f"🗓️  Quota disponible : {'inconnu' if budget is None else budget} appels")
+    for d in decisions:
+        if d.selected:
+            marker = "▶️ "
+        elif d.reason == "quota insuffisant":
+            marker = "⏸️ "
+        elif d.reason == scheduler.NO_COMMITS:
+            logger.warning(f"   ⚠️  {d.repo}/{d.branch} : {d.reason}")
+            continue
+        else:
+            marker = "  "
+        detail = d.reason or f"~{d.expected} commits, ~{d.cost} appels"
+        logger.info(f"   {marker} {d.repo}/{d.branch} : score {d.score} "
+                    f"(priorité {d.priority}, {d.rate} commits/h, due dans {max(d.due_in, 0):.0f} min) - {detail}")
+
+def run_scheduler(fetcher, once=False, dry_run=False):
+    """Synchronise les branches dues du registre, les plus actives et prioritaires d'abord.
+
+    Le registre est relu à chaque tour. Avec once (ou dry_run), un seul tour.
+    Retourne le nombre de branches synchronisées.
+    """
+    tokens = ingest_units.TokenPool(GITHUB_TOKENS, GITHUB_API_URL)
+    synced = 0
+
+    while not STOP_EVENT.is_set():
+        try:
+            entries = registry.load_registry()
+            conn = psycopg2.connect(**DB_CONFIG, options='-c client_encoding=UTF8')
+            try:
+                rates = scheduler.observed_rates(conn)
+                last, now = scheduler.last_syncs(conn)
+                stored = scheduler.stored_branches(conn)
+            finally:
+                conn.close()
+        except (OSError, ValueError, psycopg2.Error) as e:
+            # Registre invalide ou base indisponible : on réessaie au tour suivant
+            logger.error(f"❌ Planification impossible : {e}")
+            if once or dry_run:
+                break
+            STOP_EVENT.wait(SCHEDULER_MAX_WAIT)
+            continue
+
+        budget = tokens.remaining()
+        if budget is not None:
+            budget = max(budget - scheduler.API_RESERVE, 0)
+        decisions = scheduler.plan(entries, rates, last, now, budget, stored)
+        log_decisions(decisions, budget)
+        if dry_run:
+            break
+
+        selected = [d for d in decisions if d.selected]
+        PROGRESS.branches_total += len(selected)
+        imported = 0
+        for d in selected:
+            if STOP_EVENT.is_set():
+                break
+            _, token = tokens.best()
+            PROGRESS.branch_start(d.repo, d.branch)
+            result = fetch_new_commits_only(d.repo, d.branch, fetcher, token)
+            PROGRESS.branch_end(result.status)
+            imported += result.count
+            synced += 1
+        if imported:
+            refresh_derived_data()
+
+        if once or STOP_EVENT.is_set():
+            break
+        wake = scheduler.next_wake(decisions)
+        wait = SCHEDULER_MAX_WAIT if wake is None else min(max(wake * 60, 60), SCHEDULER_MAX_WAIT)
+        logger.info(f"💤 Prochain tour dans {wait / 60:.0f} min")
+        STOP_EVENT.wait(wait)
+
+    return synced
+
 # ============================================================
 # MAIN
 # ============================================================
@@ -435,15 +1064,28 @@ if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser(description='Fetch commits from Odoo repositories')
-    parser.add_argument('mode', nargs='?', default='incremental', choices=['incremental', 'full'],
-                        help='Mode de synchronisation (incremental ou full)')
+    parser.add_argument('mode', nargs='?', default='incremental', choices=['incremental', 'full', 'plan', 'worker', 'schedule', 'push'],
+                        help='Mode de synchronisation (incremental ou full), plan (remplit la file des '
+                             'unités de travail), worker (traite la file), schedule (branches dues '
+                             'du registre, par priorité) ou push (commits reçus par le webhook)')
     parser.add_argument('--repos', nargs='+', help='Liste des dépôts à synchroniser (ex: odoo/odoo odoo/enterprise)')
     parser.add_argument('--branches', nargs='+', help='Liste des branches à synchroniser (ex: 16.0 17.0 18.0)')
+    parser.add_argument('--fetcher', default=COMMIT_FETCHER, choices=['rest', 'graphql'],
+                        help='Source des métadonnées de commits (rest ou graphql)')
+    parser.add_argument('--progress-file', default=SYNC_PROGRESS_FILE,
+                        help='Fichier des événements de progression (JSON lines)')
+    parser.add_argument('--full', action='store_true',
+                        help='Avec plan : unités d\'import complet (tranches de pages) au lieu d\'incrémental')
+    parser.add_argument('--once', action='store_true',
+                        help='Avec worker : s\'arrêter quand la file est vide ; avec schedule : un seul tour')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Avec schedule : afficher les décisions sans synchroniser')
 
     args = parser.parse_args()
 
-    repos_to_sync = args.repos if args.repos else REPOSITORIES
-    branches_to_sync = args.branches if args.branches else BRANCHES
+    pairs_to_sync = registry.select(REGISTRY, args.repos, args.branches)
+    repos_to_sync = list(dict.fromkeys(repo for repo, _ in pairs_to_sync))
+    branches_to_sync = list(dict.fromkeys(branch for _, branch in pairs_to_sync))
 
     logger.info("=" * 60)
     logger.info("🚀 SYNCHRONISATION ODOO DEVLOGS")
@@ -451,6 +1093,7 @@ if __name__ == "__main__":
     logger.info(f"Mode: {args.mode.upper()}")
     logger.info(f"Dépôts: {', '.join(repos_to_sync)}")
     logger.info(f"Branches: {', '.join(branches_to_sync)}")
+    logger.info(f"Source: {args.fetcher.upper()}")
 
     if MAX_COMMITS_PER_BRANCH == 0:
         logger.info("📊 Limite: AUCUNE (récupération complète)")
@@ -459,14 +1102,94 @@ if __name__ == "__main__":
 
     logger.info("=" * 60)
 
-    if args.mode == "full":
-        for repo in repos_to_sync:
-            for branch in branches_to_sync:
-                fetch_commits_for_branch(repo, branch)
-    else:
-        for repo in repos_to_sync:
-            for branch in branches_to_sync:
-                fetch_new_commits_only(repo, branch)
+    conn = psycopg2.connect(**DB_CONFIG, options='-c client_encoding=UTF8')
+    steps = missing_schema_steps(conn)
+    conn.close()
+    if steps:
+        logger.error("❌ Le schéma de la base n'est pas à jour. Lancez d'abord :")
+        for step in steps:
+            logger.error(f"   → {step}")
+        sys.exit(1)
+
+    signal.signal(signal.SIGTERM, handle_stop_signal)
+    signal.signal(signal.SIGINT, handle_stop_signal)
+
+    if args.mode == "plan":
+        conn = psycopg2.connect(**DB_CONFIG, options='-c client_encoding=UTF8')
+        g = Github(GITHUB_TOKENS[0], base_url=GITHUB_API_URL)
+        added = ingest_units.plan_units(conn, g, pairs_to_sync, args.full)
+        counts = ingest_units.queue_status(conn)
+        conn.close()
+        logger.info(f"✅ {added} unités ajoutées ({counts.get('queued', 0)} en attente, {counts.get('running', 0)} en cours)")
+        sys.exit(0)
+
+    if args.mode == "worker":
+        PROGRESS = ProgressReporter(args.progress_file, args.mode)
+        PROGRESS.sync_start([], [])
+        logger.info(f"👷 Worker {ingest_units.OWNER} : {len(GITHUB_TOKENS)} jeton(s)")
+        processed = run_worker(args.fetcher, args.once)
+        PROGRESS.sync_end('cancelled' if STOP_EVENT.is_set() else 'success')
+        logger.info("=" * 60)
+        logger.info(f"✅ WORKER ARRÊTÉ : {processed} unités traitées")
+        logger.info("=" * 60)
+        sys.exit(0)
+
+    if args.mode == "push":
+        # Sans --repos / --branches : toutes les branches qui ont des pushs en attente
+        if not args.repos and not args.branches:
+            conn = psycopg2.connect(**DB_CONFIG, options='-c client_encoding=UTF8')
+            pairs_to_sync = push_events.pending_branches(conn)
+            conn.close()
+        PROGRESS = ProgressReporter(args.progress_file, args.mode, len(pairs_to_sync))
+        PROGRESS.sync_start(repos_to_sync, branches_to_sync)
+        imported = 0
+        for repo, branch in pairs_to_sync:
+            if STOP_EVENT.is_set():
+                break
+            PROGRESS.branch_start(repo, branch)
+            result = fetch_pushed_commits(repo, branch)
+            PROGRESS.branch_end(result.status)
+            imported += result.count
+        if imported:
+            refresh_derived_data()
+        PROGRESS.sync_end('cancelled' if STOP_EVENT.is_set() else 'success')
+        logger.info("=" * 60)
+        logger.info(f"✅ PUSHS IMPORTÉS : {imported} nouveaux commits")
+        logger.info("=" * 60)
+        sys.exit(0)
+
+    if args.mode == "schedule":
+        PROGRESS = ProgressReporter(args.progress_file, args.mode)
+        PROGRESS.sync_start(REPOSITORIES, BRANCHES)
+        synced = run_scheduler(args.fetcher, args.once, args.dry_run)
+        PROGRESS.sync_end('cancelled' if STOP_EVENT.is_set() else 'success')
+        logger.info("=" * 60)
+        logger.info(f"✅ PLANIFICATEUR ARRÊTÉ : {synced} synchronisations")
+        logger.info("=" * 60)
+        sys.exit(0)
+
+    PROGRESS = ProgressReporter(args.progress_file, args.mode, len(pairs_to_sync), MAX_COMMITS_PER_BRANCH)
+    PROGRESS.sync_start(repos_to_sync, branches_to_sync)
+
+    for repo, branch in pairs_to_sync:
+        if STOP_EVENT.is_set():
+            break
+        PROGRESS.branch_start(repo, branch)
+        if args.mode == "full":
+            result = fetch_commits_for_branch(repo, branch, args.fetcher)
+        else:
+            result = fetch_new_commits_only(repo, branch, args.fetcher)
+        PROGRESS.branch_end(result.status)
+
+    if STOP_EVENT.is_set():
+        logger.info("=" * 60)
+        logger.warning("⚠️  SYNCHRONISATION ANNULÉE")
+        logger.info("=" * 60)
+        PROGRESS.sync_end('cancelled')
+        sys.exit(0)
+
+    refresh_derived_data()
+    PROGRESS.sync_end('success')
 
     logger.info("=" * 60)
     logger.info("✅ SYNCHRONISATION TERMINÉE")
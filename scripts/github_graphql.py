@@ -0,0 +1,206 @@
+import os
+import json
+import time
+import logging
+import urllib.request
+import urllib.error
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+GITHUB_GRAPHQL_URL = os.getenv("GITHUB_GRAPHQL_URL", "https://api.github.com/graphql")
+
+# GitHub limite les connexions GraphQL à 100 noeuds par page
+PAGE_SIZE = 100
+
+# En dessous de ce nombre de points restants, on attend le reset
+MIN_RATE_LIMIT_REMAINING = 50
+
+HISTORY_QUERY = """
+query($owner: String!, $name: String!, $ref: String!, $cursor: String, $pageSize: Int!) {
+  rateLimit { cost remaining resetAt }
+  repository(owner: $owner, name: $name) {
+    ref(qualifiedName: $ref) {
+      target {
+        ... on Commit {
+          history(first: $pageSize, after: $cursor) {
+            pageInfo { hasNextPage endCursor }
+            nodes {
+              oid
+              url
+              message
+              additions
+              deletions
+              changedFilesIfAvailable
+              comments { totalCount }
+              author { name email date }
+              committer { name email date }
+              parents(first: 20) { totalCount nodes { oid } }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+class GraphQLError(Exception):
+    pass
+
+# ============================================================
+# TRANSPORT
+# ============================================================
+class UrllibTransport:
+    """Transport HTTP par défaut : POST JSON vers l'endpoint GraphQL.
+
+    N'importe quel callable `transport(query, variables) -> dict` peut le
+    remplacer (serveur de fixtures local, rejeu d'enregistrements, ...).
+    """
+
+    def __init__(self, token, url=None, timeout=60, retries=3):
+        self.token = token
+        self.url = url or GITHUB_GRAPHQL_URL
+        self.timeout = timeout
+        self.retries = retries
+
+    def __call__(self, query, variables):
+        body = json.dumps({"query": query, "variables": variables}).encode("utf-8")
+        headers = {"Content-Type": "application/json", "Accept": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"bearer {self.token}"
+
+        for attempt in range(1, self.retries + 1):
+            request = urllib.request.Request(self.url, data=body, headers=headers, method="POST")
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    return json.loads(response.read().decode("utf-8"))
+            except urllib.error.HTTPError as e:
+                if e.code < 500 or attempt == self.retries:
+                    raise GraphQLError(f"HTTP {e.code} sur {self.url}: {e.read()[:500]!r}")
+            except (urllib.error.URLError, TimeoutError) as e:
+                if attempt == self.retries:
+                    raise GraphQLError(f"Erreur réseau sur {self.url}: {e}")
+            time.sleep(2 ** attempt)
+
+# ============================================================
+# ADAPTATEURS (même forme que les objets PyGithub)
+# ============================================================
+def _parse_datetime(value):
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+class GitActor:
+    def __init__(self, data):
+        self.name = data.get("name")
+        self.email = data.get("email")
+        self.date = _parse_datetime(data.get("date"))
+
+class GitCommitData:
+    def __init__(self, node):
+        self.message = node.get("message") or ""
+        self.author = GitActor(node["author"]) if node.get("author") else None
+        self.committer = GitActor(node["committer"]) if node.get("committer") else None
+        self.comment_count = (node.get("comments") or {}).get("totalCount", 0)
+
+class CommitStats:
+    def __init__(self, additions, deletions):
+        self.additions = additions or 0
+        self.deletions = deletions or 0
+        self.total = self.additions + self.deletions
+
+class GraphQLCommit:
+    """Commit issu d'une page GraphQL, compatible avec insert_commit().
+
+    Les métadonnées (stats, parents, auteur) viennent de la page ; seuls les
+    fichiers (avec leur patch) nécessitent un appel REST, fait à la demande.
+    """
+
+    def __init__(self, node, rest_repo=None):
+        self.sha = node["oid"]
+        self.html_url = node.get("url")
+        self.commit = GitCommitData(node)
+        self.stats = CommitStats(node.get("additions"), node.get("deletions"))
+        parents = node.get("parents") or {}
+        self.parents = [p["oid"] for p in parents.get("nodes") or []]
+        # Seuls 20 parents sont listés : le compte vient de totalCount
+        self.parent_count = parents.get("totalCount", len(self.parents))
+        self.changed_files = node.get("changedFilesIfAvailable")
+        self._rest_repo = rest_repo
+        self._rest_commit = None
+
+    @property
+    def rest_commit(self):
+        """Commit REST complet (fichiers paginés), None si aucun fichier"""
+        if self._rest_commit is None and self.changed_files != 0 and self._rest_repo is not None:
+            self._rest_commit = self._rest_repo.get_commit(self.sha)
+        return self._rest_commit
+
+    @property
+    def files(self):
+        return self.rest_commit.files if self.rest_commit is not None else []
+
+# ============================================================
+# FETCHER
+# ============================================================
+class GraphQLCommitFetcher:
+    """Parcourt l'historique d'une branche par pages de 100 commits."""
+
+    def __init__(self, transport, rest_repo=None, page_size=PAGE_SIZE):
+        self.transport = transport
+        self.rest_repo = rest_repo
+        self.page_size = page_size
+        self.api_calls = 0
+        self.rate_limit_remaining = None
+
+    def _query(self, query, variables):
+        payload = self.transport(query, variables)
+        self.api_calls += 1
+
+        if payload.get("errors"):
+            messages = "; ".join(e.get("message", str(e)) for e in payload["errors"])
+            raise GraphQLError(f"Erreur GraphQL: {messages}")
+
+        data = payload.get("data") or {}
+        rate_limit = data.get("rateLimit")
+        if rate_limit:
+            self.rate_limit_remaining = rate_limit.get("remaining")
+            if self.rate_limit_remaining is not None and self.rate_limit_remaining < MIN_RATE_LIMIT_REMAINING:
+                reset_at = _parse_datetime(rate_limit.get("resetAt"))
+                wait = 60
+                if reset_at:
+                    wait = max(1, int((reset_at - datetime.now(timezone.utc)).total_seconds()) + 1)
+                logger.warning(f"⚠️  Rate limit GraphQL: {self.rate_limit_remaining} points restants. Pause {wait}s...")
+                time.sleep(wait)
+        return data
+
+    def iter_commits(self, repo_full_name, branch_name):
+        owner, name = repo_full_name.split("/", 1)
+        cursor = None
+
+        while True:
+            data = self._query(HISTORY_QUERY, {
+                "owner": owner,
+                "name": name,
+                "ref": f"refs/heads/{branch_name}",
+                "cursor": cursor,
+                "pageSize": self.page_size
+            })
+
+            repository = data.get("repository")
+            ref = repository.get("ref") if repository else None
+            if not ref or not ref.get("target"):
+                raise GraphQLError(f"Branche {branch_name} introuvable sur {repo_full_name}")
+
+            history = ref["target"]["history"]
+            for node in history["nodes"]:
+                yield GraphQLCommit(node, self.rest_repo)
+
+            page_info = history["pageInfo"]
+            if not page_info["hasNextPage"]:
+                break
+            cursor = page_info["endCursor"]
@@ -0,0 +1,227 @@
+"""Unités de travail de l'import, partagées par plusieurs workers.
+
+`fetch_commits.py plan` découpe une synchronisation en unités rangées dans
+odoo_devlog.ingest_units : une unité par branche en mode incrémental, une
+unité par tranche de PAGES_PER_UNIT pages de 100 commits en mode complet
+(l'historique de master se répartit ainsi entre plusieurs machines).
+`fetch_commits.py worker` réclame les unités une à une avec
+`FOR UPDATE SKIP LOCKED`, signe sa présence (heartbeat) pendant le
+traitement et remet en file les unités dont le worker a disparu.
+
+Les tranches de pages d'une branche listent toutes l'historique du même
+commit de tête (head_sha), lu une fois à la planification : si la branche
+avance pendant l'import, les pages ne se décalent pas et aucun commit
+n'est sauté entre deux tranches. Les commits poussés depuis reviennent à
+la synchronisation incrémentale suivante.
+
+Plusieurs jetons GitHub (GITHUB_TOKENS, séparés par des virgules) peuvent
+être répartis entre les workers : chaque unité part avec le jeton qui a le
+plus de quota restant.
+"""
+import os
+import socket
+import threading
+import logging
+from collections import namedtuple
+from github import Github
+
+logger = logging.getLogger(__name__)
+
+# Pages de 100 commits par unité en mode complet
+PAGES_PER_UNIT = 20
+COMMITS_PER_PAGE = 100
+
+# Heartbeat d'une unité en cours (s)
+HEARTBEAT_INTERVAL = 15
+
+# Sans heartbeat depuis ce délai, l'unité est remise en file (s)
+STALE_AFTER = 120
+
+# Au-delà, une unité qui a perdu son worker à chaque fois passe en échec
+MAX_ATTEMPTS = 3
+
+# Identité du worker dans ingest_units.owner
+OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+Unit = namedtuple("Unit", "id repo_name branch_name mode first_page last_page head_sha attempts")
+
+UNIT_COLUMNS = "id, repo_name, branch_name, mode, first_page, last_page, head_sha, attempts"
+
+# ============================================================
+# PLANIFICATION
+# ============================================================
+def add_unit(cur, repo_name, branch_name, mode, first_page=None, last_page=None, head_sha=None):
+    """Ajoute une unité, sauf si la même attend ou tourne déjà ; True si ajoutée"""
+    cur.execute("""
+        INSERT INTO odoo_devlog.ingest_units (repo_name, branch_name, mode, first_page, last_page, head_sha)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON CONFLICT DO NOTHING;
+    """, (repo_name, branch_name, mode, first_page, last_page, head_sha))
+    return cur.rowcount == 1
+
+def page_ranges(total_commits, pages_per_unit=PAGES_PER_UNIT):
+    """Tranches (première page, dernière page) couvrant total_commits commits, pages numérotées depuis 0"""
+    pages = -(-total_commits // COMMITS_PER_PAGE)
+    return [(first, min(first + pages_per_unit, pages) - 1) for first in range(0, pages, pages_per_unit)]
+
+def plan_units(conn, g, pairs, full=False):
+    """Crée les unités des couples (dépôt, branche) ; retourne le nombre d'unités ajoutées"""
+    added = 0
+    with conn.cursor() as cur:
+        for repo_name, branch_name in pairs:
+            if not full:
+                added += add_unit(cur, repo_name, branch_name, "incremental")
+                continue
+            # Tête figée : toutes les tranches paginent le même historique
+            repo = g.get_repo(repo_name)
+            head_sha = repo.get_branch(branch_name).commit.sha
+            # Nombre de commits lu en une requête (en-tête Link d'une page d'un commit)
+            total = repo.get_commits(sha=head_sha).totalCount
+            ranges = page_ranges(total)
+            for first, last in ranges:
+                added += add_unit(cur, repo_name, branch_name, "full", first, last, head_sha)
+            logger.info(f"📋 {repo_name}/{branch_name} @ {head_sha[:8]} : {total} commits, {len(ranges)} unités")
+    conn.commit()
+    return added
+
+# ============================================================
+# RÉCLAMATION
+# ============================================================
+def claim_unit(conn, owner=OWNER):
+    """Réclame la plus ancienne unité en attente (None si la file est vide)"""
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            UPDATE odoo_devlog.ingest_units SET
+                status = 'running', owner = %s, attempts = attempts + 1,
+                claimed_at = NOW(), heartbeat_at = NOW()
+            WHERE id = (
+                SELECT id FROM odoo_devlog.ingest_units
+                WHERE status = 'queued'
+                ORDER BY id
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING {UNIT_COLUMNS};
+        """, (owner,))
+        row = cur.fetchone()
+    conn.commit()
+    return Unit(*row) if row else None
+
+def set_token(conn, unit_id, token_index):
+    with conn.cursor() as cur:
+        cur.execute("UPDATE odoo_devlog.ingest_units SET token_index = %s WHERE id = %s;", (token_index, unit_id))
+    conn.commit()
+
+def finish_unit(conn, unit_id, status, commits_imported=0, error_message=None):
+    """Termine une unité : done, failed, ou queued pour la rendre à un autre worker"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE odoo_devlog.ingest_units SET
+                status = %s, commits_imported = commits_imported + %s, error_message = %s,
+                owner = CASE WHEN %s = 'queued' THEN NULL ELSE owner END,
+                finished_at = CASE WHEN %s = 'queued' THEN NULL ELSE NOW() END
+            WHERE id = %s;
+        """, (status, commits_imported, error_message, status, status, unit_id))
+    conn.commit()
+
+def reclaim_stale(conn):
+    """Remet en file les unités sans heartbeat (échec après MAX_ATTEMPTS) ; retourne leurs ids"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE odoo_devlog.ingest_units SET
+                status = CASE WHEN attempts >= %s THEN 'failed' ELSE 'queued' END,
+                error_message = 'Worker perdu (plus de heartbeat)',
+                owner = NULL
+            WHERE status = 'running' AND heartbeat_at < NOW() - make_interval(secs => %s)
+            RETURNING id;
+        """, (MAX_ATTEMPTS, STALE_AFTER))
+        ids = [row[0] for row in cur.fetchall()]
+    conn.commit()
+    return ids
+
+def queue_status(conn):
+    """Nombre d'unités par statut"""
+    with conn.cursor() as cur:
+        cur.execute("SELECT status, COUNT(*) FROM odoo_devlog.ingest_units GROUP BY status;")
+        counts = dict(cur.fetchall())
+    conn.commit()
+    return counts
+
+# ============================================================
+# HEARTBEAT
+# ============================================================
+class Heartbeat(threading.Thread):
+    """Thread qui signe l'unité en cours sur sa propre connexion"""
+
+    def __init__(self, connect, owner=OWNER, interval=HEARTBEAT_INTERVAL):
+        super().__init__(daemon=True)
+        self.connect = connect
+        self.owner = owner
+        self.interval = interval
+        self.unit_id = None
+        self._halt = threading.Event()
+
+    def run(self):
+        conn = None
+        while not self._halt.wait(self.interval):
+            unit_id = self.unit_id
+            if unit_id is None:
+                continue
+            try:
+                if conn is None or conn.closed:
+                    conn = self.connect()
+                with conn.cursor() as cur:
+                    cur.execute("""
+                        UPDATE odoo_devlog.ingest_units SET heartbeat_at = NOW()
+                        WHERE id = %s AND owner = %s AND status = 'running';
+                    """, (unit_id, self.owner))
+                    if cur.rowcount == 0:
+                        # Déjà rendue à un autre worker : l'import reste idempotent
+                        logger.warning(f"⚠️  Unité {unit_id} reprise par un autre worker")
+                conn.commit()
+            except Exception as e:
+                logger.warning(f"⚠️  Heartbeat impossible : {e}")
+                conn = None
+        if conn is not None:
+            conn.close()
+
+    def stop(self):
+        self._halt.set()
+
+# ============================================================
+# JETONS GITHUB
+# ============================================================
+class TokenPool:
+    """Jetons GitHub disponibles ; chaque unité prend celui qui a le plus de quota"""
+
+    def __init__(self, tokens, base_url):
+        self.tokens = [token for token in tokens if token] or [None]
+        self.base_url = base_url
+
+    def best(self):
+        """(index, jeton) du jeton le moins entamé (/rate_limit ne consomme pas de quota)"""
+        if len(self.tokens) == 1:
+            return 0, self.tokens[0]
+        best = None
+        for index, token in enumerate(self.tokens):
+            try:
+                remaining = Github(token, base_url=self.base_url).get_rate_limit().core.remaining
+            except Exception as e:
+                logger.warning(f"⚠️  Quota illisible pour le jeton {index} : {e}")
+                continue
+            if best is None or remaining > best[0]:
+                best = (remaining, index)
+        index = best[1] if best else 0
+        return index, self.tokens[index]
+
+    def remaining(self):
+        """Quota REST restant, tous jetons confondus (None s'il est illisible)"""
+        total = None
+        for index, token in enumerate(self.tokens):
+            try:
+                remaining = Github(token, base_url=self.base_url).get_rate_limit().core.remaining
+            except Exception as e:
+                logger.warning(f"⚠️  Quota illisible pour le jeton {index} : {e}")
+                continue
+            total = (total or 0) + remaining
+        return total
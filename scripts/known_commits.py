@@ -0,0 +1,55 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Nombre de lignes lues par aller-retour lors du chargement
+LOAD_BATCH_SIZE = 50000
+
+class KnownCommits:
+    """Ensemble des sha déjà présents en base pour un dépôt.
+
+    Les sha sont stockés sous forme binaire (20 octets) ; `refresh()` ne lit
+    que les commits insérés depuis le dernier chargement (id croissant), par
+    lots, via un curseur serveur.
+    """
+
+    def __init__(self, repo_id):
+        self.repo_id = repo_id
+        self.shas = set()
+        self.max_id = 0
+
+    def refresh(self, conn):
+        loaded = 0
+        with conn.cursor(name=f"known_commits_{self.repo_id}") as cur:
+            cur.itersize = LOAD_BATCH_SIZE
+            cur.execute("""
+                SELECT id, sha FROM odoo_devlog.commits
+                WHERE repo_id = %s AND id > %s
+                ORDER BY id;
+            """, (self.repo_id, self.max_id))
+            for commit_id, sha in cur:
+                self.shas.add(bytes.fromhex(sha))
+                self.max_id = commit_id
+                loaded += 1
+        conn.commit()
+        return loaded
+
+    def add(self, sha):
+        self.shas.add(bytes.fromhex(sha))
+
+    def __contains__(self, sha):
+        return bytes.fromhex(sha) in self.shas
+
+    def __len__(self):
+        return len(self.shas)
+
+# Un ensemble par dépôt, partagé entre les branches d'une même exécution
+_registry = {}
+
+def known_commits_for(conn, repo_id):
+    known = _registry.get(repo_id)
+    if known is None:
+        known = _registry[repo_id] = KnownCommits(repo_id)
+    loaded = known.refresh(conn)
+    logger.info(f"🧠 {len(known)} commits connus pour ce dépôt ({loaded} chargés)")
+    return known
@@ -0,0 +1,197 @@
+"""Découpage des patchs en hunks pour la recherche migration.
+
+Chaque hunk (« @@ -a,b +c,d @@ ») est stocké dans odoo_devlog.patch_hunks
+avec ses plages de lignes, son texte complet et, à part, le texte des
+lignes ajoutées et supprimées (en minuscules) : la recherche porte sur les
+seules lignes modifiées et distingue « terme ajouté » / « terme supprimé »
+en SQL.
+
+L'import remplit la table au fil de l'eau ; ce script la complète pour les
+fichiers importés avant son existence (idempotent, relançable).
+
+Usage :
+    python patch_hunks.py                      # hunks manquants de toute la base
+    python patch_hunks.py --batch-size 5000 --pause 0.1
+"""
+import os
+import re
+import time
+import argparse
+import logging
+from collections import namedtuple
+import psycopg2
+from psycopg2.extras import execute_values
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DB_CONFIG = {
+    "dbname": os.getenv("DB_NAME", "odoo_devlog"),
+    "user": os.getenv("DB_USER"),
+    "password": os.getenv("DB_PASSWORD"),
+    "host": os.getenv("DB_HOST", "localhost"),
+    "port": 5432
+}
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@ ?(.*)$")
+
+Hunk = namedtuple(
+    "Hunk",
+    "index old_start old_lines new_start new_lines section content additions deletions added_text removed_text"
+)
+
+HUNK_COLUMNS = (
+    "file_change_id, committed_date, hunk_index, old_start, old_lines, new_start, new_lines, "
+    "section, content, additions, deletions, added_text, removed_text"
+)
+
+# ============================================================
+# DÉCOUPAGE
+# ============================================================
+def split_hunks(patch):
+    """Découpe un patch unifié GitHub en hunks.
+
+    Les lignes précédant le premier en-tête @@ (patch tronqué, binaire) sont
+    ignorées ; le dernier hunk d'un patch coupé à 50 000 caractères est
+    gardé tel quel. added_text / removed_text sont en minuscules : la
+    recherche n'a pas à appliquer LOWER() à chaque ligne.
+    """
+    hunks = []
+    if not patch:
+        return hunks
+
+    current = None
+    for line in patch.split("\n"):
+        header = HUNK_HEADER.match(line)
+        if header:
+            if current:
+                hunks.append(_build_hunk(len(hunks), *current))
+            current = (header, [line], [], [])
+            continue
+        if current is None:
+            continue
+        _, lines, added, removed = current
+        lines.append(line)
+        if line.startswith("+"):
+            added.append(line[1:])
+        elif line.startswith("-"):
+            removed.append(line[1:])
+
+    if current:
+        hunks.append(_build_hunk(len(hunks), *current))
+    return hunks
+
+def _build_hunk(index, header, lines, added, removed):
+    old_start, old_lines, new_start, new_lines, section = header.groups()
+    return Hunk(
+        index=index,
+        old_start=int(old_start),
+        old_lines=int(old_lines) if old_lines is not None else 1,
+        new_start=int(new_start),
+        new_lines=int(new_lines) if new_lines is not None else 1,
+        section=section or None,
+        content="\n".join(lines),
+        additions=len(added),
+        deletions=len(removed),
+        added_text="\n".join(added).lower() if added else None,
+        removed_text="\n".join(removed).lower() if removed else None
+    )
+
+# ============================================================
+# ÉCRITURE
+# ============================================================
+def insert_hunks(cur, files, replace_ids=()):
+    """Écrit les hunks de fichiers déjà présents dans file_changes.
+
+    `files` contient des triplets (file_change_id, committed_date, patch).
+    Les hunks des fichiers de `replace_ids` (fichier réimporté, patch
+    peut-être différent) sont supprimés avant réécriture. Retourne le
+    nombre de hunks écrits.
+    """
+    if replace_ids:
+        dates = list({committed_date for file_change_id, committed_date, _ in files if file_change_id in replace_ids})
+        cur.execute(
+            "DELETE FROM odoo_devlog.patch_hunks WHERE file_change_id = ANY(%s) AND committed_date = ANY(%s);",
+            (list(replace_ids), dates)
+        )
+
+    rows = []
+    for file_change_id, committed_date, patch in files:
+        for hunk in split_hunks(patch):
+            rows.append((
+                file_change_id, committed_date, hunk.index,
+                hunk.old_start, hunk.old_lines, hunk.new_start, hunk.new_lines,
+                hunk.section, hunk.content, hunk.additions, hunk.deletions,
+                hunk.added_text, hunk.removed_text
+            ))
+    if rows:
+        execute_values(
+            cur,
+            f"INSERT INTO odoo_devlog.patch_hunks ({HUNK_COLUMNS}) VALUES %s ON CONFLICT DO NOTHING",
+            rows,
+            page_size=500
+        )
+    return len(rows)
+
+# ============================================================
+# RATTRAPAGE
+# ============================================================
+def backfill_hunks(conn, batch_size=2000, pause=0.0):
+    """Découpe les patchs des fichiers qui n'ont pas encore de hunks.
+
+    Parcourt file_changes par tranches d'id, une transaction par tranche.
+    Retourne (fichiers traités, hunks écrits).
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM odoo_devlog.file_changes;")
+        low, high = cur.fetchone()
+    conn.commit()
+
+    files_done = hunks_done = batches = 0
+    start = low
+    while start <= high:
+        end = start + batch_size - 1
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT fc.id, fc.committed_date, fc.patch
+                FROM odoo_devlog.file_changes fc
+                WHERE fc.id BETWEEN %s AND %s
+                  AND fc.patch IS NOT NULL
+                  AND NOT EXISTS (
+                      SELECT 1 FROM odoo_devlog.patch_hunks h
+                      WHERE h.file_change_id = fc.id AND h.committed_date = fc.committed_date
+                  );
+            """, (start, end))
+            files = cur.fetchall()
+            hunks_done += insert_hunks(cur, files)
+            files_done += len(files)
+        conn.commit()
+
+        batches += 1
+        if batches % 50 == 0:
+            logger.info(f"   → fichiers jusqu'à {end} : {files_done} découpés, {hunks_done} hunks")
+        start = end + 1
+        if pause:
+            time.sleep(pause)
+
+    return files_done, hunks_done
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    parser = argparse.ArgumentParser(description="Découpe en hunks les patchs déjà importés")
+    parser.add_argument("--batch-size", type=int, default=2000, help="Nombre d'id de file_changes par transaction")
+    parser.add_argument("--pause", type=float, default=0.0, help="Pause entre deux tranches (secondes)")
+    args = parser.parse_args()
+
+    try:
+        conn = psycopg2.connect(**DB_CONFIG, options='-c client_encoding=UTF8')
+    except Exception as e:
+        logger.error(f"❌ Erreur de connexion à PostgreSQL : {e}")
+        exit(1)
+
+    started = time.time()
+    files_done, hunks_done = backfill_hunks(conn, args.batch_size, args.pause)
+    logger.info(f"✅ {files_done} fichiers découpés en {hunks_done} hunks ({time.time() - started:.1f}s)")
+    conn.close()
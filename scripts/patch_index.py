@@ -0,0 +1,673 @@
+"""Index de recherche des patchs sur disque (trigrammes, segments mmap).
+
+Optionnel, activé par PATCH_INDEX_DIR : /search/migration y cherche ses
+candidats sans solliciter PostgreSQL, qui ne relit ensuite que les
+fichiers retenus (par clé primaire).
+
+Un document est le texte ajouté (ou supprimé) d'un fichier : les lignes de
+ses hunks, en minuscules, comme dans patch_hunks. Chaque segment est un
+fichier immuable, lu par mmap :
+
+    en-tête | colonnes des documents (file_change_id, date, branche, côté)
+    | positions des textes et des noms | textes | noms de fichiers
+    | listes de documents | trigrammes | débuts des listes
+
+Les trigrammes sont des triplets d'octets UTF-8 pris dans une même ligne.
+Les numéros de documents sont globaux à l'index (segment = plage
+base..base+n) : fusionner des segments voisins revient à concaténer leurs
+listes, sans les réécrire. manifest.json donne les segments en service, le
+dernier file_changes.id lu et les plages d'ids encore réservées par des
+imports en cours lors de la mise à jour (pending) ; les fichiers importés
+depuis et ceux de ces plages restent cherchés dans PostgreSQL.
+
+Usage :
+    python patch_index.py              # indexe les nouveaux fichiers, fusionne si besoin
+    python patch_index.py --merge      # fusionne tous les segments en un seul
+    python patch_index.py --rebuild    # reconstruit l'index (fichiers réimportés)
+    python patch_index.py --status
+"""
+import os
+import json
+import mmap
+import time
+import heapq
+import struct
+import argparse
+import calendar
+import logging
+import threading
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from pathlib import Path
+import psycopg2
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DB_CONFIG = {
+    "dbname": os.getenv("DB_NAME", "odoo_devlog"),
+    "user": os.getenv("DB_USER"),
+    "password": os.getenv("DB_PASSWORD"),
+    "host": os.getenv("DB_HOST", "localhost"),
+    "port": 5432
+}
+
+PATCH_INDEX_DIR = os.getenv("PATCH_INDEX_DIR")
+
+# Documents par segment écrit lors d'une mise à jour
+SEGMENT_MAX_DOCS = int(os.getenv("PATCH_INDEX_SEGMENT_DOCS", 200000))
+
+# Au-delà, les segments voisins les plus petits sont fusionnés
+MAX_SEGMENTS = int(os.getenv("PATCH_INDEX_MAX_SEGMENTS", 8))
+
+# Lignes dont les trigrammes sont gardés en cache pendant la construction
+LINE_CACHE_SIZE = 200000
+
+MAGIC = b"ODLPIDX1"
+# Ordre d'octets natif : les sections sont lues par memoryview.cast()
+HEADER = struct.Struct("=8sQQQQQQ")
+HEADER_SIZE = 64
+
+# Colonnes par document : file_change_id, date (secondes), branch_id (à l'indexation,
+# informatif : non utilisé pour filtrer), côté
+COLUMNS = (("file_ids", "I"), ("dates", "I"), ("branches", "I"), ("sides", "B"))
+
+ADDED, REMOVED = 0, 1
+SIDES = {"added": ADDED, "removed": REMOVED}
+
+MANIFEST = "manifest.json"
+LOCK = "index.lock"
+
+# ============================================================
+# OUTILS
+# ============================================================
+def _align(size):
+    return (size + 7) & ~7
+
+def _pad(f):
+    f.write(b"\0" * (_align(f.tell()) - f.tell()))
+
+def to_epoch(value):
+    """Date naïve (UTC, comme en base) -> secondes"""
+    return calendar.timegm(value.timetuple())
+
+def literal_trigrams(literal):
+    """Trigrammes d'un littéral déjà en minuscules (ceux à cheval sur deux lignes sont ignorés)"""
+    data = literal.encode("utf-8")
+    return {
+        int.from_bytes(data[i:i + 3], "big")
+        for i in range(len(data) - 2)
+        if b"\n" not in data[i:i + 3]
+    }
+
+def _contains(postings, doc):
+    i = bisect_left(postings, doc)
+    return i < len(postings) and postings[i] == doc
+
+def _intersect(lists):
+    """Intersection de listes triées, en partant de la plus courte"""
+    lists = sorted(lists, key=len)
+    result = set(lists[0])
+    for postings in lists[1:]:
+        if not result:
+            break
+        if len(result) * 20 < len(postings):
+            result = {doc for doc in result if _contains(postings, doc)}
+        else:
+            result.intersection_update(postings)
+    return result
+
+# ============================================================
+# ÉCRITURE
+# ============================================================
+def _write_segment(path, base, columns, text_offsets, texts, name_offsets, names, postings):
+    """Écrit un segment.
+
+    `columns` : pour chaque colonne de COLUMNS, ses morceaux d'octets ;
+    `text_offsets` / `name_offsets` : array('Q') de doc_count + 1 positions ;
+    `texts` / `names` : morceaux d'octets ; `postings` : couples
+    (trigramme, [morceaux de uint32]) par trigramme croissant.
+    """
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        f.write(b"\0" * HEADER_SIZE)
+        for chunks in columns:
+            for chunk in chunks:
+                f.write(chunk)
+            _pad(f)
+        f.write(text_offsets.tobytes())
+        f.write(name_offsets.tobytes())
+        for chunks in (texts, names):
+            for chunk in chunks:
+                f.write(chunk)
+            _pad(f)
+
+        keys, starts = array("I"), array("Q", [0])
+        count = 0
+        for key, chunks in postings:
+            for chunk in chunks:
+                f.write(chunk)
+                count += len(chunk) // 4
+            keys.append(key)
+            starts.append(count)
+        _pad(f)
+        f.write(keys.tobytes())
+        _pad(f)
+        f.write(starts.tobytes())
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, base, len(text_offsets) - 1, text_offsets[-1], name_offsets[-1], count, len(keys)))
+    os.replace(tmp, path)
+
+class SegmentBuilder:
+    """Accumule des documents en mémoire puis les écrit en un segment"""
+
+    def __init__(self, base):
+        self.base = base
+        self.columns = {name: array(code) for name, code in COLUMNS}
+        self.text_offsets = array("Q", [0])
+        self.name_offsets = array("Q", [0])
+        self.texts = []
+        self.names = []
+        self.postings = defaultdict(list)
+        self._lines = {}
+
+    def __len__(self):
+        return len(self.text_offsets) - 1
+
+    def _line_trigrams(self, line):
+        grams = self._lines.get(line)
+        if grams is None:
+            grams = {line[i:i + 3] for i in range(len(line) - 2)}
+            if len(self._lines) >= LINE_CACHE_SIZE:
+                self._lines.clear()
+            self._lines[line] = grams
+        return grams
+
+    def add(self, file_change_id, committed, branch_id, side, filename, text):
+        doc = self.base + len(self)
+        data = text.encode("utf-8")
+        grams = set()
+        for line in set(data.split(b"\n")):
+            grams |= self._line_trigrams(line)
+        for gram in grams:
+            self.postings[gram].append(doc)
+
+        for (name, _), value in zip(COLUMNS, (file_change_id, committed, branch_id or 0, side)):
+            self.columns[name].append(value)
+        name = filename.encode("utf-8")
+        self.texts.append(data)
+        self.names.append(name)
+        self.text_offsets.append(self.text_offsets[-1] + len(data))
+        self.name_offsets.append(self.name_offsets[-1] + len(name))
+
+    def write(self, path):
+        postings = (
+            (int.from_bytes(gram, "big"), [array("I", self.postings[gram]).tobytes()])
+            for gram in sorted(self.postings)
+        )
+        _write_segment(
+            path, self.base, [[self.columns[name].tobytes()] for name, _ in COLUMNS],
+            self.text_offsets, self.texts, self.name_offsets, self.names, postings
+        )
+
+# ============================================================
+# LECTURE
+# ============================================================
+class Segment:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._map)
+        magic, self.base, self.doc_count, text_size, name_size, posting_count, key_count = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError(f"{path} : segment d'index invalide")
+
+        self._views = []
+
+        def section(pos, size, code=None):
+            part = view[pos:pos + size]
+            self._views.append(part)
+            if code:
+                part = part.cast(code)
+                self._views.append(part)
+            return part, _align(pos + size)
+
+        pos = HEADER_SIZE
+        self.column_bytes = {}
+        for name, code in COLUMNS:
+            size = self.doc_count * struct.calcsize(code)
+            self.column_bytes[name], _ = section(pos, size)
+            column, pos = section(pos, size, code)
+            setattr(self, name, column)
+        self.text_offsets, pos = section(pos, (self.doc_count + 1) * 8, "Q")
+        self.name_offsets, pos = section(pos, (self.doc_count + 1) * 8, "Q")
+        self._text_pos = pos
+        self.texts, pos = section(pos, text_size)
+        self._name_pos = pos
+        self.names, pos = section(pos, name_size)
+        self.postings_bytes, _ = section(pos, posting_count * 4)
+        self.postings, pos = section(pos, posting_count * 4, "I")
+        self.keys, pos = section(pos, key_count * 4, "I")
+        self.starts, pos = section(pos, (key_count + 1) * 8, "Q")
+
+    def close(self):
+        for part in reversed(self._views):
+            part.release()
+        try:
+            self._map.close()
+        except BufferError:
+            # Une vue est encore référencée : le ramasse-miettes fermera le fichier
+            pass
+
+    def lookup(self, key):
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self.postings[self.starts[i]:self.starts[i + 1]]
+        return self.postings[0:0]
+
+    def contains(self, i, needle):
+        """Le texte du i-ème document du segment contient-il `needle` (octets) ?"""
+        return self._map.find(needle, self._text_pos + self.text_offsets[i], self._text_pos + self.text_offsets[i + 1]) != -1
+
+    def in_module(self, i, module):
+        """Mêmes règles que le filtre module de l'API : module/..., .../module/..."""
+        name = self._map[self._name_pos + self.name_offsets[i]:self._name_pos + self.name_offsets[i + 1]]
+        return name.startswith(module[1:]) or module in name
+
+    def evaluate(self, required):
+        """Documents pouvant contenir les littéraux, None si aucun trigramme ne restreint"""
+        if isinstance(required, str):
+            keys = literal_trigrams(required)
+            return _intersect([self.lookup(key) for key in keys]) if keys else None
+        operator, children = required
+        results = [self.evaluate(child) for child in children]
+        if operator == "and":
+            known = sorted((result for result in results if result is not None), key=len)
+            return set.intersection(*known) if known else None
+        if any(result is None for result in results):
+            return None
+        return set().union(*results)
+
+class PatchIndex:
+    """Segments en service d'un répertoire d'index"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.manifest = read_manifest(self.directory)
+        self.segments = [Segment(self.directory / name) for name in self.manifest["segments"]]
+
+    @property
+    def last_file_change_id(self):
+        return self.manifest["last_file_change_id"]
+
+    @property
+    def pending_ranges(self):
+        """Plages (premier, dernier) d'ids sous last_file_change_id pas encore indexées"""
+        return [tuple(ids) for group in self.manifest.get("pending", []) for ids in group["ranges"]]
+
+    def close(self):
+        for segment in self.segments:
+            segment.close()
+
+    def search(self, required, first_date, last_date, change=None, module=None, needle=None):
+        """file_change_id candidats, du plus récent au plus ancien (itérateur).
+
+        Pas de filtre par branche : un commit déjà indexé peut changer de
+        branche (réimport, forward-port réattribué) sans que l'index le
+        sache ; la requête SQL qui relit les candidats vérifie la branche.
+
+        `required` : littéraux obligatoires (chaîne ou arbre de
+        regex_search.required_literals). `needle` : texte exact exigé
+        (recherche simple), vérifié au fil de l'itération : le coût suit le
+        nombre de résultats consommés. Retourne None si les littéraux ne
+        donnent aucun trigramme : l'index ne peut pas aider.
+        """
+        if required is None:
+            return None
+        first, last = to_epoch(first_date), to_epoch(last_date)
+        side = SIDES.get(change)
+
+        candidates = []
+        for n, segment in enumerate(self.segments):
+            docs = segment.evaluate(required)
+            if docs is None:
+                return None
+            dates, sides = segment.dates, segment.sides
+            for doc in docs:
+                i = doc - segment.base
+                if side is not None and sides[i] != side:
+                    continue
+                if first <= dates[i] <= last:
+                    candidates.append((dates[i], segment.file_ids[i], n, i))
+        candidates.sort(reverse=True)
+        return self._matches(
+            candidates,
+            f"/{module}/".encode("utf-8") if module else None,
+            needle.encode("utf-8") if needle else None
+        )
+
+    def _matches(self, candidates, module, needle):
+        seen = set()
+        for _, file_change_id, n, i in candidates:
+            if file_change_id in seen:
+                continue
+            segment = self.segments[n]
+            if module is not None and not segment.in_module(i, module):
+                continue
+            if needle is not None and not segment.contains(i, needle):
+                continue
+            seen.add(file_change_id)
+            yield file_change_id
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+def cached_index(directory):
+    """Index du répertoire, rechargé quand manifest.json change ; None s'il n'existe pas"""
+    manifest = Path(directory) / MANIFEST
+    try:
+        mtime = manifest.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    with _cache_lock:
+        cached = _cache.get(directory)
+        if cached is None or cached[0] != mtime:
+            # Les anciens segments restent lisibles par les recherches en cours
+            _cache[directory] = (mtime, PatchIndex(directory))
+        return _cache[directory][1]
+
+# ============================================================
+# MANIFESTE
+# ============================================================
+def read_manifest(directory):
+    path = Path(directory) / MANIFEST
+    if not path.exists():
+        return {"segments": [], "last_file_change_id": 0, "next_doc": 0, "next_segment": 1, "pending": []}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+def write_manifest(directory, manifest):
+    path = Path(directory) / MANIFEST
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+def _new_segment_name(manifest):
+    name = f"segment_{manifest['next_segment']:06d}.idx"
+    manifest["next_segment"] += 1
+    return name
+
+def _remove_unused(directory, manifest):
+    """Supprime les segments sortis du manifeste (échoue sous Windows tant qu'ils sont ouverts)"""
+    for path in Path(directory).glob("segment_*.idx"):
+        if path.name not in manifest["segments"]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+class IndexLock:
+    """Un seul processus modifie l'index à la fois"""
+
+    def __init__(self, directory):
+        self.path = Path(directory) / LOCK
+
+    def __enter__(self):
+        try:
+            fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            raise RuntimeError(f"Index en cours de modification ({self.path} ; à supprimer après un arrêt brutal)")
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        return self
+
+    def __exit__(self, *exc):
+        self.path.unlink(missing_ok=True)
+
+# ============================================================
+# MISE À JOUR
+# ============================================================
+def _read_documents(cur, start, end):
+    cur.execute("""
+        SELECT h.file_change_id, EXTRACT(EPOCH FROM h.committed_date)::BIGINT, c.branch_id, fc.filename,
+               string_agg(h.added_text, E'\\n' ORDER BY h.hunk_index),
+               string_agg(h.removed_text, E'\\n' ORDER BY h.hunk_index)
+        FROM odoo_devlog.patch_hunks h
+        INNER JOIN odoo_devlog.file_changes fc ON fc.id = h.file_change_id AND fc.committed_date = h.committed_date
+        INNER JOIN odoo_devlog.commits c ON c.id = fc.commit_id AND c.committed_date = fc.committed_date
+        WHERE h.file_change_id BETWEEN %s AND %s
+        GROUP BY h.file_change_id, h.committed_date, c.branch_id, fc.filename
+        ORDER BY h.file_change_id;
+    """, (start, end))
+    return cur.fetchall()
+
+def _read_batch(conn, start, end):
+    """(documents, ids visibles, xmin) des file_changes start..end, lus sur un même instantané"""
+    with conn.cursor() as cur:
+        cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ;")
+        cur.execute("SELECT txid_snapshot_xmin(txid_current_snapshot());")
+        xmin = cur.fetchone()[0]
+        cur.execute("SELECT id FROM odoo_devlog.file_changes WHERE id BETWEEN %s AND %s;", (start, end))
+        present = {row[0] for row in cur.fetchall()}
+        rows = _read_documents(cur, start, end)
+    conn.commit()
+    return rows, present, xmin
+
+def _add_missing(ranges, start, end, present):
+    """Ajoute à ranges les plages d'ids de start..end absents de present (plages contiguës fusionnées)"""
+    for file_change_id in range(start, end + 1):
+        if file_change_id in present:
+            continue
+        if ranges and ranges[-1][1] == file_change_id - 1:
+            ranges[-1][1] = file_change_id
+        else:
+            ranges.append([file_change_id, file_change_id])
+
+def update_index(conn, directory, batch_size=2000, rebuild=False):
+    """Ajoute les fichiers importés depuis la dernière mise à jour.
+
+    Les hunks sont lus par tranches d'id ; un segment est écrit tous les
+    SEGMENT_MAX_DOCS documents, puis le manifeste avance. Avec `rebuild`,
+    l'index repart de zéro. Retourne le nombre de documents indexés.
+
+    Plusieurs imports tournent en parallèle et chacun garde sa transaction
+    ouverte le temps des pages de fichiers d'un commit : un id peut devenir
+    visible après un id plus grand déjà lu. Les ids absents d'une tranche
+    sont donc gardés dans manifest["pending"] avec le xmax de l'instantané
+    du relevé, et relus aux mises à jour suivantes jusqu'à ce qu'un
+    instantané ait un xmin au moins égal : les transactions qui pouvaient
+    les détenir sont alors terminées, les ids encore absents ne viendront
+    plus (annulation, id consommé par ON CONFLICT).
+
+    Un fichier réimporté garde son file_changes.id (upsert ON CONFLICT …
+    RETURNING id) : l'index conserve l'ancien texte de cet id jusqu'à
+    `--rebuild`.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    with IndexLock(directory):
+        manifest = read_manifest(directory)
+        if rebuild:
+            # Les anciens segments restent en service jusqu'au premier segment écrit
+            manifest.update({"segments": [], "last_file_change_id": 0, "next_doc": 0, "pending": []})
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT COALESCE(MAX(id), 0), txid_snapshot_xmax(txid_current_snapshot())
+                FROM odoo_devlog.file_changes;
+            """)
+            high, xmax = cur.fetchone()
+        conn.commit()
+
+        builder = SegmentBuilder(manifest["next_doc"])
+        indexed = 0
+
+        def flush(last_id):
+            if len(builder):
+                name = _new_segment_name(manifest)
+                builder.write(directory / name)
+                manifest["segments"].append(name)
+                manifest["next_doc"] = builder.base + len(builder)
+            manifest["last_file_change_id"] = last_id
+            manifest["pending"] = [group for group in pending if group["ranges"]]
+            write_manifest(directory, manifest)
+
+        def read(start, end, ranges, group_xmax):
+            """Indexe les documents de start..end ; les ids absents encore réservés vont dans ranges"""
+            rows, present, xmin = _read_batch(conn, start, end)
+            for file_change_id, committed, branch_id, filename, added, removed in rows:
+                if added:
+                    builder.add(file_change_id, committed, branch_id, ADDED, filename, added)
+                if removed:
+                    builder.add(file_change_id, committed, branch_id, REMOVED, filename, removed)
+            # Sinon, les transactions en cours lors du relevé sont terminées : absents pour de bon
+            if xmin < group_xmax:
+                _add_missing(ranges, start, end, present)
+
+        # Ids réservés lors des mises à jour précédentes
+        pending = []
+        for group in manifest.get("pending", []):
+            ranges = []
+            for first, last in group["ranges"]:
+                for start in range(first, last + 1, batch_size):
+                    read(start, min(start + batch_size - 1, last), ranges, group["xmax"])
+            pending.append({"xmax": group["xmax"], "ranges": ranges})
+        current = {"xmax": xmax, "ranges": []}
+        pending.append(current)
+
+        start = manifest["last_file_change_id"] + 1
+        while start <= high:
+            end = min(start + batch_size - 1, high)
+            read(start, end, current["ranges"], xmax)
+            if len(builder) >= SEGMENT_MAX_DOCS:
+                indexed += len(builder)
+                flush(end)
+                builder = SegmentBuilder(manifest["next_doc"])
+            start = end + 1
+
+        indexed += len(builder)
+        flush(max(high, manifest["last_file_change_id"]))
+        compact(directory, manifest)
+        _remove_unused(directory, manifest)
+    return indexed
+
+# ============================================================
+# FUSION
+# ============================================================
+def _segment_keys(n, segment):
+    for i, key in enumerate(segment.keys):
+        yield key, n, i
+
+def _merge(directory, manifest, names):
+    """Remplace des segments voisins par leur fusion"""
+    segments = [Segment(directory / name) for name in names]
+    try:
+        def shifted(attribute):
+            offsets, shift = array("Q"), 0
+            for segment in segments:
+                segment_offsets = getattr(segment, attribute)
+                offsets.extend(offset + shift for offset in segment_offsets[:-1])
+                shift += segment_offsets[-1]
+            offsets.append(shift)
+            return offsets
+
+        # Trigrammes de tous les segments, dans l'ordre ; les listes se suivent
+        entries = heapq.merge(*(_segment_keys(n, segment) for n, segment in enumerate(segments)))
+
+        def postings():
+            current, chunks = None, []
+            for key, n, i in entries:
+                if key != current and chunks:
+                    yield current, chunks
+                    chunks = []
+                current = key
+                segment = segments[n]
+                chunks.append(segment.postings_bytes[segment.starts[i] * 4:segment.starts[i + 1] * 4])
+            if chunks:
+                yield current, chunks
+
+        name = _new_segment_name(manifest)
+        _write_segment(
+            directory / name, segments[0].base,
+            [[segment.column_bytes[column] for segment in segments] for column, _ in COLUMNS],
+            shifted("text_offsets"), [segment.texts for segment in segments],
+            shifted("name_offsets"), [segment.names for segment in segments],
+            postings()
+        )
+    finally:
+        for segment in segments:
+            segment.close()
+
+    position = manifest["segments"].index(names[0])
+    manifest["segments"][position:position + len(names)] = [name]
+    write_manifest(directory, manifest)
+    return name
+
+def compact(directory, manifest, max_segments=MAX_SEGMENTS):
+    """Fusionne les paires de segments voisins les plus petites jusqu'à max_segments"""
+    directory = Path(directory)
+    while len(manifest["segments"]) > max_segments:
+        sizes = [(directory / name).stat().st_size for name in manifest["segments"]]
+        pair = min(range(len(sizes) - 1), key=lambda i: sizes[i] + sizes[i + 1])
+        _merge(directory, manifest, manifest["segments"][pair:pair + 2])
+
+def merge_all(directory):
+    directory = Path(directory)
+    with IndexLock(directory):
+        manifest = read_manifest(directory)
+        if len(manifest["segments"]) > 1:
+            _merge(directory, manifest, list(manifest["segments"]))
+        _remove_unused(directory, manifest)
+
+def index_status(directory):
+    manifest = read_manifest(directory)
+    segments = []
+    for name in manifest["segments"]:
+        segment = Segment(Path(directory) / name)
+        segments.append((name, segment.doc_count, len(segment.keys), (Path(directory) / name).stat().st_size))
+        segment.close()
+    return manifest, segments
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    parser = argparse.ArgumentParser(description="Index de recherche des patchs sur disque")
+    parser.add_argument("--dir", default=PATCH_INDEX_DIR, help="Répertoire de l'index (défaut : PATCH_INDEX_DIR)")
+    parser.add_argument("--merge", action="store_true", help="Fusionner tous les segments en un seul")
+    parser.add_argument("--rebuild", action="store_true", help="Reconstruire l'index depuis le début")
+    parser.add_argument("--status", action="store_true", help="Afficher les segments")
+    parser.add_argument("--batch-size", type=int, default=2000, help="Nombre d'id de file_changes par lecture")
+    args = parser.parse_args()
+
+    if not args.dir:
+        logger.error("❌ Répertoire de l'index non défini (--dir ou PATCH_INDEX_DIR)")
+        exit(1)
+
+    if args.status:
+        manifest, segments = index_status(args.dir)
+        logger.info(f"📂 {args.dir} : fichiers indexés jusqu'à l'id {manifest['last_file_change_id']}")
+        pending = [ids for group in manifest.get("pending", []) for ids in group["ranges"]]
+        if pending:
+            logger.info(f"   ⏳ {sum(last - first + 1 for first, last in pending)} ids réservés par des imports en cours, relus à la prochaine mise à jour")
+        for name, docs, keys, size in segments:
+            logger.info(f"   • {name} : {docs} documents, {keys} trigrammes, {size / 1024 / 1024:.1f} Mo")
+        exit(0)
+
+    if args.merge:
+        started = time.time()
+        merge_all(args.dir)
+        logger.info(f"✅ Segments fusionnés ({time.time() - started:.1f}s)")
+        exit(0)
+
+    try:
+        conn = psycopg2.connect(**DB_CONFIG, options='-c client_encoding=UTF8')
+    except Exception as e:
+        logger.error(f"❌ Erreur de connexion à PostgreSQL : {e}")
+        exit(1)
+
+    started = time.time()
+    indexed = update_index(conn, args.dir, args.batch_size, rebuild=args.rebuild)
+    logger.info(f"✅ {indexed} documents indexés ({time.time() - started:.1f}s)")
+    conn.close()
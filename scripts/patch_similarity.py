@@ -0,0 +1,218 @@
+"""Empreintes MinHash des patchs, pour retrouver les changements similaires.
+
+Les lignes ajoutées / supprimées d'un patch sont normalisées (minuscules,
+découpées en mots et symboles, espaces ignorés) puis découpées en
+« shingles » de SHINGLE_SIZE mots consécutifs, préfixés du côté du diff
+(« + » ou « - »). Deux patchs qui partagent une grande part de leurs
+shingles ont des empreintes proches : la part de cases égales estime leur
+similarité de Jaccard.
+
+L'empreinte a NUM_HASHES cases de 32 bits (256 octets), calculées en une
+seule passe (one permutation hashing : une valeur de hachage choisit la
+case et donne la valeur ; les cases vides empruntent la suivante). Elle est
+découpée en BANDS bandes de ROWS_PER_BAND cases ; chaque bande donne une
+clé rangée dans patch_signatures.bands (index GIN). Deux patchs similaires
+à plus de ~50 % partagent une bande avec une forte probabilité : les
+candidats sont trouvés par l'index, sans comparaison deux à deux.
+
+L'import remplit la table au fil de l'eau ; ce script la reconstruit pour
+une plage de fichiers déjà importés (idempotent, reprise avec --from-id).
+
+Usage :
+    python patch_similarity.py
+    python patch_similarity.py --from-id 250000 --batch-size 5000
+"""
+import os
+import re
+import time
+import struct
+import argparse
+import logging
+from hashlib import blake2b
+import psycopg2
+from psycopg2.extras import execute_values
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DB_CONFIG = {
+    "dbname": os.getenv("DB_NAME", "odoo_devlog"),
+    "user": os.getenv("DB_USER"),
+    "password": os.getenv("DB_PASSWORD"),
+    "host": os.getenv("DB_HOST", "localhost"),
+    "port": 5432
+}
+
+# Cases de l'empreinte, bandes LSH : seuil ~ (1 / BANDS) ** (1 / ROWS_PER_BAND) = 0.5
+NUM_HASHES = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_HASHES // BANDS
+
+# Mots consécutifs par shingle
+SHINGLE_SIZE = 3
+
+# Au-delà, les lignes suivantes du patch sont ignorées (fichiers générés, traductions)
+MAX_SHINGLES = 20000
+
+SIGNATURE = struct.Struct(f"<{NUM_HASHES}I")
+TOKEN = re.compile(r"\w+|[^\w\s]")
+
+BIN_BITS = NUM_HASHES.bit_length() - 1
+# Écart ajouté à une valeur empruntée, par case de distance
+BORROW_OFFSET = 0x9E3779B1
+
+# ============================================================
+# EMPREINTES
+# ============================================================
+def shingles(patch):
+    """Shingles des lignes ajoutées / supprimées du patch"""
+    found = set()
+    for line in patch.split("\n"):
+        marker = line[:1]
+        if marker not in ("+", "-"):
+            continue
+        tokens = TOKEN.findall(line[1:].lower())
+        if not tokens:
+            continue
+        if len(tokens) <= SHINGLE_SIZE:
+            found.add(marker + " ".join(tokens))
+        else:
+            for i in range(len(tokens) - SHINGLE_SIZE + 1):
+                found.add(marker + " ".join(tokens[i:i + SHINGLE_SIZE]))
+        if len(found) >= MAX_SHINGLES:
+            break
+    return found
+
+def minhash(items):
+    """Empreinte (NUM_HASHES entiers de 32 bits) d'un ensemble non vide de shingles"""
+    mask = NUM_HASHES - 1
+    mins = [None] * NUM_HASHES
+    for item in items:
+        value = int.from_bytes(blake2b(item.encode(), digest_size=8).digest(), "little")
+        slot, value = value & mask, value >> BIN_BITS
+        if mins[slot] is None or value < mins[slot]:
+            mins[slot] = value
+
+    # Densification : une case vide prend la valeur de la suivante non vide, décalée
+    signature = []
+    for slot in range(NUM_HASHES):
+        distance = 0
+        while mins[(slot + distance) & mask] is None:
+            distance += 1
+        signature.append((mins[(slot + distance) & mask] + distance * BORROW_OFFSET) & 0xFFFFFFFF)
+    return signature
+
+def band_keys(signature):
+    """Clés LSH (entiers signés 64 bits) des bandes de l'empreinte"""
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = blake2b(struct.pack(f"<H{ROWS_PER_BAND}I", band, *rows), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+def patch_signature(patch):
+    """(nombre de shingles, empreinte en octets, clés de bandes), ou None sans ligne modifiée"""
+    if not patch:
+        return None
+    items = shingles(patch)
+    if not items:
+        return None
+    signature = minhash(items)
+    return len(items), SIGNATURE.pack(*signature), band_keys(signature)
+
+def similarity(signature, other):
+    """Similarité de Jaccard estimée entre deux empreintes (octets)"""
+    return sum(a == b for a, b in zip(SIGNATURE.unpack(signature), SIGNATURE.unpack(other))) / NUM_HASHES
+
+# ============================================================
+# ÉCRITURE
+# ============================================================
+def insert_signatures(cur, files, replace_ids=()):
+    """Écrit les empreintes de fichiers déjà présents dans file_changes.
+
+    `files` contient des tuples (file_change_id, committed_date, commit_id,
+    patch). Les empreintes des fichiers de `replace_ids` sont supprimées
+    avant réécriture. Retourne le nombre d'empreintes écrites.
+    """
+    if replace_ids:
+        dates = list({committed_date for file_change_id, committed_date, *_ in files if file_change_id in replace_ids})
+        cur.execute(
+            "DELETE FROM odoo_devlog.patch_signatures WHERE file_change_id = ANY(%s) AND committed_date = ANY(%s);",
+            (list(replace_ids), dates)
+        )
+
+    rows = []
+    for file_change_id, committed_date, commit_id, patch in files:
+        computed = patch_signature(patch)
+        if computed:
+            shingle_count, signature, bands = computed
+            rows.append((file_change_id, committed_date, commit_id, shingle_count, psycopg2.Binary(signature), bands))
+    if rows:
+        execute_values(cur, """
+            INSERT INTO odoo_devlog.patch_signatures
+                (file_change_id, committed_date, commit_id, shingles, signature, bands)
+            VALUES %s
+        """, rows, page_size=500)
+    return len(rows)
+
+# ============================================================
+# RECONSTRUCTION
+# ============================================================
+def backfill_signatures(conn, batch_size=2000, pause=0.0, from_id=None):
+    """Reconstruit les empreintes par tranches d'id de file_changes.
+
+    Chaque tranche est effacée puis réécrite dans sa propre transaction :
+    une reprise après interruption (--from-id) ne crée pas de doublons.
+    Retourne (fichiers analysés, empreintes écrites).
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM odoo_devlog.file_changes;")
+        low, high = cur.fetchone()
+    conn.commit()
+
+    files_done = signatures_done = batches = 0
+    start = max(low, from_id or 0)
+    while start <= high:
+        end = start + batch_size - 1
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM odoo_devlog.patch_signatures WHERE file_change_id BETWEEN %s AND %s;", (start, end))
+            cur.execute("""
+                SELECT id, committed_date, commit_id, patch
+                FROM odoo_devlog.file_changes
+                WHERE id BETWEEN %s AND %s AND patch IS NOT NULL;
+            """, (start, end))
+            files = cur.fetchall()
+            signatures_done += insert_signatures(cur, files)
+            files_done += len(files)
+        conn.commit()
+
+        batches += 1
+        if batches % 50 == 0:
+            logger.info(f"   → fichiers jusqu'à {end} : {files_done} analysés, {signatures_done} empreintes")
+        start = end + 1
+        if pause:
+            time.sleep(pause)
+
+    return files_done, signatures_done
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    parser = argparse.ArgumentParser(description="Reconstruit les empreintes MinHash des patchs déjà importés")
+    parser.add_argument("--batch-size", type=int, default=2000, help="Nombre d'id de file_changes par transaction")
+    parser.add_argument("--pause", type=float, default=0.0, help="Pause entre deux tranches (secondes)")
+    parser.add_argument("--from-id", type=int, default=None, help="Reprendre à partir de cet id de file_changes")
+    args = parser.parse_args()
+
+    try:
+        conn = psycopg2.connect(**DB_CONFIG, options='-c client_encoding=UTF8')
+    except Exception as e:
+        logger.error(f"❌ Erreur de connexion à PostgreSQL : {e}")
+        exit(1)
+
+    started = time.time()
+    files_done, signatures_done = backfill_signatures(conn, args.batch_size, args.pause, args.from_id)
+    logger.info(f"✅ {files_done} fichiers analysés, {signatures_done} empreintes ({time.time() - started:.1f}s)")
+    conn.close()
@@ -0,0 +1,239 @@
+"""Index des symboles Odoo touchés par les patchs.
+
+Les lignes ajoutées / supprimées des fichiers Python et XML sont analysées
+pour en extraire les symboles : modèles (_name, _inherit), champs
+(`x = fields.Many2one(...)`), méthodes (`def _compute_x`) et identifiants
+XML (`<record id="...">`, `<template id="...">`, `<menuitem id="...">`).
+Ils sont rangés dans odoo_devlog.patch_symbols, avec le modèle de
+rattachement quand le patch permet de le retrouver (lignes `_name` /
+`_inherit` du hunk ou d'un hunk précédent de la même classe).
+
+L'import remplit la table au fil de l'eau ; ce script la reconstruit pour
+une plage de fichiers déjà importés (idempotent, reprise avec --from-id).
+
+Usage :
+    python patch_symbols.py
+    python patch_symbols.py --from-id 250000 --batch-size 5000
+"""
+import os
+import re
+import time
+import argparse
+import logging
+from collections import namedtuple
+import psycopg2
+from psycopg2.extras import execute_values
+from dotenv import load_dotenv
+from patch_hunks import split_hunks
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DB_CONFIG = {
+    "dbname": os.getenv("DB_NAME", "odoo_devlog"),
+    "user": os.getenv("DB_USER"),
+    "password": os.getenv("DB_PASSWORD"),
+    "host": os.getenv("DB_HOST", "localhost"),
+    "port": 5432
+}
+
+Symbol = namedtuple("Symbol", "kind model name change line detail")
+
+SYMBOL_COLUMNS = (
+    "file_change_id, committed_date, commit_id, module, kind, model, name, "
+    "qualified_name, change, line, detail"
+)
+
+# ============================================================
+# MOTIFS
+# ============================================================
+PY_CLASS = re.compile(r"^\s*class\s+(\w+)\s*[(:]")
+PY_MODEL = re.compile(r"""^\s*_(name|inherit)\s*=\s*\[?\s*['"]([\w.]+)['"]""")
+PY_FIELD = re.compile(r"^\s+(\w+)\s*=\s*fields\.(\w+)\(")
+PY_METHOD = re.compile(r"^\s*(?:async\s+)?def\s+(\w+)\s*\(")
+
+XML_ID = re.compile(r"""<(record|template|menuitem|act_window|report)\b[^>]*?\bid=['"]([\w.]+)['"]""")
+XML_MODEL = re.compile(r"""\bmodel=['"]([\w.]+)['"]""")
+
+def symbol_module(filename):
+    """Module Odoo d'un chemin (addons/x/..., odoo/addons/x/..., x/... pour enterprise)"""
+    for prefix in ("odoo/addons/", "addons/"):
+        if filename.startswith(prefix):
+            return filename[len(prefix):].split("/", 1)[0] or None
+    parts = filename.split("/", 1)
+    return parts[0] if len(parts) == 2 and parts[0] else None
+
+# ============================================================
+# EXTRACTION
+# ============================================================
+def _diff_lines(hunk):
+    """Lignes d'un hunk avec leur type (' ', '+', '-') et numéro dans l'ancien / nouveau fichier"""
+    old_line, new_line = hunk.old_start, hunk.new_start
+    for line in hunk.content.split("\n")[1:]:
+        marker, text = line[:1], line[1:]
+        if marker == "+":
+            yield marker, text, new_line
+            new_line += 1
+        elif marker == "-":
+            yield marker, text, old_line
+            old_line += 1
+        elif marker == " ":
+            yield marker, text, new_line
+            old_line += 1
+            new_line += 1
+
+def _python_symbols(hunks):
+    symbols = []
+    model = None
+    current_class = None
+    for hunk in hunks:
+        # L'en-tête @@ porte la classe englobante : seul un changement de classe oublie le modèle
+        section = PY_CLASS.match(hunk.section or "")
+        if section and section.group(1) != current_class:
+            current_class = section.group(1)
+            model = None
+        for marker, text, line in _diff_lines(hunk):
+            declared_class = PY_CLASS.match(text)
+            if declared_class:
+                current_class = declared_class.group(1)
+                model = None
+                continue
+            declared = PY_MODEL.match(text)
+            if declared:
+                kind, name = declared.groups()
+                if kind == "name" or model is None:
+                    model = name
+                if marker != " ":
+                    symbols.append(Symbol("model" if kind == "name" else "inherit", name, name, marker, line, None))
+                continue
+            if marker == " ":
+                continue
+            field = PY_FIELD.match(text)
+            if field:
+                symbols.append(Symbol("field", model, field.group(1), marker, line, field.group(2)))
+                continue
+            method = PY_METHOD.match(text)
+            if method:
+                symbols.append(Symbol("method", model, method.group(1), marker, line, None))
+    return symbols
+
+def _xml_symbols(hunks):
+    symbols = []
+    for hunk in hunks:
+        for marker, text, line in _diff_lines(hunk):
+            if marker == " ":
+                continue
+            for tag, xmlid in XML_ID.findall(text):
+                record_model = XML_MODEL.search(text) if tag == "record" else None
+                symbols.append(Symbol("xmlid", record_model.group(1) if record_model else None, xmlid, marker, line, tag))
+    return symbols
+
+def extract_symbols(filename, patch):
+    """Symboles ajoutés ('+') ou supprimés ('-') par le patch d'un fichier"""
+    if not patch:
+        return []
+    if filename.endswith(".py"):
+        return _python_symbols(split_hunks(patch))
+    if filename.endswith(".xml"):
+        return _xml_symbols(split_hunks(patch))
+    return []
+
+def qualified_name(symbol, module):
+    """Nom complet : modele.champ / modele.methode, module.id pour les identifiants XML"""
+    if symbol.kind == "xmlid":
+        return symbol.name if "." in symbol.name or not module else f"{module}.{symbol.name}"
+    if symbol.kind in ("field", "method") and symbol.model:
+        return f"{symbol.model}.{symbol.name}"
+    return symbol.name
+
+# ============================================================
+# ÉCRITURE
+# ============================================================
+def insert_symbols(cur, files, replace_ids=()):
+    """Écrit les symboles de fichiers déjà présents dans file_changes.
+
+    `files` contient des tuples (file_change_id, committed_date, commit_id,
+    filename, patch). Les symboles des fichiers de `replace_ids` sont
+    supprimés avant réécriture. Retourne le nombre de symboles écrits.
+    """
+    if replace_ids:
+        dates = list({committed_date for file_change_id, committed_date, *_ in files if file_change_id in replace_ids})
+        cur.execute(
+            "DELETE FROM odoo_devlog.patch_symbols WHERE file_change_id = ANY(%s) AND committed_date = ANY(%s);",
+            (list(replace_ids), dates)
+        )
+
+    rows = []
+    for file_change_id, committed_date, commit_id, filename, patch in files:
+        module = symbol_module(filename)
+        for symbol in extract_symbols(filename, patch):
+            rows.append((
+                file_change_id, committed_date, commit_id, module, symbol.kind, symbol.model, symbol.name,
+                qualified_name(symbol, module), "added" if symbol.change == "+" else "removed",
+                symbol.line, symbol.detail
+            ))
+    if rows:
+        execute_values(cur, f"INSERT INTO odoo_devlog.patch_symbols ({SYMBOL_COLUMNS}) VALUES %s", rows, page_size=500)
+    return len(rows)
+
+# ============================================================
+# RECONSTRUCTION
+# ============================================================
+def backfill_symbols(conn, batch_size=2000, pause=0.0, from_id=None):
+    """Reconstruit les symboles par tranches d'id de file_changes.
+
+    Chaque tranche est effacée puis réécrite dans sa propre transaction :
+    une reprise après interruption (--from-id) ne crée pas de doublons.
+    Retourne (fichiers analysés, symboles écrits).
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM odoo_devlog.file_changes;")
+        low, high = cur.fetchone()
+    conn.commit()
+
+    files_done = symbols_done = batches = 0
+    start = max(low, from_id or 0)
+    while start <= high:
+        end = start + batch_size - 1
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM odoo_devlog.patch_symbols WHERE file_change_id BETWEEN %s AND %s;", (start, end))
+            cur.execute("""
+                SELECT id, committed_date, commit_id, filename, patch
+                FROM odoo_devlog.file_changes
+                WHERE id BETWEEN %s AND %s
+                  AND patch IS NOT NULL
+                  AND (filename LIKE '%%.py' OR filename LIKE '%%.xml');
+            """, (start, end))
+            files = cur.fetchall()
+            symbols_done += insert_symbols(cur, files)
+            files_done += len(files)
+        conn.commit()
+
+        batches += 1
+        if batches % 50 == 0:
+            logger.info(f"   → fichiers jusqu'à {end} : {files_done} analysés, {symbols_done} symboles")
+        start = end + 1
+        if pause:
+            time.sleep(pause)
+
+    return files_done, symbols_done
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    parser = argparse.ArgumentParser(description="Reconstruit l'index des symboles des patchs déjà importés")
+    parser.add_argument("--batch-size", type=int, default=2000, help="Nombre d'id de file_changes par transaction")
+    parser.add_argument("--pause", type=float, default=0.0, help="Pause entre deux tranches (secondes)")
+    parser.add_argument("--from-id", type=int, default=None, help="Reprendre à partir de cet id de file_changes")
+    args = parser.parse_args()
+
+    try:
+        conn = psycopg2.connect(**DB_CONFIG, options='-c client_encoding=UTF8')
+    except Exception as e:
+        logger.error(f"❌ Erreur de connexion à PostgreSQL : {e}")
+        exit(1)
+
+    started = time.time()
+    files_done, symbols_done = backfill_symbols(conn, args.batch_size, args.pause, args.from_id)
+    logger.info(f"✅ {files_done} fichiers analysés, {symbols_done} symboles ({time.time() - started:.1f}s)")
+    conn.close()
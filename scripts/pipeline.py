@@ -0,0 +1,125 @@
+import queue
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+# Nombre maximum d'éléments (morceaux de commits) en attente d'écriture (backpressure)
+QUEUE_SIZE = 50
+
+# Fréquence (en éléments écrits) des logs de débit par étape
+LOG_EVERY = 100
+
+_DONE = object()
+
+# ============================================================
+# COMPTEURS PAR ÉTAPE
+# ============================================================
+class StageStats:
+    """Compteurs d'une étape : éléments traités, temps actif, temps bloqué"""
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+
+    def rate(self):
+        return self.items / self.busy if self.busy > 0 else 0.0
+
+    def summary(self):
+        total = self.busy + self.blocked
+        blocked_pct = (self.blocked / total * 100) if total > 0 else 0
+        return f"{self.name}: {self.items} ({self.rate():.1f}/s actif, {blocked_pct:.0f}% en attente)"
+
+# ============================================================
+# PIPELINE FETCH -> ÉCRITURE
+# ============================================================
+class FetchPipeline:
+    """Sépare l'étape réseau (thread dédié) de l'étape d'écriture en base.
+
+    Le thread de fetch consomme `source` (un itérable qui fait les appels
+    GitHub) et dépose les éléments dans une file bornée ; le thread appelant
+    les passe à `write`. Quand la file est pleine, le fetch attend
+    (backpressure) ; quand elle est vide, c'est l'écriture qui attend.
+    `stop_event` permet un arrêt propre : l'élément en cours d'écriture est
+    terminé, le reste de la file est abandonné.
+    """
+
+    def __init__(self, stop_event, queue_size=QUEUE_SIZE):
+        self.stop_event = stop_event
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.fetch_stats = StageStats("Fetch")
+        self.write_stats = StageStats("Écriture")
+        self.error = None
+        self._halt = threading.Event()
+
+    def _stopped(self):
+        return self._halt.is_set() or self.stop_event.is_set()
+
+    def _put(self, item):
+        started = time.monotonic()
+        while not self._stopped():
+            try:
+                self.queue.put(item, timeout=0.5)
+                self.fetch_stats.blocked += time.monotonic() - started
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self, source):
+        try:
+            iterator = iter(source)
+            while not self._stopped():
+                started = time.monotonic()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                self.fetch_stats.busy += time.monotonic() - started
+                self.fetch_stats.items += 1
+                if not self._put(item):
+                    break
+        except BaseException as e:
+            self.error = e
+        finally:
+            self._put(_DONE)
+
+    def run(self, source, write):
+        producer = threading.Thread(target=self._produce, args=(source,), name="fetch", daemon=True)
+        producer.start()
+
+        try:
+            while not self.stop_event.is_set():
+                started = time.monotonic()
+                try:
+                    item = self.queue.get(timeout=0.5)
+                except queue.Empty:
+                    self.write_stats.blocked += time.monotonic() - started
+                    continue
+                self.write_stats.blocked += time.monotonic() - started
+
+                if item is _DONE:
+                    break
+
+                started = time.monotonic()
+                write(item)
+                self.write_stats.busy += time.monotonic() - started
+                self.write_stats.items += 1
+
+                if self.write_stats.items % LOG_EVERY == 0:
+                    self.log_throughput()
+        finally:
+            self._halt.set()
+            producer.join(timeout=5)
+
+        if self.error:
+            raise self.error
+
+    def log_throughput(self):
+        logger.info(f"   ⏱  {self.fetch_stats.summary()} | {self.write_stats.summary()} | file: {self.queue.qsize()}")
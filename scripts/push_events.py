@@ -0,0 +1,223 @@
+"""Pushs reçus par le webhook GitHub (POST /webhooks/github).
+
+À chaque push, GitHub envoie un événement signé (HMAC SHA-256 du corps avec
+GITHUB_WEBHOOK_SECRET, en-tête X-Hub-Signature-256). L'API vérifie la
+signature, range les SHA poussés dans odoo_devlog.push_events, met à jour
+branches.last_commit_sha (seulement pour une livraison nouvelle : une
+redélivrance d'un ancien push ne fait pas reculer la tête) et met en file
+un job `push` pour la branche :
+`fetch_commits.py push` importe alors exactement ces commits (un appel
+GitHub par commit absent de la base) au lieu de relister la branche depuis
+sa tête.
+
+Si le parent d'un push (`before`) n'est pas en base (livraison perdue,
+import en échec, liste tronquée par GitHub au-delà de PAYLOAD_MAX_COMMITS),
+les commits manquants sont repris par une comparaison entre le dernier
+commit connu de la branche et la nouvelle tête.
+
+Usage :
+    python push_events.py --status                  # pushs en attente par branche
+    python push_events.py --send payload.json       # rejoue un payload signé vers l'API
+"""
+import os
+import hmac
+import json
+import uuid
+import hashlib
+import argparse
+import logging
+import urllib.request
+import psycopg2
+from collections import namedtuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DB_CONFIG = {
+    "dbname": os.getenv("DB_NAME", "odoo_devlog"),
+    "user": os.getenv("DB_USER"),
+    "password": os.getenv("DB_PASSWORD"),
+    "host": os.getenv("DB_HOST", "localhost"),
+    "port": 5432
+}
+
+# SHA d'une branche créée ou supprimée
+ZERO_SHA = "0" * 40
+
+# GitHub ne liste pas plus de commits dans le payload d'un push
+PAYLOAD_MAX_COMMITS = 2048
+
+PushEvent = namedtuple("PushEvent", "repo_name branch_name before after shas forced complete")
+
+# Push en attente d'import
+QueuedPush = namedtuple("QueuedPush", "id before after shas forced complete")
+
+# ============================================================
+# SIGNATURE ET PAYLOAD
+# ============================================================
+def sign(secret, body):
+    """Valeur de X-Hub-Signature-256 pour un corps (bytes)"""
+    return "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+def verify_signature(secret, body, header):
+    """True si l'en-tête X-Hub-Signature-256 correspond au corps (comparaison à temps constant)"""
+    if not secret or not header:
+        return False
+    return hmac.compare_digest(sign(secret, body), header)
+
+def parse_push(payload):
+    """PushEvent d'un payload « push », None pour une suppression ou une référence hors branches"""
+    ref = payload.get("ref") or ""
+    after = payload.get("after")
+    if not ref.startswith("refs/heads/") or payload.get("deleted") or not after or after == ZERO_SHA:
+        return None
+    before = payload.get("before")
+    commits = payload.get("commits") or []
+    return PushEvent(
+        payload["repository"]["full_name"],
+        ref[len("refs/heads/"):],
+        None if before == ZERO_SHA else before,
+        after,
+        [commit["id"] for commit in commits],
+        bool(payload.get("forced")),
+        len(commits) < PAYLOAD_MAX_COMMITS,
+    )
+
+# ============================================================
+# FILE DES PUSHS
+# ============================================================
+def record_push(conn, delivery_id, event):
+    """Enregistre un push ; None si cette livraison a déjà été reçue"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO odoo_devlog.push_events
+                (delivery_id, repo_name, branch_name, before_sha, after_sha, shas, forced, complete)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (delivery_id) DO NOTHING
+            RETURNING id;
+        """, (delivery_id, event.repo_name, event.branch_name, event.before, event.after,
+              event.shas, event.forced, event.complete))
+        row = cur.fetchone()
+    conn.commit()
+    return row[0] if row else None
+
+def branch_exists(conn, repo_name, branch_name):
+    """True si la branche est en base"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT 1 FROM odoo_devlog.branches b
+            JOIN odoo_devlog.repositories r ON r.id = b.repo_id
+            WHERE r.full_name = %s AND b.name = %s;
+        """, (repo_name, branch_name))
+        exists = cur.fetchone() is not None
+    conn.commit()
+    return exists
+
+def update_branch_head(conn, repo_name, branch_name, sha):
+    """Nouvelle tête de la branche ; False si la branche n'est pas en base"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE odoo_devlog.branches b SET last_commit_sha = %s
+            FROM odoo_devlog.repositories r
+            WHERE r.id = b.repo_id AND r.full_name = %s AND b.name = %s;
+        """, (sha, repo_name, branch_name))
+        updated = cur.rowcount > 0
+    conn.commit()
+    return updated
+
+def queued_pushes(conn, repo_name, branch_name):
+    """Pushs en attente d'une branche, dans l'ordre de réception"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT id, before_sha, after_sha, shas, forced, complete
+            FROM odoo_devlog.push_events
+            WHERE status = 'queued' AND repo_name = %s AND branch_name = %s
+            ORDER BY id;
+        """, (repo_name, branch_name))
+        pushes = [QueuedPush(*row) for row in cur.fetchall()]
+    conn.commit()
+    return pushes
+
+def pending_branches(conn):
+    """(dépôt, branche) ayant des pushs en attente"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT repo_name, branch_name FROM odoo_devlog.push_events
+            WHERE status = 'queued'
+            GROUP BY repo_name, branch_name
+            ORDER BY MIN(id);
+        """)
+        pairs = cur.fetchall()
+    conn.commit()
+    return pairs
+
+def finish_pushes(conn, push_ids, status, commits_imported=0, error_message=None):
+    """Marque des pushs importés (done) ou en échec ; le nombre de commits va au dernier"""
+    if not push_ids:
+        return
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE odoo_devlog.push_events SET
+                status = %s, error_message = %s, processed_at = NOW(),
+                commits_imported = CASE WHEN id = %s THEN %s ELSE 0 END
+            WHERE id = ANY(%s);
+        """, (status, error_message, push_ids[-1], commits_imported, list(push_ids)))
+    conn.commit()
+
+# ============================================================
+# MAIN
+# ============================================================
+def send(path, url, secret, event="push"):
+    """Envoie un payload enregistré à l'API, signé comme le ferait GitHub ; retourne la réponse"""
+    with open(path, "rb") as f:
+        body = f.read()
+    headers = {
+        "Content-Type": "application/json",
+        "X-GitHub-Event": event,
+        "X-GitHub-Delivery": str(uuid.uuid4()),
+        "X-Hub-Signature-256": sign(secret, body),
+    }
+    request = urllib.request.Request(url, data=body, headers=headers, method="POST")
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    parser = argparse.ArgumentParser(description="Pushs reçus par le webhook GitHub")
+    parser.add_argument("--status", action="store_true", help="Pushs en attente par branche (par défaut)")
+    parser.add_argument("--send", metavar="PAYLOAD", help="Rejoue un payload JSON enregistré, signé avec GITHUB_WEBHOOK_SECRET")
+    parser.add_argument("--url", default=f"{os.getenv('API_URL', 'http://localhost:8000')}/webhooks/github",
+                        help="Endpoint du webhook (avec --send)")
+    parser.add_argument("--event", default="push", help="En-tête X-GitHub-Event (avec --send)")
+    args = parser.parse_args()
+
+    if args.send:
+        secret = os.getenv("GITHUB_WEBHOOK_SECRET")
+        if not secret:
+            logger.error("❌ GITHUB_WEBHOOK_SECRET n'est pas défini.")
+            exit(1)
+        logger.info(json.dumps(send(args.send, args.url, secret, args.event), ensure_ascii=False, indent=2))
+        exit(0)
+
+    try:
+        conn = psycopg2.connect(**DB_CONFIG, options='-c client_encoding=UTF8')
+    except Exception as e:
+        logger.error(f"❌ Erreur de connexion à PostgreSQL : {e}")
+        exit(1)
+
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT repo_name, branch_name, COUNT(*), SUM(cardinality(shas)), MIN(received_at)
+            FROM odoo_devlog.push_events
+            WHERE status = 'queued'
+            GROUP BY repo_name, branch_name
+            ORDER BY MIN(id);
+        """)
+        rows = cur.fetchall()
+    conn.close()
+    if not rows:
+        logger.info("✅ Aucun push en attente")
+    for repo_name, branch_name, pushes, commits, since in rows:
+        logger.info(f"📬 {repo_name}/{branch_name} : {pushes} pushs, {commits} commits (depuis {since:%Y-%m-%d %H:%M:%S})")
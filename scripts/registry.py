@@ -0,0 +1,102 @@
+"""Dépôts et branches synchronisés, avec cadence et priorité par branche.
+
+La liste vient de repositories.json à la racine du projet (ou du fichier
+désigné par SYNC_REGISTRY_FILE) :
+
+    {
+      "defaults": {"cadence": "6h", "priority": 50},
+      "branches": {
+        "16.0": {"cadence": "1d", "priority": 20},
+        "master": {"cadence": "1h", "priority": 100}
+      },
+      "repositories": {
+        "odoo/odoo": {},
+        "odoo/enterprise": {"branches": {"master": {"priority": 90}}}
+      }
+    }
+
+Un dépôt sans clé "branches" reprend les branches communes. La cadence
+(« 30m », « 2h », « 1d » ou un nombre de minutes) est l'intervalle visé
+entre deux synchronisations incrémentales par `fetch_commits.py schedule` ;
+la priorité (plus grand = plus important) pondère le partage du quota
+GitHub entre branches en retard (scripts/scheduler.py).
+"""
+import os
+import json
+from collections import namedtuple
+from pathlib import Path
+
+DEFAULT_REGISTRY_FILE = Path(__file__).resolve().parent.parent / "repositories.json"
+
+DEFAULT_CADENCE = "6h"
+DEFAULT_PRIORITY = 50
+
+CADENCE_UNITS = {"m": 1, "h": 60, "d": 1440}
+
+# Une branche du registre ; cadence en minutes
+BranchConfig = namedtuple("BranchConfig", "repo branch cadence priority")
+
+def parse_cadence(value):
+    """Cadence en minutes : 45, « 30m », « 2h » ou « 1d »"""
+    if isinstance(value, (int, float)):
+        minutes = value
+    else:
+        text = str(value).strip().lower()
+        unit = CADENCE_UNITS.get(text[-1:])
+        try:
+            minutes = float(text[:-1]) * unit if unit else float(text)
+        except ValueError:
+            raise ValueError(f"Cadence invalide : {value!r}")
+    if minutes <= 0:
+        raise ValueError(f"Cadence invalide : {value!r}")
+    return int(minutes)
+
+def load_registry(path=None):
+    """Branches du registre, dans l'ordre du fichier"""
+    # Lu à l'appel : SYNC_REGISTRY_FILE peut venir du .env chargé après l'import
+    path = path or os.getenv("SYNC_REGISTRY_FILE") or DEFAULT_REGISTRY_FILE
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+
+    defaults = config.get("defaults", {})
+    default_cadence = defaults.get("cadence", DEFAULT_CADENCE)
+    default_priority = defaults.get("priority", DEFAULT_PRIORITY)
+    common = config.get("branches", {})
+
+    entries = []
+    for repo, repo_config in config.get("repositories", {}).items():
+        branches = (repo_config or {}).get("branches", common)
+        for branch, branch_config in branches.items():
+            branch_config = branch_config or {}
+            entries.append(BranchConfig(
+                repo,
+                branch,
+                parse_cadence(branch_config.get("cadence", default_cadence)),
+                int(branch_config.get("priority", default_priority)),
+            ))
+    if not entries:
+        raise ValueError(f"Aucune branche dans {path}")
+    return entries
+
+def repositories(entries):
+    """Dépôts du registre (sans doublon, dans l'ordre)"""
+    return list(dict.fromkeys(entry.repo for entry in entries))
+
+def branch_names(entries):
+    """Noms de branches du registre (sans doublon, dans l'ordre)"""
+    return list(dict.fromkeys(entry.branch for entry in entries))
+
+def select(entries, repos=None, branches=None):
+    """Couples (dépôt, branche) à synchroniser.
+
+    Sans filtre : les branches du registre. Avec --repos et/ou --branches :
+    chaque dépôt retenu avec les branches demandées (même hors registre),
+    ou à défaut ses branches du registre.
+    """
+    if not repos and not branches:
+        return [(entry.repo, entry.branch) for entry in entries]
+    pairs = []
+    for repo in repos or repositories(entries):
+        names = branches or [entry.branch for entry in entries if entry.repo == repo]
+        pairs.extend((repo, branch) for branch in names)
+    return pairs
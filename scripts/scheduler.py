@@ -0,0 +1,162 @@
+"""Ordonnancement des synchronisations incrémentales par priorité.
+
+`fetch_commits.py schedule` relit à chaque tour le registre
+(scripts/registry.py) et l'historique de import_log :
+
+- une branche est due quand sa dernière synchronisation réussie date de
+  plus que sa cadence (retard = temps écoulé / cadence, plafonné à
+  MAX_OVERDUE ; une branche jamais synchronisée est au plafond) ;
+- son débit observé est la médiane, sur RATE_WINDOW_DAYS jours, des
+  commits importés par heure entre deux synchronisations réussies (la
+  médiane écarte un import complet isolé) ;
+- les branches dues passent par score décroissant,
+  priorité × retard × (1 + commits par heure), tant que le quota GitHub
+  restant (moins API_RESERVE) couvre leur coût estimé ; dès qu'une
+  branche ne passe pas, elle et les suivantes attendent le tour suivant.
+
+master, active et prioritaire, reste fraîche à chaque tour ; une branche
+figée ne consomme presque rien et passe quand le quota le permet. Une
+branche sans aucun commit en base n'est jamais planifiée : sa première
+synchronisation serait un import complet, hors budget, à lancer avec
+`fetch_commits.py full` ou `plan --full`.
+"""
+import os
+import math
+import statistics
+from collections import namedtuple, defaultdict
+
+# Fenêtre d'observation du débit de commits (jours)
+RATE_WINDOW_DAYS = int(os.getenv("SCHEDULER_RATE_WINDOW_DAYS", 14))
+
+# Appels API gardés en réserve (interface, imports manuels)
+API_RESERVE = int(os.getenv("SCHEDULER_API_RESERVE", 500))
+
+# Retard maximal pris en compte dans le score
+MAX_OVERDUE = 10.0
+
+# Coût fixe d'une synchronisation incrémentale (dépôt, branche, première page)
+BASE_COST = 3
+# Commits par page de la liste REST (une page = un appel)
+LIST_PAGE_SIZE = 30
+
+# Raison d'une branche écartée faute d'historique en base
+NO_COMMITS = "aucun commit en base : lancer fetch_commits.py full ou plan --full"
+
+# Décision du planificateur pour une branche ; due_in en minutes (<= 0 : due)
+Decision = namedtuple("Decision", "repo branch priority cadence due_in rate expected cost score selected reason")
+
+# ============================================================
+# HISTORIQUE (import_log)
+# ============================================================
+def observed_rates(conn, window_days=RATE_WINDOW_DAYS):
+    """Commits par heure de chaque (dépôt, branche), médiane des intervalles entre synchronisations"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT full_name, branch_name, total_commits_imported,
+                   EXTRACT(EPOCH FROM ended_at - previous_end) / 3600.0
+            FROM (
+                SELECT r.full_name, l.branch_name, l.total_commits_imported, l.ended_at,
+                       LAG(l.ended_at) OVER (PARTITION BY l.repo_id, l.branch_name ORDER BY l.ended_at) AS previous_end
+                FROM odoo_devlog.import_log l
+                JOIN odoo_devlog.repositories r ON r.id = l.repo_id
+                WHERE l.status = 'success' AND l.ended_at >= NOW() - make_interval(days => %s)
+            ) intervals
+            WHERE previous_end IS NOT NULL AND ended_at > previous_end;
+        """, (window_days,))
+        rows = cur.fetchall()
+    conn.commit()
+
+    samples = defaultdict(list)
+    for repo, branch, count, hours in rows:
+        samples[(repo, branch)].append((count or 0) / float(hours))
+    return {key: statistics.median(values) for key, values in samples.items()}
+
+def last_syncs(conn):
+    """(fin de la dernière synchronisation réussie par (dépôt, branche), heure du serveur)"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT r.full_name, l.branch_name, MAX(l.ended_at)
+            FROM odoo_devlog.import_log l
+            JOIN odoo_devlog.repositories r ON r.id = l.repo_id
+            WHERE l.status = 'success'
+            GROUP BY r.full_name, l.branch_name;
+        """)
+        last = {(repo, branch): ended_at for repo, branch, ended_at in cur.fetchall()}
+        # import_log est horodaté par le serveur : comparer à son horloge
+        cur.execute("SELECT LOCALTIMESTAMP;")
+        now = cur.fetchone()[0]
+    conn.commit()
+    return last, now
+
+def stored_branches(conn):
+    """(dépôt, branche) ayant au moins un commit en base"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT r.full_name, b.name
+            FROM odoo_devlog.branches b
+            JOIN odoo_devlog.repositories r ON r.id = b.repo_id
+            WHERE EXISTS (SELECT 1 FROM odoo_devlog.commits c WHERE c.branch_id = b.id);
+        """)
+        stored = {(repo, branch) for repo, branch in cur.fetchall()}
+    conn.commit()
+    return stored
+
+# ============================================================
+# PLANIFICATION
+# ============================================================
+def estimated_cost(expected_commits):
+    """Appels API d'une synchronisation incrémentale : pages de la liste + fichiers de chaque commit"""
+    return BASE_COST + expected_commits + math.ceil(expected_commits / LIST_PAGE_SIZE)
+
+def plan(entries, rates, last, now, budget=None, stored=None):
+    """Décisions pour les branches du registre, par score décroissant.
+
+    budget : appels API disponibles (None = pas de limite).
+    stored : (dépôt, branche) ayant des commits en base (None = toutes) ;
+    les autres sont écartées avec la raison NO_COMMITS.
+    """
+    decisions = []
+    skipped = []
+    for entry in entries:
+        key = (entry.repo, entry.branch)
+        if stored is not None and key not in stored:
+            skipped.append(Decision(
+                entry.repo, entry.branch, entry.priority, entry.cadence, 0.0, 0.0, 0, 0, 0.0, False, NO_COMMITS,
+            ))
+            continue
+        rate = rates.get(key, 0.0)
+        synced_at = last.get(key)
+        if synced_at is None:
+            elapsed = None
+            overdue = MAX_OVERDUE
+            expected = 0
+        else:
+            elapsed = (now - synced_at).total_seconds() / 60
+            overdue = min(elapsed / entry.cadence, MAX_OVERDUE)
+            expected = int(round(rate * elapsed / 60))
+        due_in = 0.0 if elapsed is None else entry.cadence - elapsed
+        decisions.append(Decision(
+            entry.repo, entry.branch, entry.priority, entry.cadence, round(due_in, 1), round(rate, 2), expected,
+            estimated_cost(expected), round(entry.priority * overdue * (1 + rate), 1), False, None,
+        ))
+
+    decisions.sort(key=lambda d: (d.due_in > 0, -d.score))
+    remaining = budget
+    for index, decision in enumerate(decisions):
+        if decision.due_in > 0:
+            decisions[index] = decision._replace(reason="pas encore due")
+        elif remaining is not None and decision.cost > remaining:
+            # Le quota restant est gardé pour elle au tour suivant : les branches
+            # de score inférieur ne passent pas devant
+            decisions[index] = decision._replace(reason="quota insuffisant")
+            remaining = 0
+        else:
+            decisions[index] = decision._replace(selected=True)
+            if remaining is not None:
+                remaining -= decision.cost
+    return decisions + skipped
+
+def next_wake(decisions):
+    """Minutes avant la prochaine branche due (0 si une branche due attend du quota)"""
+    waiting = [max(d.due_in, 0) for d in decisions if not d.selected and d.reason != NO_COMMITS]
+    return min(waiting) if waiting else None
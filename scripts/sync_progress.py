@@ -0,0 +1,155 @@
+"""Événements de progression d'une synchronisation, au format JSON lines.
+
+En plus du journal lisible, fetch_commits.py peut écrire une ligne JSON par
+événement dans un fichier (--progress-file ou SYNC_PROGRESS_FILE) :
+
+    {"event": "progress", "ts": "2024-05-02T10:15:03", "elapsed": 42.1,
+     "phase": "fetch", "mode": "full", "repo": "odoo/odoo", "branch": "17.0",
+     "branches_done": 1, "branches_total": 5, "commits": 1200, "new": 340,
+     "skipped": 860, "files": 5120, "api_calls": 412, "rate_remaining": 4210,
+     "rate_limit": 5000, "rate_reset": "2024-05-02T11:00:00",
+     "commits_per_sec": 28.5, "eta_seconds": 168.0}
+
+Événements : sync_start, branch_start, progress (au plus un toutes les
+PROGRESS_INTERVAL secondes), rate_limit (pause sur quota), branch_end,
+sync_end. Les compteurs sont cumulés sur la branche en cours ; api_calls
+est déduit du quota REST GitHub consommé. L'ETA n'est connue qu'avec une limite
+de commits par branche ou après une première branche terminée (durée
+moyenne par branche) ; sinon elle vaut null.
+"""
+import json
+import time
+from datetime import datetime
+
+# Intervalle minimal entre deux événements « progress » (s)
+PROGRESS_INTERVAL = 2.0
+
+class ProgressReporter:
+    """Écrit les événements de progression ; sans fichier, ne fait rien"""
+
+    def __init__(self, path=None, mode=None, branches_total=0, commit_limit=0):
+        self.handle = open(path, "a", encoding="utf-8") if path else None
+        self.mode = mode
+        self.branches_total = branches_total
+        self.branches_done = 0
+        self.commit_limit = commit_limit
+        self.started = time.monotonic()
+        self.branch_started = self.started
+        self.last_progress = 0.0
+        self.repo = None
+        self.branch = None
+        self.api_calls = 0
+        self.rate = (None, None, None)
+        self.counts = {}
+        self._last_remaining = None
+
+    @property
+    def enabled(self):
+        return self.handle is not None
+
+    # ------------------------------------------------------------
+    # Quota GitHub
+    # ------------------------------------------------------------
+    def observe_rate(self, g):
+        """Relit le quota dans les derniers en-têtes reçus (aucun appel API)"""
+        if not self.enabled:
+            return
+        remaining, limit = g.rate_limiting
+        if self._last_remaining is not None and remaining < self._last_remaining:
+            self.api_calls += self._last_remaining - remaining
+        self._last_remaining = remaining
+        reset = g.rate_limiting_resettime
+        self.rate = (remaining, limit, datetime.fromtimestamp(reset).isoformat() if reset else None)
+
+    # ------------------------------------------------------------
+    # Événements
+    # ------------------------------------------------------------
+    def _emit(self, event, **fields):
+        now = time.monotonic()
+        remaining, limit, reset = self.rate
+        record = {
+            "event": event,
+            "ts": datetime.now().isoformat(timespec="seconds"),
+            "elapsed": round(now - self.started, 1),
+            "mode": self.mode,
+            "repo": self.repo,
+            "branch": self.branch,
+            "branches_done": self.branches_done,
+            "branches_total": self.branches_total,
+            "api_calls": self.api_calls,
+            "rate_remaining": remaining,
+            "rate_limit": limit,
+            "rate_reset": reset,
+        }
+        record.update(fields)
+        self.handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.handle.flush()
+
+    def _eta(self, new, branch_elapsed):
+        branches_left = max(self.branches_total - self.branches_done - 1, 0)
+        if self.commit_limit and new:
+            per_commit = branch_elapsed / new
+            return round(per_commit * (max(self.commit_limit - new, 0) + branches_left * self.commit_limit), 1)
+        if self.branches_done:
+            per_branch = (self.branch_started - self.started) / self.branches_done
+            return round(max(per_branch - branch_elapsed, 0) + branches_left * per_branch, 1)
+        return None
+
+    def sync_start(self, repos, branches):
+        if self.enabled:
+            self._emit("sync_start", phase="start", repos=list(repos), branches=list(branches))
+
+    def branch_start(self, repo, branch):
+        if not self.enabled:
+            return
+        self.repo, self.branch = repo, branch
+        self.branch_started = time.monotonic()
+        self.last_progress = 0.0
+        self.counts = {}
+        self._emit("branch_start", phase="fetch")
+
+    def progress(self, writer, skipped_extra=0, force=False):
+        """Compteurs de la branche en cours (CommitWriter), au plus toutes les PROGRESS_INTERVAL s"""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if not force and now - self.last_progress < PROGRESS_INTERVAL:
+            return
+        self.last_progress = now
+        skipped = writer.skipped + skipped_extra
+        commits = writer.count + skipped
+        branch_elapsed = now - self.branch_started
+        self.counts = {
+            "commits": commits,
+            "new": writer.count,
+            "skipped": skipped,
+            "files": writer.files_count,
+            "truncated": writer.truncated,
+        }
+        self._emit(
+            "progress",
+            phase="fetch",
+            commits_per_sec=round(commits / branch_elapsed, 2) if branch_elapsed > 0 else None,
+            eta_seconds=self._eta(writer.count, branch_elapsed),
+            **self.counts
+        )
+
+    def rate_limited(self, pause):
+        if self.enabled:
+            self._emit("rate_limit", phase="rate_limit", pause_seconds=pause)
+
+    def branch_end(self, status):
+        """Fin de branche (success, failed, cancelled) avec les derniers compteurs"""
+        if not self.enabled:
+            return
+        self.branches_done += 1
+        self._emit("branch_end", phase="fetch", status=status,
+                   branch_seconds=round(time.monotonic() - self.branch_started, 1), **self.counts)
+
+    def sync_end(self, status):
+        if not self.enabled:
+            return
+        self.repo = self.branch = None
+        self._emit("sync_end", phase="done", status=status)
+        self.handle.close()
+        self.handle = None